@@ -0,0 +1,75 @@
+"""
+系統管理 API 端點
+
+提供索引漂移報告等維運功能（僅管理員可訪問）
+"""
+
+from fastapi import APIRouter, Depends, Query
+
+from app.indexes import index_registry
+from app.models.common import ResponseModel, success_response
+from app.models.user import UserInDB
+from app.utils.dependencies import require_admin
+from app.database import get_database
+from app.utils.mongo_driver import MongoDatabase
+from app.utils.logging_config import get_logger
+from app.utils.query_budget import query_budget
+
+# 創建路由器（每個請求的資料庫命令預算在 QUERY_BUDGET_MODE 開啟時檢查，含認證查詢用戶）
+router = APIRouter(
+    prefix="/admin",
+    tags=["Administration"],
+    dependencies=[Depends(query_budget(8))]
+)
+logger = get_logger(__name__)
+
+
+@router.get("/indexes", response_model=ResponseModel[dict])
+async def get_index_report(
+    refresh: bool = Query(True, description="重新比對資料庫（false 時返回上一次的報告）"),
+    current_user: UserInDB = Depends(require_admin()),
+    db: MongoDatabase = Depends(get_database)
+):
+    """
+    獲取索引漂移報告
+
+    **需要管理員權限**
+
+    比對 app/indexes.py 宣告的索引與資料庫中的實際索引：
+    - **missing**: 已宣告但不存在的索引
+    - **extra**: 存在但未宣告的索引
+    - **mismatched**: 名稱、鍵或選項（unique、sparse、partialFilterExpression、TTL）不一致的索引
+    - **retired**: 已被取代、待遷移腳本刪除的舊索引
+    - **build**: 背景建立索引的狀態
+
+    **Returns**: 漂移報告
+    """
+    logger.info(f"管理員查詢索引漂移報告: admin_id={current_user.id}, refresh={refresh}")
+
+    report = index_registry.last_report
+    if refresh or report is None:
+        report = await index_registry.check(db)
+
+    return success_response(data=report, message="Index report retrieved successfully")
+
+
+@router.post("/indexes/build", response_model=ResponseModel[dict])
+async def build_missing_indexes(
+    current_user: UserInDB = Depends(require_admin()),
+    db: MongoDatabase = Depends(get_database)
+):
+    """
+    在背景建立缺少的索引
+
+    **需要管理員權限**
+
+    不阻塞請求，也不修改已存在但定義不一致的索引；
+    進度可透過 GET /admin/indexes 的 build 欄位查詢
+
+    **Returns**: 背景建立的狀態
+    """
+    logger.info(f"管理員觸發索引建立: admin_id={current_user.id}")
+
+    index_registry.start_build(db)
+
+    return success_response(data=dict(index_registry.build_status), message="Index build started")
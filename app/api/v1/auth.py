@@ -5,7 +5,6 @@
 """
 
 from fastapi import APIRouter, Depends, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.models.user import (
     UserCreate, UserLogin, UserResponse, UserUpdate,
@@ -13,10 +12,17 @@ from app.models.user import (
 )
 from app.models.common import ResponseModel, success_response
 from app.services.user_service import UserService, get_user_service
-from app.utils.dependencies import get_current_active_user, get_current_user
-from app.utils.security import create_access_token, create_token_response
+from app.utils.dependencies import (
+    get_current_active_user,
+    get_current_active_user_profile,
+    get_current_user_profile
+)
+from app.utils.security import (
+    create_access_token, create_token_response, build_token_claims
+)
 from app.models.user import UserInDB
 from app.database import get_database
+from app.utils.mongo_driver import MongoDatabase
 from app.middleware.error_handler import (
     ValidationException,
     NotFoundException,
@@ -25,16 +31,21 @@ from app.middleware.error_handler import (
     DatabaseException
 )
 from app.utils.logging_config import get_logger
+from app.utils.query_budget import query_budget
 
-# 創建路由器
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+# 創建路由器（每個請求的資料庫命令預算在 QUERY_BUDGET_MODE 開啟時檢查）
+router = APIRouter(
+    prefix="/auth",
+    tags=["Authentication"],
+    dependencies=[Depends(query_budget(6))]
+)
 logger = get_logger(__name__)
 
 
 @router.post("/register", response_model=ResponseModel[TokenResponse], status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     用戶註冊
@@ -57,9 +68,7 @@ async def register(
     logger.info(f"用戶創建成功: user_id={user.id}, email={user.email}")
     
     # 創建 Token
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value}
-    )
+    access_token = create_access_token(data=build_token_claims(user))
     
     # 轉換為響應模型
     user_response = await user_service.user_to_response(user)
@@ -77,7 +86,7 @@ async def register(
 @router.post("/login", response_model=ResponseModel[TokenResponse])
 async def login(
     credentials: UserLogin,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     用戶登入
@@ -112,9 +121,7 @@ async def login(
         )
     
     # 創建 Token
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value}
-    )
+    access_token = create_access_token(data=build_token_claims(user))
     
     # 轉換為響應模型
     user_response = await user_service.user_to_response(user)
@@ -131,13 +138,13 @@ async def login(
 
 @router.get("/me", response_model=ResponseModel[UserResponse])
 async def get_current_user_info(
-    current_user: UserInDB = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    current_user: UserInDB = Depends(get_current_active_user_profile),
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     獲取當前用戶信息
     
-    需要 JWT Token 認證
+    需要 JWT Token 認證（無狀態認證模式下按需載入完整資料）
     
     **Returns**: 當前用戶的詳細信息
     """
@@ -156,7 +163,7 @@ async def get_current_user_info(
 async def update_current_user(
     user_update: UserUpdate,
     current_user: UserInDB = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     更新當前用戶信息
@@ -194,7 +201,7 @@ async def update_current_user(
 async def change_password(
     password_change: PasswordChange,
     current_user: UserInDB = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     修改當前用戶密碼
@@ -229,22 +236,20 @@ async def change_password(
 
 @router.post("/refresh", response_model=ResponseModel[TokenResponse])
 async def refresh_token(
-    current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    current_user: UserInDB = Depends(get_current_user_profile),
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     刷新 JWT Token
     
-    使用當前的 JWT Token 獲取新的 Token
+    使用當前的 JWT Token 獲取新的 Token，新 Token 的聲明以資料庫中的用戶為準
     
     **Returns**: 新的 JWT Token
     """
     logger.info(f"刷新 Token 請求: user_id={current_user.id}")
     
     # 創建新 Token
-    access_token = create_access_token(
-        data={"sub": current_user.email, "role": current_user.role.value}
-    )
+    access_token = create_access_token(data=build_token_claims(current_user))
     
     user_service = UserService(db)
     user_response = await user_service.user_to_response(current_user)
@@ -258,3 +263,30 @@ async def refresh_token(
         message="Token refreshed successfully"
     )
 
+
+@router.post("/logout", response_model=ResponseModel[dict])
+async def logout(
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: MongoDatabase = Depends(get_database)
+):
+    """
+    登出
+    
+    需要 JWT Token 認證
+    
+    撤銷當前用戶目前所有的 Token（所有裝置都需要重新登入）
+    
+    **Returns**: 成功消息
+    """
+    logger.info(f"登出請求: user_id={current_user.id}")
+    
+    user_service = UserService(db)
+    revoked = await user_service.revoke_tokens(current_user.id, reason="logout")
+    if not revoked:
+        raise NotFoundException(resource="User", resource_id=current_user.id)
+    
+    logger.info(f"登出成功: user_id={current_user.id}")
+    return success_response(
+        data={"logged_out": True},
+        message="Logged out successfully"
+    )
@@ -16,7 +16,7 @@ from typing import Optional
 from datetime import datetime
 import logging
 
-from app.models.common import ResponseModel, success_response, paginated_response, PaginatedData
+from app.models.common import ResponseModel, success_response, paginated_response, PaginatedData, TotalMode
 from app.models.order import (
     OrderCreate,
     OrderResponse,
@@ -35,13 +35,20 @@ from app.utils.dependencies import (
     require_vendor_or_admin,
     get_database,
 )
+from app.utils.query_budget import query_budget
+from app.utils.serialization import TrustedResponse
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/orders", tags=["Order Management"])
+# 每个请求的数据库命令预算（QUERY_BUDGET_MODE 开启时检查，含认证查询用户）
+router = APIRouter(
+    prefix="/orders",
+    tags=["Order Management"],
+    dependencies=[Depends(query_budget(10))]
+)
 
 
-@router.post("", response_model=ResponseModel[OrderResponse])
+@router.post("", response_model=ResponseModel[OrderResponse], dependencies=[Depends(query_budget(8))])
 async def create_order(
     order_data: OrderCreate,
     current_user: UserInDB = Depends(get_current_user),
@@ -105,10 +112,12 @@ async def create_order(
     )
 
 
-@router.get("", response_model=ResponseModel[PaginatedData[OrderResponse]])
+@router.get("", response_model=ResponseModel[PaginatedData[OrderResponse]], dependencies=[Depends(query_budget(4))])
 async def get_my_orders(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="分页游标（提供时忽略 page）"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="总数模式：exact / estimated / none"),
     status: Optional[OrderStatus] = Query(None, description="订单状态筛选"),
     payment_status: Optional[PaymentStatus] = Query(None, description="支付状态筛选"),
     start_date: Optional[datetime] = Query(None, description="开始日期"),
@@ -129,6 +138,8 @@ async def get_my_orders(
     **查询参数**:
     - `page`: 页码（默认 1）
     - `page_size`: 每页数量（默认 20，最大 100）
+    - `cursor`: 分页游标（来自上一页的 next_cursor）
+    - `total`: 总数模式（exact 精确，estimated 估算，none 不计算）
     - `status`: 订单状态筛选
     - `payment_status`: 支付状态筛选
     - `start_date`: 开始日期
@@ -158,31 +169,34 @@ async def get_my_orders(
         order=order
     )
 
-    orders, total = await order_service.get_user_orders(
+    orders, total, next_cursor = await order_service.get_user_orders(
         user_id=user_id,
         filter_params=filter_params,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        cursor=cursor,
+        total_mode=total_mode
     )
 
-    # 转换为字典列表
-    orders_dict = [
-        order.model_dump(mode='json') for order in orders
-    ]
-
-    return paginated_response(
-        items=orders_dict,
+    # 订单来自数据库（写入时已验证），直接序列化，不再按 response_model 验证一次
+    return TrustedResponse(paginated_response(
+        items=orders,
         total=total,
         page=page,
         per_page=page_size,
-        message=f"获取订单列表成功，共 {total} 个订单"
-    )
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        total_mode=total_mode,
+        message=f"获取订单列表成功，共 {total} 个订单" if total is not None else "获取订单列表成功"
+    ))
 
 
 @router.get("/all", response_model=ResponseModel[PaginatedData[OrderResponse]])
 async def get_all_orders(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="分页游标（提供时忽略 page）"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="总数模式：exact / estimated / none"),
     status: Optional[OrderStatus] = Query(None, description="订单状态筛选"),
     payment_status: Optional[PaymentStatus] = Query(None, description="支付状态筛选"),
     start_date: Optional[datetime] = Query(None, description="开始日期"),
@@ -219,27 +233,28 @@ async def get_all_orders(
         order=order
     )
 
-    orders, total = await order_service.get_all_orders(
+    orders, total, next_cursor = await order_service.get_all_orders(
         filter_params=filter_params,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        cursor=cursor,
+        total_mode=total_mode
     )
 
-    # 转换为字典列表
-    orders_dict = [
-        order.model_dump(mode='json') for order in orders
-    ]
-
-    return paginated_response(
-        items=orders_dict,
+    # 订单来自数据库（写入时已验证），直接序列化，不再按 response_model 验证一次
+    return TrustedResponse(paginated_response(
+        items=orders,
         total=total,
         page=page,
         per_page=page_size,
-        message=f"获取所有订单列表成功，共 {total} 个订单"
-    )
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        total_mode=total_mode,
+        message=f"获取所有订单列表成功，共 {total} 个订单" if total is not None else "获取所有订单列表成功"
+    ))
 
 
-@router.get("/{order_id}", response_model=ResponseModel[OrderResponse])
+@router.get("/{order_id}", response_model=ResponseModel[OrderResponse], dependencies=[Depends(query_budget(3))])
 async def get_order(
     order_id: str = Path(..., description="订单ID"),
     current_user: UserInDB = Depends(get_current_user),
@@ -266,13 +281,10 @@ async def get_order(
         user_role=user_role
     )
 
-    # 转换为字典
-    order_dict = order.model_dump(mode='json')
-
-    return success_response(
-        data=order_dict,
+    return TrustedResponse(success_response(
+        data=order,
         message="获取订单详情成功"
-    )
+    ))
 
 
 @router.put("/{order_id}/status", response_model=ResponseModel[OrderResponse])
@@ -439,7 +451,11 @@ async def get_order_statistics(
     )
 
 
-@router.get("/number/{order_number}", response_model=ResponseModel[OrderResponse])
+@router.get(
+    "/number/{order_number}",
+    response_model=ResponseModel[OrderResponse],
+    dependencies=[Depends(query_budget(3))]
+)
 async def get_order_by_number(
     order_number: str = Path(..., description="订单编号"),
     current_user: UserInDB = Depends(get_current_user),
@@ -466,11 +482,8 @@ async def get_order_by_number(
         user_role=user_role
     )
 
-    # 转换为字典
-    order_dict = order.model_dump(mode='json')
-
-    return success_response(
-        data=order_dict,
+    return TrustedResponse(success_response(
+        data=order,
         message="获取订单详情成功"
-    )
+    ))
 
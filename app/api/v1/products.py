@@ -5,7 +5,6 @@
 """
 
 from fastapi import APIRouter, Depends, Query, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional, List
 
 from app.models.product import (
@@ -14,6 +13,7 @@ from app.models.product import (
     ProductResponse,
     ProductListFilter,
     ProductStatus,
+    SearchMode,
     StockUpdate
 )
 from app.models.common import (
@@ -21,6 +21,7 @@ from app.models.common import (
     PaginatedResponse,
     PaginatedData,
     PaginationParams,
+    TotalMode,
     success_response,
     paginated_response
 )
@@ -31,27 +32,55 @@ from app.utils.dependencies import (
     require_vendor_or_admin
 )
 from app.database import get_database
+from app.utils.mongo_driver import MongoDatabase
 from app.middleware.error_handler import NotFoundException, ForbiddenException
 from app.utils.logging_config import get_logger
+from app.utils.query_budget import query_budget
+from app.utils.response_cache import (
+    CATEGORIES_TAG,
+    PRODUCT_LISTS_TAG,
+    category_tag,
+    product_tag,
+    tag_response
+)
+from app.utils.serialization import TrustedResponse
 
-# 创建路由器
-router = APIRouter(prefix="/products", tags=["Product Management"])
+# 创建路由器（每个请求的数据库命令预算在 QUERY_BUDGET_MODE 开启时检查，含认证查询用户）
+router = APIRouter(
+    prefix="/products",
+    tags=["Product Management"],
+    dependencies=[Depends(query_budget(8))]
+)
 logger = get_logger(__name__)
 
+# 匿名且与用户无关的只读端点，由响应缓存中间件缓存（相对于 /products，见 app/main.py）
+CACHED_PATHS = ("", "/search/query", "/category/{category}", "/categories/all")
+
+
+def _tag_product_list(products: List[ProductResponse], category: Optional[str] = None) -> None:
+    """标记列表响应涉及的商品与分类（限定分类时只受该分类的新增商品影响）"""
+    tag_response(
+        category_tag(category) if category else PRODUCT_LISTS_TAG,
+        *(product_tag(product.id) for product in products)
+    )
 
-@router.get("", response_model=ResponseModel[PaginatedData[ProductResponse]])
+
+@router.get("", response_model=ResponseModel[PaginatedData[ProductResponse]], dependencies=[Depends(query_budget(5))])
 async def list_products(
     page: int = Query(1, ge=1, description="页码（从 1 开始）"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量（最大 100）"),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页的 next_cursor，提供时忽略 page）"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="总数模式：exact / estimated / none"),
     search: Optional[str] = Query(None, description="搜索关键词"),
+    search_mode: SearchMode = Query(SearchMode.AUTO, description="搜索模式：auto / engine / text / prefix / regex"),
     category: Optional[str] = Query(None, description="商品分类"),
     min_price: Optional[float] = Query(None, ge=0, description="最低价格"),
     max_price: Optional[float] = Query(None, ge=0, description="最高价格"),
     status: Optional[ProductStatus] = Query(None, description="商品状态"),
     tags: Optional[str] = Query(None, description="标签（逗号分隔）"),
-    sort_by: str = Query("created_at", pattern="^(price|created_at|updated_at|sales_count|rating|views|name)$"),
+    sort_by: str = Query("created_at", pattern="^(price|created_at|updated_at|sales_count|rating|views|name|relevance)$"),
     order: str = Query("desc", pattern="^(asc|desc)$"),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     获取商品列表
@@ -59,6 +88,8 @@ async def list_products(
     - **所有用户都可以访问**
     - 支持分页、搜索、筛选、排序
     - 默认只显示上架中的商品
+    - 深分页请使用 cursor（响应中的 next_cursor）
+    - total=none 时不计算总数（适合无限滚动），total=estimated 返回估算总数
     """
     logger.info(f"获取商品列表请求: page={page}, page_size={page_size}, search={search}")
     
@@ -71,6 +102,7 @@ async def list_products(
     # 构建筛选参数
     filter_params = ProductListFilter(
         search=search_value,
+        search_mode=search_mode,
         category=category,
         min_price=min_price,
         max_price=max_price,
@@ -86,28 +118,28 @@ async def list_products(
     
     # 获取商品列表
     product_service = ProductService(db)
-    products, total = await product_service.get_products(filter_params, page, page_size)
-    
-    # 将 ProductResponse 对象转换为字典以确保正确序列化（包括枚举类型）
-    products_dict = [
-        p.model_dump(mode='json') if hasattr(p, 'model_dump') else p.dict()
-        for p in products
-    ]
+    products, total, next_cursor = await product_service.get_products(
+        filter_params, page, page_size, cursor, total_mode
+    )
+    _tag_product_list(products, filter_params.category)
     
-    # 返回分页响应
-    return paginated_response(
-        items=products_dict,
+    # 商品来自数据库（写入时已验证），直接序列化，不再按 response_model 验证一次
+    return TrustedResponse(paginated_response(
+        items=products,
         total=total,
         page=page,
         per_page=page_size,
-        message=f"获取商品列表成功，共 {total} 个商品"
-    )
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        total_mode=total_mode,
+        message=f"获取商品列表成功，共 {total} 个商品" if total is not None else "获取商品列表成功"
+    ))
 
 
-@router.get("/{product_id}", response_model=ResponseModel[ProductResponse])
+@router.get("/{product_id}", response_model=ResponseModel[ProductResponse], dependencies=[Depends(query_budget(3))])
 async def get_product(
     product_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     获取商品详情
@@ -124,20 +156,17 @@ async def get_product(
         logger.warning(f"商品不存在: product_id={product_id}")
         raise NotFoundException(resource="Product", resource_id=product_id)
     
-    # 将 ProductResponse 转换为字典以确保正确序列化（包括枚举类型）
-    product_dict = product.model_dump(mode='json') if hasattr(product, 'model_dump') else product.dict()
-    
-    return success_response(
-        data=product_dict,
+    return TrustedResponse(success_response(
+        data=product,
         message="获取商品详情成功"
-    )
+    ))
 
 
 @router.post("", response_model=ResponseModel[ProductResponse], status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
     current_user: UserInDB = Depends(require_vendor_or_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     创建商品
@@ -165,7 +194,7 @@ async def update_product(
     product_id: str,
     product_data: ProductUpdate,
     current_user: UserInDB = Depends(require_vendor_or_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     更新商品
@@ -214,7 +243,7 @@ async def update_product(
 async def delete_product(
     product_id: str,
     current_user: UserInDB = Depends(require_vendor_or_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     删除商品（软删除）
@@ -262,7 +291,7 @@ async def update_product_stock(
     product_id: str,
     stock_update: StockUpdate,
     current_user: UserInDB = Depends(require_vendor_or_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     更新商品库存
@@ -278,8 +307,8 @@ async def update_product_stock(
     
     product_service = ProductService(db)
     
-    # 检查商品是否存在
-    existing_product = await product_service.get_product_by_id(product_id)
+    # 检查商品是否存在（库存调整直接读库，不使用缓存）
+    existing_product = await product_service.get_product_by_id(product_id, use_cache=False)
     if not existing_product:
         logger.warning(f"商品不存在: product_id={product_id}")
         raise NotFoundException(resource="Product", resource_id=product_id)
@@ -312,46 +341,80 @@ async def update_product_stock(
     )
 
 
-@router.get("/search/query", response_model=ResponseModel[PaginatedData[ProductResponse]])
+@router.get(
+    "/search/query",
+    response_model=ResponseModel[PaginatedData[ProductResponse]],
+    dependencies=[Depends(query_budget(5))]
+)
 async def search_products(
     q: str = Query(..., min_length=1, description="搜索关键词"),
+    mode: SearchMode = Query(SearchMode.AUTO, description="搜索模式：auto / engine / text / prefix / regex"),
+    category: Optional[str] = Query(None, description="商品分类"),
+    min_price: Optional[float] = Query(None, ge=0, description="最低价格"),
+    max_price: Optional[float] = Query(None, ge=0, description="最高价格"),
+    tags: Optional[str] = Query(None, description="标签（逗号分隔）"),
+    sort_by: str = Query("relevance", pattern="^(relevance|price|created_at|updated_at|sales_count|rating|views|name)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="总数模式：exact / estimated / none"),
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     搜索商品
     
     - **所有用户都可以访问**
-    - 在商品名称、描述、标签中搜索
-    - 不区分大小写
+    - **mode=text**: 在商品名称、描述、标签中全文检索，按相关度排序
+    - **mode=prefix**: 商品名称前缀匹配（不区分大小写）
+    - **mode=regex**: 子串匹配（全表扫描，仅作兜底）
+    - **mode=engine**: 进程内倒排索引（支持中文单字与二元分词，按 BM25 排序；未就绪时改用全文检索）
+    - **mode=auto**: 搜索引擎就绪时使用 engine，否则短关键词使用前缀匹配，其余使用全文检索
+    - 可与分类、价格区间、标签筛选组合
     """
-    logger.info(f"搜索商品: query={q}, page={page}")
+    logger.info(f"搜索商品: query={q}, mode={mode}, page={page}")
     
     product_service = ProductService(db)
-    products, total = await product_service.search_products(q, page, page_size)
-    
-    # 将 ProductResponse 对象转换为字典以确保正确序列化（包括枚举类型）
-    products_dict = [
-        p.model_dump(mode='json') if hasattr(p, 'model_dump') else p.dict()
-        for p in products
-    ]
+    products, total, next_cursor = await product_service.search_products(
+        q,
+        page,
+        page_size,
+        cursor,
+        total_mode,
+        search_mode=mode,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        tags=tags.split(",") if tags else None,
+        sort_by=sort_by,
+        order=order
+    )
+    _tag_product_list(products, category)
     
-    return paginated_response(
-        items=products_dict,
+    return TrustedResponse(paginated_response(
+        items=products,
         total=total,
         page=page,
         per_page=page_size,
-        message=f"搜索到 {total} 个商品"
-    )
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        total_mode=total_mode,
+        message=f"搜索到 {total} 个商品" if total is not None else "搜索商品成功"
+    ))
 
 
-@router.get("/category/{category}", response_model=ResponseModel[PaginatedData[ProductResponse]])
+@router.get(
+    "/category/{category}",
+    response_model=ResponseModel[PaginatedData[ProductResponse]],
+    dependencies=[Depends(query_budget(5))]
+)
 async def get_products_by_category(
     category: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="总数模式：exact / estimated / none"),
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     按分类获取商品
@@ -362,26 +425,24 @@ async def get_products_by_category(
     logger.info(f"按分类获取商品: category={category}, page={page}")
     
     product_service = ProductService(db)
-    products, total = await product_service.get_products_by_category(category, page, page_size)
+    products, total, next_cursor = await product_service.get_products_by_category(category, page, page_size, cursor, total_mode)
+    _tag_product_list(products, category)
     
-    # 将 ProductResponse 对象转换为字典以确保正确序列化（包括枚举类型）
-    products_dict = [
-        p.model_dump(mode='json') if hasattr(p, 'model_dump') else p.dict()
-        for p in products
-    ]
-    
-    return paginated_response(
-        items=products_dict,
+    return TrustedResponse(paginated_response(
+        items=products,
         total=total,
         page=page,
         per_page=page_size,
-        message=f"分类 '{category}' 共有 {total} 个商品"
-    )
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        total_mode=total_mode,
+        message=f"分类 '{category}' 共有 {total} 个商品" if total is not None else f"获取分类 '{category}' 商品成功"
+    ))
 
 
-@router.get("/categories/all", response_model=ResponseModel[List[str]])
+@router.get("/categories/all", response_model=ResponseModel[List[str]], dependencies=[Depends(query_budget(2))])
 async def get_all_categories(
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     获取所有商品分类
@@ -393,6 +454,7 @@ async def get_all_categories(
     
     product_service = ProductService(db)
     categories = await product_service.get_categories()
+    tag_response(CATEGORIES_TAG)
     
     return success_response(
         data=categories,
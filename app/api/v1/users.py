@@ -5,7 +5,6 @@
 """
 
 from fastapi import APIRouter, Depends, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional
 
 from app.models.user import (
@@ -14,16 +13,22 @@ from app.models.user import (
 )
 from app.models.common import (
     ResponseModel, PaginatedResponse, PaginatedData,
-    PaginationParams, success_response, paginated_response
+    PaginationParams, TotalMode, success_response, paginated_response
 )
 from app.services.user_service import UserService
 from app.utils.dependencies import require_admin, get_current_active_user
 from app.database import get_database
+from app.utils.mongo_driver import MongoDatabase
 from app.middleware.error_handler import NotFoundException, DatabaseException
 from app.utils.logging_config import get_logger
+from app.utils.query_budget import query_budget
 
-# 創建路由器
-router = APIRouter(prefix="/users", tags=["User Management"])
+# 創建路由器（每個請求的資料庫命令預算在 QUERY_BUDGET_MODE 開啟時檢查，含認證查詢用戶）
+router = APIRouter(
+    prefix="/users",
+    tags=["User Management"],
+    dependencies=[Depends(query_budget(6))]
+)
 logger = get_logger(__name__)
 
 
@@ -31,10 +36,12 @@ logger = get_logger(__name__)
 async def list_users(
     page: int = Query(1, ge=1, description="頁碼"),
     per_page: int = Query(20, ge=1, le=100, description="每頁數量"),
+    cursor: Optional[str] = Query(None, description="分頁游標（提供時忽略 page）"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="總數模式：exact / estimated / none"),
     role: Optional[UserRole] = Query(None, description="過濾角色"),
     is_active: Optional[bool] = Query(None, description="過濾活躍狀態"),
     current_user: UserInDB = Depends(require_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     獲取用戶列表（分頁）
@@ -43,6 +50,8 @@ async def list_users(
     
     - **page**: 頁碼（從1開始）
     - **per_page**: 每頁數量（1-100）
+    - **cursor**: 分頁游標（來自上一頁的 next_cursor，可選）
+    - **total**: 總數模式（exact 精確，estimated 估算，none 不計算）
     - **role**: 過濾角色（可選）: admin, customer, vendor
     - **is_active**: 過濾活躍狀態（可選）: true/false
     
@@ -60,7 +69,9 @@ async def list_users(
     users, pagination_meta = await user_service.get_users(
         pagination=pagination,
         role=role,
-        is_active=is_active
+        is_active=is_active,
+        cursor=cursor,
+        total_mode=total_mode
     )
     
     # 轉換為響應模型
@@ -75,6 +86,9 @@ async def list_users(
         page=pagination.page,
         per_page=pagination.per_page,
         total=pagination_meta.total,
+        next_cursor=pagination_meta.next_cursor,
+        has_next=pagination_meta.has_next,
+        total_mode=total_mode,
         message="Users retrieved successfully"
     )
 
@@ -83,7 +97,7 @@ async def list_users(
 async def get_user(
     user_id: str,
     current_user: UserInDB = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     獲取特定用戶信息
@@ -126,7 +140,7 @@ async def update_user(
     user_id: str,
     user_update: UserUpdate,
     current_user: UserInDB = Depends(require_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     更新用戶信息
@@ -163,7 +177,7 @@ async def update_user(
 async def delete_user(
     user_id: str,
     current_user: UserInDB = Depends(require_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     刪除用戶（軟刪除）
@@ -215,7 +229,7 @@ async def update_user_role(
     user_id: str,
     role_update: UserRoleUpdate,
     current_user: UserInDB = Depends(require_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     更新用戶角色
@@ -262,7 +276,7 @@ async def update_user_role(
 async def activate_user(
     user_id: str,
     current_user: UserInDB = Depends(require_admin()),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: MongoDatabase = Depends(get_database)
 ):
     """
     啟用用戶
@@ -277,21 +291,8 @@ async def activate_user(
     
     user_service = UserService(db)
     
-    # 更新用戶狀態
-    from app.models.user import UserUpdate
-    user_update = UserUpdate()
-    user_update.full_name = None  # 不修改其他字段
-    
-    # 直接更新 is_active 狀態
-    from bson import ObjectId
-    obj_id = ObjectId(user_id)
-    await db.users.update_one(
-        {"_id": obj_id},
-        {"$set": {"is_active": True}}
-    )
-    
-    # 獲取更新後的用戶
-    updated_user = await user_service.get_user_by_id(user_id)
+    # 更新用戶狀態（同時使已認證用戶快取失效）
+    updated_user = await user_service.activate_user(user_id)
     if updated_user is None:
         logger.warning(f"用戶不存在: user_id={user_id}")
         raise NotFoundException(resource="User", resource_id=user_id)
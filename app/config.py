@@ -16,6 +16,63 @@ class Settings(BaseSettings):
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "ecommerce_db"
     
+    MONGODB_DRIVER: str = "motor"  # 異步驅動：motor 或 pymongo（PyMongo 原生 AsyncMongoClient）
+    
+    # MongoDB 連線池與逾時配置（對應 MongoClient 參數，None 表示使用驅動預設值）
+    MONGODB_APP_NAME: str = "ecommerce-api"  # appname，出現在伺服器日誌與 currentOp 中
+    MONGODB_MAX_POOL_SIZE: int = 100  # 每個 worker 進程的連線上限
+    MONGODB_MIN_POOL_SIZE: int = 0  # 常駐連線數，啟動時預先建立
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None  # 閒置超過此時間的連線會被關閉
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None  # 等待可用連線的上限
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 20000
+    MONGODB_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGODB_COMPRESSORS: str = ""  # 逗號分隔，例如 "zstd,snappy,zlib"；未安裝對應套件的會被略過
+    MONGODB_ZLIB_COMPRESSION_LEVEL: Optional[int] = None  # -1 ~ 9
+    MONGODB_POOL_METRICS_ENABLED: bool = True  # 註冊 PoolListener，輸出連線池指標
+
+    # 資料庫命令監控配置
+    DB_COMMAND_METRICS_ENABLED: bool = True  # 註冊 CommandListener，依路由輸出命令耗時
+    DB_SLOW_QUERY_MS: float = 100.0  # 命令耗時達到此值時記錄慢查詢日誌（含正規化的查詢形狀），0 表示關閉
+    SERVER_TIMING_ENABLED: bool = False  # 回應加上 Server-Timing 標頭（資料庫時間 / 應用時間）
+    QUERY_BUDGET_MODE: str = "off"  # 查詢預算與 N+1 偵測：off / warn / raise（開發與測試環境使用）
+    QUERY_REPEAT_THRESHOLD: int = 5  # 單一請求中同一查詢形狀超過此次數視為 N+1
+
+    # 回應編碼配置（見 app/utils/encoders.py）
+    RESPONSE_JSON_BACKEND: str = "auto"  # JSON 編碼後端：auto（已安裝 orjson 時使用）/ orjson / pydantic
+    RESPONSE_MSGPACK_ENABLED: bool = True  # Accept: application/msgpack 時返回 MessagePack（需安裝 msgpack）
+    RESPONSE_NDJSON_ENABLED: bool = True  # 分頁列表支援 Accept: application/x-ndjson
+
+    # 回應壓縮配置（見 app/utils/compression.py）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # 小於此大小（位元組）的回應不壓縮
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"  # 伺服器偏好順序；br 需安裝 brotli，zstd 需安裝 zstandard，未安裝的會被略過
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1 ~ 9
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0 ~ 11，動態回應不宜過高
+    COMPRESSION_ZSTD_LEVEL: int = 3  # 1 ~ 22
+
+    # 回應快取配置（匿名商品列表、搜尋與分類，見 app/utils/response_cache.py）
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 10.0  # 新鮮期間（Cache-Control max-age）
+    RESPONSE_CACHE_STALE_SECONDS: float = 30.0  # 過期後仍可返回舊內容並在背景更新的期間
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 含預先壓縮的版本
+
+    # 單飛請求合併（相同的並行讀取共用一次查詢，見 app/utils/single_flight.py）
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 10.0  # 共用呼叫的時限，逾時後取消並由下一個呼叫重新開始
+
+    # 索引配置（宣告見 app/indexes.py）
+    INDEX_CHECK_ON_STARTUP: bool = True  # 啟動時比對索引並記錄漂移報告
+    INDEX_BUILD_ON_STARTUP: bool = False  # 在背景建立缺少的索引（不阻塞啟動，不修改已存在的索引）
+
+    # 事務配置（僅在部署支援事務時使用）
+    TRANSACTION_MAX_ATTEMPTS: int = 5  # 含第一次在內的最大嘗試次數
+    TRANSACTION_TIMEOUT_SECONDS: float = 10.0  # 重試的總時間上限
+    TRANSACTION_BACKOFF_BASE_MS: int = 5  # 退避基準時間
+    TRANSACTION_BACKOFF_MAX_MS: int = 200  # 單次退避上限
+    STOCK_RESERVATION_STALE_SECONDS: float = 300.0  # 不支援事務時，超過此時間的庫存預留標記視為進程中斷遺留，啟動時回收
+    
     # JWT 配置
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -35,6 +92,41 @@ class Settings(BaseSettings):
     # 分頁配置
     DEFAULT_PAGE_SIZE: int = 10
     MAX_PAGE_SIZE: int = 100
+    COUNT_CACHE_TTL_SECONDS: float = 30.0  # total=estimated 時計數快取的存活時間
+    COUNT_CACHE_MAX_ENTRIES: int = 1000  # 計數快取最多保留的篩選條件數
+    
+    # 商品搜尋配置
+    PRODUCT_SEARCH_PREFIX_MAX_CHARS: int = 3  # auto 模式下，不超過此長度的關鍵詞使用名稱前綴匹配
+    PRODUCT_SEARCH_ENGINE_ENABLED: bool = False  # 啟動時建立進程內倒排索引，auto 模式優先使用
+    PRODUCT_SEARCH_ENGINE_MAX_CANDIDATES: int = 1000  # 非相關度排序時，從索引取出的候選商品上限
+    
+    # 商品快取配置
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_MAX_ENTRIES: int = 10000  # 最多快取的商品數
+    PRODUCT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 快取總大小上限（以 BSON 大小估算）
+    PRODUCT_CACHE_TTL_SECONDS: float = 60.0  # 條目存活時間（也是多進程間不一致的上限）
+    
+    # 商品瀏覽計數配置
+    VIEW_COUNTER_ENABLED: bool = True  # 關閉時每次瀏覽同步寫入資料庫
+    VIEW_COUNTER_FLUSH_INTERVAL_SECONDS: float = 5.0  # 寫回間隔
+    VIEW_COUNTER_FLUSH_THRESHOLD: int = 1000  # 待寫入瀏覽總數達到此值時立即寫回
+    
+    # 已認證用戶快取配置
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_ENTRIES: int = 10000  # 最多快取的用戶數
+    USER_CACHE_TTL_SECONDS: float = 30.0  # 條目存活時間（其他進程的變更最遲在此時間後生效）
+    
+    # 無狀態認證配置
+    AUTH_STATELESS_ENABLED: bool = False  # 開啟後 get_current_user 只依 JWT 聲明構造身份，不查詢資料庫
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = 10.0  # 撤銷清單重新載入間隔（其他進程的撤銷最遲在此時間後生效）
+    
+    # JWT 驗證快取配置（已驗證的 token 快取到其 exp 為止）
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAX_ENTRIES: int = 10000  # 最多快取的 token 數（LRU 淘汰）
+    
+    # 密碼雜湊配置（bcrypt 在執行緒池中執行，不阻塞事件迴圈）
+    PASSWORD_HASH_WORKERS: int = 4  # 執行緒數（bcrypt 執行時釋放 GIL）
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 執行中與排隊中的上限，超過時返回 503
     
     # 用戶配置
     DEFAULT_USER_ROLE: str = "customer"
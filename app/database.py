@@ -1,12 +1,16 @@
 """
 MongoDB 資料庫連線管理
 
-使用 Motor (異步 PyMongo) 連接 MongoDB
+使用 Motor 或 PyMongo 原生異步驅動連接 MongoDB（由 MONGODB_DRIVER 選擇）
 提供資料庫連線的生命週期管理
 """
 
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+import importlib.util
+from typing import Any, Dict, List
+
 from app.config import settings
+from app.utils.mongo_driver import MongoClient, MongoDatabase, close_client, create_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,13 +19,110 @@ logger = logging.getLogger(__name__)
 class Database:
     """資料庫連線管理類別"""
     
-    client: AsyncIOMotorClient = None
-    db: AsyncIOMotorDatabase = None
+    client: MongoClient = None
+    db: MongoDatabase = None
+    supports_transactions: bool = False  # 啟動時偵測並快取
 
 
 # 建立全域資料庫實例
 db = Database()
 
+# 各壓縮演算法所需的 Python 套件（zlib 為標準庫）
+_COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+    "zlib": "zlib",
+}
+
+
+def available_compressors(requested: str) -> List[str]:
+    """
+    過濾出已安裝對應套件的壓縮演算法（保留設定中的優先順序）
+    
+    Args:
+        requested: 逗號分隔的壓縮演算法，例如 "zstd,snappy,zlib"
+        
+    Returns:
+        List[str]: 可用的壓縮演算法
+    """
+    compressors = []
+    for name in (item.strip().lower() for item in requested.split(",")):
+        if not name:
+            continue
+        module = _COMPRESSOR_MODULES.get(name)
+        if module is None:
+            logger.warning(f"不支援的壓縮演算法，已略過: {name}")
+        elif importlib.util.find_spec(module) is None:
+            logger.warning(f"未安裝 {module}，已略過壓縮演算法: {name}")
+        else:
+            compressors.append(name)
+    return compressors
+
+
+def build_client_options() -> Dict[str, Any]:
+    """
+    依設定構造 MongoClient 參數
+    
+    只傳入有設定值的參數，其餘沿用驅動預設值（或連線字串中的設定）
+    
+    Returns:
+        Dict[str, Any]: MongoClient 關鍵字參數
+    """
+    options: Dict[str, Any] = {
+        "appname": settings.MONGODB_APP_NAME,
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+    }
+    optional = {
+        "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+        "zlibCompressionLevel": settings.MONGODB_ZLIB_COMPRESSION_LEVEL,
+    }
+    options.update({key: value for key, value in optional.items() if value is not None})
+    
+    compressors = available_compressors(settings.MONGODB_COMPRESSORS)
+    if compressors:
+        options["compressors"] = compressors
+    
+    event_listeners = []
+    if settings.MONGODB_POOL_METRICS_ENABLED:
+        from app.utils.mongo_listeners import pool_metrics_listener
+        event_listeners.append(pool_metrics_listener)
+    if settings.DB_COMMAND_METRICS_ENABLED:
+        from app.utils.mongo_listeners import command_metrics_listener
+        event_listeners.append(command_metrics_listener)
+    if event_listeners:
+        options["event_listeners"] = event_listeners
+    
+    return options
+
+
+async def prewarm_pool(client: MongoClient, connections: int) -> None:
+    """
+    預先建立連線
+    
+    同時發出多個 ping，讓連線池在接收流量前就建立好 minPoolSize 條連線，
+    避免第一批請求承擔建立連線（TCP + TLS + 認證）的延遲
+    
+    Args:
+        client: MongoDB 客戶端
+        connections: 要建立的連線數
+    """
+    if connections <= 0:
+        return
+    results = await asyncio.gather(
+        *(client.admin.command("ping") for _ in range(connections)),
+        return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logger.warning(f"連線池預熱時有 {len(failures)} 個 ping 失敗: {failures[0]}")
+    else:
+        logger.debug(f"  ✓ 連線池已預熱 {connections} 條連線")
+
 
 async def connect_to_mongo():
     """
@@ -31,10 +132,16 @@ async def connect_to_mongo():
     """
     try:
         logger.info(f"正在連接 MongoDB: {settings.MONGODB_URL}")
-        logger.debug("步驟 1/4: 建立 AsyncIOMotorClient 實例...")
+        logger.debug(f"步驟 1/4: 建立客戶端實例（驅動: {settings.MONGODB_DRIVER}）...")
         
-        db.client = AsyncIOMotorClient(settings.MONGODB_URL)
+        client_options = build_client_options()
+        db.client = create_client(settings.MONGODB_DRIVER, settings.MONGODB_URL, **client_options)
         logger.debug(f"  ✓ 客戶端建立完成: {type(db.client)}")
+        logger.debug(
+            f"  ✓ 連線池: maxPoolSize={client_options['maxPoolSize']}, "
+            f"minPoolSize={client_options['minPoolSize']}, "
+            f"compressors={client_options.get('compressors', [])}"
+        )
         
         logger.debug(f"步驟 2/4: 選擇資料庫 '{settings.MONGODB_DB_NAME}'...")
         db.db = db.client[settings.MONGODB_DB_NAME]
@@ -47,7 +154,12 @@ async def connect_to_mongo():
         logger.debug("步驟 4/4: 獲取伺服器資訊...")
         server_info = await db.client.server_info()
         logger.debug(f"  ✓ MongoDB 版本: {server_info.get('version', 'unknown')}")
-        logger.debug(f"  ✓ 伺服器位址: {db.client.address}")
+        logger.debug(f"  ✓ 伺服器位址: {list(db.client.topology_description.server_descriptions())}")
+        
+        await prewarm_pool(db.client, settings.MONGODB_MIN_POOL_SIZE)
+        
+        db.supports_transactions = await detect_transaction_support(db.client)
+        logger.info(f"事務支援: {'是' if db.supports_transactions else '否（使用非事務模式）'}")
         
         logger.info(f"✅ 成功連接到 MongoDB 資料庫: {settings.MONGODB_DB_NAME}")
         
@@ -58,6 +170,30 @@ async def connect_to_mongo():
         raise
 
 
+async def detect_transaction_support(client: MongoClient) -> bool:
+    """
+    偵測部署是否支援多文件事務
+    
+    複製集與分片叢集（mongos）支援事務，單機 mongod 不支援
+    
+    Args:
+        client: MongoDB 客戶端
+        
+    Returns:
+        bool: 是否支援事務
+    """
+    try:
+        hello = await client.admin.command("hello")
+    except Exception as e:
+        logger.warning(f"無法偵測事務支援，視為不支援: {e}")
+        return False
+    
+    if "logicalSessionTimeoutMinutes" not in hello:
+        return False
+    
+    return bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+
+
 async def close_mongo_connection():
     """
     關閉 MongoDB 連線
@@ -67,9 +203,8 @@ async def close_mongo_connection():
     try:
         logger.debug("檢查是否有活動的資料庫連線...")
         if db.client:
-            logger.debug(f"找到活動連線: {db.client.address}")
             logger.debug("正在關閉客戶端連線...")
-            db.client.close()
+            await close_client(db.client)
             logger.debug("✓ 客戶端連線已關閉")
             logger.info("MongoDB 連線已關閉")
         else:
@@ -79,14 +214,14 @@ async def close_mongo_connection():
         logger.debug(f"錯誤詳情: {e}", exc_info=True)
 
 
-def get_database() -> AsyncIOMotorDatabase:
+def get_database() -> MongoDatabase:
     """
     獲取資料庫實例
     
     用於依賴注入
     
     Returns:
-        AsyncIOMotorDatabase: MongoDB 資料庫實例
+        MongoDatabase: MongoDB 資料庫實例
     """
     return db.db
 
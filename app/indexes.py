@@ -0,0 +1,502 @@
+"""
+MongoDB 索引註冊表
+
+各集合需要的索引集中在此宣告（index_registry），應用程式啟動時：
+- 比對資料庫中的實際索引，記錄缺少、多餘與定義不一致的索引（漂移報告）
+- 啟用 INDEX_BUILD_ON_STARTUP 時在背景建立缺少的索引，不阻塞啟動
+- 漂移報告可透過 GET /api/v1/admin/indexes 查詢
+
+scripts/create_*_indexes.py 也使用這裡的宣告，新增索引時只需修改此檔案。
+
+熱點複合索引使用 partialFilterExpression {is_deleted: false}（LIVE_ONLY），
+軟刪除的文件不佔用索引空間；查詢條件必須包含 is_deleted: False 才能使用這些索引。
+取代舊索引時以 replaces 宣告舊名稱，由 scripts/migrate_partial_indexes.py
+先建立新索引再刪除舊索引（過程中查詢一直有索引可用）。
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, TEXT
+
+from app.utils.metrics import metrics
+from app.utils.mongo_driver import list_indexes
+
+logger = logging.getLogger(__name__)
+
+# 比對時視為索引定義一部分的選項（未宣告時的預設值）
+_COMPARED_OPTIONS = {
+    "unique": False,
+    "sparse": False,
+    "partialFilterExpression": None,
+    "expireAfterSeconds": None,
+}
+
+KeySpec = Union[str, Sequence[Tuple[str, Any]]]
+
+# 只索引未刪除的文件（服務層查詢一律帶有 is_deleted: False）
+LIVE_ONLY = {"is_deleted": False}
+
+
+class IndexSpec:
+    """
+    索引宣告
+
+    Attributes:
+        name: 索引名稱（比對實際索引的主要依據）
+        keys: 索引鍵，例如 [("user_id", 1), ("created_at", -1)]
+        options: create_index 選項（unique、sparse、partialFilterExpression 等）
+        description: 說明（用於報告與腳本輸出）
+        replaces: 此索引取代的舊索引名稱（遷移完成後刪除）
+
+    Examples:
+        >>> IndexSpec("email_unique", "email", unique=True, description="登入時依 email 查詢用戶")
+        >>> IndexSpec(
+        ...     "status_created_live_idx",
+        ...     [("status", 1), ("created_at", -1)],
+        ...     partialFilterExpression=LIVE_ONLY,
+        ...     replaces=("status_created_compound",),
+        ... )
+    """
+
+    def __init__(
+        self,
+        name: str,
+        keys: KeySpec,
+        description: str = "",
+        replaces: Sequence[str] = (),
+        **options: Any
+    ):
+        self.name = name
+        self.keys: List[Tuple[str, Any]] = [(keys, ASCENDING)] if isinstance(keys, str) else list(keys)
+        self.options = options
+        self.description = description
+        self.replaces = tuple(replaces)
+
+    @property
+    def is_text(self) -> bool:
+        """是否為文字索引"""
+        return any(direction == TEXT for _, direction in self.keys)
+
+    def to_model(self) -> IndexModel:
+        """轉換為 pymongo 的 IndexModel"""
+        return IndexModel(self.keys, name=self.name, **self.options)
+
+    def key_signature(self) -> Tuple:
+        """
+        用於比對的索引鍵
+
+        文字索引在資料庫中儲存為 {_fts: "text", _ftsx: 1} 與 weights，
+        因此以文字欄位集合比對
+        """
+        if self.is_text:
+            return ("text", tuple(sorted(field for field, direction in self.keys if direction == TEXT)))
+        return tuple((field, _normalize_direction(direction)) for field, direction in self.keys)
+
+    def differences(self, info: Dict[str, Any]) -> List[str]:
+        """
+        比對資料庫中的索引定義
+
+        Args:
+            info: list_indexes 返回的索引文件
+
+        Returns:
+            List[str]: 不一致之處（一致時為空）
+        """
+        diffs = []
+        if self.key_signature() != _existing_key_signature(info):
+            diffs.append(f"key: expected {dict(self.keys)}, found {dict(info.get('key', {}))}")
+        for option, default in _COMPARED_OPTIONS.items():
+            expected = self.options.get(option, default)
+            found = info.get(option, default)
+            if _normalize_option(expected) != _normalize_option(found):
+                diffs.append(f"{option}: expected {expected}, found {found}")
+        return diffs
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為可序列化的字典"""
+        return {
+            "name": self.name,
+            "keys": [[field, direction] for field, direction in self.keys],
+            "options": self.options,
+            "description": self.description,
+            "replaces": list(self.replaces),
+        }
+
+
+def _normalize_direction(direction: Any) -> Any:
+    """1 與 1.0 視為相同方向"""
+    if isinstance(direction, (int, float)) and not isinstance(direction, bool):
+        return int(direction)
+    return direction
+
+
+def _normalize_option(value: Any) -> Any:
+    """選項比對時忽略數值型別差異（例如 expireAfterSeconds 0 與 0.0）"""
+    if isinstance(value, dict):
+        return {key: _normalize_option(item) for key, item in value.items()}
+    return _normalize_direction(value)
+
+
+def _existing_key_signature(info: Dict[str, Any]) -> Tuple:
+    """資料庫中索引的比對鍵（與 IndexSpec.key_signature 對應）"""
+    key = info.get("key", {})
+    if "_fts" in key:
+        return ("text", tuple(sorted(info.get("weights", {}))))
+    return tuple((field, _normalize_direction(direction)) for field, direction in key.items())
+
+
+class IndexRegistry:
+    """
+    索引註冊表
+
+    依集合保存索引宣告，提供漂移檢查與建立缺少索引的功能
+
+    Examples:
+        >>> registry = IndexRegistry()
+        >>> registry.declare("users", IndexSpec("email_unique", "email", unique=True))
+        >>> report = await registry.check(db)
+        >>> registry.start_build(db)
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, Dict[str, IndexSpec]] = {}
+        self._retired: Dict[str, List[str]] = {}
+        self._build_task: Optional[asyncio.Task] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.build_status: Dict[str, Any] = {"state": "idle"}
+
+    def declare(self, collection: str, *specs: IndexSpec) -> None:
+        """宣告集合的索引"""
+        declared = self._specs.setdefault(collection, {})
+        for spec in specs:
+            declared[spec.name] = spec
+
+    def retire(self, collection: str, *names: str) -> None:
+        """宣告不再需要、沒有替代索引的舊索引（遷移時刪除）"""
+        self._retired.setdefault(collection, []).extend(names)
+
+    def retired(self, collection: str) -> List[str]:
+        """
+        集合中待刪除的舊索引：被 replaces 取代的與以 retire 宣告的
+
+        Returns:
+            List[str]: 索引名稱
+        """
+        names = list(self._retired.get(collection, []))
+        for spec in self.specs(collection):
+            names.extend(name for name in spec.replaces if name not in names)
+        return names
+
+    def collections(self) -> List[str]:
+        """已宣告索引的集合"""
+        return list(self._specs)
+
+    def specs(self, collection: str) -> List[IndexSpec]:
+        """集合的索引宣告"""
+        return list(self._specs.get(collection, {}).values())
+
+    async def diff_collection(self, collection) -> Dict[str, Any]:
+        """
+        比對單一集合的索引
+
+        先依名稱比對；名稱不同但鍵與選項相同的索引視為不一致（改名），
+        避免誤報為缺少後重複建立。待遷移刪除的舊索引列於 retired，不參與改名比對
+
+        Args:
+            collection: 集合
+
+        Returns:
+            Dict: missing / extra / mismatched / retired / ok
+        """
+        declared = self._specs.get(collection.name, {})
+        existing = {
+            info["name"]: info
+            for info in await list_indexes(collection)
+            if info["name"] != "_id_"
+        }
+
+        missing, mismatched, ok = [], [], []
+        retired_names = self.retired(collection.name)
+        retired = sorted(name for name in existing if name in retired_names)
+        unmatched = {name: info for name, info in existing.items() if name not in retired_names}
+        for name, spec in declared.items():
+            info = unmatched.pop(name, None)
+            if info is None:
+                renamed = next(
+                    (other for other, other_info in unmatched.items() if not spec.differences(other_info)),
+                    None
+                )
+                if renamed is None:
+                    missing.append(name)
+                else:
+                    unmatched.pop(renamed)
+                    mismatched.append({"name": name, "differences": [f"name: expected {name}, found {renamed}"]})
+                continue
+            differences = spec.differences(info)
+            if differences:
+                mismatched.append({"name": name, "differences": differences})
+            else:
+                ok.append(name)
+
+        return {
+            "missing": missing,
+            "extra": sorted(unmatched),
+            "retired": retired,
+            "mismatched": mismatched,
+            "ok": ok,
+        }
+
+    async def check(self, db) -> Dict[str, Any]:
+        """
+        產生所有已宣告集合的漂移報告
+
+        Args:
+            db: 資料庫
+
+        Returns:
+            Dict: {"checked_at", "collections": {集合: 比對結果}, "summary", "build"}
+        """
+        collections = {}
+        for name in self._specs:
+            collections[name] = await self.diff_collection(db[name])
+
+        summary = {
+            kind: sum(len(result[kind]) for result in collections.values())
+            for kind in ("missing", "extra", "mismatched", "retired")
+        }
+        report = {
+            "checked_at": datetime.utcnow().isoformat(),
+            "collections": collections,
+            "summary": summary,
+            "build": dict(self.build_status),
+        }
+        self.last_report = report
+        return report
+
+    async def ensure(self, collection, include_replacements: bool = False) -> List[str]:
+        """
+        建立單一集合缺少的索引
+
+        取代舊索引的新索引預設略過（舊索引仍存在時，部分伺服器版本不允許相同鍵的第二個索引），
+        交由 scripts/migrate_partial_indexes.py 處理
+
+        Args:
+            collection: 集合
+            include_replacements: 是否也建立舊索引仍存在的取代索引
+
+        Returns:
+            List[str]: 建立的索引名稱
+        """
+        result = await self.diff_collection(collection)
+        specs = [
+            spec for spec in (self._specs[collection.name][name] for name in result["missing"])
+            if include_replacements or not set(spec.replaces) & set(result["retired"])
+        ]
+        if not specs:
+            return []
+        created = await collection.create_indexes([spec.to_model() for spec in specs])
+        metrics.incr("mongo.indexes.created", value=len(created), collection=collection.name)
+        return list(created)
+
+    async def build_missing(self, db, collections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        建立缺少的索引（已存在但定義不一致的索引不會自動修改）
+
+        單一集合失敗（例如 users.email 有重複資料導致唯一索引建立失敗）不影響其他集合
+
+        Args:
+            db: 資料庫
+            collections: 要處理的集合（預設為全部）
+
+        Returns:
+            Dict: {"created": {集合: [索引]}, "errors": {集合: 錯誤訊息}}
+        """
+        created: Dict[str, List[str]] = {}
+        errors: Dict[str, str] = {}
+        for name in collections or self._specs:
+            try:
+                names = await self.ensure(db[name])
+            except Exception as e:
+                metrics.incr("mongo.indexes.build_errors", collection=name)
+                logger.error(f"建立 {name} 的索引失敗: {e}")
+                errors[name] = str(e)
+                continue
+            if names:
+                logger.info(f"已建立 {name} 的索引: {', '.join(names)}")
+                created[name] = names
+        return {"created": created, "errors": errors}
+
+    def start_build(self, db) -> None:
+        """在背景建立缺少的索引（不阻塞啟動）"""
+        if self._build_task is not None and not self._build_task.done():
+            return
+        self._build_task = asyncio.create_task(self._run_build(db))
+
+    async def _run_build(self, db) -> None:
+        """背景建立索引並更新漂移報告"""
+        self.build_status = {"state": "running", "started_at": datetime.utcnow().isoformat()}
+        try:
+            result = await self.build_missing(db)
+            self.build_status = {
+                "state": "failed" if result["errors"] else "done",
+                "finished_at": datetime.utcnow().isoformat(),
+                **result,
+            }
+            await self.check(db)
+        except Exception as e:
+            logger.error(f"背景建立索引失敗: {e}")
+            self.build_status = {"state": "failed", "error": str(e)}
+
+    async def stop(self) -> None:
+        """停止等待背景建立（伺服器端已開始的建立會繼續完成）"""
+        if self._build_task is not None:
+            self._build_task.cancel()
+            try:
+                await self._build_task
+            except asyncio.CancelledError:
+                pass
+            self._build_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """漂移摘要（供 /metrics 使用）"""
+        return {
+            "declared": sum(len(specs) for specs in self._specs.values()),
+            "drift": self.last_report["summary"] if self.last_report else None,
+            "build": self.build_status.get("state"),
+        }
+
+
+def log_drift_report(report: Dict[str, Any]) -> None:
+    """將漂移報告寫入日誌（缺少或不一致的索引以警告記錄）"""
+    for name, result in report["collections"].items():
+        for index in result["missing"]:
+            logger.warning(f"缺少索引: {name}.{index}")
+        for item in result["mismatched"]:
+            logger.warning(f"索引定義不一致: {name}.{item['name']} - {'; '.join(item['differences'])}")
+        for index in result["extra"]:
+            logger.info(f"未宣告的索引: {name}.{index}")
+        for index in result["retired"]:
+            logger.warning(f"待刪除的舊索引: {name}.{index}（執行 scripts/migrate_partial_indexes.py）")
+    summary = report["summary"]
+    logger.info(
+        f"索引檢查完成: 缺少 {summary['missing']}、多餘 {summary['extra']}、"
+        f"不一致 {summary['mismatched']}、待刪除 {summary['retired']}"
+    )
+
+
+# ============= 索引宣告 =============
+
+index_registry = IndexRegistry()
+
+index_registry.declare(
+    "users",
+    IndexSpec("email_unique", "email", unique=True, description="Email 唯一索引（登入與註冊時依 email 查詢）"),
+)
+
+index_registry.declare(
+    "products",
+    IndexSpec("name_1", "name", description="商品名稱"),
+    IndexSpec("category_1", "category", description="商品分類"),
+    IndexSpec("status_1", "status", description="商品狀態"),
+    IndexSpec("tags_1", "tags", description="標籤（陣列欄位）"),
+    IndexSpec("price_1", "price", description="價格（排序與範圍查詢）"),
+    IndexSpec("created_at_1", "created_at", description="建立時間（排序）"),
+    IndexSpec("updated_at_1", "updated_at", description="更新時間（排序）"),
+    IndexSpec("sales_count_1", "sales_count", description="銷售數量（排行榜）"),
+    IndexSpec("views_1", "views", description="瀏覽次數（熱門商品）"),
+    IndexSpec("rating_1", "rating", description="評分（排序）"),
+    IndexSpec(
+        "text_search_index",
+        [("name", TEXT), ("description", TEXT), ("tags", TEXT)],
+        default_language="none",
+        description="全文搜尋（不使用特定語言的分詞）",
+    ),
+    IndexSpec(
+        "category_status_price_live_idx",
+        [("category", ASCENDING), ("status", ASCENDING), ("price", ASCENDING)],
+        partialFilterExpression=LIVE_ONLY,
+        replaces=("category_status_price_idx",),
+        description="分類 + 狀態 + 價格（常用組合查詢，僅未刪除商品）",
+    ),
+    IndexSpec(
+        "status_live_idx",
+        "status",
+        partialFilterExpression=LIVE_ONLY,
+        replaces=("deleted_status_idx",),
+        description="狀態（有效商品查詢，僅未刪除商品）",
+    ),
+    IndexSpec(
+        "slug_live_unique_idx",
+        "slug",
+        unique=True,
+        # slug 為可選欄位：partialFilterExpression 不能與 sparse 併用，以 $type 排除缺少與 null 的文件
+        partialFilterExpression={"is_deleted": False, "slug": {"$type": "string"}},
+        replaces=("slug_unique_idx",),
+        description="URL slug 唯一索引（僅未刪除商品，軟刪除後 slug 可重新使用）",
+    ),
+    IndexSpec("created_by_1", "created_by", description="建立者"),
+    IndexSpec(
+        "created_at_id_keyset_idx",
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+        description="游標分頁（_id 作為決勝欄位）",
+    ),
+    IndexSpec(
+        "name_normalized_idx",
+        "name_normalized",
+        description="正規化名稱（前綴搜尋，需先執行 backfill_product_search_fields.py）",
+    ),
+)
+
+index_registry.declare(
+    "orders",
+    IndexSpec("order_number_unique", "order_number", unique=True, description="訂單編號唯一索引"),
+    IndexSpec("user_id_index", "user_id", description="用戶 ID（查詢用戶的所有訂單）"),
+    IndexSpec("status_index", "status", description="訂單狀態"),
+    IndexSpec("payment_status_index", "payment_status", description="支付狀態"),
+    IndexSpec("created_at_index", [("created_at", DESCENDING)], description="建立時間（最新訂單優先）"),
+    IndexSpec("updated_at_index", [("updated_at", DESCENDING)], description="更新時間"),
+    IndexSpec("paid_at_index", [("paid_at", DESCENDING)], sparse=True, description="支付時間（稀疏）"),
+    IndexSpec(
+        "user_created_live_idx",
+        [("user_id", ASCENDING), ("created_at", DESCENDING)],
+        partialFilterExpression=LIVE_ONLY,
+        replaces=("user_created_compound",),
+        description="用戶 ID + 建立時間（用戶訂單列表，僅未刪除訂單）",
+    ),
+    IndexSpec(
+        "status_created_live_idx",
+        [("status", ASCENDING), ("created_at", DESCENDING)],
+        partialFilterExpression=LIVE_ONLY,
+        replaces=("status_created_compound",),
+        description="狀態 + 建立時間（依狀態篩選，僅未刪除訂單）",
+    ),
+    IndexSpec(
+        "user_status_compound",
+        [("user_id", ASCENDING), ("status", ASCENDING)],
+        description="用戶 ID + 狀態（用戶特定狀態的訂單）",
+    ),
+    IndexSpec("total_amount_index", [("total_amount", DESCENDING)], description="訂單金額（排序與篩選）"),
+    IndexSpec(
+        "user_created_id_keyset",
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        description="用戶訂單游標分頁（created_at 相同時以 _id 決勝）",
+    ),
+    IndexSpec(
+        "created_id_keyset",
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+        description="管理員訂單游標分頁",
+    ),
+)
+
+# is_deleted 為布林值，稀疏索引仍包含所有文件，且查詢計畫器很少選用
+index_registry.retire("orders", "is_deleted_index")
+
+index_registry.declare(
+    "token_revocations",
+    IndexSpec("expires_at_ttl", "expires_at", expireAfterSeconds=0, description="撤銷紀錄於 token 過期後自動刪除"),
+)
+
+metrics.register_collector("indexes", index_registry.stats)
@@ -4,13 +4,15 @@ FastAPI 應用程式主入口
 電商訂單管理系統 API
 """
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import connect_to_mongo, close_mongo_connection
 from app.config import settings
 from app.utils.logging_config import setup_logging, get_logger
 from app.middleware.error_handler import register_exception_handlers
 from app.models.common import ResponseModel, success_response
+from app.utils.encoders import EncodedResponse
+from app.utils.dependencies import require_admin
 
 # 設定日誌系統
 setup_logging(
@@ -38,7 +40,9 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    # 依 Accept 標頭協商 JSON / MessagePack / NDJSON（見 app/utils/encoders.py）
+    default_response_class=EncodedResponse
 )
 logger.debug(f"✅ FastAPI 應用實例建立完成: {app.title} v{app.version}")
 
@@ -46,6 +50,19 @@ logger.debug(f"✅ FastAPI 應用實例建立完成: {app.title} v{app.version}"
 logger.debug("正在註冊異常處理器...")
 register_exception_handlers(app)
 
+# 回應快取中介軟體（最內層：快取的是路由輸出，CORS 與壓縮仍逐請求處理）
+if settings.RESPONSE_CACHE_ENABLED:
+    from app.api.v1.products import CACHED_PATHS
+    from app.middleware.response_cache import ResponseCacheMiddleware
+
+    cached_routes = [f"{settings.API_V1_PREFIX}/products{path}" for path in CACHED_PATHS]
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        routes=cached_routes,
+        compress_min_size=settings.COMPRESSION_MIN_SIZE if settings.COMPRESSION_ENABLED else None
+    )
+    logger.debug(f"✅ 回應快取中介軟體設定完成（路由: {cached_routes}）")
+
 # CORS 中介軟體設定
 logger.debug("正在設定 CORS 中介軟體...")
 allowed_origins = settings.allowed_origins_list if not settings.DEBUG else ["*"]
@@ -59,14 +76,28 @@ app.add_middleware(
 )
 logger.debug("✅ CORS 中介軟體設定完成")
 
+# 回應壓縮中介軟體（依 Accept-Encoding 選擇 zstd / br / gzip）
+if settings.COMPRESSION_ENABLED:
+    from app.middleware.compression import CompressionMiddleware
+
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+    logger.debug(f"✅ 回應壓縮中介軟體設定完成（最小大小: {settings.COMPRESSION_MIN_SIZE} bytes）")
+
+# 請求指標中介軟體（依路由歸屬資料庫命令，可選 Server-Timing 標頭）
+from app.middleware.request_metrics import RequestMetricsMiddleware
+
+app.add_middleware(RequestMetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+logger.debug(f"✅ 請求指標中介軟體設定完成（Server-Timing: {settings.SERVER_TIMING_ENABLED}）")
+
 # 註冊 API 路由
 logger.debug("正在註冊 API 路由...")
-from app.api.v1 import auth, users, products, orders
+from app.api.v1 import auth, users, products, orders, admin
 
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX, tags=["Authentication"])
 app.include_router(users.router, prefix=settings.API_V1_PREFIX, tags=["User Management"])
 app.include_router(products.router, prefix=settings.API_V1_PREFIX, tags=["Product Management"])
 app.include_router(orders.router, prefix=settings.API_V1_PREFIX, tags=["Order Management"])
+app.include_router(admin.router, prefix=settings.API_V1_PREFIX, tags=["Administration"])
 logger.debug("✅ API 路由註冊完成")
 
 
@@ -76,6 +107,11 @@ async def startup_event():
     應用程式啟動事件
     
     - 連接 MongoDB 資料庫
+    - 建立商品搜尋索引（啟用 PRODUCT_SEARCH_ENGINE_ENABLED 時）
+    - 啟動瀏覽計數器的背景寫回任務
+    - 載入 token 撤銷清單（啟用 AUTH_STATELESS_ENABLED 時）
+    - 回收非事務下單中斷遺留的庫存預留標記（部署不支援事務時）
+    - 檢查索引漂移，並可在背景建立缺少的索引
     - 初始化其他資源
     """
     logger.info("=" * 80)
@@ -91,6 +127,41 @@ async def startup_event():
         logger.debug(f"  ✓ 資料庫客戶端: {db.client}")
         logger.debug(f"  ✓ 資料庫實例: {db.db.name}")
     
+    if settings.PRODUCT_SEARCH_ENGINE_ENABLED and db.db is not None:
+        logger.debug("建立商品搜尋索引...")
+        from app.services.search_engine import product_search_engine
+        from app.utils.metrics import metrics
+        await product_search_engine.build(db.db.products)
+        metrics.register_collector("search_engine", product_search_engine.stats)
+    
+    if settings.VIEW_COUNTER_ENABLED and db.db is not None:
+        from app.services.view_counter import view_counter
+        view_counter.start(db.db.products)
+    
+    if settings.AUTH_STATELESS_ENABLED and db.db is not None:
+        from app.utils.token_revocation import token_revocations
+        from app.utils.metrics import metrics
+        await token_revocations.start(db.db.token_revocations)
+        metrics.register_collector("token_revocations", token_revocations.stats)
+    
+    if db.db is not None and not db.supports_transactions:
+        from app.services.order_service import OrderService
+        try:
+            await OrderService(db.db).release_stale_reservations(settings.STOCK_RESERVATION_STALE_SECONDS)
+        except Exception as e:
+            logger.error(f"回收庫存預留標記失敗: {e}")
+    
+    if settings.INDEX_CHECK_ON_STARTUP and db.db is not None:
+        from app.indexes import index_registry, log_drift_report
+        try:
+            log_drift_report(await index_registry.check(db.db))
+        except Exception as e:
+            logger.error(f"索引檢查失敗: {e}")
+    
+    if settings.INDEX_BUILD_ON_STARTUP and db.db is not None:
+        from app.indexes import index_registry
+        index_registry.start_build(db.db)
+    
     logger.debug("步驟 3/3: 初始化完成")
     logger.info("✅ 應用程式啟動完成")
     logger.info("=" * 80)
@@ -101,12 +172,27 @@ async def shutdown_event():
     """
     應用程式關閉事件
     
+    - 寫回尚未寫入的瀏覽次數
     - 關閉 MongoDB 連線
     - 清理資源
     """
     logger.info("=" * 80)
     logger.info("⏹ 應用程式關閉事件觸發")
     logger.info("=" * 80)
+    # 寫回尚未寫入的瀏覽次數（必須在關閉連線之前）
+    from app.services.view_counter import view_counter
+    logger.debug("正在寫回瀏覽計數...")
+    await view_counter.stop()
+    
+    from app.utils.token_revocation import token_revocations
+    await token_revocations.stop()
+    
+    from app.indexes import index_registry
+    await index_registry.stop()
+    
+    from app.utils.security import shutdown_password_executor
+    shutdown_password_executor()
+    
     logger.debug("正在關閉 MongoDB 連線...")
     
     await close_mongo_connection()
@@ -133,7 +219,8 @@ async def root():
         "docs": "/docs",
         "redoc": "/redoc",
         "health": "/health",
-        "db_info": "/db-info"
+        "db_info": "/db-info",
+        "metrics": "/metrics"
     }
     
     logger.debug(f"返回根路由回應: {data['message']}")
@@ -229,6 +316,25 @@ async def database_info():
             details={"error": str(e)}
         )
 
+@app.get("/metrics", tags=["Health"], response_model=ResponseModel, dependencies=[Depends(require_admin())])
+async def get_metrics():
+    """
+    應用程式指標端點
+    
+    **需要管理員權限**（內容包含慢查詢形狀、快取與撤銷清單狀態、密碼雜湊佇列深度等內部資訊）
+    
+    輸出進程內的計數器、直方圖以及各元件回報的即時狀態
+    （例如事務提交、重試、中止次數）
+    
+    Returns:
+        ResponseModel: 指標快照
+    """
+    from app.utils.metrics import metrics
+    
+    logger.debug("收到指標請求 GET /metrics")
+    return success_response(data=metrics.snapshot(), message="Metrics retrieved successfully")
+
+
 # 這裡之後會加入 API 路由
 # from app.api.v1 import auth, users, products, orders, analytics
 # app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
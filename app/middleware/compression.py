@@ -0,0 +1,133 @@
+"""
+回應壓縮中介軟體
+
+依 Accept-Encoding 選擇 zstd / br / gzip（見 app.utils.compression）壓縮回應：
+- 只壓縮可壓縮的內容類型（JSON、NDJSON、MessagePack、text/* 等）
+- 單次送出的回應小於 COMPRESSION_MIN_SIZE 時不壓縮
+- 分段送出的回應（NDJSON、StreamingResponse）以串流方式壓縮，每段都會 flush
+- 已帶有 Content-Encoding 的回應（例如回應快取中預先壓縮的內容）直接送出
+
+可壓縮的回應都會加上 Vary: Accept-Encoding。
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.utils.compression import Codec, StreamCompressor, compress, is_compressible, record_compression, select_codec
+from app.utils.metrics import metrics
+
+# 不帶主體的狀態碼
+_NO_BODY_STATUS = {204, 304}
+
+
+class CompressionMiddleware:
+    """
+    回應壓縮中介軟體
+
+    Examples:
+        >>> app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    """
+
+    def __init__(self, app: Callable, minimum_size: int = 1024, codecs: Optional[List[Codec]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = codecs
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codec = select_codec(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        responder = _CompressionResponder(send, codec, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """單一回應的壓縮狀態"""
+
+    def __init__(self, send: Callable, codec: Optional[Codec], minimum_size: int):
+        self._send = send
+        self.codec = codec
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Dict[str, Any]] = None
+        self.passthrough = False
+        self.stream: Optional[StreamCompressor] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 等到第一段主體才能決定是否壓縮
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None:
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self._flush_start()
+                await self._send(message)
+                return
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["content-encoding"] = self.codec.name
+            if not more_body:
+                compressed = compress(body, self.codec)
+                headers["content-length"] = str(len(compressed))
+                await self._flush_start()
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            # 分段回應：不知道總長度，改用 chunked 傳輸
+            del headers["content-length"]
+            self.stream = self.codec.stream()
+            await self._flush_start()
+
+        start = time.thread_time()
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        self.cpu_seconds += time.thread_time() - start
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            record_compression(self.codec.name, self.bytes_in, self.bytes_out, self.cpu_seconds * 1000)
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        """依第一段主體與回應標頭判斷是否壓縮（同時補上 Vary 標頭）"""
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        if (
+            self.start_message["status"] in _NO_BODY_STATUS
+            or "content-encoding" in headers
+            or not is_compressible(headers.get("content-type", ""))
+        ):
+            return False
+
+        headers.add_vary_header("Accept-Encoding")
+        if self.codec is None:
+            metrics.incr("http.compression_skipped", reason="not_accepted")
+            return False
+        if not more_body and len(body) < self.minimum_size:
+            metrics.incr("http.compression_skipped", reason="small")
+            return False
+        return True
+
+    async def _flush_start(self) -> None:
+        """送出暫存的 http.response.start"""
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self._send(message)
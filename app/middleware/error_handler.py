@@ -88,6 +88,18 @@ class AlreadyExistsException(APIException):
         )
 
 
+class ConflictException(APIException):
+    """資源狀態衝突異常（例如並發修改）"""
+    
+    def __init__(self, message: str = "Resource state conflict", details: dict = None):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            code="CONFLICT",
+            message=message,
+            details=details or {}
+        )
+
+
 class UnauthorizedException(APIException):
     """未授權異常"""
     
@@ -134,6 +146,18 @@ class BadRequestException(APIException):
         )
 
 
+class ServiceUnavailableException(APIException):
+    """服務暫時不可用異常（過載時拒絕請求）"""
+    
+    def __init__(self, message: str = "Service temporarily unavailable", details: dict = None):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            code="SERVICE_UNAVAILABLE",
+            message=message,
+            details=details or {}
+        )
+
+
 class DatabaseException(APIException):
     """資料庫錯誤異常"""
     
@@ -0,0 +1,119 @@
+"""
+請求指標中介軟體
+
+為每個 HTTP 請求建立 RequestContext，讓 CommandMetricsListener 把資料庫命令歸屬到路由；
+請求結束時依路由模板記錄：
+- http.request_ms{route,method}：請求總耗時（直方圖）
+- http.db_ms{route}：請求內資料庫命令的總耗時（直方圖）
+- http.db_commands{route}：請求內的資料庫命令數（直方圖）
+
+啟用 SERVER_TIMING_ENABLED 時回應加上 Server-Timing 標頭，
+瀏覽器開發者工具可直接顯示資料庫時間與應用時間。
+
+QUERY_BUDGET_MODE 不為 off 時同時檢查查詢預算與 N+1（見 app.utils.query_budget）；
+raise 模式會先緩衝回應，違規時改為返回 500 QUERY_BUDGET_EXCEEDED。
+
+以純 ASGI 實作（而非 BaseHTTPMiddleware），端點與中介軟體在同一個任務中執行，
+contextvars 可以正確傳遞。
+"""
+
+import json
+from typing import Any, Callable, Dict, List
+
+from app.models.common import error_response
+from app.utils.metrics import metrics
+from app.utils.query_budget import QueryBudgetMode, find_violations, query_budget_mode, report_violations
+from app.utils.request_context import RequestContext, reset_request_context, set_request_context
+
+
+def format_server_timing(context: RequestContext) -> str:
+    """
+    構造 Server-Timing 標頭
+
+    Examples:
+        >>> format_server_timing(context)
+        'db;dur=12.4;desc="3 queries", app;dur=5.1'
+    """
+    db_ms = context.db_time_ms
+    app_ms = max(0.0, context.elapsed_ms - db_ms)
+    return f'db;dur={db_ms:.1f};desc="{context.db_commands} queries", app;dur={app_ms:.1f}'
+
+
+class RequestMetricsMiddleware:
+    """
+    請求指標中介軟體
+
+    Examples:
+        >>> app.add_middleware(RequestMetricsMiddleware, server_timing=True)
+    """
+
+    def __init__(self, app: Callable, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(scope.get("method", ""), scope.get("path", ""), scope)
+        budget_mode = query_budget_mode()
+        context.track_queries = budget_mode != QueryBudgetMode.OFF
+        buffered: List[Dict[str, Any]] = []
+        token = set_request_context(context)
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if self.server_timing and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(context).encode("latin-1")))
+                message = {**message, "headers": headers}
+
+            if budget_mode != QueryBudgetMode.RAISE:
+                await send(message)
+                return
+
+            # raise 模式：回應完整產生後才檢查，違規時以錯誤回應取代
+            buffered.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                violations = find_violations(context)
+                if violations:
+                    report_violations(context, violations)
+                    await self._send_violation(send, context, violations)
+                else:
+                    for buffered_message in buffered:
+                        await send(buffered_message)
+                buffered.clear()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_context(token)
+            route = context.route
+            metrics.observe("http.request_ms", context.elapsed_ms, route=route, method=context.method)
+            metrics.observe("http.db_ms", context.db_time_ms, route=route)
+            metrics.observe("http.db_commands", context.db_commands, route=route)
+            if budget_mode == QueryBudgetMode.WARN:
+                violations = find_violations(context)
+                if violations:
+                    report_violations(context, violations)
+
+    @staticmethod
+    async def _send_violation(send: Callable, context: RequestContext, violations: List[Dict[str, Any]]) -> None:
+        """返回 500 QUERY_BUDGET_EXCEEDED"""
+        body = json.dumps(
+            error_response(
+                "QUERY_BUDGET_EXCEEDED",
+                f"Query budget exceeded for {context.method} {context.route}",
+                {"commands": context.db_commands, "violations": violations},
+            ),
+            ensure_ascii=False,
+        ).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
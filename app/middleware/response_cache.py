@@ -0,0 +1,242 @@
+"""
+回應快取中介軟體
+
+快取指定路由模板的匿名 GET 回應（見 app.utils.response_cache）：
+- 鍵為路徑、正規化的查詢參數與協商後的媒體類型，值為已編碼的主體
+- 命中時不經過路由與資料庫；If-None-Match 相符時返回 304
+- 客戶端接受壓縮時返回預先壓縮的版本（帶 Content-Encoding，壓縮中介軟體直接放行）
+- 過期但仍在 stale 期間的條目照常返回，並在背景重新產生（同一條目只有一個背景任務）
+- 請求帶 Cache-Control: no-cache 時略過讀取，重新產生並更新快取
+- 同一個鍵的並行未命中與背景更新以單飛合併，只執行一次路由（見 app.utils.single_flight）
+
+回應加上 ETag、Cache-Control 與 X-Cache（HIT / STALE / MISS）。
+只快取 200、沒有 Set-Cookie、沒有 Content-Encoding、Cache-Control 不含 no-store / private 的回應。
+此中介軟體必須在 RequestMetricsMiddleware 之內（路由透過請求上下文回報快取標籤）。
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+from starlette.datastructures import Headers
+
+from app.utils.compression import compress, select_codec
+from app.utils.encoders import negotiate
+from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+from app.utils.request_context import RequestContext, get_request_context, reset_request_context, set_request_context
+from app.utils.response_cache import CachedResponse, ResponseCache, etag_matches, normalize_query, response_cache
+from app.utils.single_flight import SingleFlight, single_flight_group
+
+logger = get_logger(__name__)
+
+# 不能從快取條目複製到回應的標頭（每次回應重新計算）
+_PER_RESPONSE_HEADERS = {b"content-length", b"etag", b"cache-control", b"age", b"x-cache", b"vary"}
+
+
+def compile_route(template: str) -> Pattern:
+    """
+    把路由模板轉成正規表示式
+
+    Examples:
+        >>> compile_route("/api/v1/products/category/{category}").match("/api/v1/products/category/周邊") is not None
+        True
+    """
+    parts = re.split(r"(\{[^}]+\})", template)
+    pattern = "".join("[^/]+" if part.startswith("{") else re.escape(part) for part in parts)
+    return re.compile(f"^{pattern}$")
+
+
+class ResponseCacheMiddleware:
+    """
+    回應快取中介軟體
+
+    Examples:
+        >>> app.add_middleware(ResponseCacheMiddleware, routes=["/api/v1/products", "/api/v1/products/category/{category}"])
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        routes: Iterable[str],
+        cache: Optional[ResponseCache] = None,
+        compress_min_size: Optional[int] = None,
+        flights: Optional[SingleFlight] = None
+    ):
+        """
+        Args:
+            app: ASGI 應用
+            routes: 要快取的路由模板（完整路徑）
+            cache: 回應快取（預設為全域的 response_cache）
+            compress_min_size: 主體達到此大小才返回壓縮版本（None 表示不壓縮，交給壓縮中介軟體）
+            flights: 合併並行未命中的單飛群組（預設為 response_cache 群組）
+        """
+        self.app = app
+        self.routes: List[Tuple[str, Pattern]] = [(route, compile_route(route)) for route in routes]
+        self.cache = cache if cache is not None else response_cache
+        self.flights = flights if flights is not None else single_flight_group("response_cache")
+        self.compress_min_size = compress_min_size
+        self._background: Set[asyncio.Task] = set()
+
+    def _match(self, path: str) -> Optional[str]:
+        for route, pattern in self.routes:
+            if pattern.match(path):
+                return route
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+        route = self._match(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoder = negotiate(headers.get("accept", ""), paginated=True)
+        key = (scope["path"], normalize_query(scope.get("query_string", b"")), encoder.media_type)
+
+        if "no-cache" not in headers.get("cache-control", ""):
+            entry = self.cache.lookup(key)
+            if entry is not None:
+                fresh = entry.is_fresh()
+                metrics.incr("response_cache.hits", route=route, state="fresh" if fresh else "stale")
+                if not fresh and not entry.revalidating:
+                    self._revalidate(entry, dict(scope))
+                await self._send_entry(entry, headers, scope, send, "HIT" if fresh else "STALE")
+                return
+
+        metrics.incr("response_cache.misses", route=route)
+        # 同一個鍵的並行未命中共用一次路由執行（HEAD 沒有主體，不與 GET 合併）
+        entry, messages = await self.flights.do(
+            (scope["method"], key),
+            lambda: self._fetch(scope, receive, key, route)
+        )
+        if entry is None:
+            # 原始訊息在等待者之間共用，外層中介軟體會修改標頭，送出前先複製
+            for message in messages:
+                if message["type"] == "http.response.start":
+                    message = dict(message, headers=list(message["headers"]))
+                await send(message)
+            return
+        await self._send_entry(entry, headers, scope, send, "MISS")
+
+    async def _fetch(
+        self,
+        scope: Dict[str, Any],
+        receive: Callable,
+        key: Any,
+        route: str
+    ) -> Tuple[Optional[CachedResponse], List[Dict[str, Any]]]:
+        """
+        執行路由並嘗試寫入快取
+
+        Returns:
+            (條目, 原始 ASGI 訊息)：不可快取時條目為 None，呼叫端直接送出原始訊息
+        """
+        messages: List[Dict[str, Any]] = []
+
+        async def buffer(message: Dict[str, Any]) -> None:
+            messages.append(message)
+
+        started_at = time.monotonic()
+        context = get_request_context()
+        token = None
+        if context is None:
+            context = RequestContext(scope["method"], scope["path"], scope)
+            token = set_request_context(context)
+        try:
+            await self.app(scope, receive, buffer)
+        finally:
+            if token is not None:
+                reset_request_context(token)
+
+        start = messages[0] if messages and messages[0]["type"] == "http.response.start" else None
+        if start is None or start["status"] != 200 or scope["method"] != "GET":
+            return None, messages
+        response_headers = Headers(raw=start["headers"])
+        cache_control = response_headers.get("cache-control", "")
+        if (
+            "content-encoding" in response_headers
+            or "set-cookie" in response_headers
+            or "no-store" in cache_control
+            or "private" in cache_control
+        ):
+            return None, messages
+
+        body = b"".join(message.get("body", b"") for message in messages[1:] if message["type"] == "http.response.body")
+        stored_headers = [(name, value) for name, value in start["headers"] if name not in _PER_RESPONSE_HEADERS]
+        entry = self.cache.store(key, route, 200, stored_headers, body, context.cache_tags, started_at)
+        return entry, messages
+
+    async def _send_entry(
+        self,
+        entry: CachedResponse,
+        request_headers: Headers,
+        scope: Dict[str, Any],
+        send: Callable,
+        state: str
+    ) -> None:
+        """送出快取條目（304、預先壓縮的版本或原始主體）"""
+        headers = list(entry.headers)
+        headers += [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", self.cache.cache_control.encode("latin-1")),
+            (b"age", str(entry.age()).encode("latin-1")),
+            (b"x-cache", state.encode("latin-1")),
+        ]
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, entry.etag):
+            metrics.incr("response_cache.not_modified", route=entry.route)
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        body = entry.body
+        vary = b"Accept"
+        if self.compress_min_size is not None and len(body) >= self.compress_min_size:
+            vary = b"Accept, Accept-Encoding"
+            codec = select_codec(request_headers.get("accept-encoding", ""))
+            if codec is not None:
+                body = entry.variants.get(codec.name) or self.cache.add_variant(entry, codec.name, compress(body, codec))
+                headers.append((b"content-encoding", codec.name.encode("latin-1")))
+        headers += [(b"vary", vary), (b"content-length", str(len(body)).encode("latin-1"))]
+
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+    def _revalidate(self, entry: CachedResponse, scope: Dict[str, Any]) -> None:
+        """在背景重新產生過期的條目（不阻塞目前的請求）"""
+        entry.revalidating = True
+        metrics.incr("response_cache.revalidations", route=entry.route)
+        scope["method"] = "GET"
+        task = asyncio.create_task(self._run_revalidation(entry, scope))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _run_revalidation(self, entry: CachedResponse, scope: Dict[str, Any]) -> None:
+        received = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal received
+            if received:
+                return {"type": "http.disconnect"}
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        # 背景任務使用自己的請求上下文，快取標籤與資料庫指標不會算到觸發它的請求
+        token = set_request_context(RequestContext("GET", scope["path"], scope))
+        try:
+            await self.flights.do(
+                ("GET", entry.key),
+                lambda: self._fetch(scope, receive, entry.key, entry.route)
+            )
+        except Exception as e:
+            logger.warning(f"回應快取背景更新失敗: {entry.route} {e}")
+            metrics.incr("response_cache.revalidation_errors", route=entry.route)
+        finally:
+            reset_request_context(token)
+            entry.revalidating = False
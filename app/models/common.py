@@ -4,6 +4,7 @@
 定義整個 API 使用的通用響應模型、分頁模型和錯誤模型
 """
 
+from enum import Enum
 from typing import Generic, TypeVar, Optional, Any, List
 from pydantic import BaseModel, Field
 
@@ -119,6 +120,19 @@ class PaginationParams(BaseModel):
         }
 
 
+class TotalMode(str, Enum):
+    """
+    列表總數計算模式
+    
+    - exact: 精確總數（count_documents，與當頁查詢並行執行）
+    - estimated: 估算總數（短期快取的計數，最多落後 COUNT_CACHE_TTL_SECONDS）
+    - none: 不計算總數，只返回 has_next（適合無限捲動）
+    """
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
 class PaginationMeta(BaseModel):
     """
     分頁元資料
@@ -128,39 +142,63 @@ class PaginationMeta(BaseModel):
     Attributes:
         page: 當前頁碼
         per_page: 每頁數量
-        total: 總筆數
-        total_pages: 總頁數
+        total: 總筆數（total_mode 為 none 時為 None）
+        total_pages: 總頁數（total_mode 為 none 時為 None）
+        total_mode: 總數計算模式
         has_next: 是否有下一頁
         has_prev: 是否有上一頁
+        next_cursor: 下一頁游標（鍵集分頁，沒有下一頁時為 None）
     """
     page: int = Field(..., description="當前頁碼")
     per_page: int = Field(..., description="每頁數量")
-    total: int = Field(..., description="總筆數")
-    total_pages: int = Field(..., description="總頁數")
+    total: Optional[int] = Field(default=None, description="總筆數（total_mode=none 時不提供）")
+    total_pages: Optional[int] = Field(default=None, description="總頁數（total_mode=none 時不提供）")
+    total_mode: TotalMode = Field(default=TotalMode.EXACT, description="總數計算模式")
     has_next: bool = Field(..., description="是否有下一頁")
     has_prev: bool = Field(..., description="是否有上一頁")
+    next_cursor: Optional[str] = Field(default=None, description="下一頁游標（傳入 cursor 參數取得下一頁）")
     
     @classmethod
-    def create(cls, page: int, per_page: int, total: int) -> "PaginationMeta":
+    def create(
+        cls,
+        page: int,
+        per_page: int,
+        total: Optional[int],
+        next_cursor: Optional[str] = None,
+        has_next: Optional[bool] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> "PaginationMeta":
         """
         建立分頁元資料
         
         Args:
             page: 當前頁碼
             per_page: 每頁數量
-            total: 總筆數
+            total: 總筆數（未計算時為 None）
+            next_cursor: 下一頁游標（可選）
+            has_next: 是否有下一頁（可選，預設依總數計算；沒有總數時必須提供）
+            total_mode: 總數計算模式
         
         Returns:
             PaginationMeta: 分頁元資料實例
         """
-        total_pages = (total + per_page - 1) // per_page  # 向上取整
+        if total is None:
+            total_pages = None
+            if has_next is None:
+                has_next = next_cursor is not None
+        else:
+            total_pages = (total + per_page - 1) // per_page  # 向上取整
+            if has_next is None:
+                has_next = page < total_pages
         return cls(
             page=page,
             per_page=per_page,
             total=total,
             total_pages=total_pages,
-            has_next=page < total_pages,
-            has_prev=page > 1
+            total_mode=total_mode,
+            has_next=has_next,
+            has_prev=page > 1,
+            next_cursor=next_cursor
         )
     
     class Config:
@@ -170,6 +208,7 @@ class PaginationMeta(BaseModel):
                 "per_page": 20,
                 "total": 100,
                 "total_pages": 5,
+                "total_mode": "exact",
                 "has_next": True,
                 "has_prev": False
             }
@@ -299,8 +338,11 @@ def paginated_response(
     items: List[Any],
     page: int,
     per_page: int,
-    total: int,
-    message: str = "Data retrieved successfully"
+    total: Optional[int],
+    message: str = "Data retrieved successfully",
+    next_cursor: Optional[str] = None,
+    has_next: Optional[bool] = None,
+    total_mode: TotalMode = TotalMode.EXACT
 ) -> dict:
     """
     建立分頁回應
@@ -309,8 +351,11 @@ def paginated_response(
         items: 資料列表
         page: 當前頁碼
         per_page: 每頁數量
-        total: 總筆數
+        total: 總筆數（total_mode 為 none 時傳入 None）
         message: 成功訊息
+        next_cursor: 下一頁游標（可選）
+        has_next: 是否有下一頁（可選，預設依總數計算）
+        total_mode: 總數計算模式
     
     Returns:
         dict: 格式化的分頁回應
@@ -326,7 +371,14 @@ def paginated_response(
             'message': 'Data retrieved successfully'
         }
     """
-    pagination = PaginationMeta.create(page, per_page, total)
+    pagination = PaginationMeta.create(
+        page,
+        per_page,
+        total,
+        next_cursor=next_cursor,
+        has_next=has_next,
+        total_mode=total_mode
+    )
     return {
         "success": True,
         "data": {
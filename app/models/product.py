@@ -17,6 +17,15 @@ class ProductStatus(str, Enum):
     OUT_OF_STOCK = "out_of_stock"  # 缺货
 
 
+class SearchMode(str, Enum):
+    """商品搜索模式枚举"""
+    AUTO = "auto"       # 自动：短关键词用前缀匹配，其余用全文检索
+    TEXT = "text"       # 全文检索（$text，按相关度排序）
+    PREFIX = "prefix"   # 商品名称前缀匹配（走 name_normalized 索引）
+    REGEX = "regex"     # 正则子串匹配（全表扫描，仅作为兜底）
+    ENGINE = "engine"   # 进程内倒排索引（支持中文单字与二元分词，需启用 PRODUCT_SEARCH_ENGINE_ENABLED）
+
+
 class ProductBase(BaseModel):
     """商品基础模型"""
     name: str = Field(..., min_length=1, max_length=200, description="商品名称")
@@ -190,6 +199,7 @@ class ProductInDB(ProductResponse):
 class ProductListFilter(BaseModel):
     """商品列表筛选参数"""
     search: Optional[str] = Field(None, description="搜索关键词（商品名称、描述、标签）")
+    search_mode: SearchMode = Field(SearchMode.AUTO, description="搜索模式")
     category: Optional[str] = Field(None, description="商品分类")
     min_price: Optional[float] = Field(None, ge=0, description="最低价格")
     max_price: Optional[float] = Field(None, ge=0, description="最高价格")
@@ -198,7 +208,7 @@ class ProductListFilter(BaseModel):
     sort_by: Optional[str] = Field(
         "created_at",
         description="排序字段",
-        pattern="^(price|created_at|updated_at|sales_count|rating|views|name)$"
+        pattern="^(price|created_at|updated_at|sales_count|rating|views|name|relevance)$"
     )
     order: Optional[str] = Field(
         "desc",
@@ -218,6 +228,7 @@ class ProductListFilter(BaseModel):
         json_schema_extra = {
             "example": {
                 "search": "MacBook",
+                "search_mode": "auto",
                 "category": "筆記型電腦",
                 "min_price": 30000,
                 "max_price": 80000,
@@ -177,6 +177,7 @@ class UserInDB(UserBase):
     is_active: bool = True
     is_email_verified: bool = False
     addresses: List[Address] = Field(default_factory=list)
+    token_version: int = 0  # 遞增後，舊版本的 token 全部失效
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -185,6 +186,20 @@ class UserInDB(UserBase):
         arbitrary_types_allowed = True
 
 
+class AuthPrincipal(BaseModel):
+    """
+    無狀態認證模式下的輕量用戶身份
+    
+    只包含 JWT 聲明中的字段，由 get_current_user 直接構造，不查詢資料庫；
+    需要完整資料的端點使用 get_current_user_profile
+    """
+    id: str
+    email: str
+    role: UserRole
+    is_active: bool = True
+    token_version: int = 0
+
+
 class TokenResponse(BaseModel):
     """Token 響應模型"""
     access_token: str = Field(..., description="JWT Access Token")
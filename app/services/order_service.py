@@ -9,14 +9,15 @@
 - 订单取消与退款
 """
 
-from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClientSession
 from bson import ObjectId
-from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 import random
 import string
 import logging
 
+from pymongo import ReturnDocument, UpdateOne
+
 from app.models.order import (
     OrderCreate,
     OrderUpdate,
@@ -25,25 +26,45 @@ from app.models.order import (
     OrderStatus,
     PaymentStatus,
     OrderItem,
-    ShippingAddress,
-    OrderStatusHistory,
     OrderListFilter,
     OrderStatistics,
 )
+from app.models.common import TotalMode
+from app.services.product_service import product_cache
+from app.utils.mongo_driver import MongoClientSession, MongoDatabase, aggregate
+from app.utils.pagination import fetch_page
+from app.utils.response_cache import invalidate_product
+from app.utils.serialization import construct_model
+from app.utils.transactions import run_in_transaction, transactions_supported
 from app.middleware.error_handler import (
     NotFoundException,
     ValidationException,
     DatabaseException,
     ForbiddenException,
+    ConflictException,
 )
 
 logger = logging.getLogger(__name__)
 
+# 创建订单时只需要的商品字段（图片只取第一张）
+ORDER_ITEM_PRODUCT_PROJECTION = {
+    "name": 1,
+    "slug": 1,
+    "price": 1,
+    "stock": 1,
+    "status": 1,
+    "images": {"$slice": 1},
+}
+
+# 非事务模式扣减库存时写在商品上的预留标记字段
+# 每个标记为 {"id": 订单编号, "quantity": 扣减数量, "created_at": 扣减时间}
+STOCK_RESERVATIONS_FIELD = "stock_reservations"
+
 
 class OrderService:
     """订单服务类"""
 
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: MongoDatabase):
         """
         初始化订单服务
 
@@ -59,7 +80,7 @@ class OrderService:
         self,
         order_data: OrderCreate,
         user_id: str,
-        session: Optional[AsyncIOMotorClientSession] = None
+        session: Optional[MongoClientSession] = None
     ) -> OrderResponse:
         """
         创建订单（含事务处理）
@@ -120,7 +141,7 @@ class OrderService:
         }
 
         try:
-            # 5. 在事务中执行：扣减库存 + 创建订单
+            # 5. 扣减库存 + 创建订单
             if session:
                 # 使用传入的会话（事务中）
                 result = await self._create_order_with_transaction(
@@ -128,31 +149,35 @@ class OrderService:
                     validated_items,
                     session
                 )
-            else:
-                # 尝试使用事务创建订单
-                try:
-                    async with await self.db.client.start_session() as new_session:
-                        async with new_session.start_transaction():
-                            result = await self._create_order_with_transaction(
-                                order_dict,
-                                validated_items,
-                                new_session
-                            )
-                except Exception as e:
-                    # 如果事务失败（如未配置复制集），退回到非事务模式
-                    logger.warning(f"事务创建订单失败，尝试非事务模式: {str(e)}")
-                    result = await self._create_order_without_transaction(
+            elif transactions_supported():
+                # 部署支持事务：暂时性错误由事务引擎重试
+                result = await run_in_transaction(
+                    self.db.client,
+                    lambda new_session: self._create_order_with_transaction(
                         order_dict,
-                        validated_items
-                    )
+                        validated_items,
+                        new_session
+                    ),
+                    operation="create_order"
+                )
+            else:
+                # 单机部署不支持事务，使用带补偿的非事务模式
+                result = await self._create_order_without_transaction(
+                    order_dict,
+                    validated_items
+                )
+
+            order_dict["_id"] = result.inserted_id
+            logger.info(f"订单创建成功: {order_number} (ID: {result.inserted_id})")
 
-            order_id = str(result.inserted_id)
-            logger.info(f"订单创建成功: {order_number} (ID: {order_id})")
+            # 库存与销量已变化，使商品缓存与缓存的响应失效
+            self._invalidate_products(item.product_id for item in validated_items)
 
-            # 6. 获取并返回完整订单信息
-            order = await self.get_order_by_id(order_id)
-            return order
+            # 6. 直接使用已写入的订单数据返回，无需再次查询
+            return self._order_helper(order_dict)
 
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"创建订单失败: {str(e)}", exc_info=True)
             raise DatabaseException(f"创建订单失败: {str(e)}")
@@ -161,7 +186,7 @@ class OrderService:
         self,
         order_dict: Dict[str, Any],
         items: List[OrderItem],
-        session: AsyncIOMotorClientSession
+        session: MongoClientSession
     ):
         """
         在事务中创建订单并扣减库存
@@ -173,27 +198,26 @@ class OrderService:
 
         Returns:
             插入结果
+
+        Raises:
+            ValidationException: 任一商品库存不足或已下架（整个事务回滚）
         """
-        # 1. 扣减库存
-        for item in items:
-            update_result = await self.products_collection.update_one(
-                {
-                    "_id": ObjectId(item.product_id),
-                    "stock": {"$gte": item.quantity},
-                    "is_deleted": False
-                },
-                {
-                    "$inc": {
-                        "stock": -item.quantity,
-                        "sales_count": item.quantity
-                    },
-                    "$set": {"updated_at": datetime.utcnow()}
-                },
-                session=session
-            )
+        quantities = self._aggregate_quantities(items)
+        deducted_at = datetime.utcnow()
+
+        # 1. 一次 bulk_write 扣减库存（每个商品带 stock >= qty 条件）
+        result = await self.products_collection.bulk_write(
+            self._build_deduct_operations(quantities, deducted_at),
+            ordered=True,
+            session=session
+        )
 
-            if update_result.modified_count == 0:
-                raise ValidationException(f"商品 '{item.product_name}' 库存不足或已下架")
+        if result.matched_count < len(quantities):
+            # 在同一事务中找出没有被扣减的商品
+            failed_id = await self._find_stock_shortage(quantities, deducted_at, session)
+            raise ValidationException(
+                f"商品 '{self._product_name(failed_id, items)}' 库存不足或已下架"
+            )
 
         # 2. 创建订单
         result = await self.collection.insert_one(order_dict, session=session)
@@ -207,51 +231,281 @@ class OrderService:
         """
         非事务模式创建订单（用于未配置复制集的环境）
 
+        扣减库存时在商品上记录本次预留标记（以订单编号标识），失败时只回补
+        带有标记的商品，避免库存被部分扣减。进程在扣减与清除标记之间中断时，
+        标记会留在商品上，由 release_stale_reservations 在启动时回收。
+
         Args:
             order_dict: 订单数据字典
             items: 订单商品项列表
 
         Returns:
             插入结果
+
+        Raises:
+            ValidationException: 任一商品库存不足或已下架（已扣减的库存会被回补）
         """
-        # 1. 检查库存
-        for item in items:
-            product = await self.products_collection.find_one({
-                "_id": ObjectId(item.product_id),
-                "is_deleted": False
-            })
+        quantities = self._aggregate_quantities(items)
+        reservation = order_dict["order_number"]
 
-            if not product:
-                raise ValidationException(f"商品 '{item.product_name}' 不存在或已下架")
+        # 1. 一次 bulk_write 扣减库存并记录预留标记
+        result = await self.products_collection.bulk_write(
+            self._build_deduct_operations(quantities, datetime.utcnow(), reservation),
+            ordered=True
+        )
+
+        if result.matched_count < len(quantities):
+            applied = await self.products_collection.find(
+                {
+                    "_id": {"$in": [ObjectId(pid) for pid in quantities]},
+                    f"{STOCK_RESERVATIONS_FIELD}.id": reservation
+                },
+                {"_id": 1}
+            ).to_list(length=len(quantities))
+            applied_ids = {str(doc["_id"]) for doc in applied}
 
-            if product.get("stock", 0) < item.quantity:
-                raise ValidationException(f"商品 '{item.product_name}' 库存不足")
+            await self._release_reservation(quantities, reservation)
 
-        # 2. 扣减库存
-        for item in items:
-            await self.products_collection.update_one(
-                {"_id": ObjectId(item.product_id)},
+            failed_id = next(pid for pid in quantities if pid not in applied_ids)
+            raise ValidationException(
+                f"商品 '{self._product_name(failed_id, items)}' 库存不足或已下架"
+            )
+
+        # 2. 创建订单（失败时回补库存）
+        try:
+            result = await self.collection.insert_one(order_dict)
+        except Exception:
+            await self._release_reservation(quantities, reservation)
+            raise
+
+        # 3. 清除预留标记
+        await self.products_collection.update_many(
+            {"_id": {"$in": [ObjectId(pid) for pid in quantities]}},
+            {"$pull": {STOCK_RESERVATIONS_FIELD: {"id": reservation}}}
+        )
+        return result
+
+    def _build_deduct_operations(
+        self,
+        quantities: Dict[str, int],
+        now: datetime,
+        reservation: Optional[str] = None
+    ) -> List[UpdateOne]:
+        """
+        构建扣减库存的批量操作（每个商品带 stock >= qty 条件）
+
+        Args:
+            quantities: 商品ID -> 扣减数量
+            now: 写入 updated_at 的时间（事务中据此识别本次扣减的商品）
+            reservation: 非事务模式下的预留标记（订单编号，可选）
+
+        Returns:
+            List[UpdateOne]: bulk_write 操作列表
+        """
+        operations = []
+        for product_id, quantity in quantities.items():
+            update: Dict[str, Any] = {
+                "$inc": {
+                    "stock": -quantity,
+                    "sales_count": quantity
+                },
+                "$set": {"updated_at": now}
+            }
+            if reservation:
+                update["$push"] = {STOCK_RESERVATIONS_FIELD: {
+                    "id": reservation,
+                    "quantity": quantity,
+                    "created_at": now
+                }}
+
+            operations.append(UpdateOne(
+                {
+                    "_id": ObjectId(product_id),
+                    "stock": {"$gte": quantity},
+                    "is_deleted": False
+                },
+                update
+            ))
+        return operations
+
+    def _build_restore_operations(self, quantities: Dict[str, int]) -> List[UpdateOne]:
+        """
+        构建恢复库存的批量操作
+
+        Args:
+            quantities: 商品ID -> 恢复数量
+
+        Returns:
+            List[UpdateOne]: bulk_write 操作列表
+        """
+        now = datetime.utcnow()
+        return [
+            UpdateOne(
+                {"_id": ObjectId(product_id)},
                 {
                     "$inc": {
-                        "stock": -item.quantity,
-                        "sales_count": item.quantity
+                        "stock": quantity,
+                        "sales_count": -quantity
                     },
-                    "$set": {"updated_at": datetime.utcnow()}
+                    "$set": {"updated_at": now}
                 }
             )
+            for product_id, quantity in quantities.items()
+        ]
 
-        # 3. 创建订单
-        result = await self.collection.insert_one(order_dict)
-        return result
+    async def _release_reservation(self, quantities: Dict[str, int], reservation: str) -> None:
+        """
+        回补带有预留标记的商品库存（非事务模式的补偿操作）
+
+        过滤条件包含预留标记，重复执行不会多次回补。
+
+        Args:
+            quantities: 商品ID -> 已扣减数量
+            reservation: 预留标记（订单编号）
+        """
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {
+                    "_id": ObjectId(product_id),
+                    f"{STOCK_RESERVATIONS_FIELD}.id": reservation
+                },
+                {
+                    "$inc": {
+                        "stock": quantity,
+                        "sales_count": -quantity
+                    },
+                    "$set": {"updated_at": now},
+                    "$pull": {STOCK_RESERVATIONS_FIELD: {"id": reservation}}
+                }
+            )
+            for product_id, quantity in quantities.items()
+        ]
+        result = await self.products_collection.bulk_write(operations, ordered=False)
+        logger.warning(f"下单失败，已回补 {result.modified_count} 个商品的库存 (reservation: {reservation})")
+        self._invalidate_products(quantities)
+
+    async def release_stale_reservations(self, older_than_seconds: float) -> int:
+        """
+        回收进程中断遗留的预留标记（非事务模式）
+
+        订单已写入的标记只清除；订单不存在的标记回补库存后清除。
+        只处理超过 older_than_seconds 的标记，避免影响其他进程进行中的下单。
+
+        Args:
+            older_than_seconds: 标记的最短存在时间
+
+        Returns:
+            int: 回补库存的预留数量
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+        products = await self.products_collection.find(
+            {STOCK_RESERVATIONS_FIELD: {"$elemMatch": {"created_at": {"$lt": cutoff}}}},
+            {STOCK_RESERVATIONS_FIELD: 1}
+        ).to_list(length=None)
+
+        # 订单编号 -> {商品ID: 扣减数量}
+        reservations: Dict[str, Dict[str, int]] = {}
+        for product in products:
+            for marker in product.get(STOCK_RESERVATIONS_FIELD, []):
+                if isinstance(marker, dict) and marker.get("created_at", cutoff) < cutoff:
+                    reservations.setdefault(marker["id"], {})[str(product["_id"])] = marker["quantity"]
+        if not reservations:
+            return 0
+
+        placed = await self.collection.find(
+            {"order_number": {"$in": list(reservations)}},
+            {"order_number": 1}
+        ).to_list(length=len(reservations))
+        placed_numbers = {order["order_number"] for order in placed}
+
+        released = 0
+        for reservation, quantities in reservations.items():
+            if reservation in placed_numbers:
+                await self.products_collection.update_many(
+                    {"_id": {"$in": [ObjectId(pid) for pid in quantities]}},
+                    {"$pull": {STOCK_RESERVATIONS_FIELD: {"id": reservation}}}
+                )
+            else:
+                await self._release_reservation(quantities, reservation)
+                released += 1
+
+        logger.warning(f"已回收 {len(reservations)} 个遗留的库存预留标记，其中 {released} 个回补了库存")
+        return released
+
+    @staticmethod
+    def _invalidate_products(product_ids: Iterable[str]) -> None:
+        """库存变化后使商品缓存与包含这些商品的缓存响应失效"""
+        for product_id in product_ids:
+            product_cache.invalidate(product_id)
+            invalidate_product(product_id)
+
+    async def _find_stock_shortage(
+        self,
+        quantities: Dict[str, int],
+        deducted_at: datetime,
+        session: MongoClientSession
+    ) -> str:
+        """
+        找出事务中没有被扣减的商品（库存不足或已下架）
+
+        在同一会话中读取：本次扣减成功的商品 updated_at 等于 deducted_at，
+        其余商品即为不满足扣减条件的商品，结果与 bulk_write 看到的快照一致
+
+        Args:
+            quantities: 商品ID -> 需要数量
+            deducted_at: 本次扣减写入的 updated_at
+            session: 扣减所在的会话
+
+        Returns:
+            str: 商品ID（若无法确认，则返回第一个商品）
+        """
+        deducted = await self.products_collection.find(
+            {
+                "_id": {"$in": [ObjectId(pid) for pid in quantities]},
+                "updated_at": deducted_at
+            },
+            {"_id": 1},
+            session=session
+        ).to_list(length=len(quantities))
+        deducted_ids = {str(product["_id"]) for product in deducted}
+
+        for product_id in quantities:
+            if product_id not in deducted_ids:
+                return product_id
+        return next(iter(quantities))
+
+    @staticmethod
+    def _normalize_product_id(product_id: str) -> str:
+        """
+        规范化商品ID（ObjectId 的十六进制不区分大小写，统一为小写形式）
+
+        无效的 ID 原样返回，由调用方报告错误
+        """
+        if ObjectId.is_valid(product_id):
+            return str(ObjectId(product_id))
+        return product_id
+
+    @classmethod
+    def _product_name(cls, product_id: str, items: List[OrderItem]) -> str:
+        """从订单项中取得商品名称（用于错误提示）"""
+        for item in items:
+            if cls._normalize_product_id(item.product_id) == product_id:
+                return item.product_name
+        return product_id
 
     async def _validate_and_prepare_items(
         self,
         items: List[OrderItem],
-        session: Optional[AsyncIOMotorClientSession] = None
+        session: Optional[MongoClientSession] = None
     ) -> Tuple[List[OrderItem], Dict[str, Any]]:
         """
         验证商品并准备订单项
 
+        所有商品通过一次 $in 查询批量获取（仅投影 OrderItem 所需字段），
+        同一商品在购物车中出现多次时按累计数量检查库存。
+        错误的检查顺序与逐项查询时保持一致。
+
         Args:
             items: 订单商品项列表
             session: MongoDB 会话
@@ -262,31 +516,37 @@ class OrderService:
         Raises:
             ValidationException: 商品不存在、库存不足
         """
+        product_ids = [self._normalize_product_id(item.product_id) for item in items]
+
+        # 只查询第一个无效 ID 之前的商品，保证错误的先后顺序不变
+        valid_ids: List[ObjectId] = []
+        for product_id in product_ids:
+            if not ObjectId.is_valid(product_id):
+                break
+            valid_ids.append(ObjectId(product_id))
+
+        products = await self._fetch_products_for_order(valid_ids, session)
+        required_quantities = self._aggregate_quantities(items)
+
         validated_items = []
         products_info = {}
 
-        for item in items:
+        for item, product_id in zip(items, product_ids):
             # 验证商品ID
-            if not ObjectId.is_valid(item.product_id):
+            if not ObjectId.is_valid(product_id):
                 raise ValidationException(f"无效的商品ID: {item.product_id}")
 
-            # 查询商品信息
-            product = await self.products_collection.find_one(
-                {
-                    "_id": ObjectId(item.product_id),
-                    "is_deleted": False
-                },
-                session=session
-            )
+            product = products.get(product_id)
 
             if not product:
                 raise ValidationException(f"商品不存在或已下架: {item.product_id}")
 
-            # 检查库存
-            if product.get("stock", 0) < item.quantity:
+            # 检查库存（同一商品多行时使用累计数量）
+            required = required_quantities[product_id]
+            if product.get("stock", 0) < required:
                 raise ValidationException(
                     f"商品 '{product.get('name')}' 库存不足 "
-                    f"(可用: {product.get('stock', 0)}, 需要: {item.quantity})"
+                    f"(可用: {product.get('stock', 0)}, 需要: {required})"
                 )
 
             # 检查商品状态
@@ -295,7 +555,7 @@ class OrderService:
 
             # 创建订单项（使用实时商品信息）
             validated_item = OrderItem(
-                product_id=item.product_id,
+                product_id=product_id,
                 product_name=product.get("name"),
                 product_slug=product.get("slug"),
                 price=product.get("price"),  # 使用当前价格
@@ -306,10 +566,57 @@ class OrderService:
             )
 
             validated_items.append(validated_item)
-            products_info[item.product_id] = product
+            products_info[product_id] = product
 
         return validated_items, products_info
 
+    async def _fetch_products_for_order(
+        self,
+        product_ids: List[ObjectId],
+        session: Optional[MongoClientSession] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取下单所需的商品信息（单次 $in 查询）
+
+        Args:
+            product_ids: 商品 ObjectId 列表（允许重复）
+            session: MongoDB 会话
+
+        Returns:
+            Dict[str, Dict]: 以商品ID字符串为键的商品文档
+        """
+        unique_ids = list(dict.fromkeys(product_ids))
+        if not unique_ids:
+            return {}
+
+        cursor = self.products_collection.find(
+            {
+                "_id": {"$in": unique_ids},
+                "is_deleted": False
+            },
+            ORDER_ITEM_PRODUCT_PROJECTION,
+            session=session
+        )
+        products = await cursor.to_list(length=len(unique_ids))
+        return {str(product["_id"]): product for product in products}
+
+    @classmethod
+    def _aggregate_quantities(cls, items: List[OrderItem]) -> Dict[str, int]:
+        """
+        按商品汇总购买数量（保持商品首次出现的顺序）
+
+        Args:
+            items: 订单商品项列表
+
+        Returns:
+            Dict[str, int]: 规范化的商品ID -> 累计数量
+        """
+        quantities: Dict[str, int] = {}
+        for item in items:
+            product_id = cls._normalize_product_id(item.product_id)
+            quantities[product_id] = quantities.get(product_id, 0) + item.quantity
+        return quantities
+
     def _calculate_order_amounts(
         self,
         items: List[OrderItem],
@@ -443,8 +750,10 @@ class OrderService:
         user_id: str,
         filter_params: OrderListFilter,
         page: int = 1,
-        page_size: int = 20
-    ) -> Tuple[List[OrderResponse], int]:
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[List[OrderResponse], Optional[int], Optional[str]]:
         """
         获取用户的订单列表
 
@@ -453,9 +762,11 @@ class OrderService:
             filter_params: 筛选参数
             page: 页码
             page_size: 每页数量
+            cursor: 分页游标（提供时使用键集分页，忽略 page）
+            total_mode: 总数计算模式（exact / estimated / none）
 
         Returns:
-            Tuple[List[OrderResponse], int]: 订单列表和总数
+            Tuple[List[OrderResponse], Optional[int], Optional[str]]: 订单列表、总数和下一页游标
         """
         # 构建查询条件
         query = {
@@ -470,28 +781,30 @@ class OrderService:
         sort_direction = 1 if filter_params.order == "asc" else -1
         sort_field = filter_params.sort_by
 
-        # 查询总数
-        total = await self.collection.count_documents(query)
-
-        # 分页查询
-        skip = (page - 1) * page_size
-        cursor = self.collection.find(query)\
-            .sort(sort_field, sort_direction)\
-            .skip(skip)\
-            .limit(page_size)
-
-        orders = await cursor.to_list(length=page_size)
+        # 分页查询（偏移量分页或游标分页）
+        orders, total, next_cursor = await fetch_page(
+            self.collection,
+            query,
+            sort_field,
+            sort_direction,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode
+        )
         orders_response = [self._order_helper(order) for order in orders]
 
         logger.info(f"用户 {user_id} 的订单列表查询成功，共 {total} 个订单")
-        return orders_response, total
+        return orders_response, total, next_cursor
 
     async def get_all_orders(
         self,
         filter_params: OrderListFilter,
         page: int = 1,
-        page_size: int = 20
-    ) -> Tuple[List[OrderResponse], int]:
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[List[OrderResponse], Optional[int], Optional[str]]:
         """
         获取所有订单列表（管理员）
 
@@ -499,9 +812,11 @@ class OrderService:
             filter_params: 筛选参数
             page: 页码
             page_size: 每页数量
+            cursor: 分页游标（提供时使用键集分页，忽略 page）
+            total_mode: 总数计算模式（exact / estimated / none）
 
         Returns:
-            Tuple[List[OrderResponse], int]: 订单列表和总数
+            Tuple[List[OrderResponse], Optional[int], Optional[str]]: 订单列表、总数和下一页游标
         """
         # 构建查询条件
         query = {"is_deleted": False}
@@ -511,21 +826,21 @@ class OrderService:
         sort_direction = 1 if filter_params.order == "asc" else -1
         sort_field = filter_params.sort_by
 
-        # 查询总数
-        total = await self.collection.count_documents(query)
-
-        # 分页查询
-        skip = (page - 1) * page_size
-        cursor = self.collection.find(query)\
-            .sort(sort_field, sort_direction)\
-            .skip(skip)\
-            .limit(page_size)
-
-        orders = await cursor.to_list(length=page_size)
+        # 分页查询（偏移量分页或游标分页）
+        orders, total, next_cursor = await fetch_page(
+            self.collection,
+            query,
+            sort_field,
+            sort_direction,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode
+        )
         orders_response = [self._order_helper(order) for order in orders]
 
         logger.info(f"管理员订单列表查询成功，共 {total} 个订单")
-        return orders_response, total
+        return orders_response, total, next_cursor
 
     def _build_filter_query(
         self,
@@ -597,6 +912,7 @@ class OrderService:
         Raises:
             NotFoundException: 订单不存在
             ValidationException: 状态转换不合法
+            ConflictException: 订单状态已被其他操作修改
         """
         if not ObjectId.is_valid(order_id):
             raise NotFoundException("无效的订单ID")
@@ -649,20 +965,29 @@ class OrderService:
         elif new_status == OrderStatus.CANCELLED:
             update_dict["$set"]["cancelled_at"] = now
 
-        # 更新订单
-        await self.collection.update_one(
-            {"_id": ObjectId(order_id)},
-            update_dict
+        # 更新订单（以当前状态作为前置条件，实现乐观并发控制）
+        updated_order = await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(order_id),
+                "is_deleted": False,
+                "status": current_status.value
+            },
+            update_dict,
+            return_document=ReturnDocument.AFTER
         )
 
+        if not updated_order:
+            raise ConflictException(
+                "订单状态已被其他操作修改，请刷新后重试",
+                details={"order_id": order_id, "expected_status": current_status.value}
+            )
+
         logger.info(
             f"订单 {order.get('order_number')} 状态更新: "
             f"{current_status.value} -> {new_status.value} (by: {updated_by})"
         )
 
-        # 返回更新后的订单
-        updated_order = await self.get_order_by_id(order_id)
-        return updated_order
+        return self._order_helper(updated_order)
 
     def _is_valid_status_transition(
         self,
@@ -717,6 +1042,7 @@ class OrderService:
             NotFoundException: 订单不存在
             ForbiddenException: 无权取消
             ValidationException: 订单状态不允许取消
+            ConflictException: 订单状态已被其他操作修改（例如并发取消）
         """
         if not ObjectId.is_valid(order_id):
             raise NotFoundException("无效的订单ID")
@@ -747,23 +1073,55 @@ class OrderService:
                 f"订单状态为 '{current_status.value}'，不能取消"
             )
 
-        # 恢复库存
-        for item in order.get("items", []):
-            await self.products_collection.update_one(
-                {"_id": ObjectId(item["product_id"])},
-                {
-                    "$inc": {
-                        "stock": item["quantity"],
-                        "sales_count": -item["quantity"]
-                    },
-                    "$set": {"updated_at": datetime.utcnow()}
-                }
+        # 更新状态 + 恢复库存（部署支持事务时两者原子执行）
+        if transactions_supported():
+            cancelled_order = await run_in_transaction(
+                self.db.client,
+                lambda session: self._apply_cancellation(order, user_id, reason, session),
+                operation="cancel_order"
             )
+        else:
+            cancelled_order = await self._apply_cancellation(order, user_id, reason)
+
+        self._invalidate_products(item["product_id"] for item in order.get("items", []))
+
+        logger.info(f"订单 {order.get('order_number')} 已取消，库存已恢复")
+
+        return self._order_helper(cancelled_order)
+
+    async def _apply_cancellation(
+        self,
+        order: Dict[str, Any],
+        user_id: str,
+        reason: Optional[str] = None,
+        session: Optional[MongoClientSession] = None
+    ) -> Dict[str, Any]:
+        """
+        执行取消订单的写入：将订单标记为已取消并恢复库存
+
+        先以当前状态为前置条件更新订单，只有成功取消的请求才会恢复库存，
+        并发取消同一订单时库存不会被重复恢复。
 
+        Args:
+            order: 订单文档
+            user_id: 操作人ID
+            reason: 取消原因
+            session: MongoDB 会话（事务中）
+
+        Returns:
+            Dict: 取消后的订单文档
+
+        Raises:
+            ConflictException: 订单状态已被其他操作修改
+        """
         # 更新订单状态为已取消
         now = datetime.utcnow()
-        await self.collection.update_one(
-            {"_id": ObjectId(order_id)},
+        cancelled_order = await self.collection.find_one_and_update(
+            {
+                "_id": order["_id"],
+                "is_deleted": False,
+                "status": order.get("status")
+            },
             {
                 "$set": {
                     "status": OrderStatus.CANCELLED.value,
@@ -778,13 +1136,28 @@ class OrderService:
                         "note": reason or "订单已取消"
                     }
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER,
+            session=session
         )
 
-        logger.info(f"订单 {order.get('order_number')} 已取消，库存已恢复")
+        if not cancelled_order:
+            raise ConflictException(
+                "订单状态已被其他操作修改，请刷新后重试",
+                details={"order_id": str(order["_id"]), "expected_status": order.get("status")}
+            )
+
+        # 恢复库存（一次 bulk_write）
+        quantities: Dict[str, int] = {}
+        for item in order.get("items", []):
+            quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+        if quantities:
+            await self.products_collection.bulk_write(
+                self._build_restore_operations(quantities),
+                ordered=True,
+                session=session
+            )
 
-        # 返回取消后的订单
-        cancelled_order = await self.get_order_by_id(order_id)
         return cancelled_order
 
     async def get_order_statistics(
@@ -852,7 +1225,8 @@ class OrderService:
             }
         ]
 
-        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        cursor = await aggregate(self.collection, pipeline)
+        result = await cursor.to_list(length=1)
 
         if not result:
             return OrderStatistics(
@@ -886,47 +1260,15 @@ class OrderService:
         """
         将数据库订单文档转换为 OrderResponse 模型
 
+        订单写入前已经过 OrderCreate / OrderItem 验证，读取时直接构建模型（含商品项、
+        收货地址和状态历史），不重复执行验证器；管理员一页 100 个订单时可省去数千次验证
+
         Args:
             order: 数据库订单文档
 
         Returns:
             OrderResponse: 订单响应模型
         """
-        # 转换商品项
-        items = [OrderItem(**item) for item in order.get("items", [])]
-
-        # 转换收货地址
-        shipping_address = ShippingAddress(**order.get("shipping_address", {}))
-
-        # 转换状态历史
-        status_history = [
-            OrderStatusHistory(**history)
-            for history in order.get("status_history", [])
-        ]
-
-        return OrderResponse(
-            id=str(order["_id"]),
-            order_number=order.get("order_number"),
-            user_id=order.get("user_id"),
-            items=items,
-            subtotal=order.get("subtotal"),
-            shipping_fee=order.get("shipping_fee", 0.0),
-            discount=order.get("discount", 0.0),
-            total_amount=order.get("total_amount"),
-            shipping_address=shipping_address,
-            status=OrderStatus(order.get("status")),
-            payment_status=PaymentStatus(order.get("payment_status")),
-            payment_method=order.get("payment_method"),
-            tracking_number=order.get("tracking_number"),
-            note=order.get("note"),
-            coupon_code=order.get("coupon_code"),
-            created_at=order.get("created_at"),
-            updated_at=order.get("updated_at"),
-            paid_at=order.get("paid_at"),
-            shipped_at=order.get("shipped_at"),
-            delivered_at=order.get("delivered_at"),
-            completed_at=order.get("completed_at"),
-            cancelled_at=order.get("cancelled_at"),
-            status_history=status_history
-        )
-
+        document = dict(order)
+        document["id"] = str(document.pop("_id"))
+        return construct_model(OrderResponse, document)
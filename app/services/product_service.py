@@ -5,10 +5,12 @@
 """
 
 from typing import List, Optional, Dict, Any, Tuple
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
 from datetime import datetime
 import re
+import time
 
 from app.models.product import (
     ProductCreate,
@@ -16,22 +18,62 @@ from app.models.product import (
     ProductResponse,
     ProductInDB,
     ProductListFilter,
-    ProductStatus
+    ProductStatus,
+    SearchMode
 )
+from app.config import settings
 from app.middleware.error_handler import (
     NotFoundException,
     ValidationException,
-    DatabaseException
+    DatabaseException,
+    BadRequestException
 )
+from app.services.search_engine import product_search_engine
+from app.services.view_counter import view_counter
+from app.utils.cache import BoundedCache
+from app.utils.helpers import normalize_search_text
 from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+from app.utils.mongo_driver import MongoDatabase
+from app.models.common import TotalMode
+from app.utils.pagination import count_documents, decode_cursor, encode_cursor, fetch_page
+from app.utils.response_cache import invalidate_product
+from app.utils.serialization import construct_model
+from app.utils.single_flight import flight_key, single_flight_group
 
 logger = get_logger(__name__)
 
+# 商品名称的正规化字段（小写、NFKC），用于可走索引的前缀搜索
+SEARCH_NAME_FIELD = "name_normalized"
+
+# 按相关度排序时使用的虚拟排序字段
+RELEVANCE_SORT = "relevance"
+
+# $text 查询找不到全文索引时的错误码（IndexNotFound）
+TEXT_INDEX_NOT_FOUND_CODE = 27
+
+# 商品详情缓存（键为商品 ID 字符串，值为原始文档，只缓存未删除的商品）
+product_cache = BoundedCache(
+    "products",
+    max_entries=settings.PRODUCT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.PRODUCT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.PRODUCT_CACHE_TTL_SECONDS
+)
+product_cache.enabled = settings.PRODUCT_CACHE_ENABLED
+metrics.register_collector("product_cache", product_cache.stats)
+
+# 浏览计数写回后，缓存中的 views 已过期
+view_counter.on_flush = product_cache.invalidate_many
+metrics.register_collector("view_counter", view_counter.stats)
+
+# 相同的并发读取（商品详情、列表）合并为一次查询
+product_flights = single_flight_group("products")
+
 
 class ProductService:
     """商品服务类"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: MongoDatabase):
         """
         初始化商品服务
         
@@ -59,6 +101,20 @@ class ProductService:
             return product
         return None
     
+    def _product_response(self, product: Dict[str, Any]) -> ProductResponse:
+        """
+        由数据库文档构建 ProductResponse（不重复验证）
+        
+        文档写入前已经过 ProductCreate / ProductUpdate 验证，读取时直接构建模型
+        
+        Args:
+            product: MongoDB 文档
+            
+        Returns:
+            ProductResponse: 商品响应模型
+        """
+        return construct_model(ProductResponse, self._product_helper(product))
+    
     def _generate_slug(self, name: str) -> str:
         """
         生成 URL 友好的 slug
@@ -122,6 +178,7 @@ class ProductService:
                 product_dict["slug"] = f"{product_dict['slug']}-{str(uuid.uuid4())[:8]}"
             
             # 添加元数据
+            product_dict[SEARCH_NAME_FIELD] = normalize_search_text(product_dict["name"])
             product_dict["views"] = 0
             product_dict["sales_count"] = 0
             product_dict["rating"] = 0.0
@@ -136,10 +193,12 @@ class ProductService:
             
             # 获取创建的商品
             created_product = await self.collection.find_one({"_id": result.inserted_id})
+            product_search_engine.upsert(created_product)
+            invalidate_product(result.inserted_id, [created_product.get("category")], lists=True)
             
             logger.info(f"商品创建成功: product_id={result.inserted_id}")
             
-            return ProductResponse(**self._product_helper(created_product))
+            return self._product_response(created_product)
         
         except Exception as e:
             logger.error(f"创建商品失败: {str(e)}")
@@ -151,14 +210,18 @@ class ProductService:
     async def get_product_by_id(
         self,
         product_id: str,
-        increment_views: bool = False
+        increment_views: bool = False,
+        use_cache: bool = True
     ) -> Optional[ProductResponse]:
         """
         根据 ID 获取商品
         
+        优先读取商品缓存；对库存敏感的调用方应传入 use_cache=False 直接读库
+        
         Args:
             product_id: 商品 ID
             increment_views: 是否增加浏览次数
+            use_cache: 是否允许使用缓存
             
         Returns:
             Optional[ProductResponse]: 商品数据或 None
@@ -175,31 +238,69 @@ class ProductService:
                 details={"product_id": product_id}
             )
         
-        # 查询商品（排除已删除的）
-        product = await self.collection.find_one({
-            "_id": ObjectId(product_id),
-            "is_deleted": False
-        })
+        product = product_cache.get(product_id) if use_cache else None
         
-        if not product:
-            return None
+        if product is None:
+            if use_cache:
+                # 同一商品的并发查询合并为一次（缓存条目过期的瞬间也只有一个请求读库）
+                product = await product_flights.do(
+                    flight_key("get_product_by_id", product_id),
+                    lambda: self._load_product(product_id)
+                )
+            else:
+                product = await self._load_product(product_id)
+            
+            if not product:
+                return None
+        
+        # 缓存与合并查询中的文档是共享的，转换前先复制
+        product = dict(product)
         
         # 增加浏览次数（可选）
-        if increment_views:
+        if increment_views and view_counter.running:
+            # 写后合并：只在内存中累加，由计数器批量写回
+            view_counter.increment(product_id)
+        elif increment_views:
             await self.collection.update_one(
                 {"_id": ObjectId(product_id)},
                 {"$inc": {"views": 1}}
             )
             product["views"] = product.get("views", 0) + 1
         
-        return ProductResponse(**self._product_helper(product))
+        # 返回的浏览次数包含尚未写回的部分
+        product["views"] = product.get("views", 0) + view_counter.pending(product_id)
+        
+        return self._product_response(product)
+    
+    async def _load_product(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """
+        从数据库读取商品（排除已删除的）并写入商品缓存
+        
+        读取期间商品被更新或失效时不回填，避免较旧的文档覆盖缓存直到 TTL 过期
+        
+        Args:
+            product_id: 商品 ID（已验证格式）
+            
+        Returns:
+            Optional[Dict[str, Any]]: 商品文档或 None
+        """
+        started_at = time.monotonic()
+        product = await self.collection.find_one({
+            "_id": ObjectId(product_id),
+            "is_deleted": False
+        })
+        if product:
+            product_cache.set_if_unchanged(product_id, product, started_at)
+        return product
     
     async def get_products(
         self,
         filter_params: ProductListFilter,
         page: int = 1,
-        page_size: int = 10
-    ) -> Tuple[List[ProductResponse], int]:
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[List[ProductResponse], Optional[int], Optional[str]]:
         """
         获取商品列表（分页、筛选、搜索、排序）
         
@@ -207,9 +308,11 @@ class ProductService:
             filter_params: 筛选参数
             page: 页码（从 1 开始）
             page_size: 每页数量
+            cursor: 分页游标（提供时使用键集分页，忽略 page）
+            total_mode: 总数计算模式（exact / estimated / none）
             
         Returns:
-            Tuple[List[ProductResponse], int]: (商品列表, 总数)
+            Tuple[List[ProductResponse], Optional[int], Optional[str]]: (商品列表, 总数, 下一页游标)
         """
         logger.info(f"获取商品列表: page={page}, page_size={page_size}")
         
@@ -240,40 +343,318 @@ class ProductService:
         if filter_params.tags:
             query["tags"] = {"$all": filter_params.tags}
         
-        # 搜索（使用正则表达式）
+        # 搜索模式
+        search_mode = None
         if filter_params.search:
-            search_pattern = {"$regex": filter_params.search, "$options": "i"}
-            query["$or"] = [
-                {"name": search_pattern},
-                {"description": search_pattern},
-                {"tags": search_pattern}
-            ]
+            search_mode = self._resolve_search_mode(filter_params.search, filter_params.search_mode)
         
-        # 计算总数
-        total = await self.collection.count_documents(query)
+        # 相同参数的并发列表查询合并为一次（结果列表在调用方之间共享，返回副本）
+        product_list, total, next_cursor = await product_flights.do(
+            flight_key("get_products", filter_params, search_mode, page, page_size, cursor, total_mode),
+            lambda: self._load_products(query, filter_params, search_mode, page, page_size, cursor, total_mode)
+        )
         
-        # 构建排序
-        sort_direction = 1 if filter_params.order == "asc" else -1
-        sort_field = filter_params.sort_by
+        logger.info(f"获取商品列表成功: 返回 {len(product_list)} 个商品，总数 {total}")
         
-        # 分页查询
-        skip = (page - 1) * page_size
-        cursor = self.collection.find(query)\
-            .sort(sort_field, sort_direction)\
-            .skip(skip)\
-            .limit(page_size)
+        return list(product_list), total, next_cursor
+    
+    async def _load_products(
+        self,
+        query: Dict[str, Any],
+        filter_params: ProductListFilter,
+        search_mode: Optional[SearchMode],
+        page: int,
+        page_size: int,
+        cursor: Optional[str],
+        total_mode: TotalMode
+    ) -> Tuple[List[ProductResponse], Optional[int], Optional[str]]:
+        """
+        执行商品列表查询并转换为响应模型
         
-        products = await cursor.to_list(length=page_size)
+        Args:
+            query: 不含搜索条件的筛选条件
+            filter_params: 筛选参数
+            search_mode: 实际搜索模式（无搜索时为 None）
+            page: 页码
+            page_size: 每页数量
+            cursor: 分页游标（可选）
+            total_mode: 总数计算模式
+            
+        Returns:
+            Tuple[List[ProductResponse], Optional[int], Optional[str]]: (商品列表, 总数, 下一页游标)
+        """
+        try:
+            products, total, next_cursor = await self._query_products(
+                query, filter_params, search_mode, page, page_size, cursor, total_mode
+            )
+        except OperationFailure as e:
+            if search_mode != SearchMode.TEXT or e.code != TEXT_INDEX_NOT_FOUND_CODE:
+                raise
+            # 尚未创建 text_search_index 时退回正则匹配，避免搜索直接失败
+            logger.warning("缺少全文索引 text_search_index，本次搜索改用正则匹配")
+            products, total, next_cursor = await self._query_products(
+                query, filter_params, SearchMode.REGEX, page, page_size, cursor, total_mode
+            )
         
         # 转换格式
         product_list = [
-            ProductResponse(**self._product_helper(product))
+            self._product_response(product)
             for product in products
         ]
         
-        logger.info(f"获取商品列表成功: 返回 {len(product_list)} 个商品，总数 {total}")
+        return product_list, total, next_cursor
+    
+    async def _query_products(
+        self,
+        base_query: Dict[str, Any],
+        filter_params: ProductListFilter,
+        search_mode: Optional[SearchMode],
+        page: int,
+        page_size: int,
+        cursor: Optional[str],
+        total_mode: TotalMode
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """
+        按搜索模式与排序执行商品列表查询
+        
+        Args:
+            base_query: 不含搜索条件的筛选条件
+            filter_params: 筛选参数
+            search_mode: 实际搜索模式（无搜索时为 None）
+            page: 页码
+            page_size: 每页数量
+            cursor: 分页游标（可选）
+            total_mode: 总数计算模式
+            
+        Returns:
+            Tuple[List[Dict], Optional[int], Optional[str]]: (文档列表, 总数, 下一页游标)
+        """
+        # 构建排序
+        sort_direction = 1 if filter_params.order == "asc" else -1
+        sort_field = filter_params.sort_by
         
-        return product_list, total
+        if sort_field == RELEVANCE_SORT and search_mode == SearchMode.ENGINE:
+            # 搜索引擎按 BM25 排序
+            return await self._fetch_from_engine(
+                base_query, filter_params, page, page_size, cursor, total_mode
+            )
+        
+        query = dict(base_query)
+        if search_mode is not None:
+            query.update(self._build_search_clause(filter_params.search, search_mode))
+        
+        if sort_field == RELEVANCE_SORT:
+            if search_mode == SearchMode.TEXT:
+                # 全文检索按相关度排序
+                return await self._fetch_by_relevance(query, page, page_size, cursor, total_mode)
+            
+            # 前缀匹配按名称排序（与索引顺序一致），其余按创建时间倒序
+            if search_mode == SearchMode.PREFIX:
+                sort_field, sort_direction = SEARCH_NAME_FIELD, 1
+            else:
+                sort_field, sort_direction = "created_at", -1
+        
+        # 分页查询（偏移量分页或游标分页）
+        return await fetch_page(
+            self.collection,
+            query,
+            sort_field,
+            sort_direction,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode
+        )
+    
+    def _resolve_search_mode(self, search: str, mode: SearchMode) -> SearchMode:
+        """
+        确定实际使用的搜索模式
+        
+        auto 模式下，搜索引擎就绪时使用搜索引擎；否则短关键词
+        （不超过 PRODUCT_SEARCH_PREFIX_MAX_CHARS）使用名称前缀匹配，其余使用全文检索。
+        指定 engine 但搜索引擎未就绪时改用全文检索。
+        
+        Args:
+            search: 搜索关键词
+            mode: 请求的搜索模式
+            
+        Returns:
+            SearchMode: 实际搜索模式
+        """
+        engine_ready = settings.PRODUCT_SEARCH_ENGINE_ENABLED and product_search_engine.ready
+        if mode == SearchMode.ENGINE:
+            return SearchMode.ENGINE if engine_ready else SearchMode.TEXT
+        if mode != SearchMode.AUTO:
+            return mode
+        if engine_ready:
+            return SearchMode.ENGINE
+        if len(normalize_search_text(search)) <= settings.PRODUCT_SEARCH_PREFIX_MAX_CHARS:
+            return SearchMode.PREFIX
+        return SearchMode.TEXT
+    
+    def _build_search_clause(self, search: str, mode: SearchMode) -> Dict[str, Any]:
+        """
+        构建搜索查询条件
+        
+        Args:
+            search: 搜索关键词
+            mode: 搜索模式（不能为 auto）
+            
+        Returns:
+            Dict[str, Any]: 查询条件
+        """
+        if mode == SearchMode.TEXT:
+            # 使用 text_search_index（name、description、tags）
+            return {"$text": {"$search": search}}
+        
+        if mode == SearchMode.ENGINE:
+            # 搜索引擎只负责召回候选商品，其余筛选与排序交给数据库
+            product_ids, _ = product_search_engine.search(
+                search, limit=settings.PRODUCT_SEARCH_ENGINE_MAX_CANDIDATES
+            )
+            return {"_id": {"$in": [ObjectId(pid) for pid in product_ids]}}
+        
+        if mode == SearchMode.PREFIX:
+            # 锚定且区分大小写的正则可以转换为索引范围扫描
+            prefix = re.escape(normalize_search_text(search))
+            return {SEARCH_NAME_FIELD: {"$regex": f"^{prefix}"}}
+        
+        # 兜底：不区分大小写的子串匹配（无法使用索引）
+        search_pattern = {"$regex": re.escape(search), "$options": "i"}
+        return {"$or": [
+            {"name": search_pattern},
+            {"description": search_pattern},
+            {"tags": search_pattern}
+        ]}
+    
+    def _decode_offset_cursor(self, cursor: str) -> int:
+        """
+        解析按相关度排序时使用的偏移量游标
+        
+        Args:
+            cursor: 分页游标
+            
+        Returns:
+            int: 下一页的偏移量
+            
+        Raises:
+            BadRequestException: 游标无效
+        """
+        offset, _ = decode_cursor(cursor, RELEVANCE_SORT, -1)
+        if not isinstance(offset, int) or offset < 0:
+            raise BadRequestException(
+                message="Invalid pagination cursor",
+                details={"cursor": cursor}
+            )
+        return offset
+    
+    def _encode_offset_cursor(self, last_product: Dict[str, Any], next_offset: int) -> str:
+        """生成按相关度排序时使用的偏移量游标"""
+        return encode_cursor(
+            RELEVANCE_SORT,
+            -1,
+            {"_id": last_product["_id"], RELEVANCE_SORT: next_offset}
+        )
+    
+    async def _fetch_from_engine(
+        self,
+        base_query: Dict[str, Any],
+        filter_params: ProductListFilter,
+        page: int,
+        page_size: int,
+        cursor: Optional[str],
+        total_mode: TotalMode
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """
+        通过搜索引擎查询一页结果并批量回表
+        
+        分类、价格、状态、标签在搜索引擎内存中筛选，
+        当页商品 ID 以一次 $in 查询取回完整文档并保持排名顺序
+        
+        Args:
+            base_query: 不含搜索条件的筛选条件
+            filter_params: 筛选参数
+            page: 页码
+            page_size: 每页数量
+            cursor: 分页游标（可选）
+            total_mode: 总数计算模式（搜索引擎的匹配数总是精确的）
+            
+        Returns:
+            Tuple[List[Dict], Optional[int], Optional[str]]: (文档列表, 总数, 下一页游标)
+        """
+        offset = self._decode_offset_cursor(cursor) if cursor else (page - 1) * page_size
+        
+        product_ids, total = product_search_engine.search(
+            filter_params.search,
+            offset=offset,
+            limit=page_size + 1,
+            category=filter_params.category,
+            min_price=filter_params.min_price,
+            max_price=filter_params.max_price,
+            status=filter_params.status.value if filter_params.status else None,
+            tags=filter_params.tags
+        )
+        
+        has_next = len(product_ids) > page_size
+        product_ids = product_ids[:page_size]
+        
+        products: List[Dict[str, Any]] = []
+        if product_ids:
+            hydrate_query = dict(base_query)
+            hydrate_query["_id"] = {"$in": [ObjectId(pid) for pid in product_ids]}
+            found = await self.collection.find(hydrate_query).to_list(length=len(product_ids))
+            by_id = {str(product["_id"]): product for product in found}
+            products = [by_id[pid] for pid in product_ids if pid in by_id]
+        
+        next_cursor = None
+        if has_next and products:
+            next_cursor = self._encode_offset_cursor(products[-1], offset + page_size)
+        
+        return products, (None if total_mode == TotalMode.NONE else total), next_cursor
+    
+    async def _fetch_by_relevance(
+        self,
+        query: Dict[str, Any],
+        page: int,
+        page_size: int,
+        cursor: Optional[str],
+        total_mode: TotalMode
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """
+        按 textScore 排序查询一页全文检索结果
+        
+        相关度无法作为范围条件，游标中记录的是下一页的偏移量
+        
+        Args:
+            query: 包含 $text 的查询条件
+            page: 页码
+            page_size: 每页数量
+            cursor: 分页游标（可选）
+            total_mode: 总数计算模式
+            
+        Returns:
+            Tuple[List[Dict], Optional[int], Optional[str]]: (文档列表, 总数, 下一页游标)
+        """
+        skip = self._decode_offset_cursor(cursor) if cursor else (page - 1) * page_size
+        
+        total = await count_documents(self.collection, query, total_mode)
+        
+        score = {"$meta": "textScore"}
+        find_cursor = self.collection.find(query, {"score": score})\
+            .sort([("score", score), ("_id", -1)])\
+            .skip(skip)\
+            .limit(page_size + 1)
+        products = await find_cursor.to_list(length=page_size + 1)
+        
+        next_cursor = None
+        if len(products) > page_size:
+            products = products[:page_size]
+            next_cursor = self._encode_offset_cursor(products[-1], skip + page_size)
+        
+        for product in products:
+            product.pop("score", None)
+        
+        return products, total, next_cursor
     
     async def update_product(
         self,
@@ -322,7 +703,7 @@ class ProductService:
         
         if not update_dict:
             # 没有需要更新的数据
-            return ProductResponse(**self._product_helper(existing_product))
+            return self._product_response(existing_product)
         
         # 如果更新了 slug，检查是否重复
         if "slug" in update_dict:
@@ -337,6 +718,10 @@ class ProductService:
                     details={"slug": update_dict["slug"]}
                 )
         
+        # 名称变更时同步更新搜索字段
+        if "name" in update_dict:
+            update_dict[SEARCH_NAME_FIELD] = normalize_search_text(update_dict["name"])
+        
         # 添加更新时间和更新者
         update_dict["updated_at"] = datetime.utcnow()
         update_dict["updated_by"] = user_id
@@ -353,10 +738,18 @@ class ProductService:
             
             # 获取更新后的商品
             updated_product = await self.collection.find_one({"_id": ObjectId(product_id)})
+            product_search_engine.upsert(updated_product)
+            product_cache.set(product_id, dict(updated_product))
+            # 名称、价格、状态、分类都可能改变商品所在的列表与排序，不限分类的列表一并失效
+            invalidate_product(
+                product_id,
+                [existing_product.get("category"), updated_product.get("category")],
+                lists=True
+            )
             
             logger.info(f"商品更新成功: product_id={product_id}")
             
-            return ProductResponse(**self._product_helper(updated_product))
+            return self._product_response(updated_product)
         
         except Exception as e:
             logger.error(f"更新商品失败: {str(e)}")
@@ -410,6 +803,9 @@ class ProductService:
         success = result.modified_count > 0
         
         if success:
+            product_search_engine.remove(product_id)
+            product_cache.invalidate(product_id)
+            invalidate_product(product_id, lists=True)
             logger.info(f"商品删除成功: product_id={product_id}")
         else:
             logger.warning(f"商品删除失败或已删除: product_id={product_id}")
@@ -445,48 +841,51 @@ class ProductService:
                 details={"product_id": product_id}
             )
         
-        # 获取当前商品
-        product = await self.collection.find_one({
-            "_id": ObjectId(product_id),
-            "is_deleted": False
-        })
-        
-        if not product:
-            return None
-        
-        # 检查库存是否足够（扣减时）
-        current_stock = product.get("stock", 0)
-        new_stock = current_stock + quantity
+        # 扣减时由过滤条件保证库存足够，判断与更新在一次原子操作中完成
+        updated_product = await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(product_id),
+                "is_deleted": False,
+                "stock": {"$gte": -quantity}
+            },
+            {
+                "$inc": {"stock": quantity},
+                "$set": {
+                    "updated_at": datetime.utcnow(),
+                    "updated_by": user_id
+                }
+            },
+            return_document=ReturnDocument.AFTER
+        )
         
-        if new_stock < 0:
+        if updated_product is None:
+            # 未匹配：商品不存在或库存不足
+            product = await self.collection.find_one(
+                {"_id": ObjectId(product_id), "is_deleted": False},
+                {"stock": 1}
+            )
+            
+            if not product:
+                return None
+            
+            current_stock = product.get("stock", 0)
             raise ValidationException(
                 message="Insufficient stock",
                 details={
                     "product_id": product_id,
                     "current_stock": current_stock,
                     "requested_quantity": abs(quantity),
-                    "shortage": abs(new_stock)
+                    "shortage": max(-(current_stock + quantity), 0)
                 }
             )
         
-        # 更新库存
-        await self.collection.update_one(
-            {"_id": ObjectId(product_id)},
-            {
-                "$inc": {"stock": quantity},
-                "$set": {
-                    "updated_at": datetime.utcnow(),
-                    "updated_by": user_id
-                }
-            }
-        )
-        
-        # 获取更新后的商品
-        updated_product = await self.collection.find_one({"_id": ObjectId(product_id)})
+        new_stock = updated_product.get("stock", 0)
+        product_cache.set(product_id, dict(updated_product))
+        invalidate_product(product_id)
         
         logger.info(f"库存更新成功: product_id={product_id}, new_stock={new_stock}")
         
-        return ProductResponse(**self._product_helper(updated_product))
+        return self._product_response(updated_product)
     
     async def check_stock_available(
         self,
@@ -521,8 +920,10 @@ class ProductService:
         self,
         category: str,
         page: int = 1,
-        page_size: int = 10
-    ) -> Tuple[List[ProductResponse], int]:
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[List[ProductResponse], Optional[int], Optional[str]]:
         """
         按分类获取商品
         
@@ -530,32 +931,63 @@ class ProductService:
             category: 商品分类
             page: 页码
             page_size: 每页数量
+            cursor: 分页游标（可选）
+            total_mode: 总数计算模式
             
         Returns:
-            Tuple[List[ProductResponse], int]: (商品列表, 总数)
+            Tuple[List[ProductResponse], Optional[int], Optional[str]]: (商品列表, 总数, 下一页游标)
         """
         filter_params = ProductListFilter(category=category)
-        return await self.get_products(filter_params, page, page_size)
+        return await self.get_products(filter_params, page, page_size, cursor, total_mode)
     
     async def search_products(
         self,
         search_query: str,
         page: int = 1,
-        page_size: int = 10
-    ) -> Tuple[List[ProductResponse], int]:
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        search_mode: SearchMode = SearchMode.AUTO,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        tags: Optional[List[str]] = None,
+        sort_by: str = RELEVANCE_SORT,
+        order: str = "desc"
+    ) -> Tuple[List[ProductResponse], Optional[int], Optional[str]]:
         """
         搜索商品
         
+        默认按相关度排序：全文检索按 textScore，前缀匹配按名称，正则兜底按创建时间
+        
         Args:
             search_query: 搜索关键词
             page: 页码
             page_size: 每页数量
+            cursor: 分页游标（可选）
+            total_mode: 总数计算模式
+            search_mode: 搜索模式（auto / engine / text / prefix / regex）
+            category: 商品分类（可选）
+            min_price: 最低价格（可选）
+            max_price: 最高价格（可选）
+            tags: 标签筛选（可选）
+            sort_by: 排序字段（默认 relevance）
+            order: 排序方向
             
         Returns:
-            Tuple[List[ProductResponse], int]: (商品列表, 总数)
+            Tuple[List[ProductResponse], Optional[int], Optional[str]]: (商品列表, 总数, 下一页游标)
         """
-        filter_params = ProductListFilter(search=search_query)
-        return await self.get_products(filter_params, page, page_size)
+        filter_params = ProductListFilter(
+            search=search_query,
+            search_mode=search_mode,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            tags=tags,
+            sort_by=sort_by,
+            order=order
+        )
+        return await self.get_products(filter_params, page, page_size, cursor, total_mode)
     
     async def get_categories(self) -> List[str]:
         """
@@ -592,6 +1024,8 @@ class ProductService:
             {"_id": ObjectId(product_id)},
             {"$inc": {"sales_count": quantity}}
         )
+        product_cache.invalidate(product_id)
+        invalidate_product(product_id)
         
         return result.modified_count > 0
 
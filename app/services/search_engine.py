@@ -0,0 +1,489 @@
+"""
+商品搜索引擎
+
+进程内的倒排索引，供 ProductService 在全文检索时委托使用：
+- 分词：拉丁字母/数字按单词切分，CJK 连续字符切成二元组（bigram），
+  建立索引时另外收录每个 CJK 单字，因此单字查询也能命中，且不依赖 MongoDB $text 的分词
+- 倒排表：每个词项对应两个紧凑数组（文档序号 array('I') 与加权词频 array('H')）
+- 更新：文档以追加方式写入，旧版本打上删除标记（tombstone），
+  删除标记超过一定比例时在后台线程压缩倒排表，完成后合并压缩期间的更新
+- 排序：BM25
+- 筛选：在内存中保存分类、价格、状态、标签，筛选后再分页
+
+索引只存在于当前进程中，多进程部署时每个进程各自维护一份。
+"""
+
+import asyncio
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.product import ProductStatus
+from app.utils.helpers import normalize_search_text
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 各字段的词频权重
+FIELD_WEIGHTS = {
+    "name": 3,
+    "tags": 2,
+    "category": 1,
+    "description": 1,
+}
+
+# 构建索引时读取的字段
+INDEX_PROJECTION = {
+    "name": 1,
+    "description": 1,
+    "tags": 1,
+    "category": 1,
+    "price": 1,
+    "status": 1,
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 删除标记占比超过此值时压缩倒排表
+COMPACT_RATIO = 0.25
+
+# 加权词频上限（array('H') 的最大值）
+MAX_TERM_FREQ = 65535
+
+_LATIN_TOKEN = re.compile(r"[0-9a-z]+")
+_CJK_RUN = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+"
+)
+
+
+def tokenize(text: str, unigrams: bool = False) -> List[str]:
+    """
+    将文本切分为词项
+
+    Args:
+        text: 原始文本
+        unigrams: 是否另外输出连续 CJK 字符中的每个单字（建立索引时使用）
+
+    Returns:
+        List[str]: 词项列表（可能重复）
+
+    Examples:
+        >>> tokenize("MacBook Pro 筆記型電腦")
+        ['macbook', 'pro', '筆記', '記型', '型電', '電腦']
+        >>> tokenize("藍牙", unigrams=True)
+        ['藍牙', '藍', '牙']
+    """
+    normalized = normalize_search_text(text)
+    if not normalized:
+        return []
+
+    tokens = _LATIN_TOKEN.findall(normalized)
+    for run in _CJK_RUN.findall(normalized):
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        if unigrams:
+            tokens.extend(run)
+    return tokens
+
+
+class _DocMeta:
+    """文档的筛选元数据"""
+
+    __slots__ = ("product_id", "category", "price", "status", "tags", "length")
+
+    def __init__(
+        self,
+        product_id: str,
+        category: Optional[str],
+        price: float,
+        status: str,
+        tags: frozenset,
+        length: int
+    ):
+        self.product_id = product_id
+        self.category = category
+        self.price = price
+        self.status = status
+        self.tags = tags
+        self.length = length
+
+
+def _compact_snapshot(
+    docs: List[Optional[_DocMeta]],
+    postings: Dict[str, Tuple[array, array]],
+    doc_limit: int
+) -> Tuple[List[Optional[_DocMeta]], Dict[str, Tuple[array, array]], Dict[str, int], array]:
+    """
+    压缩索引快照中文档序号小于 doc_limit 的部分（可在线程中执行）
+
+    倒排数组只会在末尾追加，因此读取 doc_limit 之前的前缀不受并发写入影响
+
+    Returns:
+        Tuple: (新文档列表, 新倒排表, 商品 ID -> 新序号, 旧序号 -> 新序号)
+    """
+    remap = array("i", [-1]) * doc_limit
+    new_docs: List[Optional[_DocMeta]] = []
+    for old_no in range(doc_limit):
+        meta = docs[old_no]
+        if meta is not None:
+            remap[old_no] = len(new_docs)
+            new_docs.append(meta)
+
+    new_postings: Dict[str, Tuple[array, array]] = {}
+    for term, (doc_nos, freqs) in postings.items():
+        end = bisect_left(doc_nos, doc_limit)
+        new_nos, new_freqs = array("I"), array("H")
+        for doc_no, freq in zip(doc_nos[:end], freqs[:end]):
+            new_no = remap[doc_no]
+            if new_no >= 0:
+                new_nos.append(new_no)
+                new_freqs.append(freq)
+        if new_nos:
+            new_postings[term] = (new_nos, new_freqs)
+
+    by_product = {meta.product_id: no for no, meta in enumerate(new_docs)}
+    return new_docs, new_postings, by_product, remap
+
+
+class ProductSearchEngine:
+    """
+    倒排索引搜索引擎
+
+    Examples:
+        >>> engine = ProductSearchEngine()
+        >>> await engine.build(db.products)
+        >>> ids, total = engine.search("藍牙耳機", limit=20)
+    """
+
+    def __init__(self):
+        self._generation = 0
+        self._compacting = False
+        self._compact_task: Optional[asyncio.Task] = None
+        self._removed_while_compacting: List[int] = []
+        self._reset()
+        self.ready = False
+        self.last_build_seconds: Optional[float] = None
+
+    def _reset(self) -> None:
+        """清空索引（进行中的压缩结果会被丢弃）"""
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._docs: List[Optional[_DocMeta]] = []
+        self._doc_by_product: Dict[str, int] = {}
+        self._tombstones = 0
+        self._total_length = 0
+        self._generation += 1
+
+    # ------------------------------------------------------------------
+    # 构建与更新
+    # ------------------------------------------------------------------
+
+    async def build(self, collection) -> int:
+        """
+        从数据库全量构建索引
+
+        Args:
+            collection: 商品集合
+
+        Returns:
+            int: 已索引的商品数量
+        """
+        start = time.perf_counter()
+        self._reset()
+
+        query = {"is_deleted": False, "status": {"$ne": ProductStatus.INACTIVE.value}}
+        async for product in collection.find(query, INDEX_PROJECTION):
+            self._add(product)
+
+        self.ready = True
+        self.last_build_seconds = time.perf_counter() - start
+        logger.info(
+            f"商品搜索索引构建完成: {self.document_count} 个商品，"
+            f"{len(self._postings)} 个词项，耗时 {self.last_build_seconds:.2f}s"
+        )
+        return self.document_count
+
+    def upsert(self, product: Dict[str, Any]) -> None:
+        """
+        新增或更新一个商品
+
+        已删除或下架的商品会从索引中移除
+
+        Args:
+            product: 商品文档（包含 _id 或 id）
+        """
+        if not self.ready:
+            return
+        product_id = str(product.get("_id") or product.get("id"))
+        self.remove(product_id)
+        if product.get("is_deleted") or product.get("status") == ProductStatus.INACTIVE.value:
+            return
+        self._add(product)
+
+    def remove(self, product_id: str) -> None:
+        """
+        移除一个商品（打删除标记）
+
+        Args:
+            product_id: 商品 ID
+        """
+        doc_no = self._doc_by_product.pop(product_id, None)
+        if doc_no is None:
+            return
+        meta = self._docs[doc_no]
+        self._total_length -= meta.length
+        self._docs[doc_no] = None
+        self._tombstones += 1
+        if self._compacting:
+            self._removed_while_compacting.append(doc_no)
+
+        if not self._compacting and self._tombstones > COMPACT_RATIO * len(self._docs):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self._compact()
+            else:
+                self._compact_task = asyncio.create_task(self.compact())
+
+    def _add(self, product: Dict[str, Any]) -> None:
+        """把文档追加到索引末尾"""
+        product_id = str(product.get("_id") or product.get("id"))
+        term_freqs: Dict[str, int] = {}
+        length = 0
+        for field, weight in FIELD_WEIGHTS.items():
+            value = product.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for token in tokenize(text, unigrams=True):
+                term_freqs[token] = term_freqs.get(token, 0) + weight
+                length += weight
+
+        doc_no = len(self._docs)
+        status = product.get("status")
+        self._docs.append(_DocMeta(
+            product_id=product_id,
+            category=product.get("category"),
+            price=float(product.get("price") or 0),
+            status=status.value if isinstance(status, ProductStatus) else str(status),
+            tags=frozenset(product.get("tags") or ()),
+            length=length
+        ))
+        self._doc_by_product[product_id] = doc_no
+        self._total_length += length
+
+        for term, freq in term_freqs.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = (array("I"), array("H"))
+                self._postings[term] = postings
+            postings[0].append(doc_no)
+            postings[1].append(min(freq, MAX_TERM_FREQ))
+
+    async def compact(self) -> None:
+        """
+        在后台线程中压缩倒排表
+
+        压缩期间的新增与删除照常写入当前索引，完成后在事件循环中合并；
+        期间索引被重建时丢弃压缩结果
+        """
+        if self._compacting:
+            return
+        self._compacting = True
+        self._removed_while_compacting = []
+        generation = self._generation
+        doc_limit = len(self._docs)
+        try:
+            result = await asyncio.to_thread(
+                _compact_snapshot, list(self._docs), dict(self._postings), doc_limit
+            )
+        except Exception as e:
+            logger.error(f"商品搜索索引压缩失败: {e}")
+            return
+        finally:
+            self._compacting = False
+
+        if generation == self._generation:
+            self._apply_compaction(result, doc_limit)
+
+    def _compact(self) -> None:
+        """同步压缩倒排表（没有事件循环时使用）"""
+        self._removed_while_compacting = []
+        doc_limit = len(self._docs)
+        self._apply_compaction(_compact_snapshot(self._docs, self._postings, doc_limit), doc_limit)
+
+    def _apply_compaction(self, result, doc_limit: int) -> None:
+        """
+        换上压缩后的索引，并补上压缩期间的删除与新增文档
+
+        Args:
+            result: _compact_snapshot 的返回值
+            doc_limit: 压缩时的文档数（之后的文档为压缩期间新增）
+        """
+        docs, postings, by_product, remap = result
+        tombstones = 0
+
+        for old_no in self._removed_while_compacting:
+            if old_no >= doc_limit:
+                continue
+            new_no = remap[old_no]
+            by_product.pop(docs[new_no].product_id, None)
+            docs[new_no] = None
+            tombstones += 1
+
+        if len(self._docs) > doc_limit:
+            offset = len(docs) - doc_limit
+            for meta in self._docs[doc_limit:]:
+                if meta is None:
+                    tombstones += 1
+                else:
+                    by_product[meta.product_id] = len(docs)
+                docs.append(meta)
+
+            for term, (doc_nos, freqs) in self._postings.items():
+                start = bisect_left(doc_nos, doc_limit)
+                if start == len(doc_nos):
+                    continue
+                target = postings.get(term)
+                if target is None:
+                    target = (array("I"), array("H"))
+                    postings[term] = target
+                target[0].extend(doc_no + offset for doc_no in doc_nos[start:])
+                target[1].extend(freqs[start:])
+
+        self._docs = docs
+        self._postings = postings
+        self._doc_by_product = by_product
+        self._tombstones = tombstones
+        self._removed_while_compacting = []
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 20,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        status: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Tuple[List[str], int]:
+        """
+        搜索商品
+
+        所有查询词项都必须出现（AND 语义），结果按 BM25 分数降序
+
+        Args:
+            query: 搜索关键词
+            offset: 跳过的结果数
+            limit: 返回的结果数
+            category: 分类筛选（可选）
+            min_price: 最低价格（可选）
+            max_price: 最高价格（可选）
+            status: 状态筛选（可选）
+            tags: 必须包含的标签（可选）
+
+        Returns:
+            Tuple[List[str], int]: (商品 ID 列表, 匹配总数)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._docs:
+            return [], 0
+
+        term_postings = []
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                return [], 0
+            term_postings.append(postings)
+
+        # 从最短的倒排表开始累计，只保留每个词项都命中的文档
+        term_postings.sort(key=lambda p: len(p[0]))
+        doc_count = self.document_count
+        avg_length = self._total_length / doc_count if doc_count else 1.0
+
+        docs = self._docs
+        scores: Dict[int, float] = {}
+        for index, (doc_nos, freqs) in enumerate(term_postings):
+            entries = zip(doc_nos, freqs)
+            doc_freq = len(doc_nos)
+            if self._tombstones:
+                # 文档频率只计算有效文档，避免删除标记压低 IDF
+                entries = [(doc_no, freq) for doc_no, freq in entries if docs[doc_no] is not None]
+                doc_freq = len(entries)
+            idf = math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+            next_scores: Dict[int, float] = {}
+            for doc_no, freq in entries:
+                if index > 0 and doc_no not in scores:
+                    continue
+                meta = docs[doc_no]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * meta.length / avg_length)
+                next_scores[doc_no] = scores.get(doc_no, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+            scores = next_scores
+            if not scores:
+                return [], 0
+
+        required_tags = frozenset(tags) if tags else None
+        matches = []
+        for doc_no, score in scores.items():
+            meta = self._docs[doc_no]
+            if category is not None and meta.category != category:
+                continue
+            if min_price is not None and meta.price < min_price:
+                continue
+            if max_price is not None and meta.price > max_price:
+                continue
+            if status is not None and meta.status != status:
+                continue
+            if required_tags and not required_tags <= meta.tags:
+                continue
+            matches.append((score, doc_no))
+
+        matches.sort(key=lambda item: (-item[0], item[1]))
+        page = matches[offset:offset + limit]
+        return [self._docs[doc_no].product_id for _, doc_no in page], len(matches)
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    @property
+    def document_count(self) -> int:
+        """有效文档数"""
+        return len(self._docs) - self._tombstones
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        索引统计信息（供 /metrics 与基准测试使用）
+
+        postings_bytes 只计算倒排数组的数据缓冲区
+        """
+        postings_count = 0
+        postings_bytes = 0
+        for doc_nos, freqs in self._postings.values():
+            postings_count += len(doc_nos)
+            postings_bytes += doc_nos.itemsize * len(doc_nos) + freqs.itemsize * len(freqs)
+        return {
+            "ready": self.ready,
+            "documents": self.document_count,
+            "tombstones": self._tombstones,
+            "compacting": self._compacting,
+            "terms": len(self._postings),
+            "postings": postings_count,
+            "postings_bytes": postings_bytes,
+            "last_build_seconds": self.last_build_seconds,
+        }
+
+
+# 全局搜索引擎实例
+product_search_engine = ProductSearchEngine()
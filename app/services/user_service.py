@@ -7,15 +7,19 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
 
 from app.models.user import (
     UserCreate, UserUpdate, UserInDB, UserResponse,
     UserRole, PasswordChange, UserRoleUpdate
 )
-from app.models.common import PaginationParams, PaginationMeta
-from app.utils.security import hash_password, verify_password
+from app.models.common import PaginationParams, PaginationMeta, TotalMode
+from app.utils.security import hash_password_async, verify_password_async
 from app.utils.helpers import str_to_objectid
+from app.utils.mongo_driver import MongoDatabase
+from app.utils.pagination import fetch_page
+from app.utils.user_cache import user_cache
+from app.utils.token_revocation import token_revocations
 from app.config import settings
 from app.middleware.error_handler import (
     NotFoundException, ValidationException, DatabaseException
@@ -25,7 +29,7 @@ from app.middleware.error_handler import (
 class UserService:
     """用戶服務類"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: MongoDatabase):
         """
         初始化用戶服務
         
@@ -63,7 +67,7 @@ class UserService:
         
         user_dict = {
             "email": user_data.email,
-            "hashed_password": hash_password(user_data.password),
+            "hashed_password": await hash_password_async(user_data.password),
             "full_name": user_data.full_name,
             "phone": user_data.phone,
             "role": user_role,
@@ -77,12 +81,21 @@ class UserService:
         try:
             result = await self.collection.insert_one(user_dict)
             user_dict["_id"] = result.inserted_id
+        except DuplicateKeyError:
+            # 並發註冊同一 email 時由 users.email 唯一索引攔下
+            raise ValidationException(
+                message="Email already registered",
+                details={"email": user_data.email}
+            )
         except Exception as e:
             raise DatabaseException(
                 message="Failed to create user",
                 details={"error": str(e)}
             )
         
+        # 同一 email 的舊快取條目（例如直接從資料庫刪除的用戶）不再有效
+        user_cache.invalidate_subject(user_data.email)
+        
         # 轉換並返回
         user_dict["id"] = str(user_dict.pop("_id"))
         return UserInDB(**user_dict)
@@ -171,12 +184,20 @@ class UserService:
                 {"$set": update_data},
                 return_document=True
             )
+        except DuplicateKeyError:
+            raise ValidationException(
+                message="Email already registered",
+                details={"email": update_data.get("email")}
+            )
         except Exception as e:
             raise DatabaseException(
                 message="Failed to update user",
                 details={"error": str(e)}
             )
         
+        # 使已認證用戶快取失效（email 變更時舊 subject 也一併失效）
+        user_cache.invalidate_user(user_id)
+        
         if result is None:
             return None
         
@@ -205,16 +226,24 @@ class UserService:
             )
         
         try:
-            result = await self.collection.update_one(
+            result = await self.collection.find_one_and_update(
                 {"_id": obj_id},
                 {
                     "$set": {
                         "is_active": False,
                         "updated_at": datetime.utcnow()
-                    }
-                }
+                    },
+                    "$inc": {"token_version": 1}
+                },
+                projection={"token_version": 1},
+                return_document=True
             )
-            return result.modified_count > 0
+            # 停用立即生效，不等待快取過期，已簽發的 token 一併撤銷
+            user_cache.invalidate_user(user_id)
+            if result is None:
+                return False
+            await self._revoke_tokens(user_id, result["token_version"], "deactivated")
+            return True
         except Exception as e:
             raise DatabaseException(
                 message="Failed to delete user",
@@ -240,7 +269,7 @@ class UserService:
         if user is None:
             return None
         
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
         
         return user
@@ -270,7 +299,7 @@ class UserService:
             raise NotFoundException(resource="User", resource_id=user_id)
         
         # 驗證當前密碼
-        if not verify_password(password_change.current_password, user.hashed_password):
+        if not await verify_password_async(password_change.current_password, user.hashed_password):
             raise ValidationException(
                 message="Current password is incorrect",
                 details={}
@@ -278,17 +307,25 @@ class UserService:
         
         # 更新密碼
         obj_id = str_to_objectid(user_id)
+        new_hashed_password = await hash_password_async(password_change.new_password)
         try:
-            result = await self.collection.update_one(
+            result = await self.collection.find_one_and_update(
                 {"_id": obj_id},
                 {
                     "$set": {
-                        "hashed_password": hash_password(password_change.new_password),
+                        "hashed_password": new_hashed_password,
                         "updated_at": datetime.utcnow()
-                    }
-                }
+                    },
+                    "$inc": {"token_version": 1}
+                },
+                projection={"token_version": 1},
+                return_document=True
             )
-            return result.modified_count > 0
+            user_cache.invalidate_user(user_id)
+            if result is None:
+                return False
+            await self._revoke_tokens(user_id, result["token_version"], "password_change")
+            return True
         except Exception as e:
             raise DatabaseException(
                 message="Failed to change password",
@@ -328,10 +365,15 @@ class UserService:
                     "$set": {
                         "role": role_update.role.value,
                         "updated_at": datetime.utcnow()
-                    }
+                    },
+                    "$inc": {"token_version": 1}
                 },
                 return_document=True
             )
+            # 角色變更立即生效，不等待快取過期；帶舊角色聲明的 token 一併撤銷
+            user_cache.invalidate_user(user_id)
+            if result is not None:
+                await self._revoke_tokens(user_id, result["token_version"], "role_change")
         except Exception as e:
             raise DatabaseException(
                 message="Failed to update user role",
@@ -344,19 +386,127 @@ class UserService:
         result["id"] = str(result.pop("_id"))
         return UserInDB(**result)
     
+    async def revoke_tokens(self, user_id: str, reason: str = "logout") -> bool:
+        """
+        撤銷用戶目前所有的 token（遞增 token_version）
+        
+        Args:
+            user_id: 用戶 ID
+            reason: 撤銷原因
+            
+        Returns:
+            bool: 用戶是否存在
+            
+        Raises:
+            ValidationException: 無效的用戶 ID
+            DatabaseException: 數據庫錯誤
+        """
+        obj_id = str_to_objectid(user_id)
+        if obj_id is None:
+            raise ValidationException(
+                message="Invalid user ID format",
+                details={"user_id": user_id}
+            )
+        
+        try:
+            result = await self.collection.find_one_and_update(
+                {"_id": obj_id},
+                {"$inc": {"token_version": 1}},
+                projection={"token_version": 1},
+                return_document=True
+            )
+            user_cache.invalidate_user(user_id)
+            if result is None:
+                return False
+            await self._revoke_tokens(user_id, result["token_version"], reason)
+            return True
+        except Exception as e:
+            raise DatabaseException(
+                message="Failed to revoke tokens",
+                details={"error": str(e)}
+            )
+    
+    async def _revoke_tokens(self, user_id: str, min_version: int, reason: str) -> None:
+        """
+        寫入撤銷記錄，供無狀態認證模式的各進程同步
+        
+        Args:
+            user_id: 用戶 ID
+            min_version: 最低有效的 token 版本
+            reason: 撤銷原因
+        """
+        await token_revocations.revoke(
+            self.db.token_revocations,
+            user_id,
+            min_version,
+            reason
+        )
+    
+    async def activate_user(self, user_id: str) -> Optional[UserInDB]:
+        """
+        啟用用戶（設置 is_active=True，僅管理員可用）
+        
+        Args:
+            user_id: 用戶 ID
+            
+        Returns:
+            Optional[UserInDB]: 啟用後的用戶或 None
+            
+        Raises:
+            ValidationException: 無效的用戶 ID
+            DatabaseException: 數據庫錯誤
+        """
+        obj_id = str_to_objectid(user_id)
+        if obj_id is None:
+            raise ValidationException(
+                message="Invalid user ID format",
+                details={"user_id": user_id}
+            )
+        
+        try:
+            result = await self.collection.find_one_and_update(
+                {"_id": obj_id},
+                {
+                    "$set": {
+                        "is_active": True,
+                        "updated_at": datetime.utcnow()
+                    }
+                },
+                return_document=True
+            )
+        except Exception as e:
+            raise DatabaseException(
+                message="Failed to activate user",
+                details={"error": str(e)}
+            )
+        
+        user_cache.invalidate_user(user_id)
+        
+        if result is None:
+            return None
+        
+        result["id"] = str(result.pop("_id"))
+        return UserInDB(**result)
+    
     async def get_users(
         self,
         pagination: PaginationParams,
         role: Optional[UserRole] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
     ) -> tuple[List[UserInDB], PaginationMeta]:
         """
         獲取用戶列表（分頁）
         
+        以 _id 排序；提供 cursor 時使用鍵集分頁
+        
         Args:
             pagination: 分頁參數
             role: 過濾角色（可選）
             is_active: 過濾活躍狀態（可選）
+            cursor: 分頁游標（可選）
+            total_mode: 總數計算模式（exact / estimated / none）
             
         Returns:
             tuple[List[UserInDB], PaginationMeta]: 用戶列表和分頁信息
@@ -368,12 +518,17 @@ class UserService:
         if is_active is not None:
             query["is_active"] = is_active
         
-        # 獲取總數
-        total = await self.collection.count_documents(query)
-        
-        # 獲取用戶列表
-        cursor = self.collection.find(query).skip(pagination.skip).limit(pagination.per_page)
-        users_data = await cursor.to_list(length=pagination.per_page)
+        # 獲取用戶列表與總數
+        users_data, total, next_cursor = await fetch_page(
+            self.collection,
+            query,
+            "_id",
+            1,
+            page=pagination.page,
+            page_size=pagination.per_page,
+            cursor=cursor,
+            total_mode=total_mode
+        )
         
         # 轉換為模型
         users = []
@@ -385,7 +540,10 @@ class UserService:
         pagination_meta = PaginationMeta.create(
             page=pagination.page,
             per_page=pagination.per_page,
-            total=total
+            total=total,
+            next_cursor=next_cursor,
+            has_next=next_cursor is not None,
+            total_mode=total_mode
         )
         
         return users, pagination_meta
@@ -413,7 +571,7 @@ class UserService:
         )
 
 
-async def get_user_service(db: AsyncIOMotorDatabase) -> UserService:
+async def get_user_service(db: MongoDatabase) -> UserService:
     """
     獲取用戶服務實例（依賴注入）
     
@@ -0,0 +1,188 @@
+"""
+商品浏览次数的写后合并计数器
+
+商品详情页每次浏览只在内存中累加，按固定间隔或累计数量达到阈值时，
+用一次无序 bulk_write（每个商品一个 $inc）写回数据库：
+- 热门商品的多次浏览合并为一次写入，避免在同一文档上的写竞争
+- 写入失败时把计数合并回待写入队列，下一次刷新重试
+- 应用关闭时刷新剩余计数
+
+进程崩溃时尚未刷新的计数会丢失（最多一个刷新间隔的浏览量）。
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class ViewCounter:
+    """
+    写后合并的浏览计数器
+
+    Examples:
+        >>> view_counter.start(db.products)
+        >>> view_counter.increment(product_id)
+        >>> view_counter.pending(product_id)
+        1
+        >>> await view_counter.stop()  # 刷新剩余计数
+    """
+
+    def __init__(
+        self,
+        flush_interval: float,
+        flush_threshold: int,
+        on_flush: Optional[Callable[[Iterable[str]], None]] = None
+    ):
+        """
+        Args:
+            flush_interval: 刷新间隔（秒）
+            flush_threshold: 待写入的浏览总数达到此值时立即刷新
+            on_flush: 刷新成功后的回调，参数为已写入的商品 ID
+        """
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.on_flush = on_flush
+        self._pending: Dict[str, int] = {}
+        self._pending_total = 0
+        self._inflight: Dict[str, int] = {}
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._threshold_flush: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """计数器是否已启动"""
+        return self._task is not None and not self._task.done()
+
+    def start(self, collection) -> None:
+        """
+        启动后台刷新任务
+
+        Args:
+            collection: 商品集合
+        """
+        if self.running:
+            return
+        self._collection = collection
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"浏览计数器已启动: 间隔 {self.flush_interval}s，阈值 {self.flush_threshold}"
+        )
+
+    async def stop(self) -> None:
+        """停止后台任务并刷新剩余计数"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._threshold_flush is not None:
+            await asyncio.gather(self._threshold_flush, return_exceptions=True)
+            self._threshold_flush = None
+        await self.flush()
+
+    def increment(self, product_id: str, count: int = 1) -> int:
+        """
+        记录浏览
+
+        Args:
+            product_id: 商品 ID
+            count: 浏览次数
+
+        Returns:
+            int: 该商品尚未写入数据库的浏览次数
+        """
+        self._pending[product_id] = self._pending.get(product_id, 0) + count
+        self._pending_total += count
+
+        if self._pending_total >= self.flush_threshold and (
+            self._threshold_flush is None or self._threshold_flush.done()
+        ):
+            self._threshold_flush = asyncio.create_task(self.flush())
+        return self.pending(product_id)
+
+    def pending(self, product_id: str) -> int:
+        """商品尚未写入数据库的浏览次数（包含正在写入的部分）"""
+        return self._pending.get(product_id, 0) + self._inflight.get(product_id, 0)
+
+    async def flush(self) -> int:
+        """
+        把待写入的计数写回数据库
+
+        Returns:
+            int: 本次写入的商品数
+        """
+        async with self._flush_lock:
+            if not self._pending or self._collection is None:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            batch_total, self._pending_total = self._pending_total, 0
+            self._inflight = batch
+
+            operations = [
+                UpdateOne({"_id": ObjectId(product_id)}, {"$inc": {"views": count}})
+                for product_id, count in batch.items()
+            ]
+
+            start = time.perf_counter()
+            try:
+                await self._collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                # 合并回队列，下次刷新重试
+                for product_id, count in batch.items():
+                    self._pending[product_id] = self._pending.get(product_id, 0) + count
+                self._pending_total += batch_total
+                self._inflight = {}
+                metrics.incr("view_counter.flush_errors")
+                logger.error(f"浏览计数写入失败，{len(batch)} 个商品将在下次刷新重试: {e}")
+                return 0
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.incr("view_counter.flushes")
+            metrics.incr("view_counter.views_flushed", batch_total)
+            metrics.observe("view_counter.flush_size", len(batch))
+            metrics.observe("view_counter.flush_ms", elapsed_ms)
+            logger.debug(f"浏览计数已写入: {len(batch)} 个商品，{batch_total} 次浏览，{elapsed_ms:.1f}ms")
+
+            if self.on_flush is not None:
+                self.on_flush(batch.keys())
+            self._inflight = {}
+            return len(batch)
+
+    async def _run(self) -> None:
+        """按间隔刷新"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # 停止时任务会被取消，shield 保证进行中的写入完成
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                logger.error(f"浏览计数刷新任务出错: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """计数器即时状态（供 /metrics 使用）"""
+        return {
+            "running": self.running,
+            "pending_products": len(self._pending),
+            "pending_views": self._pending_total,
+        }
+
+
+# 全局浏览计数器
+view_counter = ViewCounter(
+    flush_interval=settings.VIEW_COUNTER_FLUSH_INTERVAL_SECONDS,
+    flush_threshold=settings.VIEW_COUNTER_FLUSH_THRESHOLD
+)
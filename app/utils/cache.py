@@ -0,0 +1,267 @@
+"""
+進程內快取模組
+
+- TTLCache: 帶有存活時間的簡易快取，用於緩存計算成本高、
+  可以容忍短暫過期的結果（例如列表的估算總數）
+- BoundedCache: 同時以條目數與估算位元組數限制大小的 LRU/TTL 快取，
+  並回報命中、未命中與淘汰次數
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+import bson
+
+from app.utils.metrics import metrics
+
+# 條目變更時間保留多久（只需涵蓋仍在進行中的讀取）
+_CHANGE_MEMORY_SECONDS = 60.0
+
+
+def estimate_document_size(document: Dict[str, Any]) -> int:
+    """
+    估算文檔占用的位元組數
+
+    以 BSON 編碼後的長度近似，與文檔在資料庫中的大小相當
+    """
+    try:
+        return len(bson.encode(document))
+    except Exception:
+        return len(repr(document))
+
+
+class TTLCache:
+    """
+    TTL 快取
+
+    條目在寫入後 ttl_seconds 秒過期；超過 max_entries 時淘汰最舊的條目
+
+    Examples:
+        >>> cache = TTLCache(ttl_seconds=30, max_entries=100)
+        >>> cache.set("key", 42)
+        >>> cache.get("key")
+        42
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        讀取快取
+
+        Args:
+            key: 快取鍵
+
+        Returns:
+            Optional[Any]: 快取值，不存在或已過期時返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        寫入快取
+
+        Args:
+            key: 快取鍵
+            value: 快取值
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """刪除單一條目"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """清空快取"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BoundedCache:
+    """
+    有界 LRU/TTL 快取
+
+    讀取時把條目移到最近使用的一端；超過 max_entries 或 max_bytes 時
+    從最久未使用的一端淘汰。命中、未命中、淘汰次數寫入全域指標，
+    標籤為快取名稱。
+
+    讀庫回填應使用 set_if_unchanged：讀取開始後條目被寫入或失效時不回填，
+    避免較舊的文檔覆蓋更新後的內容
+
+    Examples:
+        >>> cache = BoundedCache("products", max_entries=1000, max_bytes=8 * 1024 * 1024, ttl_seconds=60)
+        >>> cache.set("id", {"_id": "id", "name": "MacBook"})
+        >>> cache.get("id")
+        {'_id': 'id', 'name': 'MacBook'}
+        >>> started_at = time.monotonic()
+        >>> document = await collection.find_one({"_id": ...})
+        >>> cache.set_if_unchanged("id", document, started_at)
+        True
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        sizeof: Callable[[Any], int] = estimate_document_size
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+        self.enabled = True
+        self._entries: "OrderedDict[Hashable, tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._changed_at: Dict[Hashable, float] = {}
+        self._cleared_at = 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        讀取快取
+
+        Args:
+            key: 快取鍵
+
+        Returns:
+            Optional[Any]: 快取值，不存在或已過期時返回 None
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.incr("cache.misses", cache=self.name)
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            metrics.incr("cache.misses", cache=self.name)
+            metrics.incr("cache.expirations", cache=self.name)
+            return None
+
+        self._entries.move_to_end(key)
+        metrics.incr("cache.hits", cache=self.name)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        寫入快取（超過單一條目上限的值不會被快取）
+
+        Args:
+            key: 快取鍵
+            value: 快取值
+        """
+        if not self.enabled:
+            return
+
+        self._mark_changed(key)
+        self._store(key, value)
+
+    def set_if_unchanged(self, key: Hashable, value: Any, read_started_at: float) -> bool:
+        """
+        回填讀庫結果（讀取開始後條目被 set / invalidate / clear 過時不寫入）
+
+        Args:
+            key: 快取鍵
+            value: 讀到的值
+            read_started_at: 讀取開始的時間（time.monotonic）
+
+        Returns:
+            bool: 是否已寫入
+        """
+        if not self.enabled:
+            return False
+
+        if self._cleared_at >= read_started_at or self._changed_at.get(key, 0.0) >= read_started_at:
+            metrics.incr("cache.stale_fills_skipped", cache=self.name)
+            return False
+
+        self._store(key, value)
+        return True
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        """寫入條目並淘汰超出上限的條目"""
+        size = self.sizeof(value)
+        self._remove(key)
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            metrics.incr("cache.evictions", cache=self.name)
+
+    def invalidate(self, key: Hashable) -> None:
+        """使單一條目失效（條目不存在時也會阻止進行中的讀取回填）"""
+        self._mark_changed(key)
+        if self._remove(key):
+            metrics.incr("cache.invalidations", cache=self.name)
+
+    def invalidate_many(self, keys: Iterable[Hashable]) -> None:
+        """使多個條目失效"""
+        for key in keys:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        """清空快取"""
+        self._entries.clear()
+        self._bytes = 0
+        self._changed_at.clear()
+        self._cleared_at = time.monotonic()
+
+    def _mark_changed(self, key: Hashable) -> None:
+        """記錄條目的變更時間（超過上限時捨棄已不可能影響讀取的記錄）"""
+        now = time.monotonic()
+        self._changed_at[key] = now
+        if len(self._changed_at) > max(self.max_entries, 1024):
+            cutoff = now - _CHANGE_MEMORY_SECONDS
+            self._changed_at = {k: at for k, at in self._changed_at.items() if at >= cutoff}
+
+    def _remove(self, key: Hashable) -> bool:
+        """移除條目並更新位元組數"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """快取即時狀態（供 /metrics 使用）"""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """是否存在條目（不檢查過期，也不計入命中率）"""
+        return key in self._entries
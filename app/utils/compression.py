@@ -0,0 +1,278 @@
+"""
+回應壓縮工具模組
+
+提供 gzip（標準庫，永遠可用）、brotli（需安裝 brotli 或 brotlicffi）與
+zstd（需安裝 zstandard）三種編碼，未安裝的編碼自動略過：
+- select_codec: 依 Accept-Encoding 與伺服器偏好順序（COMPRESSION_ENCODINGS）選擇編碼
+- compress: 一次壓縮整個回應主體（回應快取可用來預先壓縮，命中時不必重新壓縮）
+- Codec.stream: 串流壓縮（NDJSON 等分段回應），每段都會 flush，客戶端可以逐段解壓
+
+壓縮結果記錄在指標中：
+- http.compression_bytes_in / http.compression_bytes_out / http.compression_saved_bytes{encoding}
+- http.compression_cpu_ms{encoding}：壓縮花費的 CPU 時間（目前執行緒）
+"""
+
+import importlib
+import importlib.util
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# 值得壓縮的內容類型（另外包含 text/* 與 +json 結尾的類型）
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+def _optional_module(*names: str):
+    """匯入第一個已安裝的選用套件（都未安裝時返回 None）"""
+    for name in names:
+        if importlib.util.find_spec(name) is not None:
+            return importlib.import_module(name)
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    """內容類型是否值得壓縮"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+
+class StreamCompressor:
+    """串流壓縮器（子類別實作 compress / finish）"""
+
+    def compress(self, data: bytes) -> bytes:
+        """壓縮一段資料並 flush，返回可以立即送出的位元組"""
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        """結束串流，返回剩餘的位元組"""
+        raise NotImplementedError
+
+
+class Codec:
+    """
+    壓縮編碼基底類別
+
+    子類別設定 name（Content-Encoding 的值）並實作 compress / stream
+    """
+    name = ""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def stream(self) -> StreamCompressor:
+        raise NotImplementedError
+
+
+class _GzipStream(StreamCompressor):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class GzipCodec(Codec):
+    """gzip（zlib，wbits=31 輸出 gzip 標頭）"""
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self) -> StreamCompressor:
+        return _GzipStream(self.level)
+
+
+class _BrotliStream(StreamCompressor):
+    def __init__(self, module, quality: int):
+        self._compressor = module.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class BrotliCodec(Codec):
+    """brotli（quality 越高越慢，動態回應建議 4～5）"""
+    name = "br"
+
+    def __init__(self, module, quality: int = 4):
+        self._brotli = module
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.compress(data, quality=self.quality)
+
+    def stream(self) -> StreamCompressor:
+        return _BrotliStream(self._brotli, self.quality)
+
+
+class _ZstdStream(StreamCompressor):
+    def __init__(self, module, compressor):
+        self._flush_block = module.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = compressor.compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class ZstdCodec(Codec):
+    """zstd（zstandard 套件）"""
+    name = "zstd"
+
+    def __init__(self, module, level: int = 3):
+        self._zstd = module
+        self._compressor = module.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def stream(self) -> StreamCompressor:
+        return _ZstdStream(self._zstd, self._compressor)
+
+
+def create_codecs(encodings: str) -> List[Codec]:
+    """
+    依偏好順序建立可用的壓縮編碼（未安裝的略過）
+
+    Args:
+        encodings: 逗號分隔的編碼名稱，例如 "zstd,br,gzip"
+    """
+    codecs: List[Codec] = []
+    for name in (item.strip().lower() for item in encodings.split(",")):
+        if not name:
+            continue
+        if name == "gzip":
+            codecs.append(GzipCodec(settings.COMPRESSION_GZIP_LEVEL))
+        elif name == "br":
+            module = _optional_module("brotli", "brotlicffi")
+            if module is None:
+                logger.info("未安裝 brotli，已略過壓縮編碼: br")
+                continue
+            codecs.append(BrotliCodec(module, settings.COMPRESSION_BROTLI_QUALITY))
+        elif name == "zstd":
+            module = _optional_module("zstandard")
+            if module is None:
+                logger.info("未安裝 zstandard，已略過壓縮編碼: zstd")
+                continue
+            codecs.append(ZstdCodec(module, settings.COMPRESSION_ZSTD_LEVEL))
+        else:
+            logger.warning(f"不支援的壓縮編碼，已略過: {name}")
+    return codecs
+
+
+codecs: List[Codec] = create_codecs(settings.COMPRESSION_ENCODINGS)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    解析 Accept-Encoding 標頭
+
+    Examples:
+        >>> parse_accept_encoding("gzip, br;q=0.8, *;q=0")
+        {'gzip': 1.0, 'br': 0.8, '*': 0.0}
+    """
+    preferences: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        key, _, value = params.partition("=")
+        if key.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        preferences[coding] = quality
+    return preferences
+
+
+def select_codec(accept_encoding: str, available: Optional[List[Codec]] = None) -> Optional[Codec]:
+    """
+    選擇壓縮編碼
+
+    客戶端 q 值最高者優先，q 值相同時依伺服器偏好順序；沒有可用編碼時返回 None
+
+    Args:
+        accept_encoding: Accept-Encoding 標頭
+        available: 可用的編碼（預設為 COMPRESSION_ENCODINGS 中已安裝的編碼）
+    """
+    if not accept_encoding:
+        return None
+    preferences = parse_accept_encoding(accept_encoding)
+    wildcard = preferences.get("*", 0.0)
+    best: Optional[Codec] = None
+    best_quality = 0.0
+    for codec in codecs if available is None else available:
+        quality = preferences.get(codec.name, wildcard)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def find_codec(name: str) -> Optional[Codec]:
+    """依名稱取得可用的編碼"""
+    return next((codec for codec in codecs if codec.name == name), None)
+
+
+def record_compression(encoding: str, bytes_in: int, bytes_out: int, cpu_ms: float) -> None:
+    """記錄壓縮指標"""
+    metrics.incr("http.compression_bytes_in", bytes_in, encoding=encoding)
+    metrics.incr("http.compression_bytes_out", bytes_out, encoding=encoding)
+    metrics.incr("http.compression_saved_bytes", bytes_in - bytes_out, encoding=encoding)
+    metrics.observe("http.compression_cpu_ms", cpu_ms, encoding=encoding)
+
+
+def compress(data: bytes, codec: Codec) -> bytes:
+    """
+    壓縮整個主體並記錄指標
+
+    Args:
+        data: 原始位元組
+        codec: 壓縮編碼
+
+    Returns:
+        bytes: 壓縮後的位元組
+    """
+    start = time.thread_time()
+    compressed = codec.compress(data)
+    record_compression(codec.name, len(data), len(compressed), (time.thread_time() - start) * 1000)
+    return compressed
+
+
+def compression_stats() -> Dict[str, Any]:
+    """壓縮設定（供 /metrics 輸出）"""
+    return {
+        "enabled": settings.COMPRESSION_ENABLED,
+        "encodings": [codec.name for codec in codecs],
+        "min_size": settings.COMPRESSION_MIN_SIZE,
+    }
+
+
+metrics.register_collector("compression", compression_stats)
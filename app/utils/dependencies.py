@@ -4,14 +4,17 @@ FastAPI 依賴注入函數
 提供認證、權限驗證等依賴
 """
 
-from typing import Optional
+from typing import Optional, Union, Dict, Any
 from fastapi import Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
 
+from app.config import settings
 from app.utils.security import decode_access_token
-from app.models.user import UserInDB, UserRole
+from app.models.user import UserInDB, UserRole, AuthPrincipal
 from app.database import get_database
+from app.utils.user_cache import user_cache
+from app.utils.token_revocation import token_revocations
 from app.middleware.error_handler import (
     UnauthorizedException,
     ForbiddenException,
@@ -21,21 +24,147 @@ from app.middleware.error_handler import (
 # HTTP Bearer 認證方案
 security = HTTPBearer()
 
+# 當前用戶：預設為完整的 UserInDB，無狀態模式下為 AuthPrincipal
+CurrentUser = Union[UserInDB, AuthPrincipal]
+
+
+async def _load_user_by_subject(
+    email: str,
+    user_id: Optional[str] = None
+) -> Optional[UserInDB]:
+    """
+    依 JWT subject（email）解析用戶，優先讀取用戶快取
+    
+    Args:
+        email: 用戶 email
+        user_id: token 中的用戶 ID（可選，與快取不一致時視為未命中）
+        
+    Returns:
+        Optional[UserInDB]: 用戶或 None
+        
+    Raises:
+        DatabaseException: 數據解析錯誤
+    """
+    user = user_cache.get(email)
+    if user is not None and (user_id is None or user.id == user_id):
+        return user
+    
+    database = get_database()  # 不需要 await，這是普通函數
+    user_data = await database.users.find_one({"email": email})
+    if user_data is None:
+        return None
+    
+    # 將 _id 轉換為 id
+    user_data["id"] = str(user_data.pop("_id"))
+    
+    # 轉換為 UserInDB 模型
+    try:
+        user = UserInDB(**user_data)
+    except Exception as e:
+        raise DatabaseException(
+            message="Error parsing user data",
+            details={"error": str(e), "email": email}
+        )
+    
+    user_cache.set(user)
+    return user
+
+
+def _principal_from_claims(payload: Dict[str, Any]) -> AuthPrincipal:
+    """
+    依 token 聲明構造輕量身份（無狀態模式，不查詢資料庫）
+    
+    Args:
+        payload: 已驗證簽名的 JWT payload
+        
+    Returns:
+        AuthPrincipal: 輕量用戶身份
+        
+    Raises:
+        UnauthorizedException: Token 已撤銷或聲明不完整
+    """
+    user_id = payload["uid"]
+    token_version = payload.get("ver", 0)
+    if token_revocations.is_revoked(user_id, token_version):
+        raise UnauthorizedException(
+            message="Token has been revoked"
+        )
+    
+    try:
+        return AuthPrincipal(
+            id=user_id,
+            email=payload["sub"],
+            role=payload.get("role"),
+            is_active=payload.get("active", True),
+            token_version=token_version
+        )
+    except Exception:
+        raise UnauthorizedException(
+            message="Could not validate credentials"
+        )
+
+
+async def _resolve_user(payload: Dict[str, Any]) -> CurrentUser:
+    """
+    依 JWT payload 解析當前用戶
+    
+    無狀態模式下直接依聲明構造 AuthPrincipal；
+    否則讀取完整用戶（命中用戶快取時不查詢數據庫）並比對 token 版本。
+    沒有 uid 聲明的舊 token 一律走資料庫路徑
+    
+    Args:
+        payload: 已驗證簽名的 JWT payload
+        
+    Returns:
+        CurrentUser: 當前用戶
+        
+    Raises:
+        UnauthorizedException: Token 無效、已撤銷或用戶不存在
+        DatabaseException: 數據解析錯誤
+    """
+    # 獲取用戶 email（sub 是 JWT 標準字段，用於存儲用戶標識）
+    email: str = payload.get("sub")
+    if email is None:
+        raise UnauthorizedException(
+            message="Could not validate credentials"
+        )
+    
+    user_id = payload.get("uid")
+    if settings.AUTH_STATELESS_ENABLED and user_id:
+        return _principal_from_claims(payload)
+    
+    user = await _load_user_by_subject(email, user_id)
+    if user is None:
+        raise UnauthorizedException(
+            message="User not found"
+        )
+    
+    # 登出、角色變更、停用、修改密碼後，舊版本的 token 失效
+    if payload.get("ver", 0) < user.token_version:
+        raise UnauthorizedException(
+            message="Token has been revoked"
+        )
+    
+    return user
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> UserInDB:
+) -> CurrentUser:
     """
     從 JWT Token 獲取當前用戶
     
+    開啟 AUTH_STATELESS_ENABLED 時返回只包含 id、email、role、is_active 的
+    AuthPrincipal，不查詢資料庫；需要完整資料時使用 get_current_user_profile
+    
     Args:
         credentials: HTTP Authorization Bearer Token
         
     Returns:
-        UserInDB: 當前用戶信息
+        CurrentUser: 當前用戶信息
         
     Raises:
-        UnauthorizedException: Token 無效或用戶不存在
+        UnauthorizedException: Token 無效、已撤銷或用戶不存在
         DatabaseException: 數據解析錯誤
         
     Example:
@@ -52,40 +181,44 @@ async def get_current_user(
             message="Could not validate credentials"
         )
     
-    # 獲取用戶 email（sub 是 JWT 標準字段，用於存儲用戶標識）
-    email: str = payload.get("sub")
-    if email is None:
-        raise UnauthorizedException(
-            message="Could not validate credentials"
-        )
+    return await _resolve_user(payload)
+
+
+async def get_current_user_profile(
+    current_user: CurrentUser = Depends(get_current_user)
+) -> UserInDB:
+    """
+    獲取當前用戶的完整資料
     
-    # 從數據庫獲取用戶
-    database = get_database()  # 不需要 await，這是普通函數
-    user_data = await database.users.find_one({"email": email})
+    無狀態模式下按需載入（優先讀取用戶快取），其他模式直接返回
     
-    if user_data is None:
+    Args:
+        current_user: 當前用戶
+        
+    Returns:
+        UserInDB: 完整的用戶資料
+        
+    Raises:
+        UnauthorizedException: 用戶不存在或 token 已撤銷
+    """
+    if isinstance(current_user, UserInDB):
+        return current_user
+    
+    user = await _load_user_by_subject(current_user.email, current_user.id)
+    if user is None:
         raise UnauthorizedException(
             message="User not found"
         )
-    
-    # 將 _id 轉換為 id
-    user_data["id"] = str(user_data.pop("_id"))
-    
-    # 轉換為 UserInDB 模型
-    try:
-        user = UserInDB(**user_data)
-    except Exception as e:
-        raise DatabaseException(
-            message="Error parsing user data",
-            details={"error": str(e), "email": email}
+    if current_user.token_version < user.token_version:
+        raise UnauthorizedException(
+            message="Token has been revoked"
         )
-    
     return user
 
 
 async def get_current_active_user(
-    current_user: UserInDB = Depends(get_current_user)
-) -> UserInDB:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """
     獲取當前活躍用戶（必須 is_active=True）
     
@@ -93,7 +226,7 @@ async def get_current_active_user(
         current_user: 當前用戶
         
     Returns:
-        UserInDB: 當前活躍用戶
+        CurrentUser: 當前活躍用戶
         
     Raises:
         ForbiddenException: 用戶未啟用
@@ -110,10 +243,32 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_active_user_profile(
+    current_user: UserInDB = Depends(get_current_user_profile)
+) -> UserInDB:
+    """
+    獲取當前活躍用戶的完整資料（必須 is_active=True）
+    
+    Args:
+        current_user: 當前用戶的完整資料
+        
+    Returns:
+        UserInDB: 當前活躍用戶
+        
+    Raises:
+        ForbiddenException: 用戶未啟用
+    """
+    if not current_user.is_active:
+        raise ForbiddenException(
+            message="Inactive user"
+        )
+    return current_user
+
+
 async def require_role(
     required_role: UserRole,
-    current_user: UserInDB = Depends(get_current_active_user)
-) -> UserInDB:
+    current_user: CurrentUser = Depends(get_current_active_user)
+) -> CurrentUser:
     """
     要求特定角色權限
     
@@ -122,7 +277,7 @@ async def require_role(
         current_user: 當前用戶
         
     Returns:
-        UserInDB: 當前用戶（如果有權限）
+        CurrentUser: 當前用戶（如果有權限）
         
     Raises:
         ForbiddenException: 權限不足
@@ -158,8 +313,8 @@ def require_admin():
             pass
     """
     async def admin_dependency(
-        current_user: UserInDB = Depends(get_current_active_user)
-    ) -> UserInDB:
+        current_user: CurrentUser = Depends(get_current_active_user)
+    ) -> CurrentUser:
         if current_user.role != UserRole.ADMIN:
             raise ForbiddenException(
                 message="Admin access required"
@@ -186,8 +341,8 @@ def require_vendor_or_admin():
             pass
     """
     async def vendor_or_admin_dependency(
-        current_user: UserInDB = Depends(get_current_active_user)
-    ) -> UserInDB:
+        current_user: CurrentUser = Depends(get_current_active_user)
+    ) -> CurrentUser:
         if current_user.role not in [UserRole.VENDOR, UserRole.ADMIN]:
             raise ForbiddenException(
                 message="Vendor or admin access required"
@@ -197,12 +352,12 @@ def require_vendor_or_admin():
     return vendor_or_admin_dependency
 
 
-def optional_user() -> Optional[UserInDB]:
+def optional_user() -> Optional[CurrentUser]:
     """
     可選的用戶認證（用於既可以匿名也可以認證訪問的端點）
     
     Returns:
-        Optional[UserInDB]: 當前用戶或 None
+        Optional[CurrentUser]: 當前用戶或 None
         
     Example:
         @app.get("/products")
@@ -221,7 +376,7 @@ def optional_user() -> Optional[UserInDB]:
         credentials: Optional[HTTPAuthorizationCredentials] = Depends(
             HTTPBearer(auto_error=False)
         )
-    ) -> Optional[UserInDB]:
+    ) -> Optional[CurrentUser]:
         if credentials is None:
             return None
         
@@ -231,19 +386,7 @@ def optional_user() -> Optional[UserInDB]:
             if payload is None:
                 return None
             
-            email = payload.get("sub")
-            if email is None:
-                return None
-            
-            database = get_database()  # 不需要 await
-            user_data = await database.users.find_one({"email": email})
-            
-            if user_data is None:
-                return None
-            
-            user_data["id"] = str(user_data.pop("_id"))
-            user = UserInDB(**user_data)
-            
+            user = await _resolve_user(payload)
             return user if user.is_active else None
         except Exception:
             return None
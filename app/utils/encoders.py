@@ -0,0 +1,298 @@
+"""
+回應編碼器模組
+
+提供可替換的回應編碼層與內容協商：
+- JSON：RESPONSE_JSON_BACKEND 選擇後端（auto 時已安裝 orjson 則使用 orjson，
+  否則使用 pydantic_core），兩者都原生處理 datetime、枚舉與 Pydantic 模型，
+  ObjectId / Decimal128 由 encode_default 轉換，不需要先經過 jsonable_encoder
+- MessagePack：Accept: application/msgpack（需安裝 msgpack，未安裝時略過）
+- NDJSON：Accept: application/x-ndjson，只用於分頁列表（每行一筆，
+  分頁資訊放在 X-Pagination 標頭），非列表回應退回 JSON
+
+EncodedResponse 是 app.main 的預設回應類別，依目前請求的 Accept 標頭選擇編碼器；
+可透過 register_encoder 加入其他編碼器。
+"""
+
+import importlib
+import importlib.util
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+from app.config import settings
+from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+from app.utils.request_context import get_request_context
+
+logger = get_logger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 部分客戶端使用的舊媒體類型
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/ndjson": NDJSON_MEDIA_TYPE,
+    "application/jsonl": NDJSON_MEDIA_TYPE,
+}
+
+
+def _optional_module(name: str):
+    """匯入選用套件（未安裝時返回 None）"""
+    if importlib.util.find_spec(name) is None:
+        return None
+    return importlib.import_module(name)
+
+
+def encode_default(obj: Any) -> Any:
+    """
+    JSON 後端無法原生處理的型別
+
+    Raises:
+        TypeError: 不支援的型別
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """MessagePack 無法原生處理的型別（日期時間與 JSON 一樣輸出 ISO 8601 字串）"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    return encode_default(obj)
+
+
+def paginated_items(content: Any) -> Optional[List[Any]]:
+    """分頁回應（paginated_response 的結構）的資料列表，其他回應返回 None"""
+    if not isinstance(content, dict):
+        return None
+    data = content.get("data")
+    if isinstance(data, dict) and isinstance(data.get("items"), list) and "pagination" in data:
+        return data["items"]
+    return None
+
+
+class ResponseEncoder:
+    """
+    回應編碼器基底類別
+
+    子類別設定 name / media_type 並實作 encode
+    """
+    name = ""
+    media_type = JSON_MEDIA_TYPE
+    paginated_only = False  # 只用於分頁列表
+
+    def encode(self, content: Any) -> bytes:
+        raise NotImplementedError
+
+
+class PydanticJSONEncoder(ResponseEncoder):
+    """pydantic_core 的 JSON 序列化（不需要額外套件）"""
+    name = "pydantic"
+
+    def encode(self, content: Any) -> bytes:
+        return to_json(content, fallback=encode_default)
+
+
+class OrjsonEncoder(ResponseEncoder):
+    """orjson 序列化"""
+    name = "orjson"
+
+    def __init__(self, module):
+        self._orjson = module
+
+    def encode(self, content: Any) -> bytes:
+        return self._orjson.dumps(content, default=encode_default)
+
+
+class MsgpackEncoder(ResponseEncoder):
+    """MessagePack 序列化"""
+    name = "msgpack"
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def __init__(self, module):
+        self._msgpack = module
+
+    def encode(self, content: Any) -> bytes:
+        return self._msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+class NDJSONEncoder(ResponseEncoder):
+    """分頁列表逐行輸出 JSON（分頁資訊由 EncodedResponse 放入標頭）"""
+    name = "ndjson"
+    media_type = NDJSON_MEDIA_TYPE
+    paginated_only = True
+
+    def __init__(self, json_encoder: ResponseEncoder):
+        self.json_encoder = json_encoder
+
+    def encode(self, content: Any) -> bytes:
+        items = paginated_items(content)
+        return b"".join(self.json_encoder.encode(item) + b"\n" for item in items)
+
+
+def create_json_encoder(backend: str = "auto") -> ResponseEncoder:
+    """
+    建立 JSON 編碼器
+
+    Args:
+        backend: auto / orjson / pydantic
+
+    Raises:
+        ValueError: 未知的後端名稱
+    """
+    if backend not in ("auto", "orjson", "pydantic"):
+        raise ValueError(f"Unknown JSON backend: {backend}")
+    if backend in ("auto", "orjson"):
+        orjson = _optional_module("orjson")
+        if orjson is not None:
+            return OrjsonEncoder(orjson)
+        if backend == "orjson":
+            logger.warning("未安裝 orjson，JSON 回應改用 pydantic_core 編碼")
+    return PydanticJSONEncoder()
+
+
+# 目前的 JSON 編碼器與依媒體類型註冊的編碼器
+json_encoder: ResponseEncoder = create_json_encoder(settings.RESPONSE_JSON_BACKEND)
+_encoders: Dict[str, ResponseEncoder] = {JSON_MEDIA_TYPE: json_encoder}
+
+
+def register_encoder(encoder: ResponseEncoder) -> None:
+    """註冊編碼器（同一媒體類型的舊編碼器會被取代）"""
+    _encoders[encoder.media_type] = encoder
+
+
+def set_json_encoder(encoder: ResponseEncoder) -> None:
+    """替換 JSON 編碼器（NDJSON 同時使用新的編碼器）"""
+    global json_encoder
+    json_encoder = encoder
+    register_encoder(encoder)
+    ndjson = _encoders.get(NDJSON_MEDIA_TYPE)
+    if isinstance(ndjson, NDJSONEncoder):
+        ndjson.json_encoder = encoder
+
+
+def encoders() -> Dict[str, str]:
+    """已註冊的編碼器：{媒體類型: 名稱}"""
+    return {media_type: encoder.name for media_type, encoder in _encoders.items()}
+
+
+if settings.RESPONSE_MSGPACK_ENABLED:
+    _msgpack = _optional_module("msgpack")
+    if _msgpack is not None:
+        register_encoder(MsgpackEncoder(_msgpack))
+    else:
+        logger.info("未安裝 msgpack，已略過 application/msgpack 回應編碼")
+
+if settings.RESPONSE_NDJSON_ENABLED:
+    register_encoder(NDJSONEncoder(json_encoder))
+
+
+def encode_json(content: Any) -> bytes:
+    """以目前的 JSON 編碼器序列化"""
+    return json_encoder.encode(content)
+
+
+def parse_accept(accept: str) -> List[str]:
+    """
+    解析 Accept 標頭，依 q 值由高到低返回媒體類型（排除 q=0）
+
+    Examples:
+        >>> parse_accept("application/json;q=0.5, application/msgpack")
+        ['application/msgpack', 'application/json']
+    """
+    ranges: List[Tuple[float, int, str]] = []
+    for index, part in enumerate(accept.split(",")):
+        media_type, _, params = part.partition(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, index, MEDIA_TYPE_ALIASES.get(media_type, media_type)))
+    return [media_type for _, _, media_type in sorted(ranges)]
+
+
+def negotiate(accept: str, paginated: bool = False) -> ResponseEncoder:
+    """
+    依 Accept 標頭選擇編碼器（沒有可用的編碼器時使用 JSON）
+
+    Args:
+        accept: Accept 標頭
+        paginated: 回應是否為分頁列表
+    """
+    for media_type in parse_accept(accept):
+        if media_type in ("*/*", "application/*"):
+            break
+        encoder = _encoders.get(media_type)
+        if encoder is not None and (paginated or not encoder.paginated_only):
+            return encoder
+    return json_encoder
+
+
+def _request_accept() -> str:
+    """目前請求的 Accept 標頭（不在請求中時返回空字串）"""
+    context = get_request_context()
+    if context is None:
+        return ""
+    for key, value in context.scope.get("headers", ()):
+        if key == b"accept":
+            return value.decode("latin-1")
+    return ""
+
+
+class EncodedResponse(Response):
+    """
+    依 Accept 標頭協商編碼的回應
+
+    FastAPI 的預設回應類別（見 app.main），路由也可以直接返回此回應；
+    回應加上 Vary: Accept，快取需要依 Accept 區分
+
+    Examples:
+        >>> return EncodedResponse(success_response(data=stats))
+    """
+    media_type = JSON_MEDIA_TYPE
+
+    def __init__(
+        self,
+        content: Any = None,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None
+    ) -> None:
+        accept = _request_accept()
+        self.encoder = negotiate(accept, paginated_items(content) is not None) if accept else json_encoder
+        headers = dict(headers or {})
+        headers.setdefault("vary", "Accept")
+        if self.encoder.paginated_only:
+            headers["x-pagination"] = encode_json(content["data"]["pagination"]).decode("utf-8")
+        metrics.incr("http.response_encoding", encoder=self.encoder.name)
+        super().__init__(content, status_code, headers, media_type or self.encoder.media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        return self.encoder.encode(content)
@@ -10,6 +10,7 @@ from bson import ObjectId as BsonObjectId
 from bson.errors import InvalidId
 import secrets
 import string
+import unicodedata
 
 
 def is_valid_objectid(oid: str) -> bool:
@@ -235,6 +236,30 @@ def sanitize_string(text: str, max_length: int = 255) -> str:
     return cleaned
 
 
+def normalize_search_text(text: str) -> str:
+    """
+    正規化搜尋用文字
+    
+    NFKC 正規化（全形轉半形）、大小寫摺疊並壓縮空白，
+    用於商品名稱的前綴搜尋欄位與查詢字串
+    
+    Args:
+        text: 原始文字
+    
+    Returns:
+        str: 正規化後的文字
+    
+    Examples:
+        >>> normalize_search_text("  ＭacBook   Pro ")
+        'macbook pro'
+    """
+    if not text:
+        return ""
+    
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(normalized.split())
+
+
 def calculate_pagination_offset(page: int, per_page: int) -> int:
     """
     計算分頁偏移量
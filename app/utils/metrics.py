@@ -0,0 +1,151 @@
+"""
+應用程式指標模組
+
+提供進程內的計數器與直方圖，並由 /metrics 端點輸出快照
+MongoDB 驅動的監聽器會在執行緒中回報指標，因此所有操作都加鎖
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+# 直方圖預設桶（毫秒）
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _make_key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    """將指標名稱與標籤轉換為字典鍵"""
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: LabelKey) -> str:
+    """
+    將指標鍵格式化為字串
+
+    Examples:
+        >>> _format_key(("db.commands", (("route", "/products"),)))
+        'db.commands{route=/products}'
+    """
+    name, labels = key
+    if not labels:
+        return name
+    label_str = ",".join(f"{k}={v}" for k, v in labels)
+    return f"{name}{{{label_str}}}"
+
+
+class Histogram:
+    """
+    簡易直方圖
+
+    記錄樣本數、總和、最小值、最大值以及各桶的累計數量
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        """記錄一個樣本"""
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為可序列化的字典"""
+        buckets = {f"le_{bound}": count for bound, count in zip(self.buckets, self.bucket_counts)}
+        buckets["le_inf"] = self.bucket_counts[-1]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class MetricsRegistry:
+    """
+    指標註冊表
+
+    Examples:
+        >>> metrics.incr("transactions.commits")
+        >>> metrics.observe("db.command_ms", 3.2, route="/api/v1/products")
+        >>> metrics.snapshot()["counters"]["transactions.commits"]
+        1
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[LabelKey, float] = {}
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """增加計數器"""
+        key = _make_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """記錄直方圖樣本"""
+        key = _make_key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+        """讀取計數器目前的值"""
+        with self._lock:
+            return self._counters.get(_make_key(name, labels), 0)
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """
+        註冊指標收集函數
+
+        收集函數在產生快照時被呼叫，適合輸出快取大小等即時狀態
+        """
+        self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Any]:
+        """產生目前所有指標的快照"""
+        with self._lock:
+            counters = {_format_key(k): v for k, v in sorted(self._counters.items())}
+            histograms = {_format_key(k): h.to_dict() for k, h in sorted(self._histograms.items())}
+
+        collected = {}
+        for name, collector in list(self._collectors.items()):
+            try:
+                collected[name] = collector()
+            except Exception as e:
+                collected[name] = {"error": str(e)}
+
+        return {
+            "counters": counters,
+            "histograms": histograms,
+            "collectors": collected,
+        }
+
+    def reset(self) -> None:
+        """清除所有計數器與直方圖（主要用於測試）"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# 建立全域指標實例
+metrics = MetricsRegistry()
@@ -0,0 +1,140 @@
+"""
+MongoDB 驅動抽象層
+
+支援兩種異步驅動，由 MONGODB_DRIVER 設定選擇：
+- motor：Motor（預設），每個操作在執行緒池中執行同步的 PyMongo
+- pymongo：PyMongo 4.x 原生的 AsyncMongoClient，直接在事件迴圈中執行 I/O
+
+兩者的 CRUD 介面一致，此模組只封裝有差異的呼叫：
+- aggregate / list_indexes：Motor 同步返回游標，原生驅動需要 await
+- start_session / start_transaction：原生驅動需要 await
+- close：原生驅動需要 await
+
+服務層透過 MongoDatabase / MongoClientSession 型別與這裡的函數操作資料庫，
+驅動依物件本身的類型判斷，因此兩種客戶端可以在同一進程中並存（例如基準測試）。
+"""
+
+import inspect
+from enum import Enum
+from typing import Any, Dict, List, Union
+
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorClientSession,
+    AsyncIOMotorDatabase,
+)
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+# 服務層使用的型別
+MongoClient = Union[AsyncIOMotorClient, AsyncMongoClient]
+MongoDatabase = Union[AsyncIOMotorDatabase, AsyncDatabase]
+MongoClientSession = Union[AsyncIOMotorClientSession, AsyncClientSession]
+
+_NATIVE_TYPES = (AsyncMongoClient, AsyncDatabase, AsyncCollection, AsyncClientSession)
+
+
+class MongoDriver(str, Enum):
+    """MongoDB 異步驅動"""
+    MOTOR = "motor"
+    PYMONGO = "pymongo"
+
+
+def is_native(obj: Any) -> bool:
+    """
+    判斷物件是否屬於 PyMongo 原生異步驅動
+
+    Args:
+        obj: 客戶端、資料庫、集合或會話
+
+    Returns:
+        bool: 原生驅動返回 True，Motor 返回 False
+    """
+    return isinstance(obj, _NATIVE_TYPES)
+
+
+async def _resolve(value: Any) -> Any:
+    """等待可等待的返回值"""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def create_client(driver: Union[MongoDriver, str], url: str, **options: Any) -> MongoClient:
+    """
+    建立 MongoDB 客戶端
+
+    Args:
+        driver: 驅動名稱（motor / pymongo）
+        url: 連線字串
+        **options: MongoClient 參數
+
+    Returns:
+        MongoClient: 客戶端
+
+    Raises:
+        ValueError: 未知的驅動名稱
+    """
+    driver = MongoDriver(driver)
+    if driver == MongoDriver.PYMONGO:
+        return AsyncMongoClient(url, **options)
+    return AsyncIOMotorClient(url, **options)
+
+
+async def aggregate(collection, pipeline: List[Dict[str, Any]], **kwargs: Any):
+    """
+    執行聚合查詢，返回游標
+
+    Args:
+        collection: 集合
+        pipeline: 聚合管線
+        **kwargs: aggregate 參數（session 等）
+
+    Returns:
+        聚合游標（支援 to_list 與 async for）
+
+    Example:
+        >>> cursor = await aggregate(db.orders, [{"$match": {...}}])
+        >>> results = await cursor.to_list(length=10)
+    """
+    cursor = collection.aggregate(pipeline, **kwargs)
+    if is_native(collection):
+        cursor = await _resolve(cursor)
+    return cursor
+
+
+async def list_indexes(collection, **kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    列出集合的索引
+
+    Args:
+        collection: 集合
+
+    Returns:
+        List[Dict]: 索引文件（含 _id_）
+    """
+    cursor = await _resolve(collection.list_indexes(**kwargs))
+    return await cursor.to_list(length=None)
+
+
+async def start_session(client: MongoClient, **kwargs: Any) -> MongoClientSession:
+    """
+    開始會話
+
+    Example:
+        >>> async with await start_session(db.client) as session:
+        ...     ...
+    """
+    return await _resolve(client.start_session(**kwargs))
+
+
+async def start_transaction(session: MongoClientSession, **kwargs: Any) -> None:
+    """在會話中開始事務"""
+    await _resolve(session.start_transaction(**kwargs))
+
+
+async def close_client(client: MongoClient) -> None:
+    """關閉客戶端"""
+    await _resolve(client.close())
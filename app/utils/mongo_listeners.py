@@ -0,0 +1,367 @@
+"""
+MongoDB 驅動事件監聽器
+
+PoolMetricsListener 把 pymongo 的連線池事件轉為進程內指標，用於依 worker 調整連線池大小：
+- mongo.pool.checkouts / mongo.pool.checkout_failures：取得連線成功 / 失敗次數
+- mongo.pool.checkout_wait_ms：取得連線的等待時間（直方圖）
+- mongo.pool.waits：等待時間超過 WAIT_THRESHOLD_MS 的取得次數（連線池不足的訊號）
+- mongo.pool.connections_created / connections_closed：建立 / 關閉的連線數
+- 即時狀態（/metrics 的 mongo_pool）：目前已借出、等待中、開啟中的連線數
+
+CommandMetricsListener 把每個命令歸屬到目前的請求（見 app.utils.request_context）：
+- db.command_ms{route,command}：命令耗時（直方圖）
+- db.commands{route,command,collection}：命令次數
+- db.docs_returned{route,command}：命令返回的文件數（直方圖）
+- db.command_failures{command}：失敗的命令數
+- db.slow_queries{route,command}：耗時達到 DB_SLOW_QUERY_MS 的命令數，同時寫入慢查詢日誌
+
+驅動在背景執行緒中呼叫監聽器，因此即時狀態以鎖保護。
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.request_context import get_request_context
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+# 取得連線的等待時間超過此值（毫秒）時計為一次等待
+WAIT_THRESHOLD_MS = 1.0
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    連線池指標監聽器
+
+    Examples:
+        >>> listener = PoolMetricsListener()
+        >>> client = AsyncIOMotorClient(url, event_listeners=[listener])
+        >>> listener.stats()
+        {'open_connections': 10, 'checked_out': 2, 'waiting': 0, ...}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = 0
+        self._checked_out = 0
+        self._waiting = 0
+        self._max_checked_out = 0
+        self._max_waiting = 0
+
+    # 連線池
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        metrics.incr("mongo.pool.cleared")
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    # 連線
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self._open += 1
+        metrics.incr("mongo.pool.connections_created")
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self._open = max(0, self._open - 1)
+        metrics.incr("mongo.pool.connections_closed", reason=str(event.reason))
+
+    # 借出與歸還
+    def connection_check_out_started(self, event) -> None:
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+        metrics.incr("mongo.pool.checkout_failures", reason=str(event.reason))
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+            self._checked_out += 1
+            self._max_checked_out = max(self._max_checked_out, self._checked_out)
+
+        metrics.incr("mongo.pool.checkouts")
+        # pymongo 4.7 起事件帶有 duration（秒），包含等待可用連線與建立連線的時間
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            wait_ms = duration * 1000
+            metrics.observe("mongo.pool.checkout_wait_ms", wait_ms)
+            if wait_ms >= WAIT_THRESHOLD_MS:
+                metrics.incr("mongo.pool.waits")
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self._checked_out = max(0, self._checked_out - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """連線池即時狀態（供 /metrics 使用）"""
+        with self._lock:
+            return {
+                "open_connections": self._open,
+                "checked_out": self._checked_out,
+                "waiting": self._waiting,
+                "max_checked_out": self._max_checked_out,
+                "max_waiting": self._max_waiting,
+            }
+
+
+# 各命令中描述查詢形狀的欄位
+_QUERY_FIELDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort", "update"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+
+# 不含字面值、原樣保留的欄位
+_RAW_FIELDS = {"sort", "projection", "key"}
+
+# 不計入查詢形狀的命令（游標續取與會話控制，次數取決於結果大小而非程式結構）
+_UNTRACKED_COMMANDS = {"getMore", "killCursors", "endSessions", "commitTransaction", "abortTransaction"}
+
+# 不屬於任何請求的命令（背景任務、啟動流程）使用的路由標籤
+BACKGROUND_ROUTE = "background"
+
+
+def normalize_query_shape(value: Any) -> Any:
+    """
+    去除查詢中的字面值，只保留欄位與運算子
+
+    陣列中相同形狀的元素只保留一個，因此 $in 的長度不影響形狀；
+    以 $ 開頭的字串是聚合中的欄位路徑，予以保留
+
+    Args:
+        value: 查詢條件、聚合管線或其中的任意值
+
+    Returns:
+        Any: 查詢形狀
+
+    Examples:
+        >>> normalize_query_shape({"category": "books", "price": {"$gte": 10, "$lte": 99}})
+        {'category': '?', 'price': {'$gte': '?', '$lte': '?'}}
+        >>> normalize_query_shape({"_id": {"$in": [1, 2, 3]}})
+        {'_id': {'$in': ['?']}}
+    """
+    if isinstance(value, Mapping):
+        return {key: normalize_query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = normalize_query_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def command_query_shape(command_name: str, command: Mapping) -> Dict[str, Any]:
+    """
+    取出命令的查詢形狀
+
+    Args:
+        command_name: 命令名稱
+        command: 命令文件
+
+    Returns:
+        Dict[str, Any]: 查詢形狀（沒有查詢條件的命令返回空字典）
+    """
+    shape = {}
+    for field in _QUERY_FIELDS.get(command_name, ()):
+        if field in command:
+            value = command[field]
+            shape[field] = value if field in _RAW_FIELDS else normalize_query_shape(value)
+    return shape
+
+
+def query_shape_key(command_name: str, collection: str, command: Mapping) -> str:
+    """
+    查詢形狀鍵（命令、集合與去除字面值後的查詢），用於統計同一請求中重複的查詢
+
+    Examples:
+        >>> query_shape_key("find", "products", {"find": "products", "filter": {"_id": 1}})
+        'find products {"filter": {"_id": "?"}}'
+    """
+    shape = json.dumps(command_query_shape(command_name, command), sort_keys=True, default=str)
+    return f"{command_name} {collection} {shape}"
+
+
+def command_collection(command_name: str, command: Mapping) -> str:
+    """取出命令作用的集合名稱（無法判斷時返回 "-"）"""
+    if command_name == "getMore":
+        collection = command.get("collection")
+    else:
+        collection = command.get(command_name)
+    return collection if isinstance(collection, str) else "-"
+
+
+def docs_returned(reply: Mapping) -> int:
+    """
+    命令返回（或影響）的文件數
+
+    游標類命令取批次長度；寫入類命令取 n；findAndModify 依 value 是否存在
+    """
+    cursor = reply.get("cursor")
+    if isinstance(cursor, Mapping):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if batch is not None else 0
+    if "values" in reply:
+        return len(reply["values"])
+    if "value" in reply:
+        return 1 if reply["value"] is not None else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+def plan_summary(reply: Mapping) -> Optional[str]:
+    """
+    從 explain 的回覆取出執行計畫摘要，例如 "FETCH <- IXSCAN {category: 1}"
+
+    一般命令的回覆不含執行計畫，此時返回 None
+    """
+    planner = reply.get("queryPlanner")
+    if planner is None:
+        # 聚合的 explain 把查詢計畫放在第一個 $cursor 階段
+        for stage in reply.get("stages") or ():
+            cursor = stage.get("$cursor") if isinstance(stage, Mapping) else None
+            if isinstance(cursor, Mapping) and "queryPlanner" in cursor:
+                planner = cursor["queryPlanner"]
+                break
+    if not isinstance(planner, Mapping):
+        return None
+
+    parts = []
+    plan = planner.get("winningPlan")
+    while isinstance(plan, Mapping):
+        # SBE 引擎的計畫包在 queryPlan 中
+        plan = plan.get("queryPlan", plan)
+        stage = plan.get("stage", "?")
+        key_pattern = plan.get("keyPattern")
+        if key_pattern:
+            keys = ", ".join(f"{key}: {direction}" for key, direction in key_pattern.items())
+            stage = f"{stage} {{{keys}}}"
+        parts.append(stage)
+        plan = plan.get("inputStage")
+    return " <- ".join(parts) or None
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    命令指標監聽器
+
+    命令開始時記下命令文件，完成時計算耗時與返回文件數，
+    歸屬到目前請求的路由並累加到 RequestContext；耗時達到 slow_query_ms 時記錄慢查詢日誌。
+
+    Examples:
+        >>> listener = CommandMetricsListener(slow_query_ms=100)
+        >>> client = AsyncIOMotorClient(url, event_listeners=[listener])
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[Any, int], Tuple[Mapping, str]] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple[Any, int]:
+        return event.connection_id, event.request_id
+
+    def started(self, event) -> None:
+        collection = command_collection(event.command_name, event.command)
+        with self._lock:
+            self._pending[self._key(event)] = (event.command, collection)
+
+    def succeeded(self, event) -> None:
+        with self._lock:
+            command, collection = self._pending.pop(self._key(event), ({}, "-"))
+
+        duration_ms = event.duration_micros / 1000
+        returned = docs_returned(event.reply)
+        name = event.command_name
+        context = get_request_context()
+        route = context.route if context is not None else BACKGROUND_ROUTE
+        if context is not None:
+            context.record_command(duration_ms, self._shape_for(context, name, collection, command))
+
+        metrics.observe("db.command_ms", duration_ms, route=route, command=name)
+        metrics.incr("db.commands", route=route, command=name, collection=collection)
+        metrics.observe("db.docs_returned", returned, route=route, command=name)
+
+        if self.slow_query_ms and duration_ms >= self.slow_query_ms:
+            metrics.incr("db.slow_queries", route=route, command=name)
+            self._log_slow_query(route, name, collection, command, duration_ms, returned, event.reply)
+
+    def failed(self, event) -> None:
+        with self._lock:
+            command, collection = self._pending.pop(self._key(event), ({}, "-"))
+
+        duration_ms = event.duration_micros / 1000
+        context = get_request_context()
+        if context is not None:
+            context.record_command(duration_ms, self._shape_for(context, event.command_name, collection, command))
+        metrics.incr("db.command_failures", command=event.command_name)
+
+    @staticmethod
+    def _shape_for(context, command_name: str, collection: str, command: Mapping) -> Optional[str]:
+        """請求需要追蹤查詢形狀時返回形狀鍵"""
+        if not context.track_queries or command_name in _UNTRACKED_COMMANDS:
+            return None
+        return query_shape_key(command_name, collection, command)
+
+    def _log_slow_query(
+        self,
+        route: str,
+        command_name: str,
+        collection: str,
+        command: Mapping,
+        duration_ms: float,
+        returned: int,
+        reply: Mapping,
+    ) -> None:
+        """記錄慢查詢（查詢形狀不含字面值，可直接用於彙總）"""
+        shape = json.dumps(command_query_shape(command_name, command), ensure_ascii=False, default=str)
+        message = (
+            f"慢查詢 {duration_ms:.1f}ms route={route} command={command_name} "
+            f"collection={collection} docs={returned} shape={shape}"
+        )
+        plan = plan_summary(reply)
+        if plan:
+            message += f" plan={plan}"
+        slow_query_logger.warning(message)
+
+    def stats(self) -> Dict[str, Any]:
+        """監聽器即時狀態（供 /metrics 使用）"""
+        with self._lock:
+            return {"in_flight": len(self._pending), "slow_query_ms": self.slow_query_ms}
+
+
+# 全域連線池監聽器
+pool_metrics_listener = PoolMetricsListener()
+metrics.register_collector("mongo_pool", pool_metrics_listener.stats)
+
+# 全域命令監聽器
+command_metrics_listener = CommandMetricsListener(slow_query_ms=settings.DB_SLOW_QUERY_MS)
+metrics.register_collector("mongo_commands", command_metrics_listener.stats)
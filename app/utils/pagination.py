@@ -0,0 +1,283 @@
+"""
+分頁工具模組
+
+提供偏移量（skip/limit）與鍵集（keyset/cursor）兩種分頁方式：
+- 偏移量分頁適合前幾頁，頁數越深伺服器需要跳過的文檔越多
+- 鍵集分頁以「上一頁最後一筆的排序值 + _id」作為游標，
+  使用範圍條件直接定位，與頁數無關
+
+游標是不透明的 base64url 字串，內容綁定排序欄位與方向。
+游標由客戶端傳回且未簽章，排序值只接受純量、ObjectId 與 datetime，
+避免 {"$gt": ""} 之類的查詢運算子被帶進範圍條件
+
+當頁資料一律以 find().sort().limit() 取得，可以沿著 (排序欄位, _id) 複合索引定位；
+總數與當頁查詢並行計算，有三種模式（見 TotalMode）：
+- exact: count_documents
+- estimated: 短期快取的計數（COUNT_CACHE_TTL_SECONDS 內重複的篩選條件不再計數）
+- none: 不計算總數，多取一筆判斷是否有下一頁
+"""
+
+import asyncio
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import Decimal128, ObjectId, json_util
+from bson.errors import InvalidId
+
+from app.config import settings
+from app.middleware.error_handler import BadRequestException
+from app.models.common import TotalMode
+from app.utils.cache import TTLCache
+from app.utils.metrics import metrics
+
+
+# 估算模式的計數快取：鍵為 (集合名稱, 正規化後的查詢條件)
+_count_cache = TTLCache(
+    ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS,
+    max_entries=settings.COUNT_CACHE_MAX_ENTRIES
+)
+
+
+# 游標中允許的排序值類型（None 另外允許）
+_CURSOR_VALUE_TYPES = (str, int, float, datetime, ObjectId, Decimal128)
+
+
+def _sort_direction_name(direction: int) -> str:
+    """將排序方向轉換為游標中使用的字串"""
+    return "asc" if direction == 1 else "desc"
+
+
+def encode_cursor(sort_field: str, sort_direction: int, document: Dict[str, Any]) -> str:
+    """
+    根據文檔產生下一頁游標
+    
+    Args:
+        sort_field: 排序欄位
+        sort_direction: 排序方向（1 或 -1）
+        document: 當前頁最後一筆文檔（需包含 _id 與排序欄位）
+    
+    Returns:
+        str: 不透明游標字串
+    
+    Examples:
+        >>> cursor = encode_cursor("created_at", -1, {"_id": ObjectId(), "created_at": datetime.utcnow()})
+    """
+    payload = {
+        "f": sort_field,
+        "d": _sort_direction_name(sort_direction),
+        "v": document.get(sort_field),
+        "id": document["_id"],
+    }
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str, sort_direction: int) -> Tuple[Any, ObjectId]:
+    """
+    解析游標
+    
+    Args:
+        cursor: 游標字串
+        sort_field: 當前請求的排序欄位
+        sort_direction: 當前請求的排序方向
+    
+    Returns:
+        Tuple[Any, ObjectId]: (最後一筆的排序值, 最後一筆的 _id)
+    
+    Raises:
+        BadRequestException: 游標格式錯誤、排序值類型不允許或與排序條件不一致
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = payload["id"]
+        if not isinstance(last_id, ObjectId):
+            last_id = ObjectId(last_id)
+        field = payload["f"]
+        direction = payload["d"]
+        value = payload.get("v")
+        if value is not None and not isinstance(value, _CURSOR_VALUE_TYPES):
+            raise TypeError("unsupported cursor value")
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise BadRequestException(
+            message="Invalid pagination cursor",
+            details={"cursor": cursor}
+        )
+    
+    if field != sort_field or direction != _sort_direction_name(sort_direction):
+        raise BadRequestException(
+            message="Pagination cursor does not match the requested sort",
+            details={
+                "cursor_sort_by": field,
+                "cursor_order": direction,
+                "sort_by": sort_field,
+                "order": _sort_direction_name(sort_direction)
+            }
+        )
+    
+    return value, last_id
+
+
+def build_keyset_filter(
+    sort_field: str,
+    sort_direction: int,
+    last_value: Any,
+    last_id: ObjectId
+) -> Dict[str, Any]:
+    """
+    建立「排在游標之後」的範圍查詢條件
+    
+    排序為 (sort_field, _id)，方向相同；MongoDB 中 null/缺失值排在最前，
+    因此降序時需要把 null 放在最後一段
+    
+    Args:
+        sort_field: 排序欄位
+        sort_direction: 排序方向（1 或 -1）
+        last_value: 上一頁最後一筆的排序值
+        last_id: 上一頁最後一筆的 _id
+    
+    Returns:
+        Dict[str, Any]: 查詢條件
+    """
+    if sort_field == "_id":
+        op = "$gt" if sort_direction == 1 else "$lt"
+        return {"_id": {op: last_id}}
+    
+    id_op = "$gt" if sort_direction == 1 else "$lt"
+    
+    if last_value is None:
+        if sort_direction == 1:
+            # 升序：null 之後是同為 null 的較大 _id，以及所有非 null 值
+            return {"$or": [
+                {sort_field: None, "_id": {id_op: last_id}},
+                {sort_field: {"$ne": None}},
+            ]}
+        # 降序：null 排在最後，只剩同為 null 的較小 _id
+        return {sort_field: None, "_id": {id_op: last_id}}
+    
+    value_op = "$gt" if sort_direction == 1 else "$lt"
+    branches: List[Dict[str, Any]] = [
+        {sort_field: {value_op: last_value}},
+        {sort_field: last_value, "_id": {id_op: last_id}},
+    ]
+    if sort_direction == -1:
+        branches.append({sort_field: None})
+    return {"$or": branches}
+
+
+def build_sort(sort_field: str, sort_direction: int) -> List[Tuple[str, int]]:
+    """
+    建立穩定排序（以 _id 作為次要排序鍵）
+    
+    Args:
+        sort_field: 排序欄位
+        sort_direction: 排序方向
+    
+    Returns:
+        List[Tuple[str, int]]: 排序規格
+    """
+    if sort_field == "_id":
+        return [("_id", sort_direction)]
+    return [(sort_field, sort_direction), ("_id", sort_direction)]
+
+
+def _count_cache_key(collection, query: Dict[str, Any]) -> Tuple[str, str]:
+    """以集合名稱與排序過鍵值的查詢條件作為計數快取鍵"""
+    return collection.name, json_util.dumps(query, sort_keys=True)
+
+
+async def count_documents(collection, query: Dict[str, Any], total_mode: TotalMode) -> Optional[int]:
+    """
+    依總數模式計算查詢結果數量
+    
+    Args:
+        collection: MongoDB 集合
+        query: 查詢條件
+        total_mode: 總數計算模式
+    
+    Returns:
+        Optional[int]: 總數；none 模式返回 None
+    """
+    if total_mode == TotalMode.NONE:
+        return None
+    
+    if total_mode == TotalMode.ESTIMATED:
+        # 列表查詢至少帶有 is_deleted 等條件，集合元資料（estimated_document_count）
+        # 會把已刪除的文檔算進去，因此改用短期快取的計數
+        key = _count_cache_key(collection, query)
+        cached = _count_cache.get(key)
+        if cached is not None:
+            metrics.incr("pagination.count_cache.hits", collection=collection.name)
+            return cached
+        metrics.incr("pagination.count_cache.misses", collection=collection.name)
+        total = await collection.count_documents(query)
+        _count_cache.set(key, total)
+        return total
+    
+    return await collection.count_documents(query)
+
+
+def invalidate_count_cache() -> None:
+    """清空估算模式的計數快取"""
+    _count_cache.clear()
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    sort_direction: int,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+    total_mode: TotalMode = TotalMode.EXACT
+) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+    """
+    查詢一頁資料
+    
+    提供 cursor 時使用鍵集分頁（忽略 page），否則使用偏移量分頁。
+    所有模式都會多取一筆來判斷是否有下一頁，並返回下一頁游標。
+    當頁資料以 find 取得（$facet 子管線無法使用索引，會在記憶體中排序整個結果集），
+    總數依 total_mode 另外計算，與當頁查詢並行執行。
+    
+    Args:
+        collection: MongoDB 集合
+        query: 查詢條件
+        sort_field: 排序欄位
+        sort_direction: 排序方向（1 或 -1）
+        page: 頁碼（偏移量模式）
+        page_size: 每頁數量
+        cursor: 上一頁返回的游標（鍵集模式）
+        projection: 欄位投影（可選）
+        total_mode: 總數計算模式
+    
+    Returns:
+        Tuple[List[Dict], Optional[int], Optional[str]]: (文檔列表, 總數, 下一頁游標)
+    """
+    keyset_filter = None
+    skip = (page - 1) * page_size
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_field, sort_direction)
+        keyset_filter = build_keyset_filter(sort_field, sort_direction, last_value, last_id)
+        skip = 0
+    
+    sort_spec = build_sort(sort_field, sort_direction)
+    
+    page_query = {"$and": [query, keyset_filter]} if keyset_filter else query
+    find_cursor = collection.find(page_query, projection)\
+        .sort(sort_spec)\
+        .skip(skip)\
+        .limit(page_size + 1)
+    documents, total = await asyncio.gather(
+        find_cursor.to_list(length=page_size + 1),
+        count_documents(collection, query, total_mode)
+    )
+    
+    next_cursor = None
+    if len(documents) > page_size:
+        documents = documents[:page_size]
+        next_cursor = encode_cursor(sort_field, sort_direction, documents[-1])
+    
+    return documents, total, next_cursor
@@ -0,0 +1,110 @@
+"""
+查詢預算與 N+1 偵測
+
+開發與測試時使用（QUERY_BUDGET_MODE），依 RequestContext 中累計的命令檢查：
+- 命令預算：路由以 query_budget(n) 宣告的命令數上限
+- 重複查詢：同一查詢形狀在單一請求中執行超過 QUERY_REPEAT_THRESHOLD 次
+  （迴圈中逐項 find_one / update_one 的典型 N+1 模式）
+
+模式：
+- off：不追蹤查詢形狀，也不檢查（正式環境預設）
+- warn：記錄警告並計入 db.query_budget_violations{route,kind}
+- raise：以 500 QUERY_BUDGET_EXCEEDED 取代原本的回應，讓測試直接失敗
+
+Examples:
+    >>> router = APIRouter(prefix="/orders", dependencies=[Depends(query_budget(10))])
+    >>> @router.get("/{order_id}", dependencies=[Depends(query_budget(3))])
+    ... async def get_order(...): ...
+"""
+
+import logging
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.request_context import RequestContext, get_request_context
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMode(str, Enum):
+    """查詢預算模式"""
+    OFF = "off"
+    WARN = "warn"
+    RAISE = "raise"
+
+
+def query_budget_mode() -> QueryBudgetMode:
+    """目前的查詢預算模式（每個請求讀取一次設定，測試中可直接修改 settings）"""
+    return QueryBudgetMode(settings.QUERY_BUDGET_MODE)
+
+
+def query_budget(max_commands: int) -> Callable[[], Any]:
+    """
+    宣告路由的資料庫命令預算
+
+    路由層級的宣告會覆蓋 APIRouter 層級的宣告（FastAPI 先執行 router 的依賴）。
+    預算包含依賴（例如認證查詢用戶）發出的命令。
+
+    Args:
+        max_commands: 單一請求最多執行的資料庫命令數
+
+    Returns:
+        Callable: 用於 Depends 的依賴函數
+    """
+    async def declare_query_budget() -> None:
+        context = get_request_context()
+        if context is not None:
+            context.query_budget = max_commands
+
+    return declare_query_budget
+
+
+def find_violations(context: RequestContext, repeat_threshold: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    檢查請求是否超出命令預算或重複執行同一查詢形狀
+
+    Args:
+        context: 請求上下文
+        repeat_threshold: 同一形狀允許的次數（預設為 QUERY_REPEAT_THRESHOLD）
+
+    Returns:
+        List[Dict]: 違規清單（沒有違規時為空）
+    """
+    if repeat_threshold is None:
+        repeat_threshold = settings.QUERY_REPEAT_THRESHOLD
+
+    violations = []
+    if context.query_budget is not None and context.db_commands > context.query_budget:
+        violations.append({
+            "kind": "budget",
+            "budget": context.query_budget,
+            "commands": context.db_commands,
+        })
+    for shape, count in context.query_shapes.items():
+        if count > repeat_threshold:
+            violations.append({
+                "kind": "repeated_query",
+                "shape": shape,
+                "count": count,
+                "threshold": repeat_threshold,
+            })
+    return violations
+
+
+def report_violations(context: RequestContext, violations: List[Dict[str, Any]]) -> None:
+    """記錄違規日誌與指標"""
+    route = context.route
+    for violation in violations:
+        metrics.incr("db.query_budget_violations", route=route, kind=violation["kind"])
+        if violation["kind"] == "budget":
+            logger.warning(
+                f"查詢預算超出: {context.method} {route} 執行了 {violation['commands']} 個命令"
+                f"（預算 {violation['budget']}）"
+            )
+        else:
+            logger.warning(
+                f"疑似 N+1 查詢: {context.method} {route} 重複執行 {violation['count']} 次 "
+                f"{violation['shape']}"
+            )
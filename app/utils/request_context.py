@@ -0,0 +1,104 @@
+"""
+請求上下文
+
+以 contextvars 保存目前請求的資訊，讓 MongoDB 命令監聽器能把每個命令歸屬到請求：
+- RequestMetricsMiddleware 在請求開始時建立 RequestContext，結束時輸出指標
+- CommandMetricsListener 在命令完成時累加到目前的 RequestContext
+
+Motor 把命令放到執行緒池執行時會複製 contextvars，監聽器取得的是同一個
+RequestContext 物件，因此累加操作以鎖保護。背景任務（例如瀏覽計數寫回）
+沒有請求上下文，其命令只計入全域指標。
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Set
+
+
+class RequestContext:
+    """
+    單一請求的上下文
+
+    Attributes:
+        method: HTTP 方法
+        path: 原始請求路徑
+        db_commands: 已完成的資料庫命令數
+        db_time_ms: 資料庫命令的總耗時（毫秒）
+        track_queries: 是否依查詢形狀計數（查詢預算模式開啟時由中介軟體設定）
+        query_budget: 路由宣告的命令數上限（見 app.utils.query_budget）
+        query_shapes: 各查詢形狀的命令數
+        cache_tags: 回應涉及的快取標籤（見 app.utils.response_cache.tag_response）
+    """
+
+    __slots__ = (
+        "method", "path", "scope", "started_at", "db_commands", "db_time_ms",
+        "track_queries", "query_budget", "query_shapes", "cache_tags", "_lock",
+    )
+
+    def __init__(self, method: str, path: str, scope: Optional[Dict[str, Any]] = None):
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.started_at = time.perf_counter()
+        self.db_commands = 0
+        self.db_time_ms = 0.0
+        self.track_queries = False
+        self.query_budget: Optional[int] = None
+        self.query_shapes: Dict[str, int] = {}
+        self.cache_tags: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        """
+        路由模板（例如 /api/v1/products/{product_id}）
+
+        FastAPI 完成路由後把匹配的路由寫入 scope["route"]；
+        尚未匹配（例如 404）時返回原始路徑以外的固定值，避免指標標籤無限增長
+        """
+        route = self.scope.get("route") if self.scope is not None else None
+        path_format = getattr(route, "path_format", None) or getattr(route, "path", None)
+        return path_format or "unmatched"
+
+    @property
+    def elapsed_ms(self) -> float:
+        """請求開始至今的耗時（毫秒）"""
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def record_command(self, duration_ms: float, shape: Optional[str] = None) -> None:
+        """
+        累加一個已完成的資料庫命令
+
+        Args:
+            duration_ms: 命令耗時（毫秒）
+            shape: 查詢形狀鍵（不追蹤形狀時為 None）
+        """
+        with self._lock:
+            self.db_commands += 1
+            self.db_time_ms += duration_ms
+            if shape is not None:
+                self.query_shapes[shape] = self.query_shapes.get(shape, 0) + 1
+
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar("current_request", default=None)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """目前的請求上下文（不在請求中時返回 None）"""
+    return _current_request.get()
+
+
+def set_request_context(context: Optional[RequestContext]):
+    """
+    設定目前的請求上下文
+
+    Returns:
+        Token: 用於 reset_request_context 還原
+    """
+    return _current_request.set(context)
+
+
+def reset_request_context(token) -> None:
+    """還原 set_request_context 之前的上下文"""
+    _current_request.reset(token)
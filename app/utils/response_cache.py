@@ -0,0 +1,324 @@
+"""
+HTTP 回應快取模組
+
+快取與用戶無關的匿名 GET 端點（商品列表、搜尋、分類）的完整回應：
+- 鍵：請求路徑 + 正規化的查詢參數 + 協商後的回應媒體類型（JSON / MessagePack / NDJSON）
+- 值：已編碼的回應主體（bytes）與 ETag；壓縮版本在第一次需要時產生並一併保存，
+  之後的命中不需要重新壓縮
+- 寫入後 RESPONSE_CACHE_TTL_SECONDS 內為新鮮，之後的 RESPONSE_CACHE_STALE_SECONDS 內
+  仍可返回舊內容並在背景重新產生（stale-while-revalidate）
+- 以標籤失效：端點以 tag_response 標記回應涉及的商品與分類，
+  ProductService 寫入後呼叫 invalidate_product
+
+中介軟體見 app.middleware.response_cache。
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.request_context import get_request_context
+
+# 不限分類的商品列表與搜尋（新增商品或上下架時失效）
+PRODUCT_LISTS_TAG = "products"
+# 分類列表
+CATEGORIES_TAG = "categories"
+
+# 標籤失效時間保留多久（只需涵蓋仍在產生中的回應）
+_INVALIDATION_MEMORY_SECONDS = 60.0
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+def product_tag(product_id: Any) -> str:
+    """單一商品的快取標籤"""
+    return f"product:{product_id}"
+
+
+def category_tag(category: str) -> str:
+    """單一分類的快取標籤"""
+    return f"category:{category}"
+
+
+def tag_response(*tags: str) -> None:
+    """
+    標記目前請求的回應涉及的快取標籤（不在請求中時忽略）
+
+    Examples:
+        >>> tag_response(category_tag("筆記型電腦"), *(product_tag(p.id) for p in products))
+    """
+    context = get_request_context()
+    if context is not None:
+        context.cache_tags.update(tags)
+
+
+def normalize_query(query_string: bytes) -> str:
+    """
+    正規化查詢參數：依名稱與值排序並移除空值，參數順序不同的請求共用同一條目
+
+    Examples:
+        >>> normalize_query(b"page=1&category=%E5%91%A8%E9%82%8A&search=")
+        'category=%E5%91%A8%E9%82%8A&page=1'
+    """
+    pairs = parse_qsl(query_string.decode("latin-1"), keep_blank_values=False)
+    return urlencode(sorted(pairs))
+
+
+def make_etag(body: bytes) -> str:
+    """依主體內容產生弱 ETag（同一內容的各壓縮版本共用）"""
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 是否包含指定的 ETag（弱比較）"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class CachedResponse:
+    """快取中的一個回應"""
+
+    __slots__ = (
+        "key", "route", "status", "headers", "body", "etag", "tags",
+        "fresh_until", "stale_until", "stored_at", "variants", "revalidating",
+    )
+
+    def __init__(
+        self,
+        key: Hashable,
+        route: str,
+        status: int,
+        headers: RawHeaders,
+        body: bytes,
+        tags: Set[str],
+        ttl_seconds: float,
+        stale_seconds: float
+    ):
+        now = time.monotonic()
+        self.key = key
+        self.route = route
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = make_etag(body)
+        self.tags = tags
+        self.stored_at = now
+        self.fresh_until = now + ttl_seconds
+        self.stale_until = self.fresh_until + stale_seconds
+        self.variants: Dict[str, bytes] = {}
+        self.revalidating = False
+
+    @property
+    def size(self) -> int:
+        """主體與所有壓縮版本的位元組數"""
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (time.monotonic() if now is None else now) < self.fresh_until
+
+    def age(self) -> int:
+        """寫入至今的秒數（Age 標頭）"""
+        return int(time.monotonic() - self.stored_at)
+
+
+class ResponseCache:
+    """
+    回應快取
+
+    以條目數與位元組數限制大小（LRU 淘汰），並維護標籤到條目的索引
+
+    Examples:
+        >>> cache = ResponseCache(max_entries=1000, max_bytes=32 * 1024 * 1024, ttl_seconds=10, stale_seconds=30)
+        >>> started_at = time.monotonic()
+        >>> entry = cache.store(key, "/api/v1/products", 200, headers, body, {"products"}, started_at)
+        >>> cache.invalidate_tags(["products"])
+        1
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, stale_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.enabled = True
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        self._bytes = 0
+
+    @property
+    def cache_control(self) -> str:
+        """回應的 Cache-Control 標頭（讓 CDN 與瀏覽器也能快取）"""
+        return f"public, max-age={int(self.ttl_seconds)}, stale-while-revalidate={int(self.stale_seconds)}"
+
+    def lookup(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        讀取條目（新鮮或仍在 stale 期間內）
+
+        Returns:
+            Optional[CachedResponse]: 條目，不存在或已超過 stale 期間時返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= time.monotonic():
+            self._remove(key)
+            metrics.incr("response_cache.expirations", route=entry.route)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def store(
+        self,
+        key: Hashable,
+        route: str,
+        status: int,
+        headers: RawHeaders,
+        body: bytes,
+        tags: Iterable[str],
+        started_at: float
+    ) -> Optional[CachedResponse]:
+        """
+        寫入條目
+
+        回應開始產生（started_at，time.monotonic）之後任何標籤被失效時不寫入，
+        避免失效前讀到的舊資料在失效後才被快取
+
+        Returns:
+            Optional[CachedResponse]: 新條目，未寫入時返回 None
+        """
+        tags = set(tags)
+        if any(self._invalidated_at.get(tag, 0.0) >= started_at for tag in tags):
+            metrics.incr("response_cache.store_skipped", route=route, reason="invalidated")
+            return None
+        if len(body) > self.max_bytes:
+            metrics.incr("response_cache.store_skipped", route=route, reason="too_large")
+            return None
+
+        self._remove(key)
+        entry = CachedResponse(key, route, status, headers, body, tags, self.ttl_seconds, self.stale_seconds)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        self._evict()
+        return entry
+
+    def add_variant(self, entry: CachedResponse, encoding: str, data: bytes) -> bytes:
+        """保存條目的壓縮版本，返回 data"""
+        if self._entries.get(entry.key) is entry and encoding not in entry.variants:
+            entry.variants[encoding] = data
+            self._bytes += len(data)
+            self._evict()
+        return data
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        使帶有任一標籤的條目失效
+
+        Returns:
+            int: 移除的條目數
+        """
+        now = time.monotonic()
+        removed = 0
+        for tag in tags:
+            self._invalidated_at[tag] = now
+            for key in list(self._tags.pop(tag, ())):
+                if self._remove(key):
+                    removed += 1
+        if len(self._invalidated_at) > 1024:
+            cutoff = now - _INVALIDATION_MEMORY_SECONDS
+            self._invalidated_at = {tag: at for tag, at in self._invalidated_at.items() if at >= cutoff}
+        if removed:
+            metrics.incr("response_cache.invalidations", removed)
+        return removed
+
+    def clear(self) -> None:
+        """清空快取"""
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+
+    def _evict(self) -> None:
+        """超過上限時淘汰最久未使用的條目"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            metrics.incr("response_cache.evictions")
+
+    def _remove(self, key: Hashable) -> bool:
+        """移除條目並更新位元組數與標籤索引"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """快取即時狀態（供 /metrics 使用）"""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "tags": len(self._tags),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    stale_seconds=settings.RESPONSE_CACHE_STALE_SECONDS
+)
+response_cache.enabled = settings.RESPONSE_CACHE_ENABLED
+metrics.register_collector("response_cache", response_cache.stats)
+
+
+def invalidate_product(
+    product_id: Optional[Any] = None,
+    categories: Iterable[Optional[str]] = (),
+    lists: bool = False
+) -> int:
+    """
+    商品寫入後使相關的回應失效
+
+    Args:
+        product_id: 商品 ID（包含此商品的列表頁）
+        categories: 受影響的分類（新增或移出分類時，該分類的列表頁）
+        lists: 商品是否可能出現在原本沒有它的列表中（新增、上下架、刪除），
+            為 True 時同時使不限分類的列表與分類列表失效
+
+    Returns:
+        int: 移除的條目數
+    """
+    tags = {category_tag(category) for category in categories if category}
+    if product_id is not None:
+        tags.add(product_tag(product_id))
+    if lists:
+        tags.update((PRODUCT_LISTS_TAG, CATEGORIES_TAG))
+    return response_cache.invalidate_tags(tags)
@@ -4,15 +4,38 @@
 提供密碼加密、JWT Token 生成和驗證等安全相關功能
 """
 
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.middleware.error_handler import ServiceUnavailableException
+from app.utils.cache import BoundedCache
+from app.utils.metrics import metrics
 
 # 密碼加密上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt 專用執行緒池（首次使用時建立）與執行中/排隊中的任務數
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_pending = 0
+
+# 已驗證 token 的快取：sha256(token) -> (exp, payload)
+# 條目存活時間上限為 token 的最長有效期，讀取時再依各自的 exp 判斷是否過期
+_TOKEN_ENTRY_BYTES = 512
+_token_cache = BoundedCache(
+    "jwt",
+    max_entries=settings.JWT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.JWT_CACHE_MAX_ENTRIES * _TOKEN_ENTRY_BYTES,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    sizeof=lambda _: _TOKEN_ENTRY_BYTES
+)
+_token_cache.enabled = settings.JWT_CACHE_ENABLED
+
 
 def hash_password(password: str) -> str:
     """
@@ -65,6 +88,110 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _get_password_executor() -> ThreadPoolExecutor:
+    """獲取 bcrypt 執行緒池"""
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt"
+        )
+    return _password_executor
+
+
+async def _run_password_task(operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    在 bcrypt 執行緒池中執行任務
+    
+    執行中與排隊中的任務數達到 PASSWORD_HASH_MAX_PENDING 時直接拒絕，
+    避免登入風暴時請求無限堆積
+    
+    Args:
+        operation: 操作名稱（hash / verify），用於指標標籤
+        fn: 同步函數
+        *args: 函數參數
+        
+    Returns:
+        Any: 函數返回值
+        
+    Raises:
+        ServiceUnavailableException: 排隊已滿
+    """
+    global _password_pending
+    if _password_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        metrics.incr("auth.password_hash.rejected", operation=operation)
+        raise ServiceUnavailableException(
+            message="Too many concurrent authentication requests, please retry later",
+            details={"retry_after_seconds": 1}
+        )
+    
+    _password_pending += 1
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_executor(), fn, *args)
+    finally:
+        _password_pending -= 1
+        metrics.observe(
+            "auth.password_hash_ms",
+            (time.perf_counter() - start) * 1000,
+            operation=operation
+        )
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    hash_password 的非同步版本（在 bcrypt 執行緒池中執行）
+    
+    Args:
+        password: 明文密碼
+        
+    Returns:
+        str: 哈希後的密碼
+        
+    Raises:
+        ServiceUnavailableException: 排隊已滿
+    """
+    return await _run_password_task("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password 的非同步版本（在 bcrypt 執行緒池中執行）
+    
+    Args:
+        plain_password: 明文密碼
+        hashed_password: 哈希後的密碼
+        
+    Returns:
+        bool: 密碼是否匹配
+        
+    Raises:
+        ServiceUnavailableException: 排隊已滿
+    """
+    return await _run_password_task("verify", verify_password, plain_password, hashed_password)
+
+
+def password_hasher_stats() -> Dict[str, Any]:
+    """bcrypt 執行緒池即時狀態（供 /metrics 使用）"""
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "pending": _password_pending,
+    }
+
+
+def shutdown_password_executor() -> None:
+    """關閉 bcrypt 執行緒池（應用關閉時呼叫）"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True)
+        _password_executor = None
+
+
+metrics.register_collector("password_hasher", password_hasher_stats)
+
+
 def create_access_token(
     data: Dict[str, Any],
     expires_delta: Optional[timedelta] = None
@@ -107,10 +234,38 @@ def create_access_token(
     return encoded_jwt
 
 
+def build_token_claims(user: Any) -> Dict[str, Any]:
+    """
+    構造 access token 的聲明
+    
+    除 sub（email）與 role 外，還包含用戶 ID、啟用狀態與 token 版本，
+    無狀態認證模式下 get_current_user 只依這些聲明構造身份
+    
+    Args:
+        user: 用戶（UserInDB 或 AuthPrincipal）
+        
+    Returns:
+        Dict[str, Any]: 傳給 create_access_token 的數據
+        
+    Example:
+        >>> token = create_access_token(build_token_claims(user))
+    """
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role.value,
+        "active": user.is_active,
+        "ver": user.token_version
+    }
+
+
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
     解碼並驗證 JWT Token
     
+    驗證成功的 payload 以 token 的 sha256 為鍵快取到其 exp 為止，
+    同一 token 的後續請求不再重複解析與 HMAC 驗證（JWT_CACHE_ENABLED 關閉時不快取）
+    
     Args:
         token: JWT token 字符串
         
@@ -123,15 +278,47 @@ def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
         >>> print(payload['sub'])
         user@example.com
     """
+    cache_key = None
+    if _token_cache.enabled:
+        cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+        entry = _token_cache.get(cache_key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at is None or expires_at > time.time():
+                return dict(payload)
+            _token_cache.invalidate(cache_key)
+    
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+    
+    if cache_key is not None:
+        _token_cache.set(cache_key, (payload.get("exp"), payload))
+        return dict(payload)
+    return payload
+
+
+def clear_token_cache() -> None:
+    """清空已驗證 token 的快取"""
+    _token_cache.clear()
+
+
+def set_token_cache_enabled(enabled: bool) -> None:
+    """開啟或關閉已驗證 token 的快取"""
+    _token_cache.enabled = enabled
+
+
+def token_cache_stats() -> Dict[str, Any]:
+    """已驗證 token 快取的即時狀態（供 /metrics 使用）"""
+    return _token_cache.stats()
+
+
+metrics.register_collector("jwt_cache", token_cache_stats)
 
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
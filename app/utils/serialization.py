@@ -0,0 +1,110 @@
+"""
+可信序列化工具模組
+
+資料庫中的文檔由本服務寫入，寫入前已經過模型驗證，讀取時不需要再驗證一次：
+- construct_model: 以 model_construct 由文檔建立模型（含巢狀模型），不執行欄位驗證器
+- TrustedResponse: 路由直接返回 Response 時，FastAPI 不會再依 response_model
+  驗證與轉換一次，內容（可包含模型實例）直接交給編碼器（見 app.utils.encoders）；
+  OpenAPI 文件仍依路由宣告的 response_model 產生
+
+只用於資料來源可信的讀取路徑，請求內容仍必須經過正常的模型驗證。
+"""
+
+import enum
+import types
+import typing
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.utils.encoders import EncodedResponse
+
+M = TypeVar("M", bound=BaseModel)
+
+# 每個模型需要轉換的欄位：{模型類別: {欄位名稱: 轉換函數}}
+_field_converters: Dict[type, Dict[str, Callable[[Any], Any]]] = {}
+
+
+def _field_converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """
+    依欄位型別建立轉換函數（不需要轉換時返回 None）
+
+    model_construct 不會轉換型別，以下欄位需要自行處理才能正確序列化：
+    - 巢狀模型（文檔中是 dict）
+    - 枚舉（文檔中是字串）
+    - float（文檔中可能是 int）
+    """
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        inner = _field_converter(args[0]) if len(args) == 1 else None
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+
+    if origin is list:
+        args = typing.get_args(annotation)
+        inner = _field_converter(args[0]) if args else None
+        if inner is None:
+            return None
+        return lambda value: [inner(item) for item in value]
+
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return lambda value: value if isinstance(value, annotation) else construct_model(annotation, value)
+        if issubclass(annotation, enum.Enum):
+            return lambda value: value if isinstance(value, annotation) else annotation(value)
+        if annotation is float:
+            return lambda value: float(value) if type(value) is int else value
+
+    return None
+
+
+def _converters_for(model: Type[BaseModel]) -> Dict[str, Callable[[Any], Any]]:
+    """取得模型的欄位轉換函數（依模型類別快取）"""
+    converters = _field_converters.get(model)
+    if converters is None:
+        converters = {}
+        for name, field in model.model_fields.items():
+            converter = _field_converter(field.annotation)
+            if converter is not None:
+                converters[name] = converter
+        _field_converters[model] = converters
+    return converters
+
+
+def construct_model(model: Type[M], document: Dict[str, Any]) -> M:
+    """
+    由可信的文檔建立模型實例（不驗證）
+
+    未宣告的欄位（例如 is_deleted、name_normalized）會被忽略，
+    未提供的選填欄位使用預設值
+
+    Args:
+        model: 模型類別
+        document: 欄位名稱對應值的字典（不會被修改）
+
+    Returns:
+        模型實例
+
+    Examples:
+        >>> order = construct_model(OrderResponse, {"id": "...", "items": [{...}], ...})
+    """
+    values = dict(document)
+    for name, convert in _converters_for(model).items():
+        value = values.get(name)
+        if value is not None:
+            values[name] = convert(value)
+    return model.model_construct(**values)
+
+
+class TrustedResponse(EncodedResponse):
+    """
+    可信回應
+
+    內容直接交給編碼器（依 Accept 協商 JSON / MessagePack / NDJSON），
+    不經過 response_model 驗證與 jsonable_encoder
+
+    Examples:
+        >>> return TrustedResponse(paginated_response(items=orders, page=1, per_page=20, total=100))
+    """
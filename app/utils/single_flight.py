@@ -0,0 +1,192 @@
+"""
+單飛（single-flight）請求合併模組
+
+同一時間對同一個鍵的多個相同讀取只執行一次，其餘呼叫端等待並共用結果：
+- 熱門商品被活動頁引用時，同一毫秒內上百個相同的詳情或列表查詢只送出一個資料庫命令
+- 快取條目過期的瞬間，只有一個呼叫端重新產生，避免快取擊穿（cache stampede）
+
+取消安全：共用的呼叫在獨立的 Task 中執行，單一呼叫端被取消（例如客戶端斷線）
+只會取消它自己的等待；所有等待者都離開時才取消共用的呼叫。
+逾時以鍵為單位：共用的呼叫超過時限時被取消，所有等待者收到 asyncio.TimeoutError，
+之後的呼叫重新開始。
+
+共用的結果是同一個物件，呼叫端不可修改（需要修改時先複製）。
+合併次數記錄在指標 single_flight.coalesced{group} 中。
+"""
+
+import asyncio
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+T = TypeVar("T")
+
+
+def _freeze(value: Any) -> Hashable:
+    """把參數轉成可雜湊且與順序無關的形式"""
+    if isinstance(value, BaseModel):
+        return _freeze(value.model_dump())
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    return value
+
+
+def flight_key(method: str, *args: Any, **kwargs: Any) -> Hashable:
+    """
+    由方法名稱與正規化的參數產生鍵
+
+    Pydantic 模型依欄位值、字典依鍵排序、枚舉取值，因此等價的參數得到相同的鍵
+
+    Examples:
+        >>> flight_key("get_products", ProductListFilter(category="books"), page=1)
+        ('get_products', (...), (('page', 1),))
+    """
+    return (method, _freeze(args), _freeze(kwargs))
+
+
+class _Flight:
+    """一個進行中的共用呼叫"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    單飛群組
+
+    Examples:
+        >>> product_flights = SingleFlight("products", timeout_seconds=5)
+        >>> document = await product_flights.do(flight_key("find_product", product_id), load_product)
+    """
+
+    def __init__(self, name: str, timeout_seconds: Optional[float] = None):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.enabled = True
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None
+    ) -> T:
+        """
+        執行或加入同一個鍵的共用呼叫
+
+        Args:
+            key: 鍵（見 flight_key）
+            factory: 產生 awaitable 的函式，只有第一個呼叫端會執行
+            timeout: 此鍵的逾時秒數（只在開始新的共用呼叫時生效，預設為 timeout_seconds）
+
+        Returns:
+            T: 共用呼叫的結果（不可修改）
+
+        Raises:
+            asyncio.TimeoutError: 共用呼叫逾時
+            Exception: 共用呼叫拋出的例外（所有等待者都會收到）
+        """
+        if not self.enabled:
+            return await factory()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            timeout = self.timeout_seconds if timeout is None else timeout
+            flight = _Flight(asyncio.ensure_future(self._run(key, factory, timeout)))
+            self._flights[key] = flight
+            self.calls += 1
+            metrics.incr("single_flight.calls", group=self.name)
+        else:
+            self.coalesced += 1
+            metrics.incr("single_flight.coalesced", group=self.name)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # 只取消這個呼叫端的等待；最後一個等待者離開時才取消共用的呼叫
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight.task)
+            raise
+
+    async def _run(self, key: Hashable, factory: Callable[[], Awaitable[T]], timeout: Optional[float]) -> T:
+        try:
+            if timeout is None:
+                return await factory()
+            return await asyncio.wait_for(factory(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            metrics.incr("single_flight.timeouts", group=self.name)
+            raise
+        finally:
+            self._forget(key, asyncio.current_task())
+
+    def _forget(self, key: Hashable, task: Optional["asyncio.Task"]) -> None:
+        """移除鍵（只移除屬於指定 Task 的共用呼叫，避免誤刪之後開始的新呼叫）"""
+        flight = self._flights.get(key)
+        if flight is not None and flight.task is task:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        """進行中的共用呼叫數"""
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        """群組即時狀態（供 /metrics 使用）"""
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "timeout_seconds": self.timeout_seconds,
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight_group(name: str, timeout_seconds: Optional[float] = None) -> SingleFlight:
+    """
+    取得（或建立）具名的單飛群組，設定來自 SINGLE_FLIGHT_*
+
+    Args:
+        name: 群組名稱（指標的 group 標籤）
+        timeout_seconds: 預設逾時秒數（預設為 SINGLE_FLIGHT_TIMEOUT_SECONDS）
+    """
+    group = _groups.get(name)
+    if group is None:
+        group = SingleFlight(
+            name,
+            settings.SINGLE_FLIGHT_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+        )
+        group.enabled = settings.SINGLE_FLIGHT_ENABLED
+        _groups[name] = group
+    return group
+
+
+def single_flight_stats() -> Dict[str, Any]:
+    """各群組的即時狀態（供 /metrics 輸出）"""
+    return {name: group.stats() for name, group in _groups.items()}
+
+
+metrics.register_collector("single_flight", single_flight_stats)
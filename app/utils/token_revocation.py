@@ -0,0 +1,186 @@
+"""
+Token 撤銷清單
+
+無狀態認證模式下，get_current_user 只驗證 JWT 簽名與聲明，不查詢資料庫。
+登出、角色變更、停用、修改密碼時，用戶的 token_version 會遞增，
+並在 token_revocations 集合寫入一筆 {_id: user_id, min_version}：
+- 版本低於 min_version 的 token 一律視為已撤銷
+- 記錄在最後一個可能有效的 token 過期後由 TTL 索引自動刪除，集合保持很小
+- 各進程在記憶體中保存 user_id -> min_version，並定期從集合重新載入；
+  本進程發起的撤銷立即生效，其他進程最遲在一個刷新間隔後生效
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class TokenRevocationList:
+    """
+    記憶體中的 token 撤銷清單
+
+    Examples:
+        >>> await token_revocations.start(db.token_revocations)
+        >>> await token_revocations.revoke(db.token_revocations, user_id, 3, reason="logout")
+        >>> token_revocations.is_revoked(user_id, 2)
+        True
+        >>> await token_revocations.stop()
+    """
+
+    def __init__(self, refresh_interval: float):
+        """
+        Args:
+            refresh_interval: 從集合重新載入的間隔（秒）
+        """
+        self.refresh_interval = refresh_interval
+        self._min_versions: Dict[str, int] = {}
+        # 本進程發起的撤銷：user_id -> (min_version, 時間)，避免被並發的重新載入覆蓋
+        self._local: Dict[str, Tuple[int, float]] = {}
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_refresh: Optional[datetime] = None
+
+    @property
+    def running(self) -> bool:
+        """是否已啟動背景刷新"""
+        return self._task is not None and not self._task.done()
+
+    def is_revoked(self, user_id: str, token_version: int) -> bool:
+        """
+        判斷 token 是否已撤銷
+
+        Args:
+            user_id: 用戶 ID
+            token_version: token 中的版本號
+
+        Returns:
+            bool: 版本低於撤銷清單中的最低有效版本時返回 True
+        """
+        return token_version < self._min_versions.get(user_id, 0)
+
+    async def revoke(
+        self,
+        collection,
+        user_id: str,
+        min_version: int,
+        reason: str
+    ) -> None:
+        """
+        撤銷用戶版本低於 min_version 的所有 token
+
+        Args:
+            collection: token_revocations 集合
+            user_id: 用戶 ID
+            min_version: 最低有效版本（即用戶目前的 token_version）
+            reason: 撤銷原因（logout / role_change / deactivated / password_change）
+        """
+        if min_version > self._min_versions.get(user_id, 0):
+            self._min_versions[user_id] = min_version
+
+        now = datetime.utcnow()
+        await collection.update_one(
+            {"_id": user_id},
+            {
+                # 並發撤銷時保留較大的版本
+                "$max": {"min_version": min_version},
+                "$set": {
+                    "reason": reason,
+                    "revoked_at": now,
+                    # 此時間之後，舊版本的 token 都已自然過期
+                    "expires_at": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+                }
+            },
+            upsert=True
+        )
+        # 寫入完成後才記錄時間：之前開始的重新載入可能讀不到這筆記錄
+        self._local[user_id] = (min_version, time.monotonic())
+        metrics.incr("auth.token_revocations", reason=reason)
+
+    async def refresh(self) -> int:
+        """
+        從集合重新載入撤銷清單
+
+        Returns:
+            int: 載入的記錄數
+        """
+        if self._collection is None:
+            return 0
+
+        started = time.monotonic()
+        min_versions: Dict[str, int] = {}
+        async for record in self._collection.find(
+            {"expires_at": {"$gt": datetime.utcnow()}},
+            {"min_version": 1}
+        ):
+            min_versions[str(record["_id"])] = record["min_version"]
+
+        # 載入期間本進程發起的撤銷可能不在結果中，合併後再替換
+        self._local = {
+            user_id: entry for user_id, entry in self._local.items()
+            if entry[1] >= started
+        }
+        for user_id, (min_version, _) in self._local.items():
+            if min_version > min_versions.get(user_id, 0):
+                min_versions[user_id] = min_version
+
+        self._min_versions = min_versions
+        self.last_refresh = datetime.utcnow()
+        return len(min_versions)
+
+    async def start(self, collection) -> None:
+        """
+        載入撤銷清單並啟動背景刷新
+
+        Args:
+            collection: token_revocations 集合
+        """
+        if self.running:
+            return
+        self._collection = collection
+        # TTL 索引宣告於 app/indexes.py，撤銷清單依賴它清除過期紀錄，因此在此確保存在
+        from app.indexes import index_registry
+        await index_registry.ensure(collection)
+        count = await self.refresh()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Token 撤銷清單已載入: {count} 筆，刷新間隔 {self.refresh_interval}s")
+
+    async def stop(self) -> None:
+        """停止背景刷新"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """定期重新載入"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                metrics.incr("auth.token_revocations.refresh_errors")
+                logger.error(f"Token 撤銷清單刷新失敗，繼續使用上一份: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """撤銷清單即時狀態（供 /metrics 使用）"""
+        return {
+            "running": self.running,
+            "entries": len(self._min_versions),
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+        }
+
+
+# 全域撤銷清單
+token_revocations = TokenRevocationList(
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS
+)
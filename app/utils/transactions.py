@@ -0,0 +1,171 @@
+"""
+MongoDB 事務執行引擎
+
+- 啟動時偵測部署是否支援事務（結果快取於 app.database.db）
+- 以 pymongo with_transaction 的語義執行事務：
+  TransientTransactionError 重試整個事務，
+  UnknownTransactionCommitResult 只重試提交
+- 重試次數與總時間皆有上限，並使用帶抖動的指數退避
+- 提交、重試、中止次數輸出到指標
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.database import db
+from app.utils.mongo_driver import start_session, start_transaction
+from app.utils.logging_config import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+TRANSIENT_TRANSACTION_ERROR = "TransientTransactionError"
+UNKNOWN_COMMIT_RESULT = "UnknownTransactionCommitResult"
+
+# 與 pymongo 相同：提交時若伺服器回報 MaxTimeMSExpired，不再重試提交
+_MAX_TIME_EXPIRED_CODE = 50
+
+
+def transactions_supported() -> bool:
+    """
+    目前的部署是否支援事務
+
+    Returns:
+        bool: 啟動時偵測的結果（未連線時為 False）
+    """
+    return bool(db.supports_transactions)
+
+
+def _has_label(exc: BaseException, label: str) -> bool:
+    """檢查例外是否帶有指定的錯誤標籤"""
+    return isinstance(exc, PyMongoError) and exc.has_error_label(label)
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """
+    計算第 attempt 次重試前的等待時間（full jitter）
+
+    Args:
+        attempt: 已失敗的次數（從 1 開始）
+
+    Returns:
+        float: 等待秒數
+    """
+    cap = settings.TRANSACTION_BACKOFF_MAX_MS
+    ceiling = min(cap, settings.TRANSACTION_BACKOFF_BASE_MS * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling) / 1000
+
+
+async def _abort_quietly(session, operation: str) -> None:
+    """
+    中止仍在進行的事務；中止本身失敗時只記錄日誌，
+    讓呼叫端繼續處理（或拋出）原本的例外
+    """
+    if not session.in_transaction:
+        return
+    try:
+        await session.abort_transaction()
+    except Exception as abort_exc:
+        metrics.incr("transactions.abort_errors", operation=operation)
+        logger.warning(f"中止事務失敗 ({operation}): {abort_exc}")
+
+
+async def run_in_transaction(
+    client,
+    callback: Callable[[Any], Awaitable[T]],
+    operation: str = "transaction"
+) -> T:
+    """
+    在事務中執行 callback，遇到暫時性錯誤時自動重試
+
+    callback 必須是可重複執行的（每次重試都會重新呼叫），
+    並把收到的 session 傳給所有資料庫操作。
+
+    Args:
+        client: MongoDB 客戶端
+        callback: 接收 session 的異步函數
+        operation: 操作名稱（用於日誌與指標標籤）
+
+    Returns:
+        callback 的返回值
+
+    Raises:
+        callback 拋出的業務異常，或重試耗盡後的最後一個資料庫錯誤
+        （中止事務失敗不會取代原本的例外；任務被取消時不重試，
+        由會話結束時中止事務）
+
+    Example:
+        >>> result = await run_in_transaction(
+        ...     db.client,
+        ...     lambda session: collection.insert_one(doc, session=session),
+        ...     operation="create_order"
+        ... )
+    """
+    deadline = time.monotonic() + settings.TRANSACTION_TIMEOUT_SECONDS
+    max_attempts = settings.TRANSACTION_MAX_ATTEMPTS
+
+    async with await start_session(client) as session:
+        attempt = 0
+        while True:
+            attempt += 1
+            await start_transaction(session)
+
+            try:
+                result = await callback(session)
+            except Exception as exc:
+                await _abort_quietly(session, operation)
+                if (
+                    _has_label(exc, TRANSIENT_TRANSACTION_ERROR)
+                    and attempt < max_attempts
+                    and time.monotonic() < deadline
+                ):
+                    metrics.incr("transactions.retries", operation=operation, reason="transient")
+                    logger.info(f"事務暫時性錯誤，準備重試 ({operation}, 第 {attempt} 次): {exc}")
+                    await asyncio.sleep(_backoff_seconds(attempt))
+                    continue
+                metrics.incr("transactions.aborts", operation=operation)
+                raise
+
+            if not session.in_transaction:
+                # callback 自行結束了事務
+                metrics.incr("transactions.commits", operation=operation)
+                return result
+
+            # 提交（UnknownTransactionCommitResult 只重試提交本身）
+            retry_transaction = False
+            commit_attempt = 0
+            while True:
+                commit_attempt += 1
+                try:
+                    await session.commit_transaction()
+                    metrics.incr("transactions.commits", operation=operation)
+                    return result
+                except PyMongoError as exc:
+                    can_retry = attempt + commit_attempt <= max_attempts and time.monotonic() < deadline
+                    if (
+                        _has_label(exc, UNKNOWN_COMMIT_RESULT)
+                        and getattr(exc, "code", None) != _MAX_TIME_EXPIRED_CODE
+                        and can_retry
+                    ):
+                        metrics.incr("transactions.retries", operation=operation, reason="commit_unknown")
+                        logger.info(f"事務提交結果未知，重試提交 ({operation}): {exc}")
+                        await asyncio.sleep(_backoff_seconds(commit_attempt))
+                        continue
+                    if _has_label(exc, TRANSIENT_TRANSACTION_ERROR) and can_retry:
+                        metrics.incr("transactions.retries", operation=operation, reason="transient")
+                        logger.info(f"事務提交時發生暫時性錯誤，重試整個事務 ({operation}): {exc}")
+                        retry_transaction = True
+                        break
+                    metrics.incr("transactions.aborts", operation=operation)
+                    raise
+
+            if retry_transaction:
+                await asyncio.sleep(_backoff_seconds(attempt))
+                continue
@@ -0,0 +1,116 @@
+"""
+已認證用戶快取
+
+get_current_user 每次請求都需要依 JWT subject（email）解析用戶，
+此模組以有界 TTL 快取保存解析結果，避免每個請求多一次資料庫往返：
+- 以 subject 為鍵，另外維護 user_id -> subject 的索引，
+  讓只知道用戶 ID 的服務層也能精確失效
+- 角色、狀態、密碼等變更由 UserService 明確失效，立即生效
+- 其他進程的變更最遲在 USER_CACHE_TTL_SECONDS 之後生效
+"""
+
+from typing import Dict, Optional
+
+from app.config import settings
+from app.models.user import UserInDB
+from app.utils.cache import BoundedCache
+from app.utils.metrics import metrics
+
+# 單一用戶的估算大小（位元組），只用於與 max_bytes 比較
+_USER_ENTRY_BYTES = 2048
+
+
+class UserCache:
+    """
+    已認證用戶快取
+
+    Examples:
+        >>> user_cache.set(user)
+        >>> user_cache.get(user.email)
+        UserInDB(...)
+        >>> user_cache.invalidate_user(user.id)
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._cache = BoundedCache(
+            "users",
+            max_entries=max_entries,
+            max_bytes=max_entries * _USER_ENTRY_BYTES,
+            ttl_seconds=ttl_seconds,
+            sizeof=lambda _: _USER_ENTRY_BYTES
+        )
+        self._subject_by_id: Dict[str, str] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._cache.enabled = value
+
+    def get(self, subject: str) -> Optional[UserInDB]:
+        """
+        依 subject 讀取用戶
+
+        Args:
+            subject: JWT 的 sub（email）
+
+        Returns:
+            Optional[UserInDB]: 用戶的副本，未命中時返回 None
+        """
+        user = self._cache.get(subject)
+        return user.model_copy(deep=True) if user is not None else None
+
+    def set(self, user: UserInDB) -> None:
+        """
+        寫入用戶
+
+        Args:
+            user: 已解析的用戶
+        """
+        if not self._cache.enabled:
+            return
+        self._cache.set(user.email, user.model_copy(deep=True))
+        self._subject_by_id[user.id] = user.email
+
+        # 清理已被淘汰條目的 ID 索引
+        if len(self._subject_by_id) > 2 * self._cache.max_entries:
+            self._subject_by_id = {
+                user_id: subject
+                for user_id, subject in self._subject_by_id.items()
+                if subject in self._cache
+            }
+
+    def invalidate_user(self, user_id: str) -> None:
+        """
+        依用戶 ID 失效
+
+        Args:
+            user_id: 用戶 ID
+        """
+        subject = self._subject_by_id.pop(user_id, None)
+        if subject is not None:
+            self._cache.invalidate(subject)
+
+    def invalidate_subject(self, subject: str) -> None:
+        """依 subject 失效"""
+        self._cache.invalidate(subject)
+
+    def clear(self) -> None:
+        """清空快取"""
+        self._cache.clear()
+        self._subject_by_id.clear()
+
+    def stats(self) -> Dict[str, object]:
+        """快取即時狀態（供 /metrics 使用）"""
+        return self._cache.stats()
+
+
+# 全域用戶快取
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+user_cache.enabled = settings.USER_CACHE_ENABLED
+metrics.register_collector("user_cache", user_cache.stats)
@@ -0,0 +1,64 @@
+"""
+回填商品搜索字段
+
+为已有商品写入 name_normalized（正规化后的商品名称），
+商品名称前缀搜索依赖该字段及其索引。新建或改名的商品由服务层自动维护。
+
+使用方法：
+    python scripts/backfill_product_search_fields.py            # 只回填缺少该字段的商品
+    python scripts/backfill_product_search_fields.py --all      # 重新计算所有商品
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.product_service import SEARCH_NAME_FIELD
+from app.utils.helpers import normalize_search_text
+
+BATCH_SIZE = 1000
+
+
+async def backfill(recompute_all: bool = False):
+    """回填 name_normalized 字段"""
+    print("🔌 连接到 MongoDB...")
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    collection = client[settings.MONGODB_DB_NAME].products
+    
+    try:
+        query = {} if recompute_all else {SEARCH_NAME_FIELD: {"$exists": False}}
+        cursor = collection.find(query, {"name": 1})
+        
+        operations = []
+        updated = 0
+        async for product in cursor:
+            operations.append(UpdateOne(
+                {"_id": product["_id"]},
+                {"$set": {SEARCH_NAME_FIELD: normalize_search_text(product.get("name", ""))}}
+            ))
+            if len(operations) >= BATCH_SIZE:
+                result = await collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
+                print(f"   已处理 {updated} 个商品...")
+        
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        
+        print(f"✅ 回填完成，共更新 {updated} 个商品")
+    finally:
+        client.close()
+        print("🔌 已关闭 MongoDB 连接")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill(recompute_all="--all" in sys.argv[1:]))
@@ -0,0 +1,227 @@
+"""
+基准测试公用工具
+
+提供计时、百分位统计、示例文档与基准测试数据库连线等共用函数，
+供 scripts/benchmarks/ 下的各个基准测试脚本使用。
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from bson import ObjectId
+
+from app.utils.mongo_driver import MongoDriver, close_client, create_client
+
+# 基准测试使用独立的数据库，避免污染开发数据
+DEFAULT_BENCH_DB = "ecommerce_bench"
+
+ORDER_STATUSES = ["pending", "paid", "processing", "shipped", "delivered", "completed"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    计算百分位数（最近秩法）
+
+    Args:
+        samples: 样本列表
+        pct: 百分位（0-100）
+
+    Returns:
+        float: 百分位数值
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """
+    汇总延迟样本（毫秒）
+
+    Args:
+        samples_ms: 延迟样本列表
+
+    Returns:
+        Dict[str, float]: 包含 n/mean/p50/p95/p99/max 的统计结果
+    """
+    if not samples_ms:
+        return {"n": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "n": len(samples_ms),
+        "mean": statistics.fmean(samples_ms),
+        "p50": percentile(samples_ms, 50),
+        "p95": percentile(samples_ms, 95),
+        "p99": percentile(samples_ms, 99),
+        "max": max(samples_ms),
+    }
+
+
+async def time_async(fn: Callable[[], Awaitable], iterations: int) -> List[float]:
+    """
+    重复执行异步函数并记录每次耗时（毫秒）
+
+    Args:
+        fn: 无参数的异步函数
+        iterations: 执行次数
+
+    Returns:
+        List[float]: 每次执行的耗时
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run_concurrent(
+    fn: Callable[[int], Awaitable],
+    total: int,
+    concurrency: int
+) -> Tuple[List[float], float]:
+    """
+    以固定并发度执行异步函数，记录每次耗时（毫秒）
+
+    Args:
+        fn: 接收请求序号的异步函数
+        total: 总执行次数
+        concurrency: 并发协程数
+
+    Returns:
+        Tuple[List[float], float]: (每次执行的耗时, 总耗时秒数)
+    """
+    samples = []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            await fn(index)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def format_row(label: str, stats: Dict[str, float], unit: str = "ms") -> str:
+    """格式化一行统计结果（unit 为样本单位）"""
+    return (
+        f"{label:<28} n={stats['n']:<6} mean={stats['mean']:8.2f}{unit} "
+        f"p50={stats['p50']:8.2f}{unit} p95={stats['p95']:8.2f}{unit} "
+        f"p99={stats['p99']:8.2f}{unit} max={stats['max']:8.2f}{unit}"
+    )
+
+
+def connect(mongodb_url: str, db_name: str, driver: str = MongoDriver.MOTOR.value, **options):
+    """
+    建立基准测试用的数据库连线
+
+    Args:
+        mongodb_url: MongoDB 连接URL
+        db_name: 数据库名称
+        driver: 异步驱动（motor / pymongo）
+        **options: MongoClient 参数
+
+    Returns:
+        Tuple[MongoClient, MongoDatabase]
+    """
+    client = create_client(driver, mongodb_url, **options)
+    return client, client[db_name]
+
+
+async def disconnect(client) -> None:
+    """关闭 connect 建立的连线（两种驱动通用）"""
+    await close_client(client)
+
+
+def build_order(rng: random.Random, index: int):
+    """生成一个与 create_order 写入格式相同的订单文档"""
+    created_at = datetime(2025, 1, 1) + timedelta(minutes=index)
+    items = []
+    for n in range(rng.randint(1, 5)):
+        price = round(rng.uniform(10, 5000), 2)
+        quantity = rng.randint(1, 3)
+        items.append({
+            "product_id": str(ObjectId()),
+            "product_name": f"商品 {index}-{n}",
+            "product_slug": f"product-{index}-{n}",
+            "price": price,
+            "quantity": quantity,
+            "subtotal": round(price * quantity, 2),
+            "product_image": f"https://example.com/images/{index}-{n}.jpg",
+            "attributes": {"color": "黑色"},
+        })
+    subtotal = round(sum(item["subtotal"] for item in items), 2)
+    status = rng.choice(ORDER_STATUSES)
+    return {
+        "_id": ObjectId(),
+        "order_number": f"ORD{created_at:%Y%m%d%H%M%S}{index:07d}",
+        "user_id": str(ObjectId()),
+        "items": items,
+        "subtotal": subtotal,
+        "shipping_fee": 0.0,
+        "discount": 0.0,
+        "total_amount": subtotal,
+        "shipping_address": {
+            "recipient": "张三",
+            "phone": "0912345678",
+            "address_line1": "台北市中正区忠孝东路一段1号",
+            "city": "台北市",
+            "postal_code": "100",
+            "country": "Taiwan",
+        },
+        "status": status,
+        "payment_status": "pending" if status == "pending" else "paid",
+        "payment_method": "credit_card",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "paid_at": None if status == "pending" else created_at,
+        "status_history": [
+            {"status": "pending", "changed_at": created_at, "changed_by": None, "note": "订单创建"},
+            {"status": status, "changed_at": created_at, "changed_by": None, "note": None},
+        ],
+        "is_deleted": False,
+    }
+
+
+def build_product(rng: random.Random, index: int):
+    """生成一个与 create_product 写入格式相同的商品文档"""
+    created_at = datetime(2025, 1, 1) + timedelta(minutes=index)
+    return {
+        "_id": ObjectId(),
+        "name": f"商品 {index}",
+        "name_normalized": f"商品 {index}",
+        "description": "基准测试商品描述" * 5,
+        "price": round(rng.uniform(10, 50000), 2),
+        "stock": rng.randint(0, 500),
+        "category": rng.choice(["筆記型電腦", "周邊", "音響"]),
+        # ProductBase 的验证器会对标签去重（set 会打乱顺序），这里只用一个标签，便于比较验证路径与可信路径的输出
+        "tags": ["基准测试"],
+        "images": [f"https://example.com/images/{index}.jpg"],
+        "attributes": {"color": "太空灰", "size": "14"},
+        "status": "active",
+        "slug": f"product-{index}",
+        "views": rng.randint(0, 10000),
+        "sales_count": rng.randint(0, 500),
+        "rating": round(rng.uniform(0, 5), 1),
+        "created_at": created_at,
+        "updated_at": created_at,
+        "created_by": str(ObjectId()),
+        "is_deleted": False,
+    }
@@ -0,0 +1,140 @@
+"""
+下单延迟基准测试（按购物车大小）
+
+比较逐项 find_one 查询与批量 $in 查询两种商品验证方式，
+并测量完整下单流程（验证 + 扣库存 + 写入订单）随购物车商品数的延迟变化。
+
+使用方法：
+    python scripts/benchmarks/checkout_latency.py
+    python scripts/benchmarks/checkout_latency.py --sizes 1,4,8,16,20,32 --iterations 50
+    python scripts/benchmarks/checkout_latency.py --db-url mongodb://localhost:27017 --db-name ecommerce_bench
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import List
+
+from bench_common import DEFAULT_BENCH_DB, connect, format_row, summarize, time_async
+
+from bson import ObjectId
+
+from app.models.order import OrderCreate, OrderItem, ShippingAddress, PaymentMethod
+from app.services.order_service import OrderService
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+SHIPPING_ADDRESS = ShippingAddress(
+    recipient="基准测试",
+    phone="0912345678",
+    address_line1="台北市中正区忠孝东路一段1号",
+    city="台北市",
+    postal_code="100",
+)
+
+
+async def seed_products(db, count: int) -> List[str]:
+    """插入基准测试商品（库存足够大，避免下单时耗尽）"""
+    await db.products.delete_many({})
+    now = datetime.utcnow()
+    docs = [
+        {
+            "name": f"基准商品 {i}",
+            "slug": f"bench-product-{i}",
+            "description": "用于下单延迟基准测试的商品" * 20,
+            "price": 100.0 + i,
+            "stock": 10_000_000,
+            "category": "benchmark",
+            "tags": ["bench", f"tag-{i % 10}"],
+            "images": [f"https://example.com/{i}-{n}.jpg" for n in range(5)],
+            "attributes": {"color": "黑色", "size": "M"},
+            "status": "active",
+            "views": 0,
+            "sales_count": 0,
+            "rating": 0.0,
+            "is_deleted": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+    result = await db.products.insert_many(docs)
+    return [str(oid) for oid in result.inserted_ids]
+
+
+def build_cart(product_ids: List[str], size: int) -> List[OrderItem]:
+    """构造指定大小的购物车"""
+    return [
+        OrderItem(
+            product_id=product_ids[i % len(product_ids)],
+            product_name="placeholder",
+            price=1.0,
+            quantity=1,
+            subtotal=1.0,
+        )
+        for i in range(size)
+    ]
+
+
+async def legacy_validate(service: OrderService, items: List[OrderItem]):
+    """旧版逐项 find_one 验证（作为对照组）"""
+    for item in items:
+        product = await service.products_collection.find_one(
+            {"_id": ObjectId(item.product_id), "is_deleted": False}
+        )
+        assert product is not None
+
+
+async def run(args):
+    client, db = connect(args.db_url, args.db_name)
+    try:
+        sizes = [int(s) for s in args.sizes.split(",")]
+        product_ids = await seed_products(db, max(max(sizes), 64))
+        service = OrderService(db)
+
+        print("=" * 110)
+        print(f"下单延迟基准测试  db={args.db_name}  iterations={args.iterations}")
+        print("=" * 110)
+
+        for size in sizes:
+            items = build_cart(product_ids, size)
+            order_data = OrderCreate(
+                items=items,
+                shipping_address=SHIPPING_ADDRESS,
+                payment_method=PaymentMethod.CREDIT_CARD,
+            )
+
+            legacy = await time_async(lambda: legacy_validate(service, items), args.iterations)
+            batched = await time_async(
+                lambda: service._validate_and_prepare_items(items), args.iterations
+            )
+            checkout = await time_async(
+                lambda: service.create_order(order_data, user_id="bench-user"), args.iterations
+            )
+
+            print(f"\n购物车大小: {size}")
+            print("  " + format_row("验证（逐项 find_one）", summarize(legacy)))
+            print("  " + format_row("验证（批量 $in）", summarize(batched)))
+            print("  " + format_row("完整下单", summarize(checkout)))
+
+        if not args.keep_data:
+            await db.products.delete_many({})
+            await db.orders.delete_many({})
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下单延迟基准测试")
+    parser.add_argument("--sizes", default="1,2,4,8,12,16,20,32", help="购物车大小列表（逗号分隔）")
+    parser.add_argument("--iterations", type=int, default=30, help="每个大小的重复次数")
+    parser.add_argument("--db-url", default="mongodb://localhost:27017", help="MongoDB 连接URL")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB, help="基准测试数据库名称")
+    parser.add_argument("--keep-data", action="store_true", help="保留测试数据")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
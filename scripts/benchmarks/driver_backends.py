@@ -0,0 +1,155 @@
+"""
+MongoDB 异步驱动基准测试（Motor vs PyMongo 原生 AsyncMongoClient）
+
+分别用两种驱动建立连线，在相同的并发度下执行服务层的三个典型操作，
+比较吞吐量与 p99 延迟：
+- 商品列表：ProductService.get_products（第一页，exact 总数）
+- 下单：OrderService.create_order（2 个商品，非事务模式）
+- 订单列表：OrderService.get_user_orders（第一页，exact 总数）
+
+使用方法：
+    python scripts/benchmarks/driver_backends.py
+    python scripts/benchmarks/driver_backends.py --requests 5000 --concurrency 64
+    python scripts/benchmarks/driver_backends.py --drivers pymongo --max-pool-size 50
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from bench_common import DEFAULT_BENCH_DB, connect, disconnect, format_row, run_concurrent, summarize
+
+from app.models.common import TotalMode
+from app.models.order import OrderCreate, OrderItem, OrderListFilter, PaymentMethod, ShippingAddress
+from app.models.product import ProductListFilter
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+
+logging.basicConfig(level=logging.WARNING)
+
+BENCH_USER_ID = "bench-driver-user"
+
+SHIPPING_ADDRESS = ShippingAddress(
+    recipient="基准测试",
+    phone="0912345678",
+    address_line1="台北市中正区忠孝东路一段1号",
+    city="台北市",
+    postal_code="100",
+)
+
+
+async def seed(db, products: int, orders: int):
+    """插入商品与该用户的历史订单"""
+    await db.products.delete_many({})
+    await db.orders.delete_many({})
+    now = datetime.utcnow()
+    result = await db.products.insert_many([
+        {
+            "name": f"驱动基准商品 {i}",
+            "slug": f"bench-driver-{i}",
+            "description": "用于驱动基准测试的商品" * 10,
+            "price": 100.0 + i,
+            "stock": 10_000_000,
+            "category": "benchmark",
+            "tags": ["bench", f"tag-{i % 10}"],
+            "images": [],
+            "attributes": {},
+            "status": "active",
+            "views": 0,
+            "sales_count": 0,
+            "rating": 0.0,
+            "is_deleted": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(products)
+    ])
+    product_ids = [str(oid) for oid in result.inserted_ids]
+
+    service = OrderService(db)
+    for i in range(orders):
+        await service.create_order(build_order(product_ids, i), user_id=BENCH_USER_ID)
+    return product_ids
+
+
+def build_order(product_ids, index: int) -> OrderCreate:
+    """构造包含 2 个商品的订单"""
+    items = [
+        OrderItem(
+            product_id=product_ids[(index + offset) % len(product_ids)],
+            product_name="placeholder",
+            price=1.0,
+            quantity=1,
+            subtotal=1.0,
+        )
+        for offset in (0, 1)
+    ]
+    return OrderCreate(items=items, shipping_address=SHIPPING_ADDRESS, payment_method=PaymentMethod.CREDIT_CARD)
+
+
+async def run_driver(driver: str, args):
+    """用指定驱动执行三个操作，返回 {操作: (样本, 总耗时)}"""
+    client, db = connect(args.db_url, args.db_name, driver=driver, maxPoolSize=args.max_pool_size)
+    try:
+        product_ids = await seed(db, args.products, args.orders)
+        product_service = ProductService(db)
+        order_service = OrderService(db)
+        product_filter = ProductListFilter()
+        order_filter = OrderListFilter()
+
+        async def product_list(_):
+            await product_service.get_products(product_filter, 1, 20, total_mode=TotalMode.EXACT)
+
+        async def order_create(index):
+            await order_service.create_order(build_order(product_ids, index), user_id=BENCH_USER_ID)
+
+        async def order_list(_):
+            await order_service.get_user_orders(BENCH_USER_ID, order_filter, 1, 20, total_mode=TotalMode.EXACT)
+
+        results = {}
+        for name, fn in (("商品列表", product_list), ("下单", order_create), ("订单列表", order_list)):
+            # 预热
+            await run_concurrent(fn, args.concurrency, args.concurrency)
+            results[name] = await run_concurrent(fn, args.requests, args.concurrency)
+
+        if not args.keep_data:
+            await db.products.delete_many({})
+            await db.orders.delete_many({})
+        return results
+    finally:
+        await disconnect(client)
+
+
+async def run(args):
+    print("=" * 110)
+    print(
+        f"驱动基准测试  requests={args.requests} concurrency={args.concurrency} "
+        f"maxPoolSize={args.max_pool_size}"
+    )
+    print("=" * 110)
+
+    for driver in args.drivers.split(","):
+        results = await run_driver(driver.strip(), args)
+        print(f"\n驱动: {driver}")
+        for name, (samples, elapsed) in results.items():
+            print("  " + format_row(name, summarize(samples)))
+            print(f"    吞吐量: {len(samples) / elapsed:,.0f} 次/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor 与 PyMongo 原生异步驱动的基准测试")
+    parser.add_argument("--drivers", default="motor,pymongo", help="要比较的驱动（逗号分隔）")
+    parser.add_argument("--requests", type=int, default=2000, help="每个操作的请求数")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发协程数")
+    parser.add_argument("--products", type=int, default=500, help="种子商品数量")
+    parser.add_argument("--orders", type=int, default=200, help="种子订单数量")
+    parser.add_argument("--max-pool-size", type=int, default=100, help="连接池上限")
+    parser.add_argument("--db-url", default="mongodb://localhost:27017", help="MongoDB 连接URL")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB, help="基准测试数据库名称")
+    parser.add_argument("--keep-data", action="store_true", help="保留测试数据")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
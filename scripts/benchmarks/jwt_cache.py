@@ -0,0 +1,105 @@
+"""
+JWT 验证缓存微基准测试
+
+模拟多个会话并发请求（每个会话反复发送同一个 token，会话热度服从 Zipf 分布），
+比较每次请求的 decode_access_token 开销：
+- 关闭缓存：每次都完整解析并做 HMAC 验证
+- 开启缓存：首次验证后按 sha256(token) 命中缓存
+
+不需要数据库。
+
+使用方法：
+    python scripts/benchmarks/jwt_cache.py
+    python scripts/benchmarks/jwt_cache.py --sessions 5000 --requests 200000 --concurrency 256
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from bench_common import format_row, summarize
+
+from app.utils.security import (
+    clear_token_cache,
+    create_access_token,
+    decode_access_token,
+    set_token_cache_enabled,
+    token_cache_stats,
+)
+
+
+def build_tokens(sessions: int):
+    """为每个会话签发一个 token（包含与登录时相同的声明）"""
+    return [
+        create_access_token({
+            "sub": f"user{i}@example.com",
+            "uid": f"{i:024x}",
+            "role": "customer",
+            "active": True,
+            "ver": 0,
+        })
+        for i in range(sessions)
+    ]
+
+
+def build_schedule(tokens, requests: int, zipf_s: float, seed: int = 11):
+    """按 Zipf 分布生成请求序列"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** zipf_s for rank in range(len(tokens))]
+    return rng.choices(tokens, weights=weights, k=requests)
+
+
+async def run_mode(enabled: bool, schedule, concurrency: int):
+    """并发执行请求序列，返回 (单次耗时样本（微秒）, 总耗时)"""
+    set_token_cache_enabled(enabled)
+    clear_token_cache()
+    samples = []
+    cursor = 0
+
+    async def worker():
+        nonlocal cursor
+        while cursor < len(schedule):
+            token = schedule[cursor]
+            cursor += 1
+            start = time.perf_counter()
+            payload = decode_access_token(token)
+            samples.append((time.perf_counter() - start) * 1_000_000)
+            assert payload is not None
+            # 模拟请求中的其他 await 点，让协程交错执行
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def run(args):
+    tokens = build_tokens(args.sessions)
+    schedule = build_schedule(tokens, args.requests, args.zipf)
+
+    print("=" * 110)
+    print(
+        f"JWT 验证缓存基准测试  sessions={args.sessions} requests={args.requests} "
+        f"concurrency={args.concurrency} zipf={args.zipf}"
+    )
+    print("=" * 110)
+
+    for enabled in (False, True):
+        samples, elapsed = await run_mode(enabled, schedule, args.concurrency)
+        label = "cache on" if enabled else "cache off"
+        print(format_row(f"decode（{label}）", summarize(samples), unit="us"))
+        print(f"  吞吐量: {len(samples) / elapsed:,.0f} 次/秒  缓存状态: {token_cache_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JWT 验证缓存微基准测试")
+    parser.add_argument("--sessions", type=int, default=2000, help="并发会话（不同 token）数")
+    parser.add_argument("--requests", type=int, default=100_000, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=128, help="并发协程数")
+    parser.add_argument("--zipf", type=float, default=1.1, help="会话热度的 Zipf 指数")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
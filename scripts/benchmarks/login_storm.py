@@ -0,0 +1,112 @@
+"""
+登录风暴基准测试
+
+模拟大量并发登录（bcrypt 校验密码）时，无关端点（GET /）的延迟：
+- sync：在事件循环中直接调用 verify_password（改动前的行为）
+- async：调用 verify_password_async，在 bcrypt 线程池中执行（改动后的行为）
+
+登录只执行密码校验部分，不需要数据库；无关端点通过 ASGITransport
+直接请求应用的根路由。async 模式下超出 PASSWORD_HASH_MAX_PENDING 的登录
+会被拒绝（503），拒绝次数一并输出。
+
+使用方法：
+    python scripts/benchmarks/login_storm.py
+    python scripts/benchmarks/login_storm.py --concurrency 64 --duration 10 --workers 4
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from bench_common import format_row, summarize
+
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.middleware.error_handler import ServiceUnavailableException
+from app.utils.security import (
+    hash_password, shutdown_password_executor, verify_password, verify_password_async
+)
+
+PASSWORD = "StormPass123!"
+
+
+async def run_mode(mode: str, args, hashed: str):
+    """执行一轮登录风暴，返回 (无关端点延迟, 登录延迟, 拒绝次数)"""
+    deadline = time.perf_counter() + args.duration
+    login_samples = []
+    rejected = 0
+
+    async def login_worker():
+        nonlocal rejected
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if mode == "sync":
+                    verify_password(PASSWORD, hashed)
+                else:
+                    await verify_password_async(PASSWORD, hashed)
+            except ServiceUnavailableException:
+                rejected += 1
+                await asyncio.sleep(0.05)
+                continue
+            login_samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0)
+
+    probe_samples = []
+
+    async def probe(client: AsyncClient):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get("/")
+            response.raise_for_status()
+            probe_samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(args.probe_interval / 1000)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(
+            probe(client),
+            *(login_worker() for _ in range(args.concurrency))
+        )
+    return probe_samples, login_samples, rejected
+
+
+async def run(args):
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    settings.PASSWORD_HASH_MAX_PENDING = args.max_pending
+    hashed = hash_password(PASSWORD)
+
+    print("=" * 110)
+    print(
+        f"登录风暴基准测试  concurrency={args.concurrency} duration={args.duration}s "
+        f"workers={args.workers} max_pending={args.max_pending}"
+    )
+    print("=" * 110)
+
+    for mode in ("sync", "async"):
+        probe_samples, login_samples, rejected = await run_mode(mode, args, hashed)
+        print(f"\n模式: {mode}")
+        print("  " + format_row("GET /（无关端点）", summarize(probe_samples)))
+        print("  " + format_row("登录（bcrypt 校验）", summarize(login_samples)))
+        print(f"  吞吐量: {len(login_samples) / args.duration:.1f} 次登录/秒  拒绝(503): {rejected}")
+
+    shutdown_password_executor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录风暴下无关端点的延迟基准测试")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发登录数")
+    parser.add_argument("--duration", type=float, default=5.0, help="每种模式的持续时间（秒）")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="bcrypt 线程数")
+    parser.add_argument("--max-pending", type=int, default=settings.PASSWORD_HASH_MAX_PENDING, help="排队上限")
+    parser.add_argument("--probe-interval", type=float, default=10.0, help="无关端点请求间隔（毫秒）")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
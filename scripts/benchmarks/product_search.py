@@ -0,0 +1,141 @@
+"""
+商品搜索基准测试
+
+在大量种子商品上比较三种搜索方式的延迟：
+- regex: 不区分大小写的子串匹配（全表扫描）
+- text: $text 全文检索，按 textScore 排序
+- prefix: name_normalized 上的锚定前缀匹配（索引范围扫描）
+
+每种方式同时输出 explain 中的 totalDocsExamined，便于确认是否走索引。
+
+使用方法：
+    python scripts/benchmarks/product_search.py
+    python scripts/benchmarks/product_search.py --products 200000 --iterations 50
+    python scripts/benchmarks/product_search.py --skip-seed   # 复用上一次的种子数据
+"""
+
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from bench_common import DEFAULT_BENCH_DB, connect, format_row, summarize, time_async
+
+from app.models.common import TotalMode
+from app.models.product import ProductListFilter, SearchMode
+from app.services.product_service import ProductService, SEARCH_NAME_FIELD
+from app.utils.helpers import normalize_search_text
+
+BRANDS = ["Apple", "Samsung", "Sony", "Asus", "Acer", "Lenovo", "Dell", "HP", "Xiaomi", "LG"]
+NOUNS = ["Laptop", "Phone", "Tablet", "Monitor", "Keyboard", "Mouse", "Headphones", "Camera", "Speaker", "Watch"]
+ADJECTIVES = ["Pro", "Air", "Max", "Mini", "Ultra", "Plus", "Lite", "Neo", "Edge", "Prime"]
+CATEGORIES = ["筆記型電腦", "手機", "平板", "螢幕", "周邊", "音響"]
+
+QUERIES = {
+    # 关键词 -> 在 auto 模式下的预期路径
+    "so": "prefix",
+    "app": "prefix",
+    "laptop": "text",
+    "wireless headphones": "text",
+}
+
+
+async def seed_products(db, count: int):
+    """插入基准测试商品并创建搜索相关索引"""
+    await db.products.drop()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    batch = []
+    for i in range(count):
+        name = f"{rng.choice(BRANDS)} {rng.choice(NOUNS)} {rng.choice(ADJECTIVES)} {i}"
+        batch.append({
+            "name": name,
+            SEARCH_NAME_FIELD: normalize_search_text(name),
+            "slug": f"bench-search-{i}",
+            "description": f"{name} wireless bluetooth high quality " * 3,
+            "price": round(rng.uniform(100, 80000), 2),
+            "stock": rng.randint(0, 500),
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(BRANDS + NOUNS, 3),
+            "images": [],
+            "attributes": {},
+            "status": "active",
+            "views": 0,
+            "sales_count": rng.randint(0, 1000),
+            "rating": 0.0,
+            "is_deleted": False,
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": now,
+        })
+        if len(batch) >= 5000:
+            await db.products.insert_many(batch)
+            batch = []
+    if batch:
+        await db.products.insert_many(batch)
+    
+    await db.products.create_index(
+        [("name", "text"), ("description", "text"), ("tags", "text")],
+        default_language="none",
+        name="text_search_index"
+    )
+    await db.products.create_index(SEARCH_NAME_FIELD, name="name_normalized_idx")
+    await db.products.create_index([("created_at", -1), ("_id", -1)], name="created_at_id_keyset_idx")
+
+
+async def docs_examined(service: ProductService, search: str, mode: SearchMode) -> int:
+    """通过 explain 获取一次查询检查的文档数"""
+    resolved = service._resolve_search_mode(search, mode)
+    query = {"is_deleted": False, **service._build_search_clause(search, resolved)}
+    explain = await service.collection.find(query).limit(20).explain()
+    stats = explain.get("executionStats", {})
+    return stats.get("totalDocsExamined", -1)
+
+
+async def run(args):
+    client, db = connect(args.db_url, args.db_name)
+    try:
+        if not args.skip_seed:
+            print(f"插入 {args.products} 个种子商品...")
+            await seed_products(db, args.products)
+        
+        service = ProductService(db)
+        total = await db.products.estimated_document_count()
+        
+        print("=" * 110)
+        print(f"商品搜索基准测试  products={total}  iterations={args.iterations}  total={args.total}")
+        print("=" * 110)
+        
+        for search, expected in QUERIES.items():
+            print(f"\n关键词: '{search}'（auto → {expected}）")
+            for mode in (SearchMode.REGEX, SearchMode.TEXT, SearchMode.PREFIX, SearchMode.AUTO):
+                filter_params = ProductListFilter(search=search, search_mode=mode, sort_by="relevance")
+                
+                async def search_once():
+                    await service.get_products(
+                        filter_params, 1, 20, total_mode=TotalMode(args.total)
+                    )
+                
+                samples = await time_async(search_once, args.iterations)
+                examined = await docs_examined(service, search, mode)
+                print("  " + format_row(f"{mode.value}", summarize(samples)) + f"  docsExamined={examined}")
+        
+        if not args.keep_data:
+            await db.products.drop()
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商品搜索基准测试")
+    parser.add_argument("--products", type=int, default=100_000, help="种子商品数量")
+    parser.add_argument("--iterations", type=int, default=20, help="每种方式的重复次数")
+    parser.add_argument("--total", default="none", choices=["exact", "estimated", "none"], help="总数模式")
+    parser.add_argument("--db-url", default="mongodb://localhost:27017", help="MongoDB 连接URL")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB, help="基准测试数据库名称")
+    parser.add_argument("--skip-seed", action="store_true", help="跳过插入种子数据")
+    parser.add_argument("--keep-data", action="store_true", help="保留测试数据")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+响应编码吞吐量基准测试
+
+对真实结构的订单分页（paginated_response，含嵌套商品项、收货地址与状态历史）
+比较各编码器的吞吐量与响应大小：
+- stdlib: Starlette JSONResponse 的 json.dumps（需要先 model_dump(mode="json") 转成基本类型）
+- pydantic / orjson: app.utils.encoders 的 JSON 后端（直接编码模型、datetime 与 ObjectId）
+- msgpack: application/msgpack
+- ndjson: application/x-ndjson（每行一个订单）
+
+未安装的可选后端（orjson、msgpack）会被跳过。不需要数据库。
+
+使用方法：
+    python scripts/benchmarks/response_encoding.py
+    python scripts/benchmarks/response_encoding.py --page-sizes 20,100 --iterations 1000
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import time
+from collections import defaultdict
+
+from bench_common import build_order, format_row, summarize
+
+from app.models.common import paginated_response
+from app.services.order_service import OrderService
+from app.utils.encoders import (
+    MsgpackEncoder,
+    NDJSONEncoder,
+    OrjsonEncoder,
+    PydanticJSONEncoder,
+    ResponseEncoder,
+)
+
+# 只使用服务的文档转换方法，不需要数据库连接
+ORDER_SERVICE = OrderService(defaultdict(lambda: None))
+
+
+class StdlibJSONEncoder(ResponseEncoder):
+    """Starlette JSONResponse 的编码方式（先转换为基本类型）"""
+    name = "stdlib"
+
+    def encode(self, content):
+        items = content["data"]["items"]
+        content = dict(content, data=dict(content["data"], items=[item.model_dump(mode="json") for item in items]))
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def available_encoders():
+    """可用的编码器（未安装的可选套件会被跳过）"""
+    json_backend = PydanticJSONEncoder()
+    result = [StdlibJSONEncoder(), json_backend]
+    if importlib.util.find_spec("orjson") is not None:
+        import orjson
+        json_backend = OrjsonEncoder(orjson)
+        result.append(json_backend)
+    else:
+        print("（未安装 orjson，跳过）")
+    if importlib.util.find_spec("msgpack") is not None:
+        import msgpack
+        result.append(MsgpackEncoder(msgpack))
+    else:
+        print("（未安装 msgpack，跳过）")
+    result.append(NDJSONEncoder(json_backend))
+    return result
+
+
+def build_page(page_size: int):
+    """构造一页订单响应（与 /orders/all 返回的内容相同）"""
+    rng = random.Random(page_size)
+    orders = [ORDER_SERVICE._order_helper(build_order(rng, i)) for i in range(page_size)]
+    return paginated_response(orders, 1, page_size, 10_000)
+
+
+def measure(encoder: ResponseEncoder, content, iterations: int):
+    """重复编码，返回单次耗时样本（微秒）、总耗时与响应大小"""
+    body = encoder.encode(content)
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        encoder.encode(content)
+        samples.append((time.perf_counter() - begin) * 1_000_000)
+    return samples, time.perf_counter() - start, len(body)
+
+
+def run(args):
+    encoders = available_encoders()
+    page_sizes = [int(size) for size in args.page_sizes.split(",")]
+
+    print("=" * 110)
+    print(f"响应编码吞吐量基准测试  page_sizes={page_sizes} iterations={args.iterations}")
+    print("=" * 110)
+
+    for page_size in page_sizes:
+        content = build_page(page_size)
+        print(f"\n📦 订单分页 page_size={page_size}")
+        baseline = None
+        for encoder in encoders:
+            samples, elapsed, size = measure(encoder, content, args.iterations)
+            stats = summarize(samples)
+            baseline = baseline or stats["mean"]
+            print(format_row(encoder.name, stats, unit="us"))
+            print(
+                f"  {args.iterations / elapsed:,.0f} 页/秒  {size * args.iterations / elapsed / 1024 / 1024:,.1f} MB/秒  "
+                f"大小 {size / 1024:.1f} KB  相对 stdlib {baseline / max(stats['mean'], 1e-9):.1f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应编码吞吐量基准测试")
+    parser.add_argument("--page-sizes", default="20,100", help="每页订单数（逗号分隔）")
+    parser.add_argument("--iterations", type=int, default=500, help="每种编码器的编码次数")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
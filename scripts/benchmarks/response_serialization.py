@@ -0,0 +1,124 @@
+"""
+列表响应序列化 CPU 基准测试
+
+模拟 /orders/all?page_size=100 与 /products?page_size=100 在取得文档之后的 CPU 开销：
+- validated: 旧路径。每个文档经模型验证（含嵌套的 OrderItem / ShippingAddress /
+  OrderStatusHistory）→ model_dump(mode="json") → FastAPI 按
+  ResponseModel[PaginatedData[...]] 再验证并转换一次 → json.dumps
+- trusted: 服务层以 model_construct 构建模型 → TrustedResponse 直接序列化为 JSON bytes
+
+以 time.process_time 统计每个请求的 CPU 时间，不包含数据库往返，不需要数据库。
+
+使用方法：
+    python scripts/benchmarks/response_serialization.py
+    python scripts/benchmarks/response_serialization.py --page-size 100 --iterations 500
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+from bench_common import build_order, build_product, format_row, summarize
+
+from pydantic import TypeAdapter
+
+from app.models.common import PaginatedData, ResponseModel, paginated_response
+from app.models.order import OrderResponse
+from app.models.product import ProductResponse
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+from app.utils.serialization import TrustedResponse
+
+
+def validated_orders(documents):
+    """旧路径：验证构建 → model_dump → FastAPI 再验证 → json.dumps"""
+    orders = [OrderResponse(**dict(doc, id=str(doc["_id"]))) for doc in documents]
+    payload = paginated_response([order.model_dump(mode="json") for order in orders], 1, len(documents), 10_000)
+    return _fastapi_serialize(ORDER_PAGE, payload)
+
+
+def validated_products(documents):
+    """旧路径：验证构建 → model_dump → FastAPI 再验证 → json.dumps"""
+    products = [ProductResponse(**dict(doc, id=str(doc["_id"]))) for doc in documents]
+    payload = paginated_response([product.model_dump(mode="json") for product in products], 1, len(documents), 10_000)
+    return _fastapi_serialize(PRODUCT_PAGE, payload)
+
+
+def _fastapi_serialize(adapter: TypeAdapter, payload) -> bytes:
+    """与 FastAPI serialize_response + JSONResponse 相同的步骤"""
+    value = adapter.validate_python(payload)
+    content = adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def trusted_orders(documents):
+    """可信路径：服务层 _order_helper → TrustedResponse"""
+    orders = [ORDER_SERVICE._order_helper(doc) for doc in documents]
+    return TrustedResponse(paginated_response(orders, 1, len(documents), 10_000)).body
+
+
+def trusted_products(documents):
+    """可信路径：服务层 _product_response → TrustedResponse"""
+    products = [PRODUCT_SERVICE._product_response(dict(doc)) for doc in documents]
+    return TrustedResponse(paginated_response(products, 1, len(documents), 10_000)).body
+
+
+ORDER_PAGE = TypeAdapter(ResponseModel[PaginatedData[OrderResponse]])
+PRODUCT_PAGE = TypeAdapter(ResponseModel[PaginatedData[ProductResponse]])
+
+# 只使用服务的文档转换方法，不需要数据库连接
+ORDER_SERVICE = OrderService(defaultdict(lambda: None))
+PRODUCT_SERVICE = ProductService(SimpleNamespace(products=None))
+
+
+def measure(fn, documents, iterations: int):
+    """重复执行，返回每个请求的 CPU 时间样本（毫秒）与最后一次的响应体"""
+    body = fn(documents)
+    samples = []
+    for _ in range(iterations):
+        start = time.process_time()
+        body = fn(documents)
+        samples.append((time.process_time() - start) * 1000)
+    return samples, body
+
+
+def run(args):
+    rng = random.Random(7)
+    orders = [build_order(rng, i) for i in range(args.page_size)]
+    products = [build_product(rng, i) for i in range(args.page_size)]
+
+    print("=" * 110)
+    print(f"列表响应序列化 CPU 基准测试  page_size={args.page_size} iterations={args.iterations}")
+    print("=" * 110)
+
+    for label, documents, validated, trusted in (
+        ("/orders/all", orders, validated_orders, trusted_orders),
+        ("/products", products, validated_products, trusted_products),
+    ):
+        before, validated_body = measure(validated, documents, args.iterations)
+        after, trusted_body = measure(trusted, documents, args.iterations)
+        # 两条路径的响应内容必须一致
+        assert json.loads(validated_body) == json.loads(trusted_body), f"{label} 响应内容不一致"
+
+        before_stats, after_stats = summarize(before), summarize(after)
+        print(format_row(f"{label}（validated）", before_stats))
+        print(format_row(f"{label}（trusted）", after_stats))
+        print(
+            f"  每请求 CPU 减少 {before_stats['mean'] - after_stats['mean']:.2f}ms"
+            f"（{before_stats['mean'] / max(after_stats['mean'], 1e-9):.1f}x），"
+            f"响应大小 {len(trusted_body) / 1024:.1f} KB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表响应序列化 CPU 基准测试")
+    parser.add_argument("--page-size", type=int, default=100, help="每页文档数")
+    parser.add_argument("--iterations", type=int, default=300, help="每种路径的请求次数")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+进程内搜索引擎基准测试
+
+在大量繁体中文商品名称上测量：
+- 索引构建时间与内存占用（tracemalloc 峰值与倒排数组大小）
+- 查询延迟：搜索引擎（含 $in 回表） vs 正则子串匹配
+- 增量更新（upsert / remove）的耗时
+
+使用方法：
+    python scripts/benchmarks/search_engine.py
+    python scripts/benchmarks/search_engine.py --products 200000 --iterations 50
+    python scripts/benchmarks/search_engine.py --skip-seed
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bench_common import DEFAULT_BENCH_DB, connect, format_row, summarize, time_async
+
+from bson import ObjectId
+
+from app.config import settings
+from app.models.common import TotalMode
+from app.models.product import ProductListFilter, SearchMode
+from app.services.product_service import ProductService
+from app.services.search_engine import product_search_engine
+
+BRANDS = ["Apple", "華碩", "宏碁", "小米", "索尼", "三星", "羅技", "技嘉"]
+NOUNS = ["筆記型電腦", "藍牙耳機", "無線滑鼠", "機械鍵盤", "智慧手錶", "行動電源", "電競螢幕", "平板電腦"]
+ADJECTIVES = ["輕薄", "旗艦", "入門", "專業", "降噪", "防水", "高刷新率", "長續航"]
+CATEGORIES = ["筆記型電腦", "周邊", "音響", "穿戴裝置", "螢幕"]
+
+QUERIES = ["藍牙耳機", "降噪 耳機", "電競", "Apple 筆記型電腦", "機械鍵盤 羅技"]
+
+
+async def seed_products(db, count: int):
+    """插入基准测试商品"""
+    await db.products.drop()
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    batch = []
+    for i in range(count):
+        name = f"{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)}{rng.choice(NOUNS)} {i}"
+        batch.append({
+            "name": name,
+            "slug": f"bench-engine-{i}",
+            "description": f"{name}，{rng.choice(ADJECTIVES)}設計，{rng.choice(ADJECTIVES)}體驗",
+            "price": round(rng.uniform(300, 80000), 2),
+            "stock": rng.randint(0, 500),
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(BRANDS + ADJECTIVES, 3),
+            "images": [],
+            "attributes": {},
+            "status": "active",
+            "views": 0,
+            "sales_count": 0,
+            "rating": 0.0,
+            "is_deleted": False,
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": now,
+        })
+        if len(batch) >= 5000:
+            await db.products.insert_many(batch)
+            batch = []
+    if batch:
+        await db.products.insert_many(batch)
+    await db.products.create_index([("created_at", -1), ("_id", -1)], name="created_at_id_keyset_idx")
+
+
+async def measure_build(db):
+    """测量索引构建时间与内存"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    await product_search_engine.build(db.products)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = product_search_engine.stats()
+    print(f"构建耗时: {elapsed:.2f}s")
+    print(f"文档数: {stats['documents']}  词项数: {stats['terms']}  倒排条目: {stats['postings']}")
+    print(f"倒排数组大小: {stats['postings_bytes'] / 1024 / 1024:.2f} MiB")
+    print(f"tracemalloc 当前: {current / 1024 / 1024:.2f} MiB  峰值: {peak / 1024 / 1024:.2f} MiB")
+
+
+async def run(args):
+    client, db = connect(args.db_url, args.db_name)
+    try:
+        if not args.skip_seed:
+            print(f"插入 {args.products} 个种子商品...")
+            await seed_products(db, args.products)
+
+        print("=" * 110)
+        print(f"搜索引擎基准测试  iterations={args.iterations}")
+        print("=" * 110)
+        await measure_build(db)
+
+        settings.PRODUCT_SEARCH_ENGINE_ENABLED = True
+        service = ProductService(db)
+
+        for search in QUERIES:
+            print(f"\n关键词: '{search}'")
+            async def engine_search():
+                product_search_engine.search(search, limit=20)
+
+            engine_only = await time_async(engine_search, args.iterations)
+            print("  " + format_row("engine（仅内存排序）", summarize(engine_only)))
+            for mode in (SearchMode.ENGINE, SearchMode.REGEX):
+                filter_params = ProductListFilter(search=search, search_mode=mode, sort_by="relevance")
+
+                async def search_once():
+                    await service.get_products(filter_params, 1, 20, total_mode=TotalMode.EXACT)
+
+                samples = await time_async(search_once, args.iterations)
+                print("  " + format_row(f"{mode.value}（含回表）", summarize(samples)))
+
+        # 增量更新
+        sample = await db.products.find_one({})
+        upserts = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            product_search_engine.upsert(sample)
+            upserts.append((time.perf_counter() - start) * 1000)
+        print("\n" + format_row("upsert", summarize(upserts)))
+        removes = []
+        for _ in range(args.iterations):
+            fake_id = str(ObjectId())
+            product_search_engine.upsert({**sample, "_id": fake_id})
+            start = time.perf_counter()
+            product_search_engine.remove(fake_id)
+            removes.append((time.perf_counter() - start) * 1000)
+        print(format_row("remove", summarize(removes)))
+
+        if not args.keep_data:
+            await db.products.drop()
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程内搜索引擎基准测试")
+    parser.add_argument("--products", type=int, default=100_000, help="种子商品数量")
+    parser.add_argument("--iterations", type=int, default=30, help="重复次数")
+    parser.add_argument("--db-url", default="mongodb://localhost:27017", help="MongoDB 连接URL")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB, help="基准测试数据库名称")
+    parser.add_argument("--skip-seed", action="store_true", help="跳过插入种子数据")
+    parser.add_argument("--keep-data", action="store_true", help="保留测试数据")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
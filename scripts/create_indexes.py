@@ -0,0 +1,70 @@
+"""
+索引检查与创建脚本（所有集合）
+
+按 app/indexes.py 中声明的索引检查漂移（缺少、多余、定义不一致），
+并可创建缺少的索引。包含 users、products、orders、token_revocations。
+
+使用方法：
+    python scripts/create_indexes.py check                      # 只输出漂移报告
+    python scripts/create_indexes.py create                     # 创建所有缺少的索引
+    python scripts/create_indexes.py create --collections users # 只处理指定集合
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.indexes import index_registry
+
+
+def print_report(report):
+    """输出漂移报告"""
+    for name, result in report["collections"].items():
+        print(f"\n📁 {name}")
+        print(f"   ✅ 一致: {len(result['ok'])}")
+        for index in result["missing"]:
+            print(f"   ❌ 缺少: {index}")
+        for item in result["mismatched"]:
+            print(f"   ⚠️  不一致: {item['name']} - {'; '.join(item['differences'])}")
+        for index in result["extra"]:
+            print(f"   ➕ 未声明: {index}")
+
+    summary = report["summary"]
+    print(f"\n总计: 缺少 {summary['missing']}，多余 {summary['extra']}，不一致 {summary['mismatched']}")
+
+
+async def run(args):
+    client = AsyncIOMotorClient(args.db_url)
+    db = client[args.db_name]
+    try:
+        if args.action == "create":
+            collections = args.collections.split(",") if args.collections else None
+            result = await index_registry.build_missing(db, collections)
+            for name, created in result["created"].items():
+                print(f"✅ {name}: 已创建 {', '.join(created)}")
+            for name, error in result["errors"].items():
+                print(f"❌ {name}: {error}")
+
+        print_report(await index_registry.check(db))
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按索引注册表检查并创建索引")
+    parser.add_argument("action", choices=["check", "create"], help="check=输出漂移报告, create=创建缺少的索引")
+    parser.add_argument("--collections", default="", help="只处理指定集合（逗号分隔，默认全部）")
+    parser.add_argument("--db-url", default=settings.MONGODB_URL, help="MongoDB 连接URL")
+    parser.add_argument("--db-name", default=settings.MONGODB_DB_NAME, help="数据库名称")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
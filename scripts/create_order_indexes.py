@@ -2,6 +2,7 @@
 订单集合索引创建脚本
 
 此脚本用于为 MongoDB 的 orders 集合创建必要的索引，以优化查询性能。
+索引定义统一在 app/indexes.py 中声明（应用启动时也会据此检查索引漂移）。
 
 索引列表：
 1. order_number (唯一索引) - 订单编号
@@ -11,10 +12,15 @@
 5. created_at - 创建时间
 6. updated_at - 更新时间
 7. paid_at - 支付时间
-8. {user_id, created_at} - 复合索引（用户订单列表查询）
-9. {status, created_at} - 复合索引（按状态筛选订单）
+8. {user_id, created_at} - 部分索引（用户订单列表查询，仅未删除订单）
+9. {status, created_at} - 部分索引（按状态筛选订单，仅未删除订单）
 10. {user_id, status} - 复合索引（用户特定状态订单）
-11. is_deleted - 稀疏索引（软删除）
+11. total_amount - 订单金额
+12. {user_id, created_at, _id} - 复合索引（用户订单游标分页）
+13. {created_at, _id} - 复合索引（管理员订单游标分页）
+
+已有的旧索引（user_created_compound、status_created_compound、is_deleted_index）
+请使用 scripts/migrate_partial_indexes.py 迁移。
 
 使用方法：
     python scripts/create_order_indexes.py create       # 创建所有索引
@@ -30,10 +36,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING, DESCENDING
-from datetime import datetime
 import logging
 
+from app.indexes import index_registry
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -82,124 +88,34 @@ class OrderIndexManager:
         logger.info("开始创建订单集合索引")
         logger.info("=" * 80)
 
-        indexes_to_create = [
-            # 1. 订单编号唯一索引
-            {
-                "name": "order_number_unique",
-                "keys": [("order_number", ASCENDING)],
-                "unique": True,
-                "description": "订单编号唯一索引"
-            },
-            # 2. 用户ID索引
-            {
-                "name": "user_id_index",
-                "keys": [("user_id", ASCENDING)],
-                "description": "用户ID索引（用于查询用户的所有订单）"
-            },
-            # 3. 订单状态索引
-            {
-                "name": "status_index",
-                "keys": [("status", ASCENDING)],
-                "description": "订单状态索引（用于按状态筛选订单）"
-            },
-            # 4. 支付状态索引
-            {
-                "name": "payment_status_index",
-                "keys": [("payment_status", ASCENDING)],
-                "description": "支付状态索引（用于按支付状态筛选）"
-            },
-            # 5. 创建时间索引（降序，最新订单优先）
-            {
-                "name": "created_at_index",
-                "keys": [("created_at", DESCENDING)],
-                "description": "创建时间索引（用于按时间排序）"
-            },
-            # 6. 更新时间索引
-            {
-                "name": "updated_at_index",
-                "keys": [("updated_at", DESCENDING)],
-                "description": "更新时间索引"
-            },
-            # 7. 支付时间索引（稀疏索引，因为不是所有订单都已支付）
-            {
-                "name": "paid_at_index",
-                "keys": [("paid_at", DESCENDING)],
-                "sparse": True,
-                "description": "支付时间索引（稀疏索引）"
-            },
-            # 8. 用户ID + 创建时间复合索引
-            {
-                "name": "user_created_compound",
-                "keys": [("user_id", ASCENDING), ("created_at", DESCENDING)],
-                "description": "用户ID + 创建时间复合索引（优化用户订单列表查询）"
-            },
-            # 9. 状态 + 创建时间复合索引
-            {
-                "name": "status_created_compound",
-                "keys": [("status", ASCENDING), ("created_at", DESCENDING)],
-                "description": "状态 + 创建时间复合索引（优化按状态筛选查询）"
-            },
-            # 10. 用户ID + 状态复合索引
-            {
-                "name": "user_status_compound",
-                "keys": [("user_id", ASCENDING), ("status", ASCENDING)],
-                "description": "用户ID + 状态复合索引（查询用户特定状态的订单）"
-            },
-            # 11. 软删除标记索引（稀疏索引）
-            {
-                "name": "is_deleted_index",
-                "keys": [("is_deleted", ASCENDING)],
-                "sparse": True,
-                "description": "软删除标记索引（稀疏索引，只索引已删除的文档）"
-            },
-            # 12. 订单金额索引（用于金额范围查询）
-            {
-                "name": "total_amount_index",
-                "keys": [("total_amount", DESCENDING)],
-                "description": "订单总金额索引（用于按金额排序和筛选）"
-            },
-        ]
+        specs = index_registry.specs("orders")
+        drift = await index_registry.diff_collection(self.collection)
 
         created_count = 0
         skipped_count = 0
         failed_count = 0
 
-        for idx, index_spec in enumerate(indexes_to_create, 1):
-            try:
-                logger.info(f"\n[{idx}/{len(indexes_to_create)}] 正在创建索引: {index_spec['name']}")
-                logger.info(f"  描述: {index_spec['description']}")
-                logger.info(f"  字段: {index_spec['keys']}")
-
-                # 检查索引是否已存在
-                existing_indexes = await self.collection.index_information()
-                if index_spec['name'] in existing_indexes:
-                    logger.info(f"  ⚠️  索引已存在，跳过")
-                    skipped_count += 1
-                    continue
-
-                # 准备索引选项
-                index_options = {
-                    "name": index_spec["name"]
-                }
-
-                if index_spec.get("unique"):
-                    index_options["unique"] = True
-                if index_spec.get("sparse"):
-                    index_options["sparse"] = True
-
-                # 创建索引
-                await self.collection.create_index(
-                    index_spec["keys"],
-                    **index_options
-                )
+        for idx, spec in enumerate(specs, 1):
+            logger.info(f"\n[{idx}/{len(specs)}] 正在创建索引: {spec.name}")
+            logger.info(f"  描述: {spec.description}")
+            logger.info(f"  字段: {spec.keys}")
+
+            if spec.name not in drift["missing"]:
+                logger.info(f"  ⚠️  索引已存在，跳过")
+                skipped_count += 1
+                continue
 
+            try:
+                await self.collection.create_indexes([spec.to_model()])
                 logger.info(f"  ✅ 索引创建成功")
                 created_count += 1
-
             except Exception as e:
                 logger.error(f"  ❌ 索引创建失败: {str(e)}")
                 failed_count += 1
 
+        for item in drift["mismatched"]:
+            logger.warning(f"⚠️  索引定义不一致（需手动处理）: {item['name']} - {'; '.join(item['differences'])}")
+
         # 总结
         logger.info("\n" + "=" * 80)
         logger.info("索引创建完成")
@@ -207,7 +123,7 @@ class OrderIndexManager:
         logger.info(f"✅ 成功创建: {created_count} 个")
         logger.info(f"⚠️  跳过（已存在）: {skipped_count} 个")
         logger.info(f"❌ 失败: {failed_count} 个")
-        logger.info(f"📊 总计: {len(indexes_to_create)} 个索引")
+        logger.info(f"📊 总计: {len(specs)} 个索引")
         logger.info("=" * 80)
 
         return created_count, skipped_count, failed_count
@@ -2,6 +2,7 @@
 创建商品集合的索引
 
 这个脚本会为 products 集合创建必要的索引以优化查询性能
+索引定义统一在 app/indexes.py 中声明（应用启动时也会据此检查索引漂移）
 """
 
 import asyncio
@@ -14,10 +15,11 @@ sys.path.insert(0, str(project_root))
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.indexes import index_registry
 
 
 async def create_product_indexes():
-    """创建商品集合的所有索引"""
+    """创建商品集合的所有索引（索引定义见 app/indexes.py）"""
     print("🔌 连接到 MongoDB...")
     client = AsyncIOMotorClient(settings.MONGODB_URL)
     db = client[settings.MONGODB_DB_NAME]
@@ -26,115 +28,24 @@ async def create_product_indexes():
     try:
         print(f"📊 在数据库 '{settings.MONGODB_DB_NAME}' 的 'products' 集合创建索引...\n")
         
-        # 1. 商品名称索引（单字段）
-        print("1️⃣  创建商品名称索引...")
-        await collection.create_index("name")
-        print("   ✅ name 索引创建成功")
-        
-        # 2. 商品分类索引（单字段）
-        print("2️⃣  创建商品分类索引...")
-        await collection.create_index("category")
-        print("   ✅ category 索引创建成功")
-        
-        # 3. 商品状态索引（单字段）
-        print("3️⃣  创建商品状态索引...")
-        await collection.create_index("status")
-        print("   ✅ status 索引创建成功")
-        
-        # 4. 标签索引（数组字段）
-        print("4️⃣  创建标签索引...")
-        await collection.create_index("tags")
-        print("   ✅ tags 索引创建成功")
-        
-        # 5. 价格索引（单字段，用于排序和范围查询）
-        print("5️⃣  创建价格索引...")
-        await collection.create_index("price")
-        print("   ✅ price 索引创建成功")
-        
-        # 6. 创建时间索引（用于排序）
-        print("6️⃣  创建创建时间索引...")
-        await collection.create_index("created_at")
-        print("   ✅ created_at 索引创建成功")
-        
-        # 7. 更新时间索引（用于排序）
-        print("7️⃣  创建更新时间索引...")
-        await collection.create_index("updated_at")
-        print("   ✅ updated_at 索引创建成功")
-        
-        # 8. 销售数量索引（用于排行榜）
-        print("8️⃣  创建销售数量索引...")
-        await collection.create_index("sales_count")
-        print("   ✅ sales_count 索引创建成功")
-        
-        # 9. 浏览次数索引（用于热门商品）
-        print("9️⃣  创建浏览次数索引...")
-        await collection.create_index("views")
-        print("   ✅ views 索引创建成功")
-        
-        # 10. 评分索引（用于排序）
-        print("🔟 创建评分索引...")
-        await collection.create_index("rating")
-        print("   ✅ rating 索引创建成功")
-        
-        # 11. 文本索引（用于全文搜索）
-        print("📝 创建文本索引（全文搜索）...")
-        try:
-            await collection.create_index(
-                [
-                    ("name", "text"),
-                    ("description", "text"),
-                    ("tags", "text")
-                ],
-                default_language="none",  # 不使用特定语言的分词
-                name="text_search_index"
-            )
-            print("   ✅ 文本搜索索引创建成功")
-        except Exception as e:
-            if "already exists" in str(e):
-                print("   ⚠️  文本搜索索引已存在，跳过")
+        specs = index_registry.specs("products")
+        drift = await index_registry.diff_collection(collection)
+        for idx, spec in enumerate(specs, 1):
+            print(f"{idx:>2}. {spec.name} - {spec.description}")
+            if spec.name in drift["missing"]:
+                print("    ⏳ 待创建")
             else:
-                raise
-        
-        # 12. 复合索引：分类 + 状态 + 价格（常用组合查询）
-        print("🔗 创建复合索引（category + status + price）...")
-        await collection.create_index(
-            [
-                ("category", 1),
-                ("status", 1),
-                ("price", 1)
-            ],
-            name="category_status_price_idx"
-        )
-        print("   ✅ 复合索引创建成功")
-        
-        # 13. 复合索引：软删除 + 状态（有效商品查询）
-        print("🔗 创建复合索引（is_deleted + status）...")
-        await collection.create_index(
-            [
-                ("is_deleted", 1),
-                ("status", 1)
-            ],
-            name="deleted_status_idx"
-        )
-        print("   ✅ 复合索引创建成功")
+                print("    ⚠️  已存在，跳过")
         
-        # 14. 唯一索引：URL slug（可选字段，稀疏索引）
-        print("🔑 创建唯一索引（slug）...")
-        await collection.create_index(
-            "slug",
-            unique=True,
-            sparse=True,  # 稀疏索引：只索引存在该字段的文档
-            name="slug_unique_idx"
-        )
-        print("   ✅ slug 唯一索引创建成功")
+        for item in drift["mismatched"]:
+            print(f"\n⚠️  索引定义不一致（需手动处理）: {item['name']}")
+            for difference in item["differences"]:
+                print(f"   - {difference}")
         
-        # 15. 创建者索引（用于查询某个用户创建的商品）
-        print("👤 创建创建者索引...")
-        await collection.create_index("created_by")
-        print("   ✅ created_by 索引创建成功")
+        created = await index_registry.ensure(collection)
         
         print("\n" + "="*50)
-        print("✅ 所有索引创建完成！")
+        print(f"✅ 索引创建完成！新建 {len(created)} 个")
         print("="*50)
         
         # 列出所有索引
@@ -0,0 +1,170 @@
+"""
+部分索引迁移脚本
+
+把热点复合索引换成只索引未删除文档的部分索引（partialFilterExpression: {is_deleted: false}），
+索引定义见 app/indexes.py（带 replaces 的索引声明）：
+- products: slug 唯一索引、category + status + price、status（取代 is_deleted + status）
+- orders: user_id + created_at、status + created_at，并删除 is_deleted 单字段索引
+
+迁移不停机：先建立新索引（MongoDB 4.2+ 的索引构建不会长时间锁集合），
+新索引可用后才删除旧索引，过程中查询始终有索引可用；唯一约束在新旧索引交接期间一直有效。
+执行前后输出各索引大小，便于确认软删除文档不再占用索引内存。
+
+使用方法：
+    python scripts/migrate_partial_indexes.py              # 预览：输出迁移计划与当前索引大小
+    python scripts/migrate_partial_indexes.py --apply      # 执行迁移
+    python scripts/migrate_partial_indexes.py --apply --keep-old    # 隐藏旧索引而不删除（可 unhide 回滚）
+    python scripts/migrate_partial_indexes.py --apply --drop-first  # 服务器不允许同键的两个索引时，先删旧索引
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+
+from app.config import settings
+from app.indexes import index_registry
+
+# 同键索引已存在时的错误码（IndexOptionsConflict / IndexKeySpecsConflict）
+INDEX_CONFLICT_CODES = {85, 86}
+
+
+async def index_sizes(db, collection: str):
+    """各索引大小（字节）"""
+    stats = await db.command("collStats", collection)
+    return dict(stats.get("indexSizes", {}))
+
+
+def format_size(size: int) -> str:
+    """格式化字节数"""
+    return f"{size / 1024 / 1024:,.2f} MB"
+
+
+def print_sizes(title: str, sizes_by_collection):
+    """输出索引大小"""
+    print(f"\n📊 {title}")
+    for collection, sizes in sizes_by_collection.items():
+        print(f"  {collection}（合计 {format_size(sum(sizes.values()))}）")
+        for name, size in sorted(sizes.items()):
+            print(f"    • {name:<36} {format_size(size)}")
+
+
+async def retire_index(db, collection, name: str, keep_old: bool):
+    """
+    删除旧索引，或在 keep_old 时将其隐藏（MongoDB 4.4+）
+
+    隐藏的唯一索引仍会执行唯一约束，确认无误后应删除
+    """
+    if keep_old:
+        await db.command("collMod", collection.name, index={"name": name, "hidden": True})
+        print(f"    🙈 已隐藏旧索引 {name}（回滚: collMod index.hidden=false）")
+    else:
+        await collection.drop_index(name)
+        print(f"    🗑️  已删除旧索引 {name}")
+
+
+async def migrate_collection(db, name: str, args) -> int:
+    """迁移单个集合，返回失败数"""
+    collection = db[name]
+    existing = {info["name"] for info in await collection.list_indexes().to_list(length=None)}
+    failures = 0
+
+    for spec in index_registry.specs(name):
+        old_names = [old for old in spec.replaces if old in existing]
+        if spec.name in existing and not old_names:
+            continue
+
+        print(f"\n  🔁 {name}.{spec.name}")
+        print(f"    字段: {spec.keys}")
+        print(f"    部分索引条件: {spec.options.get('partialFilterExpression')}")
+        print(f"    取代: {', '.join(old_names) or '（无）'}")
+        if not args.apply:
+            continue
+
+        try:
+            if spec.name not in existing:
+                try:
+                    await collection.create_indexes([spec.to_model()])
+                except OperationFailure as e:
+                    if e.code not in INDEX_CONFLICT_CODES or not args.drop_first:
+                        raise
+                    # 服务器不允许相同键的第二个索引：先删旧索引（短暂没有索引可用）
+                    print("    ⚠️  服务器不允许同键的两个索引，先删除旧索引")
+                    for old in old_names:
+                        await collection.drop_index(old)
+                    old_names = []
+                    await collection.create_indexes([spec.to_model()])
+                print("    ✅ 新索引已建立")
+
+            for old in old_names:
+                await retire_index(db, collection, old, args.keep_old)
+        except OperationFailure as e:
+            failures += 1
+            print(f"    ❌ 失败: {e}")
+            if e.code in INDEX_CONFLICT_CODES:
+                print("    提示: 旧版本 MongoDB 不允许相同键的两个索引，可加上 --drop-first 重试")
+
+    for old in index_registry.retired(name):
+        if old in existing and not any(old in spec.replaces for spec in index_registry.specs(name)):
+            print(f"\n  🧹 {name}.{old}（不再需要）")
+            if args.apply:
+                await retire_index(db, collection, old, args.keep_old)
+
+    return failures
+
+
+async def run(args):
+    client = AsyncIOMotorClient(args.db_url)
+    db = client[args.db_name]
+    collections = [name for name in index_registry.collections() if index_registry.retired(name)]
+    try:
+        before = {name: await index_sizes(db, name) for name in collections}
+        print_sizes("迁移前索引大小", before)
+
+        print("\n" + "=" * 60)
+        print("迁移计划" if not args.apply else "执行迁移")
+        print("=" * 60)
+        failures = 0
+        for name in collections:
+            failures += await migrate_collection(db, name, args)
+
+        if not args.apply:
+            print("\n（预览模式，未做任何修改；加上 --apply 执行）")
+            return
+
+        after = {name: await index_sizes(db, name) for name in collections}
+        print_sizes("迁移后索引大小", after)
+
+        print("\n📉 变化")
+        for name in collections:
+            total_before = sum(before[name].values())
+            total_after = sum(after[name].values())
+            print(f"  {name}: {format_size(total_before)} -> {format_size(total_after)}"
+                  f"（{format_size(total_after - total_before)}）")
+
+        if failures:
+            print(f"\n❌ {failures} 个索引迁移失败")
+            sys.exit(1)
+        print("\n✅ 迁移完成")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把热点索引迁移为只索引未删除文档的部分索引")
+    parser.add_argument("--apply", action="store_true", help="执行迁移（默认只预览）")
+    parser.add_argument("--keep-old", action="store_true", help="隐藏旧索引而不删除（MongoDB 4.4+）")
+    parser.add_argument("--drop-first", action="store_true", help="服务器不允许同键的两个索引时先删除旧索引")
+    parser.add_argument("--db-url", default=settings.MONGODB_URL, help="MongoDB 连接URL")
+    parser.add_argument("--db-name", default=settings.MONGODB_DB_NAME, help="数据库名称")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+測試共用設定
+
+API 測試以 raise 模式檢查查詢預算：請求超出路由宣告的命令預算（query_budget）
+或重複執行同一查詢形狀（N+1）時返回 500 QUERY_BUDGET_EXCEEDED，測試隨即失敗。
+必須在匯入 app 之前設定，個別測試可透過 settings.QUERY_BUDGET_MODE 調整。
+"""
+
+import os
+
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
@@ -0,0 +1,106 @@
+"""
+進程內快取測試
+
+測試 BoundedCache 的 LRU 淘汰、位元組上限、TTL、失效與讀庫回填保護（不需要資料庫）
+"""
+
+import time
+
+import pytest
+
+from app.utils.cache import BoundedCache
+
+
+@pytest.fixture
+def cache():
+    """空的有界快取"""
+    return BoundedCache("test", max_entries=10, max_bytes=1024 * 1024, ttl_seconds=30.0, sizeof=lambda _: 1)
+
+
+class TestBoundedCache:
+    """測試有界快取"""
+
+    def test_least_recently_used_evicted(self):
+        cache = BoundedCache("test", max_entries=2, max_bytes=1024, ttl_seconds=30.0, sizeof=lambda _: 1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_byte_limit(self):
+        cache = BoundedCache("test", max_entries=10, max_bytes=10, ttl_seconds=30.0, sizeof=len)
+        cache.set("a", "123456")
+        cache.set("b", "123456")
+
+        assert "a" not in cache
+        assert cache.stats()["bytes"] == 6
+
+    def test_oversized_value_not_cached(self):
+        cache = BoundedCache("test", max_entries=10, max_bytes=4, ttl_seconds=30.0, sizeof=len)
+        cache.set("a", "123456")
+
+        assert len(cache) == 0
+
+    def test_expired_entry_removed(self, monkeypatch):
+        cache = BoundedCache("test", max_entries=10, max_bytes=1024, ttl_seconds=30.0, sizeof=lambda _: 1)
+        now = time.monotonic()
+        cache.set("a", 1)
+
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate(self, cache):
+        cache.set("p1", {"stock": 5})
+        cache.invalidate("p1")
+
+        assert cache.get("p1") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_disabled(self, cache):
+        cache.enabled = False
+        cache.set("p1", {"stock": 5})
+
+        assert cache.get("p1") is None
+        assert len(cache) == 0
+
+
+class TestSetIfUnchanged:
+    """測試讀庫回填保護"""
+
+    def test_fill_without_concurrent_write(self, cache):
+        started_at = time.monotonic()
+
+        assert cache.set_if_unchanged("p1", {"stock": 5}, started_at) is True
+        assert cache.get("p1") == {"stock": 5}
+
+    def test_write_during_read_wins(self, cache):
+        started_at = time.monotonic()
+        cache.set("p1", {"stock": 4})
+
+        assert cache.set_if_unchanged("p1", {"stock": 5}, started_at) is False
+        assert cache.get("p1") == {"stock": 4}
+
+    def test_invalidate_during_read_blocks_fill(self, cache):
+        started_at = time.monotonic()
+        cache.invalidate("p1")
+
+        assert cache.set_if_unchanged("p1", {"stock": 5}, started_at) is False
+        assert cache.get("p1") is None
+
+    def test_clear_during_read_blocks_fill(self, cache):
+        started_at = time.monotonic()
+        cache.clear()
+
+        assert cache.set_if_unchanged("p1", {"stock": 5}, started_at) is False
+
+    def test_write_before_read_allows_fill(self, cache):
+        cache.invalidate("p1")
+        # 讀取在失效之後才開始（加上一點時間，避免時鐘解析度不足時兩者相等）
+        started_at = time.monotonic() + 0.001
+
+        assert cache.set_if_unchanged("p1", {"stock": 5}, started_at) is True
@@ -0,0 +1,239 @@
+"""
+資料庫命令監控測試
+
+測試查詢形狀正規化、返回文件數、執行計畫摘要、命令歸屬到請求
+以及查詢預算與 N+1 偵測（不需要資料庫）
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.middleware.request_metrics import RequestMetricsMiddleware
+from app.utils.metrics import metrics
+from app.utils.mongo_listeners import (
+    BACKGROUND_ROUTE,
+    CommandMetricsListener,
+    command_collection,
+    command_query_shape,
+    docs_returned,
+    normalize_query_shape,
+    plan_summary,
+)
+from app.utils.query_budget import find_violations, query_budget
+from app.utils.request_context import (
+    RequestContext,
+    get_request_context,
+    reset_request_context,
+    set_request_context,
+)
+
+
+def started_event(command_name: str, command: dict, request_id: int = 1):
+    """構造 CommandStartedEvent"""
+    return SimpleNamespace(
+        command_name=command_name,
+        command=command,
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+    )
+
+
+def succeeded_event(command_name: str, reply: dict, duration_ms: float, request_id: int = 1):
+    """構造 CommandSucceededEvent"""
+    return SimpleNamespace(
+        command_name=command_name,
+        reply=reply,
+        duration_micros=int(duration_ms * 1000),
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+    )
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """每個測試前清空指標"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestQueryShape:
+    """測試查詢形狀"""
+
+    def test_literals_are_stripped(self):
+        shape = normalize_query_shape({"category": "books", "price": {"$gte": 10, "$lte": 99}})
+        assert shape == {"category": "?", "price": {"$gte": "?", "$lte": "?"}}
+
+    def test_in_list_length_does_not_change_shape(self):
+        short = normalize_query_shape({"_id": {"$in": [1]}})
+        long = normalize_query_shape({"_id": {"$in": list(range(500))}})
+        assert short == long == {"_id": {"$in": ["?"]}}
+
+    def test_find_keeps_sort_as_is(self):
+        command = {"find": "products", "filter": {"status": "active"}, "sort": {"price": -1}, "limit": 20}
+        shape = command_query_shape("find", command)
+        assert shape == {"filter": {"status": "?"}, "sort": {"price": -1}}
+
+    def test_aggregate_pipeline(self):
+        command = {
+            "aggregate": "orders",
+            "pipeline": [{"$match": {"user_id": "u1"}}, {"$group": {"_id": "$status", "n": {"$sum": 1}}}],
+        }
+        shape = command_query_shape("aggregate", command)
+        assert shape == {
+            "pipeline": [{"$match": {"user_id": "?"}}, {"$group": {"_id": "$status", "n": {"$sum": "?"}}}]
+        }
+
+    def test_commands_without_query(self):
+        assert command_query_shape("insert", {"insert": "orders", "documents": [{"a": 1}]}) == {}
+
+    def test_collection_name(self):
+        assert command_collection("find", {"find": "products"}) == "products"
+        assert command_collection("getMore", {"getMore": 123, "collection": "orders"}) == "orders"
+        assert command_collection("ping", {"ping": 1}) == "-"
+
+
+class TestReplyParsing:
+    """測試回覆解析"""
+
+    def test_docs_returned(self):
+        assert docs_returned({"cursor": {"firstBatch": [{}, {}], "id": 0}}) == 2
+        assert docs_returned({"cursor": {"nextBatch": [{}], "id": 0}}) == 1
+        assert docs_returned({"n": 5, "ok": 1}) == 5
+        assert docs_returned({"value": None, "ok": 1}) == 0
+        assert docs_returned({"values": ["a", "b", "c"], "ok": 1}) == 3
+        assert docs_returned({"ok": 1}) == 0
+
+    def test_plan_summary_from_explain(self):
+        reply = {
+            "queryPlanner": {
+                "winningPlan": {
+                    "stage": "FETCH",
+                    "inputStage": {"stage": "IXSCAN", "keyPattern": {"category": 1, "price": -1}},
+                }
+            }
+        }
+        assert plan_summary(reply) == "FETCH <- IXSCAN {category: 1, price: -1}"
+
+    def test_plan_summary_missing(self):
+        assert plan_summary({"cursor": {"firstBatch": []}, "ok": 1}) is None
+
+
+class TestCommandMetricsListener:
+    """測試命令歸屬"""
+
+    def test_attributes_to_current_request(self):
+        listener = CommandMetricsListener(slow_query_ms=0)
+        scope = {"route": SimpleNamespace(path_format="/api/v1/products/{product_id}")}
+        context = RequestContext("GET", "/api/v1/products/abc", scope)
+        token = set_request_context(context)
+        try:
+            listener.started(started_event("find", {"find": "products", "filter": {"_id": "abc"}}))
+            listener.succeeded(succeeded_event("find", {"cursor": {"firstBatch": [{}]}}, duration_ms=3.0))
+        finally:
+            reset_request_context(token)
+
+        assert context.db_commands == 1
+        assert context.db_time_ms == pytest.approx(3.0)
+        assert metrics.get_counter(
+            "db.commands", route="/api/v1/products/{product_id}", command="find", collection="products"
+        ) == 1
+        assert listener.stats()["in_flight"] == 0
+
+    def test_background_commands(self):
+        listener = CommandMetricsListener(slow_query_ms=0)
+        listener.started(started_event("update", {"update": "products", "updates": []}))
+        listener.succeeded(succeeded_event("update", {"n": 3}, duration_ms=1.0))
+
+        assert metrics.get_counter(
+            "db.commands", route=BACKGROUND_ROUTE, command="update", collection="products"
+        ) == 1
+
+    def test_slow_query_logged_with_shape(self, caplog):
+        listener = CommandMetricsListener(slow_query_ms=50)
+        listener.started(started_event("find", {"find": "orders", "filter": {"user_id": "secret-user"}}))
+        with caplog.at_level("WARNING", logger="app.slow_query"):
+            listener.succeeded(succeeded_event("find", {"cursor": {"firstBatch": []}}, duration_ms=80.0))
+
+        assert metrics.get_counter("db.slow_queries", route=BACKGROUND_ROUTE, command="find") == 1
+        assert '"user_id": "?"' in caplog.text
+        assert "secret-user" not in caplog.text
+
+    def test_fast_query_not_logged(self, caplog):
+        listener = CommandMetricsListener(slow_query_ms=50)
+        listener.started(started_event("find", {"find": "orders", "filter": {}}))
+        with caplog.at_level("WARNING", logger="app.slow_query"):
+            listener.succeeded(succeeded_event("find", {"cursor": {"firstBatch": []}}, duration_ms=5.0))
+
+        assert caplog.text == ""
+
+
+class TestQueryBudget:
+    """測試查詢預算與 N+1 偵測"""
+
+    def make_context(self, budget=None, shapes=None, commands=0):
+        context = RequestContext("GET", "/api/v1/orders", {})
+        context.query_budget = budget
+        context.query_shapes = dict(shapes or {})
+        context.db_commands = commands
+        return context
+
+    def test_within_budget(self):
+        context = self.make_context(budget=3, shapes={"find orders {}": 2}, commands=2)
+        assert find_violations(context, repeat_threshold=5) == []
+
+    def test_budget_exceeded(self):
+        context = self.make_context(budget=3, commands=4)
+        violations = find_violations(context, repeat_threshold=5)
+        assert violations == [{"kind": "budget", "budget": 3, "commands": 4}]
+
+    def test_repeated_shape(self):
+        shape = 'find products {"filter": {"_id": "?"}}'
+        context = self.make_context(shapes={shape: 6}, commands=6)
+        violations = find_violations(context, repeat_threshold=5)
+        assert [v["kind"] for v in violations] == ["repeated_query"]
+        assert violations[0]["shape"] == shape
+
+    def test_listener_tracks_shapes_only_when_enabled(self):
+        listener = CommandMetricsListener(slow_query_ms=0)
+        context = RequestContext("GET", "/api/v1/orders", {})
+        context.track_queries = True
+        token = set_request_context(context)
+        try:
+            for request_id in range(3):
+                command = {"find": "products", "filter": {"_id": request_id}}
+                listener.started(started_event("find", command, request_id=request_id))
+                listener.succeeded(succeeded_event("find", {"cursor": {"firstBatch": []}}, 1.0, request_id=request_id))
+            listener.started(started_event("getMore", {"getMore": 1, "collection": "products"}, request_id=9))
+            listener.succeeded(succeeded_event("getMore", {"cursor": {"nextBatch": []}}, 1.0, request_id=9))
+        finally:
+            reset_request_context(token)
+
+        assert context.db_commands == 4
+        assert context.query_shapes == {'find products {"filter": {"_id": "?"}}': 3}
+
+    @pytest.mark.asyncio
+    async def test_middleware_replaces_response_in_raise_mode(self, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "raise")
+
+        async def endpoint(scope, receive, send):
+            # 模擬路由宣告預算為 1，但執行了 2 個命令
+            await query_budget(1)()
+            context = get_request_context()
+            context.record_command(1.0)
+            context.record_command(1.0)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        middleware = RequestMetricsMiddleware(endpoint)
+        await middleware({"type": "http", "method": "GET", "path": "/x"}, None, send)
+
+        assert messages[0]["status"] == 500
+        assert b"QUERY_BUDGET_EXCEEDED" in messages[1]["body"]
@@ -0,0 +1,136 @@
+"""
+回應壓縮測試
+
+測試編碼選擇、最小大小、串流壓縮與已壓縮回應的直通（以 ASGI 應用模擬，不需要資料庫）
+"""
+
+import gzip
+import zlib
+
+import pytest
+
+from app.middleware.compression import CompressionMiddleware
+from app.utils.compression import GzipCodec, select_codec
+from app.utils.metrics import metrics
+
+LARGE_BODY = b'{"items":[' + b",".join(b'{"id":"%d","name":"product"}' % i for i in range(200)) + b"]}"
+
+
+def make_app(chunks, content_type=b"application/json", extra_headers=()):
+    """依序送出各段主體的 ASGI 應用"""
+    async def app(scope, receive, send):
+        headers = [(b"content-type", content_type)] + list(extra_headers)
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+async def call(app, accept_encoding="gzip"):
+    """執行請求，返回 (標頭字典, 主體)"""
+    middleware = CompressionMiddleware(app, minimum_size=500, codecs=[GzipCodec(6)])
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await middleware(scope, None, send)
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, body
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestSelectCodec:
+    """測試 Accept-Encoding 協商"""
+
+    def test_quality_and_server_preference(self):
+        class Named(GzipCodec):
+            def __init__(self, name):
+                super().__init__()
+                self.name = name
+
+        zstd, br, gz = Named("zstd"), Named("br"), Named("gzip")
+        available = [zstd, br, gz]
+
+        assert select_codec("gzip, br", available) is br
+        assert select_codec("gzip, br;q=0.5", available) is gz
+        assert select_codec("*", available) is zstd
+        assert select_codec("identity", available) is None
+        assert select_codec("gzip;q=0", available) is None
+        assert select_codec("", available) is None
+
+
+class TestCompressionMiddleware:
+    """測試壓縮中介軟體"""
+
+    @pytest.mark.asyncio
+    async def test_large_body_compressed(self):
+        headers, body = await call(make_app([LARGE_BODY]))
+
+        assert headers["content-encoding"] == "gzip"
+        assert headers["content-length"] == str(len(body))
+        assert "Accept-Encoding" in headers["vary"]
+        assert gzip.decompress(body) == LARGE_BODY
+        saved = metrics.get_counter("http.compression_saved_bytes", encoding="gzip")
+        assert saved == len(LARGE_BODY) - len(body)
+
+    @pytest.mark.asyncio
+    async def test_small_body_skipped(self):
+        headers, body = await call(make_app([b'{"ok":true}']))
+
+        assert "content-encoding" not in headers
+        assert body == b'{"ok":true}'
+        assert "Accept-Encoding" in headers["vary"]
+
+    @pytest.mark.asyncio
+    async def test_not_accepted(self):
+        headers, body = await call(make_app([LARGE_BODY]), accept_encoding="identity")
+
+        assert "content-encoding" not in headers
+        assert body == LARGE_BODY
+
+    @pytest.mark.asyncio
+    async def test_incompressible_type_skipped(self):
+        headers, body = await call(make_app([LARGE_BODY], content_type=b"image/png"))
+
+        assert "content-encoding" not in headers
+        assert "vary" not in headers
+
+    @pytest.mark.asyncio
+    async def test_already_encoded_passthrough(self):
+        precompressed = gzip.compress(LARGE_BODY)
+        app = make_app([precompressed], extra_headers=[(b"content-encoding", b"gzip")])
+
+        headers, body = await call(app)
+
+        assert body == precompressed
+
+    @pytest.mark.asyncio
+    async def test_streaming_chunks_decompress_incrementally(self):
+        lines = [b'{"id":"%d"}\n' % i for i in range(5)]
+        middleware = CompressionMiddleware(make_app(lines, b"application/x-ndjson"), minimum_size=500, codecs=[GzipCodec(6)])
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({"type": "http", "headers": [(b"accept-encoding", b"gzip")]}, None, send)
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        # 每一段都已 flush，逐段解壓即可取得對應的行
+        decompressor = zlib.decompressobj(31)
+        for line, message in zip(lines, messages[1:]):
+            assert decompressor.decompress(message["body"]) == line
+        assert messages[-1]["more_body"] is False
@@ -0,0 +1,134 @@
+"""
+資料庫連線設定測試
+
+測試 MONGODB_* 環境變數解析、壓縮演算法過濾、MongoClient 參數構造與連線池預熱
+（不需要資料庫）
+"""
+
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import Settings, settings
+from app.database import available_compressors, build_client_options, prewarm_pool
+
+
+@pytest.fixture
+def no_listeners(monkeypatch):
+    """不註冊事件監聽器，讓參數比對只涵蓋連線設定"""
+    monkeypatch.setattr(settings, "MONGODB_POOL_METRICS_ENABLED", False)
+    monkeypatch.setattr(settings, "DB_COMMAND_METRICS_ENABLED", False)
+
+
+class TestSettingsParsing:
+    """測試環境變數解析"""
+
+    def test_pool_and_timeout_variables(self, monkeypatch):
+        monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "50")
+        monkeypatch.setenv("MONGODB_MIN_POOL_SIZE", "5")
+        monkeypatch.setenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000")
+        monkeypatch.setenv("MONGODB_COMPRESSORS", "zstd,zlib")
+
+        parsed = Settings(_env_file=None)
+
+        assert parsed.MONGODB_MAX_POOL_SIZE == 50
+        assert parsed.MONGODB_MIN_POOL_SIZE == 5
+        assert parsed.MONGODB_WAIT_QUEUE_TIMEOUT_MS == 2000
+        assert parsed.MONGODB_COMPRESSORS == "zstd,zlib"
+
+    def test_optional_timeouts_default_to_driver(self, monkeypatch):
+        monkeypatch.delenv("MONGODB_SOCKET_TIMEOUT_MS", raising=False)
+        monkeypatch.delenv("MONGODB_MAX_IDLE_TIME_MS", raising=False)
+
+        parsed = Settings(_env_file=None)
+
+        assert parsed.MONGODB_SOCKET_TIMEOUT_MS is None
+        assert parsed.MONGODB_MAX_IDLE_TIME_MS is None
+
+
+class TestCompressors:
+    """測試壓縮演算法過濾"""
+
+    def test_keeps_order_and_skips_unknown(self, monkeypatch):
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+
+        assert available_compressors(" ZSTD, lz4 ,zlib,,snappy") == ["zstd", "zlib", "snappy"]
+
+    def test_skips_missing_packages(self, monkeypatch):
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None if name == "zstandard" else object())
+
+        assert available_compressors("zstd,zlib") == ["zlib"]
+
+    def test_empty(self):
+        assert available_compressors("") == []
+
+
+class TestClientOptions:
+    """測試 MongoClient 參數構造"""
+
+    def test_unset_options_omitted(self, monkeypatch, no_listeners):
+        monkeypatch.setattr(settings, "MONGODB_MAX_POOL_SIZE", 50)
+        monkeypatch.setattr(settings, "MONGODB_WAIT_QUEUE_TIMEOUT_MS", 2000)
+        monkeypatch.setattr(settings, "MONGODB_SOCKET_TIMEOUT_MS", None)
+        monkeypatch.setattr(settings, "MONGODB_COMPRESSORS", "")
+
+        options = build_client_options()
+
+        assert options["maxPoolSize"] == 50
+        assert options["waitQueueTimeoutMS"] == 2000
+        assert "socketTimeoutMS" not in options
+        assert "compressors" not in options
+        assert "event_listeners" not in options
+
+    def test_compressors_and_listeners(self, monkeypatch):
+        monkeypatch.setattr(settings, "MONGODB_COMPRESSORS", "zlib")
+        monkeypatch.setattr(settings, "MONGODB_POOL_METRICS_ENABLED", True)
+        monkeypatch.setattr(settings, "DB_COMMAND_METRICS_ENABLED", False)
+
+        options = build_client_options()
+
+        assert options["compressors"] == ["zlib"]
+        assert len(options["event_listeners"]) == 1
+
+
+class FakeAdmin:
+    """記錄 ping 次數，可設定失敗"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.pings = 0
+
+    async def command(self, name):
+        self.pings += 1
+        if self.fail:
+            raise ConnectionError("unreachable")
+        return {"ok": 1}
+
+
+class TestPrewarmPool:
+    """測試連線池預熱"""
+
+    @pytest.mark.asyncio
+    async def test_pings_concurrently(self):
+        client = SimpleNamespace(admin=FakeAdmin())
+
+        await prewarm_pool(client, 3)
+
+        assert client.admin.pings == 3
+
+    @pytest.mark.asyncio
+    async def test_zero_connections_skipped(self):
+        client = SimpleNamespace(admin=FakeAdmin())
+
+        await prewarm_pool(client, 0)
+
+        assert client.admin.pings == 0
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_raise(self):
+        client = SimpleNamespace(admin=FakeAdmin(fail=True))
+
+        await prewarm_pool(client, 2)
+
+        assert client.admin.pings == 2
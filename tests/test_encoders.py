@@ -0,0 +1,138 @@
+"""
+回應編碼器測試
+
+測試 JSON 編碼、Accept 內容協商與 NDJSON / MessagePack 回應（不需要資料庫）
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+
+from app.models.common import paginated_response, success_response
+from app.models.order import OrderStatus, OrderStatusHistory
+from app.utils.encoders import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    EncodedResponse,
+    PydanticJSONEncoder,
+    encode_json,
+    encoders,
+    negotiate,
+    parse_accept,
+)
+from app.utils.request_context import RequestContext, reset_request_context, set_request_context
+
+
+@pytest.fixture
+def accept():
+    """在請求上下文中設定 Accept 標頭"""
+    tokens = []
+
+    def set_accept(value: str):
+        scope = {"type": "http", "headers": [(b"accept", value.encode("latin-1"))]}
+        tokens.append(set_request_context(RequestContext("GET", "/api/v1/orders", scope)))
+
+    yield set_accept
+    for token in reversed(tokens):
+        reset_request_context(token)
+
+
+def make_page():
+    return paginated_response(
+        items=[{"id": "1"}, {"id": "2"}],
+        page=1,
+        per_page=2,
+        total=3
+    )
+
+
+class TestJSONEncoding:
+    """測試 JSON 編碼"""
+
+    def test_native_types(self):
+        object_id = ObjectId()
+        content = {
+            "id": object_id,
+            "price": Decimal128("12.50"),
+            "created_at": datetime(2025, 11, 21, 10, 30, 0),
+            "status": OrderStatus.PAID,
+        }
+
+        assert json.loads(encode_json(content)) == {
+            "id": str(object_id),
+            "price": 12.5,
+            "created_at": "2025-11-21T10:30:00",
+            "status": "paid",
+        }
+
+    def test_models_encoded_like_model_dump(self):
+        history = OrderStatusHistory(status="paid", changed_at=datetime(2025, 11, 21, 10, 30, 0))
+
+        assert json.loads(encode_json({"history": [history]})) == {"history": [history.model_dump(mode="json")]}
+
+    def test_backends_agree(self):
+        content = success_response({"id": ObjectId("507f1f77bcf86cd799439011"), "at": datetime(2025, 1, 1)})
+
+        assert json.loads(PydanticJSONEncoder().encode(content)) == json.loads(encode_json(content))
+
+
+class TestNegotiation:
+    """測試 Accept 內容協商"""
+
+    def test_parse_accept_orders_by_quality(self):
+        accept = "application/json;q=0.5, application/x-msgpack, text/html;q=0"
+        assert parse_accept(accept) == [MSGPACK_MEDIA_TYPE, JSON_MEDIA_TYPE]
+
+    def test_wildcard_and_unknown_use_json(self):
+        assert negotiate("*/*").media_type == JSON_MEDIA_TYPE
+        assert negotiate("text/html").media_type == JSON_MEDIA_TYPE
+
+    def test_ndjson_only_for_paginated(self):
+        assert negotiate(NDJSON_MEDIA_TYPE, paginated=True).media_type == NDJSON_MEDIA_TYPE
+        assert negotiate(NDJSON_MEDIA_TYPE, paginated=False).media_type == JSON_MEDIA_TYPE
+
+    def test_json_without_request_context(self):
+        response = EncodedResponse(make_page())
+
+        assert response.media_type == JSON_MEDIA_TYPE
+        assert json.loads(response.body)["data"]["items"] == [{"id": "1"}, {"id": "2"}]
+
+
+class TestEncodedResponse:
+    """測試依 Accept 編碼的回應"""
+
+    def test_ndjson_list(self, accept):
+        accept(NDJSON_MEDIA_TYPE)
+
+        response = EncodedResponse(make_page())
+
+        assert response.media_type == NDJSON_MEDIA_TYPE
+        assert [json.loads(line) for line in response.body.splitlines()] == [{"id": "1"}, {"id": "2"}]
+        assert json.loads(response.headers["x-pagination"])["total"] == 3
+        assert response.headers["vary"] == "Accept"
+
+    def test_ndjson_falls_back_to_json_for_single_resource(self, accept):
+        accept(NDJSON_MEDIA_TYPE)
+
+        response = EncodedResponse(success_response({"id": "1"}))
+
+        assert response.media_type == JSON_MEDIA_TYPE
+        assert json.loads(response.body)["data"] == {"id": "1"}
+
+    def test_msgpack(self, accept):
+        msgpack = pytest.importorskip("msgpack")
+        if MSGPACK_MEDIA_TYPE not in encoders():
+            pytest.skip("RESPONSE_MSGPACK_ENABLED 已關閉")
+        accept(MSGPACK_MEDIA_TYPE)
+
+        response = EncodedResponse(success_response({"at": datetime(2025, 1, 1), "id": ObjectId("507f1f77bcf86cd799439011")}))
+
+        assert response.media_type == MSGPACK_MEDIA_TYPE
+        assert msgpack.unpackb(response.body)["data"] == {
+            "at": "2025-01-01T00:00:00",
+            "id": "507f1f77bcf86cd799439011",
+        }
@@ -0,0 +1,162 @@
+"""
+索引註冊表測試
+
+測試索引定義比對與漂移報告（以假集合模擬 list_indexes，不需要資料庫）
+"""
+
+import pytest
+
+from app.indexes import LIVE_ONLY, IndexRegistry, IndexSpec, index_registry
+
+
+class FakeCursor:
+    """模擬 list_indexes 返回的游標"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return list(self.documents)
+
+
+class FakeCollection:
+    """只支援 list_indexes / create_indexes 的假集合"""
+
+    def __init__(self, name, indexes):
+        self.name = name
+        self.indexes = [{"v": 2, "key": {"_id": 1}, "name": "_id_"}] + list(indexes)
+        self.created = []
+
+    def list_indexes(self):
+        return FakeCursor(self.indexes)
+
+    async def create_indexes(self, models):
+        names = [model.document["name"] for model in models]
+        self.created.extend(names)
+        return names
+
+
+@pytest.fixture
+def registry():
+    registry = IndexRegistry()
+    registry.declare(
+        "users",
+        IndexSpec("email_unique", "email", unique=True),
+        IndexSpec("created_at_id", [("created_at", -1), ("_id", -1)]),
+    )
+    return registry
+
+
+class TestIndexSpec:
+    """測試索引定義比對"""
+
+    def test_identical_index(self):
+        spec = IndexSpec("email_unique", "email", unique=True)
+        assert spec.differences({"key": {"email": 1}, "name": "email_unique", "unique": True}) == []
+
+    def test_numeric_direction_types_are_equal(self):
+        spec = IndexSpec("created_at_index", [("created_at", -1)])
+        assert spec.differences({"key": {"created_at": -1.0}, "name": "created_at_index"}) == []
+
+    def test_missing_unique_option(self):
+        spec = IndexSpec("email_unique", "email", unique=True)
+        differences = spec.differences({"key": {"email": 1}, "name": "email_unique"})
+        assert differences == ["unique: expected True, found False"]
+
+    def test_partial_filter_expression_compared(self):
+        spec = IndexSpec("status_live_idx", "status", partialFilterExpression=LIVE_ONLY)
+        full = {"key": {"status": 1}, "name": "status_live_idx"}
+        partial = dict(full, partialFilterExpression={"is_deleted": False})
+
+        assert spec.differences(partial) == []
+        assert spec.differences(full) == ["partialFilterExpression: expected {'is_deleted': False}, found None"]
+
+    def test_text_index_compared_by_fields(self):
+        spec = IndexSpec("text_search_index", [("name", "text"), ("description", "text")])
+        info = {
+            "key": {"_fts": "text", "_ftsx": 1},
+            "name": "text_search_index",
+            "weights": {"description": 1, "name": 1},
+        }
+        assert spec.differences(info) == []
+
+
+class TestIndexRegistry:
+    """測試漂移報告"""
+
+    @pytest.mark.asyncio
+    async def test_missing_extra_and_ok(self, registry):
+        collection = FakeCollection("users", [
+            {"key": {"email": 1}, "name": "email_unique", "unique": True},
+            {"key": {"role": 1}, "name": "role_1"},
+        ])
+
+        result = await registry.diff_collection(collection)
+
+        assert result["ok"] == ["email_unique"]
+        assert result["missing"] == ["created_at_id"]
+        assert result["extra"] == ["role_1"]
+        assert result["mismatched"] == []
+
+    @pytest.mark.asyncio
+    async def test_renamed_index_is_mismatched_not_missing(self, registry):
+        collection = FakeCollection("users", [
+            {"key": {"email": 1}, "name": "email_1", "unique": True},
+        ])
+
+        result = await registry.diff_collection(collection)
+
+        assert "email_unique" not in result["missing"]
+        assert result["extra"] == []
+        assert result["mismatched"][0]["name"] == "email_unique"
+
+    @pytest.mark.asyncio
+    async def test_ensure_creates_only_missing(self, registry):
+        collection = FakeCollection("users", [
+            {"key": {"email": 1}, "name": "email_unique", "unique": True},
+        ])
+
+        created = await registry.ensure(collection)
+
+        assert created == ["created_at_id"]
+        assert collection.created == ["created_at_id"]
+
+    @pytest.mark.asyncio
+    async def test_replaced_index_is_retired_not_renamed(self):
+        registry = IndexRegistry()
+        registry.declare("orders", IndexSpec(
+            "status_created_live_idx",
+            [("status", 1), ("created_at", -1)],
+            partialFilterExpression=LIVE_ONLY,
+            replaces=("status_created_compound",),
+        ))
+        registry.retire("orders", "is_deleted_index")
+        collection = FakeCollection("orders", [
+            {"key": {"status": 1, "created_at": -1}, "name": "status_created_compound"},
+            {"key": {"is_deleted": 1}, "name": "is_deleted_index", "sparse": True},
+        ])
+
+        result = await registry.diff_collection(collection)
+
+        assert result["missing"] == ["status_created_live_idx"]
+        assert result["retired"] == ["is_deleted_index", "status_created_compound"]
+        assert result["mismatched"] == []
+        assert result["extra"] == []
+        # 舊索引仍在時交由遷移腳本處理，背景建立不會建立取代索引
+        assert await registry.ensure(collection) == []
+
+    def test_hot_indexes_are_partial(self):
+        products = {spec.name: spec for spec in index_registry.specs("products")}
+        orders = {spec.name: spec for spec in index_registry.specs("orders")}
+        for spec in (
+            products["slug_live_unique_idx"],
+            products["category_status_price_live_idx"],
+            orders["user_created_live_idx"],
+            orders["status_created_live_idx"],
+        ):
+            assert spec.options["partialFilterExpression"]["is_deleted"] is False
+
+    def test_users_email_is_unique(self):
+        specs = {spec.name: spec for spec in index_registry.specs("users")}
+        assert specs["email_unique"].keys == [("email", 1)]
+        assert specs["email_unique"].options.get("unique") is True
@@ -0,0 +1,73 @@
+"""
+MongoDB 驅動抽象層測試
+
+測試依設定選擇驅動、原生物件判斷，以及同步/異步返回值的統一處理
+（客戶端只建立不連線，不需要資料庫）
+"""
+
+import pytest
+
+from app.utils.mongo_driver import (
+    MongoDriver,
+    aggregate,
+    close_client,
+    create_client,
+    is_native,
+    start_session,
+)
+
+URL = "mongodb://localhost:27017"
+
+
+class FakeCollection:
+    """aggregate 同步返回游標（與 Motor 相同）"""
+
+    def aggregate(self, pipeline, **kwargs):
+        return ("cursor", pipeline)
+
+
+class FakeClient:
+    """start_session 返回協程（與原生驅動相同）"""
+
+    async def start_session(self, **kwargs):
+        return "session"
+
+
+class TestDriverSelection:
+    """測試驅動選擇"""
+
+    @pytest.mark.asyncio
+    async def test_pymongo_driver_is_native(self):
+        client = create_client("pymongo", URL, appname="test")
+        try:
+            database = client["driver_test"]
+            assert is_native(client)
+            assert is_native(database)
+            assert is_native(database["products"])
+        finally:
+            await close_client(client)
+
+    @pytest.mark.asyncio
+    async def test_motor_driver_is_not_native(self):
+        client = create_client(MongoDriver.MOTOR, URL)
+        try:
+            assert not is_native(client)
+            assert not is_native(client["driver_test"]["products"])
+        finally:
+            await close_client(client)
+
+    def test_unknown_driver_rejected(self):
+        with pytest.raises(ValueError):
+            create_client("mongoengine", URL)
+
+
+class TestResolve:
+    """測試返回值處理"""
+
+    @pytest.mark.asyncio
+    async def test_motor_style_aggregate_returns_cursor(self):
+        assert await aggregate(FakeCollection(), [{"$match": {}}]) == ("cursor", [{"$match": {}}])
+
+    @pytest.mark.asyncio
+    async def test_native_style_session_is_awaited(self):
+        assert await start_session(FakeClient()) == "session"
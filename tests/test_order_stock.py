@@ -0,0 +1,318 @@
+"""
+訂單庫存操作測試
+
+測試下單商品驗證、數量彙總、帶條件的扣減/回補批量操作、非事務模式的補償流程，
+以及訂單狀態變更的樂觀並發控制
+（以假的集合模擬，不需要資料庫）
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.middleware.error_handler import ConflictException, ValidationException
+from app.models.order import OrderItem, OrderStatus
+from app.services import order_service
+from app.services.order_service import (
+    ORDER_ITEM_PRODUCT_PROJECTION,
+    OrderService,
+    STOCK_RESERVATIONS_FIELD,
+)
+
+PRODUCT_A = str(ObjectId())
+PRODUCT_B = str(ObjectId())
+MISSING_PRODUCT = str(ObjectId())
+
+
+def make_item(product_id: str, quantity: int, name: str = "商品") -> OrderItem:
+    """構造訂單商品項"""
+    return OrderItem(
+        product_id=product_id,
+        product_name=name,
+        price=100,
+        quantity=quantity,
+        subtotal=100 * quantity
+    )
+
+
+class FakeCursor:
+    """只支援 to_list 的游標"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return list(self.documents)
+
+
+class FakeProducts:
+    """
+    記錄批量操作的商品集合
+
+    bulk_write 依 matched 決定哪些扣減成功；find 在提供 documents 時按 $in 返回商品文檔，
+    否則返回帶有預留標記的商品
+    """
+
+    def __init__(self, matched, documents=None):
+        self.matched = set(matched)
+        self.documents = documents
+        self.bulk_calls = []
+        self.find_calls = []
+        self.update_many_calls = []
+
+    async def bulk_write(self, operations, ordered=True, session=None):
+        self.bulk_calls.append(operations)
+        matched = sum(1 for op in operations if str(op._filter["_id"]) in self.matched)
+        return SimpleNamespace(matched_count=matched, modified_count=matched)
+
+    def find(self, query, projection=None, session=None):
+        self.find_calls.append((query, projection))
+        if self.documents is not None:
+            return FakeCursor([
+                self.documents[str(oid)] for oid in query["_id"]["$in"] if str(oid) in self.documents
+            ])
+        return FakeCursor([{"_id": ObjectId(pid)} for pid in self.matched])
+
+    async def update_many(self, query, update):
+        self.update_many_calls.append((query, update))
+
+
+class FakeOrders:
+    """
+    記錄寫入的訂單集合
+
+    find_one_and_update 只在查詢條件（含狀態前置條件）全部符合時更新；
+    提供 stale_document 時 find_one 返回這份舊文檔，模擬並發請求讀到相同的舊狀態
+    """
+
+    def __init__(self, error=None, document=None, stale_document=None):
+        self.error = error
+        self.document = document
+        self.stale_document = stale_document
+        self.inserted = []
+
+    async def insert_one(self, document, session=None):
+        if self.error is not None:
+            raise self.error
+        self.inserted.append(document)
+        return SimpleNamespace(inserted_id=ObjectId())
+
+    async def find_one(self, query, *args, **kwargs):
+        document = self.stale_document or self.document
+        return dict(document) if document else None
+
+    async def find_one_and_update(self, query, update, return_document=None, session=None):
+        if self.document is None or any(self.document.get(field) != value for field, value in query.items()):
+            return None
+        self.document.update(update["$set"])
+        return dict(self.document)
+
+
+def make_service(products: FakeProducts, orders: FakeOrders) -> OrderService:
+    """使用假集合的訂單服務"""
+    return OrderService({"orders": orders, "products": products, "users": None})
+
+
+def make_product(product_id: str, stock: int, name: str = "商品") -> dict:
+    """構造投影後的商品文檔"""
+    return {
+        "_id": ObjectId(product_id),
+        "name": name,
+        "slug": "product",
+        "price": 100,
+        "stock": stock,
+        "status": "active",
+        "images": [],
+    }
+
+
+class TestValidateItems:
+    """測試下單商品的批量驗證"""
+
+    def make_products(self, stock_a: int = 10, stock_b: int = 10) -> FakeProducts:
+        return FakeProducts([], documents={
+            PRODUCT_A: make_product(PRODUCT_A, stock_a),
+            PRODUCT_B: make_product(PRODUCT_B, stock_b),
+        })
+
+    @pytest.mark.asyncio
+    async def test_single_projected_find(self):
+        products = self.make_products()
+        service = make_service(products, FakeOrders())
+
+        items, info = await service._validate_and_prepare_items(
+            [make_item(PRODUCT_A, 1), make_item(PRODUCT_B, 2), make_item(PRODUCT_A, 1)]
+        )
+
+        assert len(products.find_calls) == 1
+        query, projection = products.find_calls[0]
+        assert query["_id"]["$in"] == [ObjectId(PRODUCT_A), ObjectId(PRODUCT_B)]
+        assert projection == ORDER_ITEM_PRODUCT_PROJECTION
+        assert [item.product_id for item in items] == [PRODUCT_A, PRODUCT_B, PRODUCT_A]
+        assert set(info) == {PRODUCT_A, PRODUCT_B}
+
+    @pytest.mark.asyncio
+    async def test_duplicate_lines_use_cumulative_stock(self):
+        service = make_service(self.make_products(stock_a=3), FakeOrders())
+
+        with pytest.raises(ValidationException, match="需要: 4"):
+            await service._validate_and_prepare_items([make_item(PRODUCT_A, 2), make_item(PRODUCT_A, 2)])
+
+    @pytest.mark.asyncio
+    async def test_uppercase_ids_are_normalized(self):
+        service = make_service(self.make_products(stock_a=3), FakeOrders())
+        items = [make_item(PRODUCT_A.upper(), 2), make_item(PRODUCT_A, 2)]
+
+        assert OrderService._aggregate_quantities(items) == {PRODUCT_A: 4}
+        with pytest.raises(ValidationException, match="需要: 4"):
+            await service._validate_and_prepare_items(items)
+
+        validated, _ = await service._validate_and_prepare_items([make_item(PRODUCT_A.upper(), 1)])
+        assert validated[0].product_id == PRODUCT_A
+        assert OrderService._product_name(PRODUCT_A, [make_item(PRODUCT_A.upper(), 1, "大寫商品")]) == "大寫商品"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("product_ids, message", [
+        (["invalid", MISSING_PRODUCT], "无效的商品ID"),
+        ([MISSING_PRODUCT, "invalid"], "商品不存在或已下架"),
+        ([PRODUCT_B, MISSING_PRODUCT], "库存不足"),
+        ([MISSING_PRODUCT, PRODUCT_B], "商品不存在或已下架"),
+    ])
+    async def test_first_error_matches_item_order(self, product_ids, message):
+        service = make_service(self.make_products(stock_b=0), FakeOrders())
+
+        with pytest.raises(ValidationException, match=message):
+            await service._validate_and_prepare_items([make_item(pid, 1) for pid in product_ids])
+
+
+class TestStockOperations:
+    """測試扣減與回補操作的構建"""
+
+    def test_aggregate_quantities_merges_duplicate_lines(self):
+        items = [make_item(PRODUCT_A, 1), make_item(PRODUCT_B, 2), make_item(PRODUCT_A, 3)]
+
+        assert OrderService._aggregate_quantities(items) == {PRODUCT_A: 4, PRODUCT_B: 2}
+        assert list(OrderService._aggregate_quantities(items)) == [PRODUCT_A, PRODUCT_B]
+
+    def test_deduct_operations_guard_stock(self):
+        service = make_service(FakeProducts([]), FakeOrders())
+        now = datetime(2025, 11, 21, 10, 0, 0)
+
+        operations = service._build_deduct_operations({PRODUCT_A: 2}, now)
+
+        assert operations == [UpdateOne(
+            {"_id": ObjectId(PRODUCT_A), "stock": {"$gte": 2}, "is_deleted": False},
+            {"$inc": {"stock": -2, "sales_count": 2}, "$set": {"updated_at": now}}
+        )]
+
+    def test_deduct_operations_push_reservation(self):
+        service = make_service(FakeProducts([]), FakeOrders())
+        now = datetime(2025, 11, 21, 10, 0, 0)
+
+        operation = service._build_deduct_operations({PRODUCT_A: 2}, now, "ORD1")[0]
+
+        assert operation._doc["$push"] == {
+            STOCK_RESERVATIONS_FIELD: {"id": "ORD1", "quantity": 2, "created_at": now}
+        }
+
+    def test_restore_operations(self):
+        service = make_service(FakeProducts([]), FakeOrders())
+
+        operation = service._build_restore_operations({PRODUCT_A: 2})[0]
+
+        assert operation._filter == {"_id": ObjectId(PRODUCT_A)}
+        assert operation._doc["$inc"] == {"stock": 2, "sales_count": -2}
+
+
+class TestCompensation:
+    """測試非事務模式的補償"""
+
+    @pytest.mark.asyncio
+    async def test_guard_failure_releases_only_reserved_products(self):
+        products = FakeProducts(matched=[PRODUCT_A])
+        service = make_service(products, FakeOrders())
+        items = [make_item(PRODUCT_A, 1, "充足商品"), make_item(PRODUCT_B, 5, "不足商品")]
+
+        with pytest.raises(ValidationException, match="不足商品"):
+            await service._create_order_without_transaction({"order_number": "ORD1"}, items)
+
+        release = products.bulk_calls[1]
+        assert all(op._filter[f"{STOCK_RESERVATIONS_FIELD}.id"] == "ORD1" for op in release)
+        assert all(op._doc["$pull"] == {STOCK_RESERVATIONS_FIELD: {"id": "ORD1"}} for op in release)
+
+    @pytest.mark.asyncio
+    async def test_insert_failure_releases_reservation(self):
+        products = FakeProducts(matched=[PRODUCT_A])
+        service = make_service(products, FakeOrders(error=RuntimeError("insert failed")))
+
+        with pytest.raises(RuntimeError):
+            await service._create_order_without_transaction({"order_number": "ORD2"}, [make_item(PRODUCT_A, 1)])
+
+        assert len(products.bulk_calls) == 2
+        assert products.update_many_calls == []
+
+    @pytest.mark.asyncio
+    async def test_success_clears_reservation(self):
+        products = FakeProducts(matched=[PRODUCT_A])
+        orders = FakeOrders()
+        service = make_service(products, orders)
+
+        await service._create_order_without_transaction({"order_number": "ORD3"}, [make_item(PRODUCT_A, 1)])
+
+        assert len(orders.inserted) == 1
+        assert products.update_many_calls[0][1] == {"$pull": {STOCK_RESERVATIONS_FIELD: {"id": "ORD3"}}}
+
+
+def make_order_document(status: OrderStatus) -> dict:
+    """構造訂單文檔"""
+    return {
+        "_id": ObjectId(),
+        "order_number": "ORD4",
+        "user_id": "user-1",
+        "status": status.value,
+        "items": [{"product_id": PRODUCT_A, "quantity": 2}],
+        "is_deleted": False,
+    }
+
+
+class TestOptimisticConcurrency:
+    """測試以訂單狀態為前置條件的並發控制"""
+
+    @pytest.fixture(autouse=True)
+    def without_transactions(self, monkeypatch):
+        monkeypatch.setattr(order_service, "transactions_supported", lambda: False)
+
+    @pytest.mark.asyncio
+    async def test_status_update_conflict_returns_409(self):
+        document = make_order_document(OrderStatus.CANCELLED)
+        stale = dict(document, status=OrderStatus.PENDING.value)
+        orders = FakeOrders(document=document, stale_document=stale)
+        service = make_service(FakeProducts([]), orders)
+        update = SimpleNamespace(status=OrderStatus.PAID, note=None)
+
+        with pytest.raises(ConflictException) as exc_info:
+            await service.update_order_status(str(document["_id"]), update, "admin-1", "admin")
+
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.details["expected_status"] == OrderStatus.PENDING.value
+        assert orders.document["status"] == OrderStatus.CANCELLED.value
+
+    @pytest.mark.asyncio
+    async def test_duplicate_cancel_restores_stock_once(self):
+        document = make_order_document(OrderStatus.PENDING)
+        orders = FakeOrders(document=document, stale_document=dict(document))
+        products = FakeProducts([])
+        service = make_service(products, orders)
+        order_id = str(document["_id"])
+
+        await service.cancel_order(order_id, "user-1", "customer")
+        with pytest.raises(ConflictException) as exc_info:
+            await service.cancel_order(order_id, "user-1", "customer")
+
+        assert exc_info.value.status_code == 409
+        assert orders.document["status"] == OrderStatus.CANCELLED.value
+        assert len(products.bulk_calls) == 1
+        assert products.bulk_calls[0][0]._doc["$inc"] == {"stock": 2, "sales_count": -2}
@@ -0,0 +1,156 @@
+"""
+分頁工具測試
+
+測試游標的編碼、解析與驗證、鍵集範圍條件與總數模式（不需要資料庫）
+"""
+
+import base64
+from datetime import datetime
+
+import pytest
+from bson import ObjectId, json_util
+
+from app.middleware.error_handler import BadRequestException
+from app.models.common import TotalMode
+from app.utils.pagination import (
+    build_keyset_filter,
+    build_sort,
+    count_documents,
+    decode_cursor,
+    encode_cursor,
+    invalidate_count_cache,
+)
+
+
+def raw_cursor(payload) -> str:
+    """直接由 payload 構造游標（模擬客戶端竄改）"""
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class TestCursor:
+    """測試游標編碼與解析"""
+
+    def test_round_trip_datetime(self):
+        document = {"_id": ObjectId(), "created_at": datetime(2024, 5, 1, 12, 30)}
+        cursor = encode_cursor("created_at", -1, document)
+
+        value, last_id = decode_cursor(cursor, "created_at", -1)
+
+        assert value == document["created_at"]
+        assert last_id == document["_id"]
+
+    def test_round_trip_missing_value(self):
+        document = {"_id": ObjectId()}
+        cursor = encode_cursor("price", 1, document)
+
+        assert decode_cursor(cursor, "price", 1) == (None, document["_id"])
+
+    def test_sort_mismatch_rejected(self):
+        cursor = encode_cursor("price", 1, {"_id": ObjectId(), "price": 10.0})
+
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor, "price", -1)
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor, "created_at", 1)
+
+    def test_garbage_rejected(self):
+        with pytest.raises(BadRequestException):
+            decode_cursor("not-a-cursor!", "price", 1)
+
+    @pytest.mark.parametrize("value", [{"$gt": ""}, {"$ne": None}, [1, 2]])
+    def test_operator_value_rejected(self, value):
+        cursor = raw_cursor({"f": "price", "d": "asc", "v": value, "id": ObjectId()})
+
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor, "price", 1)
+
+    def test_operator_id_rejected(self):
+        cursor = raw_cursor({"f": "price", "d": "asc", "v": 1, "id": {"$gt": ""}})
+
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor, "price", 1)
+
+
+class TestKeysetFilter:
+    """測試鍵集範圍條件"""
+
+    def test_id_sort(self):
+        last_id = ObjectId()
+
+        assert build_keyset_filter("_id", -1, None, last_id) == {"_id": {"$lt": last_id}}
+        assert build_sort("_id", -1) == [("_id", -1)]
+
+    def test_ascending(self):
+        last_id = ObjectId()
+
+        assert build_keyset_filter("price", 1, 10.0, last_id) == {"$or": [
+            {"price": {"$gt": 10.0}},
+            {"price": 10.0, "_id": {"$gt": last_id}},
+        ]}
+
+    def test_descending_includes_nulls(self):
+        last_id = ObjectId()
+
+        assert build_keyset_filter("price", -1, 10.0, last_id) == {"$or": [
+            {"price": {"$lt": 10.0}},
+            {"price": 10.0, "_id": {"$lt": last_id}},
+            {"price": None},
+        ]}
+
+    def test_null_last_value(self):
+        last_id = ObjectId()
+
+        assert build_keyset_filter("price", 1, None, last_id) == {"$or": [
+            {"price": None, "_id": {"$gt": last_id}},
+            {"price": {"$ne": None}},
+        ]}
+        assert build_keyset_filter("price", -1, None, last_id) == {"price": None, "_id": {"$lt": last_id}}
+
+    def test_sort_includes_id_tiebreaker(self):
+        assert build_sort("created_at", -1) == [("created_at", -1), ("_id", -1)]
+
+
+class FakeCollection:
+    """只記錄 count_documents 呼叫的集合"""
+
+    def __init__(self, name: str, count: int):
+        self.name = name
+        self.count = count
+        self.count_calls = 0
+
+    async def count_documents(self, query):
+        self.count_calls += 1
+        return self.count
+
+
+class TestCountDocuments:
+    """測試總數模式"""
+
+    @pytest.mark.asyncio
+    async def test_none_mode_skips_count(self):
+        collection = FakeCollection("pagination_none", 5)
+
+        assert await count_documents(collection, {"is_deleted": False}, TotalMode.NONE) is None
+        assert collection.count_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_exact_mode_counts_every_time(self):
+        collection = FakeCollection("pagination_exact", 5)
+
+        await count_documents(collection, {"is_deleted": False}, TotalMode.EXACT)
+        await count_documents(collection, {"is_deleted": False}, TotalMode.EXACT)
+
+        assert collection.count_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_estimated_mode_reuses_cached_count(self):
+        invalidate_count_cache()
+        collection = FakeCollection("pagination_estimated", 7)
+
+        first = await count_documents(collection, {"is_deleted": False, "status": "active"}, TotalMode.ESTIMATED)
+        second = await count_documents(collection, {"status": "active", "is_deleted": False}, TotalMode.ESTIMATED)
+
+        assert first == second == 7
+        assert collection.count_calls == 1
+        invalidate_count_cache()
@@ -293,6 +293,54 @@ class TestProtectedEndpoints:
         )
         
         assert login_response.status_code == status.HTTP_200_OK
+    
+    @pytest.mark.asyncio
+    async def test_logout_revokes_token(self, test_client, clean_database):
+        """測試登出後舊 Token 失效"""
+        register_response = await test_client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": "logout@example.com",
+                "password": "LogoutPass123!",
+                "full_name": "登出用戶"
+            }
+        )
+        token = register_response.json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        response = await test_client.post("/api/v1/auth/logout", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        
+        response = await test_client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    @pytest.mark.asyncio
+    async def test_stateless_mode_uses_token_claims(self, test_client, clean_database, monkeypatch):
+        """測試無狀態認證模式：身份來自 Token 聲明，登出後立即失效"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "AUTH_STATELESS_ENABLED", True)
+        
+        register_response = await test_client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": "stateless@example.com",
+                "password": "StatelessPass123!",
+                "full_name": "無狀態用戶"
+            }
+        )
+        token = register_response.json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        # /auth/me 按需載入完整資料
+        response = await test_client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["full_name"] == "無狀態用戶"
+        
+        response = await test_client.post("/api/v1/auth/logout", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        
+        response = await test_client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
 class TestAdminEndpoints:
@@ -361,6 +409,98 @@ class TestAdminEndpoints:
         
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    @pytest.mark.asyncio
+    async def test_metrics_requires_admin(self, test_client, clean_database):
+        """測試指標端點需要管理員權限"""
+        response = await test_client.get("/metrics")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        register_response = await test_client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": "metrics@example.com",
+                "password": "MetricsPass123!",
+                "full_name": "指標用戶"
+            }
+        )
+        customer_token = register_response.json()["data"]["access_token"]
+
+        response = await test_client.get(
+            "/metrics",
+            headers={"Authorization": f"Bearer {customer_token}"}
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestPasswordHashing:
+    """測試 bcrypt 執行緒池"""
+    
+    @pytest.mark.asyncio
+    async def test_async_hash_and_verify(self):
+        """測試非同步雜湊與驗證"""
+        from app.utils.security import hash_password_async, verify_password_async
+        
+        hashed = await hash_password_async("AsyncPass123!")
+        assert await verify_password_async("AsyncPass123!", hashed) is True
+        assert await verify_password_async("WrongPass123!", hashed) is False
+    
+    @pytest.mark.asyncio
+    async def test_sheds_load_when_queue_full(self, monkeypatch):
+        """測試排隊已滿時返回 503"""
+        from app.config import settings
+        from app.middleware.error_handler import ServiceUnavailableException
+        from app.utils.security import verify_password_async
+        
+        monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+        with pytest.raises(ServiceUnavailableException):
+            await verify_password_async("AnyPass123!", "$2b$12$invalid")
+
+
+class TestTokenCache:
+    """測試已驗證 token 的快取"""
+    
+    def test_cached_decode_returns_same_claims(self):
+        """測試重複解碼返回相同聲明，且返回值互不影響"""
+        from app.utils.security import clear_token_cache, create_access_token, decode_access_token
+        
+        clear_token_cache()
+        token = create_access_token({"sub": "cache@example.com", "role": "customer"})
+        
+        first = decode_access_token(token)
+        first["role"] = "admin"
+        second = decode_access_token(token)
+        
+        assert second["sub"] == "cache@example.com"
+        assert second["role"] == "customer"
+    
+    def test_expired_token_not_served_from_cache(self, monkeypatch):
+        """測試過期的 token 不會從快取返回"""
+        from datetime import timedelta
+        from jose import jwt
+        from app.utils.security import clear_token_cache, create_access_token, decode_access_token
+        
+        clear_token_cache()
+        token = create_access_token(
+            {"sub": "expiring@example.com"},
+            expires_delta=timedelta(seconds=-1)
+        )
+        
+        # 略過過期檢查解碼一次，讓已過期的 token 進入快取
+        real_decode = jwt.decode
+        monkeypatch.setattr(jwt, "decode", lambda *args, **kwargs: real_decode(*args, options={"verify_exp": False}, **kwargs))
+        assert decode_access_token(token) is not None
+        monkeypatch.undo()
+        
+        assert decode_access_token(token) is None
+    
+    def test_tampered_token_rejected(self):
+        """測試被篡改的 token 不會命中快取"""
+        from app.utils.security import create_access_token, decode_access_token
+        
+        token = create_access_token({"sub": "tamper@example.com"})
+        assert decode_access_token(token) is not None
+        assert decode_access_token(token[:-2] + "xx") is None
+
 
 def test_imports():
     """測試所有模組可以正確導入"""
@@ -380,4 +520,3 @@ def test_imports():
 if __name__ == "__main__":
     # 執行測試
     pytest.main([__file__, "-v"])
-
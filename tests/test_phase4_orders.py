@@ -33,6 +33,10 @@ Phase 4: 订单管理系统测试
 6. 订单统计
    - 用户订单统计
    - 全局订单统计（管理员）
+
+7. 库存扣减条件
+   - 扣减时库存不足的商品识别
+   - 回收中断遗留的预留标记
 """
 
 import pytest
@@ -710,3 +714,88 @@ class TestOrderStatistics:
         assert data["total_amount"] > 0
         assert data["pending_orders"] >= 1
 
+
+
+def make_guard_product(name: str, stock: int) -> dict:
+    """构造直接写入数据库的商品（绕过 API 以制造扣减时的库存不足）"""
+    now = datetime.utcnow()
+    return {
+        "name": name,
+        "description": "库存条件测试商品",
+        "price": 100.0,
+        "stock": stock,
+        "sales_count": 0,
+        "category": "测试",
+        "status": "active",
+        "is_deleted": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+@pytest.mark.asyncio
+class TestStockGuard:
+    """库存扣减条件与非事务补偿测试"""
+
+    async def test_guard_shortage_reports_failed_product(self, clean_database):
+        """测试预检之后库存被抢走时，扣减条件拦下订单并指出不足的商品"""
+        from app.database import db as database
+        from app.middleware.error_handler import ValidationException
+        from app.models.order import OrderItem
+        from app.services.order_service import OrderService, STOCK_RESERVATIONS_FIELD
+        from app.utils.transactions import run_in_transaction, transactions_supported
+
+        db = clean_database
+        enough_id = (await db.products.insert_one(make_guard_product("充足商品", 5))).inserted_id
+        short_id = (await db.products.insert_one(make_guard_product("不足商品", 1))).inserted_id
+        items = [
+            OrderItem(product_id=str(enough_id), product_name="充足商品", price=100, quantity=2, subtotal=200),
+            OrderItem(product_id=str(short_id), product_name="不足商品", price=100, quantity=3, subtotal=300),
+        ]
+        order_dict = {"order_number": "ORDGUARDTEST", "items": [], "is_deleted": False}
+        service = OrderService(db)
+
+        with pytest.raises(ValidationException, match="不足商品"):
+            if transactions_supported():
+                await run_in_transaction(
+                    database.client,
+                    lambda session: service._create_order_with_transaction(order_dict, items, session)
+                )
+            else:
+                await service._create_order_without_transaction(order_dict, items)
+
+        enough = await db.products.find_one({"_id": enough_id})
+        short = await db.products.find_one({"_id": short_id})
+        assert enough["stock"] == 5
+        assert short["stock"] == 1
+        assert not enough.get(STOCK_RESERVATIONS_FIELD)
+        assert await db.orders.count_documents({"order_number": "ORDGUARDTEST"}) == 0
+
+    async def test_release_stale_reservations(self, clean_database):
+        """测试回收中断遗留的预留标记：订单不存在时回补库存，已下单时只清除标记"""
+        from app.services.order_service import OrderService, STOCK_RESERVATIONS_FIELD
+
+        db = clean_database
+        stale_at = datetime.utcnow() - timedelta(hours=1)
+        orphan = make_guard_product("遗留预留商品", 3)
+        orphan[STOCK_RESERVATIONS_FIELD] = [{"id": "ORDORPHAN", "quantity": 2, "created_at": stale_at}]
+        placed = make_guard_product("已下单商品", 3)
+        placed[STOCK_RESERVATIONS_FIELD] = [{"id": "ORDPLACED", "quantity": 2, "created_at": stale_at}]
+        fresh = make_guard_product("进行中商品", 3)
+        fresh[STOCK_RESERVATIONS_FIELD] = [{"id": "ORDFRESH", "quantity": 2, "created_at": datetime.utcnow()}]
+        orphan_id = (await db.products.insert_one(orphan)).inserted_id
+        placed_id = (await db.products.insert_one(placed)).inserted_id
+        fresh_id = (await db.products.insert_one(fresh)).inserted_id
+        await db.orders.insert_one({"order_number": "ORDPLACED", "is_deleted": False})
+
+        released = await OrderService(db).release_stale_reservations(older_than_seconds=300)
+
+        assert released == 1
+        orphan = await db.products.find_one({"_id": orphan_id})
+        placed = await db.products.find_one({"_id": placed_id})
+        fresh = await db.products.find_one({"_id": fresh_id})
+        assert orphan["stock"] == 5
+        assert orphan[STOCK_RESERVATIONS_FIELD] == []
+        assert placed["stock"] == 3
+        assert placed[STOCK_RESERVATIONS_FIELD] == []
+        assert len(fresh[STOCK_RESERVATIONS_FIELD]) == 1
@@ -0,0 +1,146 @@
+"""
+商品快取測試
+
+以假的集合測試 ProductService 的讀穿快取，以及商品寫入與訂單改變庫存後的快取失效（不需要資料庫）
+"""
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.middleware.error_handler import ValidationException
+from app.services.product_service import ProductService, product_cache
+from app.utils.response_cache import product_tag, response_cache
+
+
+def make_product_document(product_id: ObjectId) -> dict:
+    """構造與資料庫相同格式的商品文檔"""
+    now = datetime(2025, 11, 21, 10, 0, 0)
+    return {
+        "_id": product_id,
+        "name": "機械鍵盤",
+        "description": "青軸機械鍵盤",
+        "price": 2490.0,
+        "stock": 10,
+        "category": "周邊",
+        "tags": [],
+        "images": [],
+        "attributes": {},
+        "status": "active",
+        "sales_count": 0,
+        "views": 0,
+        "created_at": now,
+        "updated_at": now,
+        "is_deleted": False,
+    }
+
+
+class FakeProducts:
+    """記錄 find_one 次數的商品集合，find_one_and_update 會檢查庫存條件"""
+
+    def __init__(self, document: dict):
+        self.document = document
+        self.find_calls = 0
+
+    async def find_one(self, query, *args, **kwargs):
+        self.find_calls += 1
+        return dict(self.document)
+
+    async def update_one(self, query, update, *args, **kwargs):
+        for field, amount in update.get("$inc", {}).items():
+            self.document[field] = self.document.get(field, 0) + amount
+        return SimpleNamespace(modified_count=1)
+
+    async def find_one_and_update(self, query, update, *args, **kwargs):
+        if self.document["stock"] < query["stock"]["$gte"]:
+            return None
+        await self.update_one(query, update)
+        return dict(self.document)
+
+
+@pytest.fixture
+def product_id():
+    return ObjectId()
+
+
+@pytest.fixture
+def service(product_id):
+    """使用假集合的商品服務"""
+    product_cache.clear()
+    response_cache.clear()
+    service = ProductService(SimpleNamespace(products=FakeProducts(make_product_document(product_id))))
+    yield service
+    product_cache.clear()
+    response_cache.clear()
+
+
+class TestProductCache:
+    """測試商品讀穿快取與失效"""
+
+    @pytest.mark.asyncio
+    async def test_second_read_served_from_cache(self, service, product_id):
+        first = await service.get_product_by_id(str(product_id))
+        second = await service.get_product_by_id(str(product_id))
+
+        assert first.name == second.name == "機械鍵盤"
+        assert service.collection.find_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_increment_sales_count_invalidates_caches(self, service, product_id):
+        key = str(product_id)
+        await service.get_product_by_id(key)
+        response_cache.store("detail", "r", 200, [], b"{}", {product_tag(key)}, time.monotonic())
+
+        assert await service.increment_sales_count(key, 2) is True
+
+        assert key not in product_cache
+        assert response_cache.lookup("detail") is None
+        product = await service.get_product_by_id(key)
+        assert product.sales_count == 2
+        assert service.collection.find_calls == 2
+
+    def test_order_stock_change_invalidates_caches(self, service, product_id):
+        from app.services.order_service import OrderService
+
+        key = str(product_id)
+        product_cache.set(key, {"_id": product_id, "stock": 10})
+        response_cache.store("detail", "r", 200, [], b"{}", {product_tag(key)}, time.monotonic())
+
+        OrderService._invalidate_products([key])
+
+        assert key not in product_cache
+        assert response_cache.lookup("detail") is None
+
+    @pytest.mark.asyncio
+    async def test_use_cache_false_reads_database(self, service, product_id):
+        await service.get_product_by_id(str(product_id))
+        await service.get_product_by_id(str(product_id), use_cache=False)
+
+        assert service.collection.find_calls == 2
+
+
+class TestUpdateStock:
+    """測試帶庫存條件的庫存調整"""
+
+    @pytest.mark.asyncio
+    async def test_deduct_refreshes_cache(self, service, product_id):
+        key = str(product_id)
+        await service.get_product_by_id(key)
+
+        product = await service.update_stock(key, -4, "admin")
+
+        assert product.stock == 6
+        assert product_cache.get(key)["stock"] == 6
+        assert service.collection.find_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_shortage_leaves_stock_unchanged(self, service, product_id):
+        with pytest.raises(ValidationException) as exc_info:
+            await service.update_stock(str(product_id), -11, "admin")
+
+        assert exc_info.value.details["current_stock"] == 10
+        assert exc_info.value.details["shortage"] == 1
+        assert service.collection.document["stock"] == 10
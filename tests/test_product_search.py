@@ -0,0 +1,93 @@
+"""
+商品搜尋模式測試
+
+測試 auto 模式的解析、各模式的查詢條件與相關度分頁游標（不需要資料庫）
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.config import settings
+from app.middleware.error_handler import BadRequestException
+from app.models.product import SearchMode
+from app.services.product_service import SEARCH_NAME_FIELD, ProductService
+from app.services.search_engine import product_search_engine
+
+
+@pytest.fixture
+def service():
+    """不需要集合的商品服務"""
+    return ProductService(SimpleNamespace(products=None))
+
+
+@pytest.fixture
+def engine_off(monkeypatch):
+    """關閉搜尋引擎，讓 auto 模式在前綴匹配與全文檢索之間選擇"""
+    monkeypatch.setattr(settings, "PRODUCT_SEARCH_ENGINE_ENABLED", False)
+    monkeypatch.setattr(settings, "PRODUCT_SEARCH_PREFIX_MAX_CHARS", 3)
+
+
+class TestResolveSearchMode:
+    """測試搜尋模式解析"""
+
+    def test_auto_short_keyword_uses_prefix(self, service, engine_off):
+        assert service._resolve_search_mode("ipa", SearchMode.AUTO) == SearchMode.PREFIX
+
+    def test_auto_long_keyword_uses_text(self, service, engine_off):
+        assert service._resolve_search_mode("iphone 15", SearchMode.AUTO) == SearchMode.TEXT
+
+    def test_length_measured_after_normalization(self, service, engine_off):
+        # 全形字元正規化後為 3 個字元
+        assert service._resolve_search_mode("ＩＰＡ", SearchMode.AUTO) == SearchMode.PREFIX
+
+    def test_explicit_mode_kept(self, service, engine_off):
+        assert service._resolve_search_mode("ip", SearchMode.REGEX) == SearchMode.REGEX
+        assert service._resolve_search_mode("ip", SearchMode.TEXT) == SearchMode.TEXT
+
+    def test_engine_falls_back_to_text_when_not_ready(self, service, engine_off):
+        assert service._resolve_search_mode("耳機", SearchMode.ENGINE) == SearchMode.TEXT
+
+    def test_auto_prefers_ready_engine(self, service, monkeypatch):
+        monkeypatch.setattr(settings, "PRODUCT_SEARCH_ENGINE_ENABLED", True)
+        monkeypatch.setattr(product_search_engine, "ready", True)
+
+        assert service._resolve_search_mode("ip", SearchMode.AUTO) == SearchMode.ENGINE
+
+
+class TestSearchClause:
+    """測試各模式的查詢條件"""
+
+    def test_text(self, service):
+        assert service._build_search_clause("iphone 15", SearchMode.TEXT) == {
+            "$text": {"$search": "iphone 15"}
+        }
+
+    def test_prefix_is_anchored_and_escaped(self, service):
+        clause = service._build_search_clause("ＡＢ.c", SearchMode.PREFIX)
+
+        assert clause == {SEARCH_NAME_FIELD: {"$regex": r"^ab\.c"}}
+
+    def test_regex_escapes_input(self, service):
+        clause = service._build_search_clause("a+b", SearchMode.REGEX)
+
+        assert clause["$or"][0] == {"name": {"$regex": r"a\+b", "$options": "i"}}
+        assert len(clause["$or"]) == 3
+
+
+class TestOffsetCursor:
+    """測試相關度排序的偏移量游標"""
+
+    def test_round_trip(self, service):
+        cursor = service._encode_offset_cursor({"_id": ObjectId()}, 40)
+
+        assert service._decode_offset_cursor(cursor) == 40
+
+    def test_keyset_cursor_rejected(self, service):
+        from app.utils.pagination import encode_cursor
+
+        cursor = encode_cursor("created_at", -1, {"_id": ObjectId(), "created_at": None})
+
+        with pytest.raises(BadRequestException):
+            service._decode_offset_cursor(cursor)
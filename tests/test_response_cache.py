@@ -0,0 +1,249 @@
+"""
+回應快取測試
+
+測試查詢正規化、ETag、標籤失效、stale-while-revalidate 與中介軟體的命中流程
+（以 ASGI 應用模擬，不需要資料庫）
+"""
+
+import asyncio
+import gzip
+import time
+
+import pytest
+
+from app.middleware.response_cache import ResponseCacheMiddleware, compile_route
+from app.utils.compression import GzipCodec
+from app.utils.metrics import metrics
+from app.utils.response_cache import (
+    ResponseCache,
+    category_tag,
+    etag_matches,
+    invalidate_product,
+    normalize_query,
+    product_tag,
+    response_cache,
+    tag_response,
+)
+from app.utils.single_flight import SingleFlight
+
+ROUTES = ["/api/v1/products", "/api/v1/products/category/{category}"]
+BODY = b'{"items":[' + b",".join(b'{"id":"%d","name":"product"}' % i for i in range(100)) + b"]}"
+
+
+def make_app(tags=("products",), headers=()):
+    """回報快取標籤並返回固定主體的 ASGI 應用，記錄被呼叫的次數"""
+    async def app(scope, receive, send):
+        app.calls += 1
+        tag_response(*tags)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"vary", b"Accept")] + list(headers),
+        })
+        await send({"type": "http.response.body", "body": BODY})
+    app.calls = 0
+    return app
+
+
+async def call(middleware, path="/api/v1/products", query=b"", request_headers=()):
+    """執行 GET 請求，返回 (狀態碼, 標頭字典, 主體)"""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query,
+        "headers": [(key.encode(), value.encode()) for key, value in request_headers],
+    }
+    await middleware(scope, None, send)
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], headers, body
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(max_entries=100, max_bytes=1024 * 1024, ttl_seconds=10, stale_seconds=30)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestHelpers:
+    """測試鍵與 ETag 工具"""
+
+    def test_normalize_query_order_and_blank(self):
+        assert normalize_query(b"page=2&category=a&search=") == normalize_query(b"category=a&page=2")
+
+    def test_compile_route(self):
+        pattern = compile_route("/api/v1/products/category/{category}")
+        assert pattern.match("/api/v1/products/category/books")
+        assert not pattern.match("/api/v1/products/category/books/extra")
+        assert not compile_route("/api/v1/products").match("/api/v1/products/123")
+
+    def test_etag_matches(self):
+        assert etag_matches('W/"abc"', 'W/"abc"')
+        assert etag_matches('"xyz", "abc"', 'W/"abc"')
+        assert etag_matches("*", 'W/"abc"')
+        assert not etag_matches('W/"xyz"', 'W/"abc"')
+
+
+class TestResponseCache:
+    """測試快取容器"""
+
+    def test_invalidate_by_tag(self, cache):
+        started_at = time.monotonic()
+        cache.store("a", "r", 200, [], b"a", {product_tag(1), category_tag("books")}, started_at)
+        cache.store("b", "r", 200, [], b"b", {product_tag(2)}, started_at)
+
+        assert cache.invalidate_tags([category_tag("books")]) == 1
+        assert cache.lookup("a") is None
+        assert cache.lookup("b") is not None
+
+    def test_store_skipped_when_invalidated_during_render(self, cache):
+        started_at = time.monotonic()
+        cache.invalidate_tags([product_tag(1)])
+
+        assert cache.store("a", "r", 200, [], b"a", {product_tag(1)}, started_at) is None
+        assert cache.lookup("a") is None
+
+    def test_byte_limit_evicts_oldest(self):
+        cache = ResponseCache(max_entries=100, max_bytes=10, ttl_seconds=10, stale_seconds=30)
+        started_at = time.monotonic()
+        cache.store("a", "r", 200, [], b"123456", set(), started_at)
+        cache.store("b", "r", 200, [], b"123456", set(), started_at)
+
+        assert cache.lookup("a") is None
+        assert cache.lookup("b") is not None
+        assert cache.stats()["bytes"] == 6
+
+    def test_expired_after_stale_window(self):
+        cache = ResponseCache(max_entries=100, max_bytes=1024, ttl_seconds=0, stale_seconds=0)
+        cache.store("a", "r", 200, [], b"a", set(), time.monotonic())
+
+        assert cache.lookup("a") is None
+
+
+class TestResponseCacheMiddleware:
+    """測試回應快取中介軟體"""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, cache):
+        app = make_app()
+        middleware = ResponseCacheMiddleware(app, ROUTES, cache=cache)
+
+        status, headers, body = await call(middleware, query=b"page=1&page_size=10")
+        assert headers["x-cache"] == "MISS"
+        assert headers["etag"].startswith('W/"')
+        assert "max-age=10" in headers["cache-control"]
+
+        status, hit_headers, hit_body = await call(middleware, query=b"page_size=10&page=1")
+        assert status == 200
+        assert hit_headers["x-cache"] == "HIT"
+        assert hit_headers["etag"] == headers["etag"]
+        assert hit_body == body == BODY
+        assert app.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304(self, cache):
+        middleware = ResponseCacheMiddleware(make_app(), ROUTES, cache=cache)
+        _, headers, _ = await call(middleware)
+
+        status, _, body = await call(middleware, request_headers=[("if-none-match", headers["etag"])])
+
+        assert status == 304
+        assert body == b""
+
+    @pytest.mark.asyncio
+    async def test_uncached_route_and_set_cookie_pass_through(self, cache):
+        app = make_app(headers=[(b"set-cookie", b"session=1")])
+        middleware = ResponseCacheMiddleware(app, ROUTES, cache=cache)
+
+        await call(middleware)
+        _, headers, _ = await call(middleware)
+        await call(middleware, path="/api/v1/orders")
+
+        assert "x-cache" not in headers
+        assert app.calls == 3
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation(self, cache):
+        app = make_app(tags=(category_tag("books"), product_tag("p1")))
+        middleware = ResponseCacheMiddleware(app, ROUTES, cache=cache)
+        path = "/api/v1/products/category/books"
+
+        await call(middleware, path=path)
+        cache.invalidate_tags([product_tag("p1")])
+        _, headers, _ = await call(middleware, path=path)
+
+        assert headers["x-cache"] == "MISS"
+        assert app.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_served_and_revalidated_in_background(self):
+        cache = ResponseCache(max_entries=100, max_bytes=1024 * 1024, ttl_seconds=0, stale_seconds=30)
+        app = make_app()
+        middleware = ResponseCacheMiddleware(app, ROUTES, cache=cache)
+
+        await call(middleware)
+        _, headers, body = await call(middleware)
+        assert headers["x-cache"] == "STALE"
+        assert body == BODY
+
+        await asyncio.gather(*middleware._background)
+        assert app.calls == 2
+        assert metrics.get_counter("response_cache.revalidations", route="/api/v1/products") == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesced(self, cache):
+        release = asyncio.Event()
+        inner = make_app()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await inner(scope, receive, send)
+
+        middleware = ResponseCacheMiddleware(slow_app, ROUTES, cache=cache, flights=SingleFlight("test"))
+        tasks = [asyncio.create_task(call(middleware)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert inner.calls == 1
+        assert all(body == BODY for _, _, body in results)
+
+    @pytest.mark.asyncio
+    async def test_precompressed_variant_reused(self, cache, monkeypatch):
+        monkeypatch.setattr("app.utils.compression.codecs", [GzipCodec(6)])
+        middleware = ResponseCacheMiddleware(make_app(), ROUTES, cache=cache, compress_min_size=500)
+        request_headers = [("accept-encoding", "gzip")]
+
+        _, headers, body = await call(middleware, request_headers=request_headers)
+        _, _, again = await call(middleware, request_headers=request_headers)
+
+        assert headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in headers["vary"]
+        assert gzip.decompress(body) == BODY
+        assert again == body
+        assert metrics.get_counter("http.compression_bytes_in", encoding="gzip") == len(BODY)
+
+
+def test_invalidate_product_tags():
+    started_at = time.monotonic()
+    response_cache.store("list", "r", 200, [], b"x", {"products"}, started_at)
+    response_cache.store("detail", "r", 200, [], b"y", {product_tag("p9")}, started_at)
+    try:
+        assert invalidate_product("p9") == 1
+        assert response_cache.lookup("list") is not None
+        assert invalidate_product(lists=True) == 1
+    finally:
+        response_cache.clear()
@@ -0,0 +1,196 @@
+"""
+商品搜索引擎测试
+
+测试分词、BM25 排序、内存筛选、增量更新与后台压缩（不需要数据库）
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.search_engine import ProductSearchEngine, tokenize
+
+
+def make_product(product_id: str, name: str, **fields):
+    """构造商品文档"""
+    product = {
+        "_id": product_id,
+        "name": name,
+        "description": fields.pop("description", ""),
+        "tags": fields.pop("tags", []),
+        "category": fields.pop("category", "周邊"),
+        "price": fields.pop("price", 1000.0),
+        "status": fields.pop("status", "active"),
+    }
+    product.update(fields)
+    return product
+
+
+@pytest.fixture
+def engine():
+    """已就绪的空搜索引擎"""
+    search_engine = ProductSearchEngine()
+    search_engine.ready = True
+    return search_engine
+
+
+class TestTokenize:
+    """测试分词"""
+
+    def test_latin_and_cjk_bigrams(self):
+        assert tokenize("MacBook Pro 筆記型電腦") == [
+            "macbook", "pro", "筆記", "記型", "型電", "電腦"
+        ]
+
+    def test_single_cjk_character(self):
+        assert tokenize("藍") == ["藍"]
+
+    def test_index_terms_include_unigrams(self):
+        assert tokenize("藍牙", unigrams=True) == ["藍牙", "藍", "牙"]
+        assert tokenize("藍", unigrams=True) == ["藍"]
+
+    def test_fullwidth_is_normalized(self):
+        assert tokenize("ＡＢＣ") == ["abc"]
+
+
+class TestSearch:
+    """测试搜索与排序"""
+
+    def test_cjk_query_matches_substring(self, engine):
+        engine.upsert(make_product("1", "索尼 降噪藍牙耳機"))
+        engine.upsert(make_product("2", "羅技 無線滑鼠"))
+
+        ids, total = engine.search("藍牙耳機")
+
+        assert ids == ["1"]
+        assert total == 1
+
+    def test_single_cjk_character_query(self, engine):
+        engine.upsert(make_product("1", "索尼 降噪藍牙耳機"))
+        engine.upsert(make_product("2", "羅技 無線滑鼠"))
+
+        assert engine.search("藍")[0] == ["1"]
+        assert engine.search("鼠")[0] == ["2"]
+
+    def test_all_terms_required(self, engine):
+        engine.upsert(make_product("1", "藍牙耳機"))
+        engine.upsert(make_product("2", "藍牙喇叭"))
+
+        ids, _ = engine.search("藍牙 耳機")
+
+        assert ids == ["1"]
+
+    def test_name_match_ranks_above_description(self, engine):
+        engine.upsert(make_product("1", "行動電源", description="可為藍牙耳機充電"))
+        engine.upsert(make_product("2", "藍牙耳機"))
+
+        ids, _ = engine.search("藍牙耳機")
+
+        assert ids == ["2", "1"]
+
+    def test_idf_ignores_tombstones(self, engine, monkeypatch):
+        monkeypatch.setattr("app.services.search_engine.COMPACT_RATIO", 10)
+        engine.upsert(make_product("1", "alpha alpha beta"))
+        engine.upsert(make_product("2", "alpha beta beta"))
+        engine.upsert(make_product("3", "beta gamma"))
+        for i in range(3):
+            engine.upsert(make_product(f"old{i}", "alpha"))
+            engine.remove(f"old{i}")
+
+        # 有效文档中 alpha 比 beta 少见，alpha 出现较多的商品应排在前面
+        ids, _ = engine.search("alpha beta")
+
+        assert ids == ["1", "2"]
+
+    def test_filters(self, engine):
+        engine.upsert(make_product("1", "電競螢幕", category="螢幕", price=9000, tags=["華碩"]))
+        engine.upsert(make_product("2", "電競螢幕", category="螢幕", price=5000, tags=["宏碁"]))
+        engine.upsert(make_product("3", "電競滑鼠", category="周邊", price=1500))
+
+        assert engine.search("電競", category="螢幕")[1] == 2
+        assert sorted(engine.search("電競", max_price=6000)[0]) == ["2", "3"]
+        assert engine.search("電競", tags=["華碩"])[0] == ["1"]
+
+    def test_pagination(self, engine):
+        for i in range(5):
+            engine.upsert(make_product(str(i), f"機械鍵盤 {i}"))
+
+        first, total = engine.search("機械鍵盤", offset=0, limit=2)
+        second, _ = engine.search("機械鍵盤", offset=2, limit=2)
+
+        assert total == 5
+        assert len(first) == 2
+        assert not set(first) & set(second)
+
+
+class TestIncrementalUpdates:
+    """测试增量更新"""
+
+    def test_update_replaces_old_terms(self, engine):
+        engine.upsert(make_product("1", "藍牙耳機"))
+        engine.upsert(make_product("1", "無線滑鼠"))
+
+        assert engine.search("藍牙")[1] == 0
+        assert engine.search("滑鼠")[0] == ["1"]
+        assert engine.document_count == 1
+
+    def test_remove_and_inactive(self, engine):
+        engine.upsert(make_product("1", "智慧手錶"))
+        engine.upsert(make_product("2", "智慧手錶", status="inactive"))
+
+        assert engine.search("手錶")[0] == ["1"]
+
+        engine.remove("1")
+        assert engine.search("手錶")[1] == 0
+
+    def test_compaction_keeps_live_documents(self, engine):
+        for i in range(10):
+            engine.upsert(make_product(str(i), f"平板電腦 {i}"))
+        for i in range(5):
+            engine.remove(str(i))
+
+        ids, total = engine.search("平板電腦", limit=20)
+
+        assert total == 5
+        assert sorted(ids) == [str(i) for i in range(5, 10)]
+        assert engine.stats()["tombstones"] < 5
+
+    @pytest.mark.asyncio
+    async def test_background_compaction_merges_concurrent_updates(self, engine):
+        for i in range(10):
+            engine.upsert(make_product(str(i), f"平板電腦 {i}"))
+        engine.remove("0")
+        engine.remove("1")
+
+        task = asyncio.create_task(engine.compact())
+        await asyncio.sleep(0)
+        assert engine.stats()["compacting"] is True
+
+        # 压缩进行中的删除、更新与新增
+        engine.remove("2")
+        engine.upsert(make_product("3", "無線滑鼠"))
+        engine.upsert(make_product("10", "平板電腦 10"))
+        await task
+
+        ids, total = engine.search("平板電腦", limit=20)
+
+        assert total == 7
+        assert sorted(ids) == sorted(["4", "5", "6", "7", "8", "9", "10"])
+        assert engine.search("滑鼠")[0] == ["3"]
+        assert engine.document_count == 8
+        assert engine.stats()["tombstones"] == 2
+
+    @pytest.mark.asyncio
+    async def test_compaction_discarded_after_rebuild(self, engine):
+        for i in range(4):
+            engine.upsert(make_product(str(i), "平板電腦"))
+        engine.remove("0")
+
+        task = asyncio.create_task(engine.compact())
+        await asyncio.sleep(0)
+        engine._reset()
+        engine.upsert(make_product("2", "智慧手錶"))
+        await task
+
+        assert engine.search("手錶")[0] == ["2"]
+        assert engine.search("平板")[1] == 0
@@ -0,0 +1,112 @@
+"""
+可信序列化測試
+
+測試 construct_model 建立的模型與驗證後的模型序列化結果一致（不需要資料庫）
+"""
+
+import json
+from datetime import datetime
+
+from app.models.common import paginated_response
+from app.models.order import OrderItem, OrderResponse, OrderStatus, ShippingAddress
+from app.models.product import ProductResponse, ProductStatus
+from app.utils.serialization import TrustedResponse, construct_model
+
+
+def make_order_document() -> dict:
+    """構造與資料庫相同格式的訂單文檔（id 已轉換）"""
+    created_at = datetime(2025, 11, 21, 10, 0, 0)
+    return {
+        "id": "507f1f77bcf86cd799439011",
+        "order_number": "ORD202511211000001234567",
+        "user_id": "507f1f77bcf86cd799439012",
+        "items": [{
+            "product_id": "507f1f77bcf86cd799439013",
+            "product_name": "iPhone 15 Pro Max",
+            "price": 39900,
+            "quantity": 1,
+            "subtotal": 39900.0,
+        }],
+        "subtotal": 39900.0,
+        "shipping_fee": 0.0,
+        "discount": 0.0,
+        "total_amount": 39900.0,
+        "shipping_address": {
+            "recipient": "張三",
+            "phone": "0912345678",
+            "address_line1": "台北市中正區忠孝東路一段1號",
+            "city": "台北市",
+            "postal_code": "100",
+        },
+        "status": "paid",
+        "payment_status": "paid",
+        "payment_method": "credit_card",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "paid_at": created_at,
+        "status_history": [{"status": "pending", "changed_at": created_at, "note": "訂單建立"}],
+        "is_deleted": False,
+    }
+
+
+class TestConstructModel:
+    """測試不驗證地建立模型"""
+
+    def test_nested_models_and_enums_are_converted(self):
+        order = construct_model(OrderResponse, make_order_document())
+
+        assert isinstance(order.items[0], OrderItem)
+        assert isinstance(order.shipping_address, ShippingAddress)
+        assert order.status is OrderStatus.PAID
+        assert order.status_history[0].status is OrderStatus.PENDING
+        assert isinstance(order.items[0].price, float)
+
+    def test_output_matches_validated_model(self):
+        document = make_order_document()
+
+        trusted = construct_model(OrderResponse, document).model_dump(mode="json")
+        validated = OrderResponse(**document).model_dump(mode="json")
+
+        assert trusted == validated
+
+    def test_document_is_not_modified_and_extra_fields_ignored(self):
+        document = make_order_document()
+
+        order = construct_model(OrderResponse, document)
+
+        assert document["status"] == "paid"
+        assert isinstance(document["items"][0], dict)
+        assert "is_deleted" not in order.model_dump()
+
+    def test_defaults_applied(self):
+        now = datetime(2025, 11, 11, 10, 0, 0)
+        product = construct_model(ProductResponse, {
+            "id": "507f191e810c19729de860ea",
+            "name": "MacBook Pro",
+            "description": "M3",
+            "price": 59900.0,
+            "stock": 15,
+            "category": "筆記型電腦",
+            "status": "active",
+            "created_at": now,
+            "updated_at": now,
+        })
+
+        assert product.status is ProductStatus.ACTIVE
+        assert product.tags == []
+        assert product.views == 0
+
+
+class TestTrustedResponse:
+    """測試直接序列化的回應"""
+
+    def test_body_matches_model_dump(self):
+        order = construct_model(OrderResponse, make_order_document())
+        response = TrustedResponse(paginated_response(items=[order], page=1, per_page=20, total=1))
+
+        body = json.loads(response.body)
+
+        assert response.media_type == "application/json"
+        assert body["data"]["items"] == [order.model_dump(mode="json")]
+        assert body["data"]["pagination"]["total"] == 1
+
@@ -0,0 +1,156 @@
+"""
+單飛請求合併測試
+
+測試並行合併、例外共用、取消安全與逾時
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.metrics import metrics
+from app.utils.single_flight import SingleFlight, flight_key
+
+
+class Loader:
+    """可控制完成時間的載入函式，記錄被呼叫的次數"""
+
+    def __init__(self, result="value", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestFlightKey:
+    """測試鍵的正規化"""
+
+    def test_kwargs_and_dict_order_ignored(self):
+        assert flight_key("m", {"b": 1, "a": [1, 2]}, page=1, size=2) == flight_key("m", {"a": [1, 2], "b": 1}, size=2, page=1)
+
+    def test_method_distinguishes(self):
+        assert flight_key("a", 1) != flight_key("b", 1)
+
+
+class TestSingleFlight:
+    """測試單飛群組"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_coalesced(self):
+        flights = SingleFlight("test")
+        loader = Loader()
+
+        tasks = [asyncio.create_task(flights.do("k", loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert results == ["value"] * 5
+        assert loader.calls == 1
+        assert flights.coalesced == 4
+        assert metrics.get_counter("single_flight.coalesced", group="test") == 4
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_not_coalesced(self):
+        flights = SingleFlight("test")
+        loader = Loader()
+        loader.release.set()
+
+        await asyncio.gather(flights.do("a", loader), flights.do("b", loader))
+
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_error_shared_and_key_released(self):
+        flights = SingleFlight("test")
+        loader = Loader(error=ValueError("boom"))
+
+        tasks = [asyncio.create_task(flights.do("k", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert loader.calls == 1
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        flights = SingleFlight("test")
+        loader = Loader()
+
+        first = asyncio.create_task(flights.do("k", loader))
+        second = asyncio.create_task(flights.do("k", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+
+        assert await second == "value"
+        assert first.cancelled()
+        assert not loader.cancelled
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancel_cancels_call(self):
+        flights = SingleFlight("test")
+        loader = Loader()
+
+        task = asyncio.create_task(flights.do("k", loader))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+        assert loader.cancelled
+        assert flights.in_flight() == 0
+
+        # 之後的呼叫重新開始
+        loader.release.set()
+        assert await flights.do("k", loader) == "value"
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        flights = SingleFlight("test", timeout_seconds=10)
+        loader = Loader()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await flights.do("k", loader, timeout=0.01)
+
+        assert loader.cancelled
+        assert flights.in_flight() == 0
+        assert metrics.get_counter("single_flight.timeouts", group="test") == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_runs_every_call(self):
+        flights = SingleFlight("test")
+        flights.enabled = False
+        loader = Loader()
+        loader.release.set()
+
+        await asyncio.gather(flights.do("k", loader), flights.do("k", loader))
+
+        assert loader.calls == 2
+        assert flights.coalesced == 0
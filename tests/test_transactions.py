@@ -0,0 +1,188 @@
+"""
+事務執行引擎測試
+
+以假的客戶端與會話測試暫時性錯誤重試、提交重試、
+中止失敗與任務取消的處理（不需要資料庫）
+"""
+
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.utils.transactions import (
+    TRANSIENT_TRANSACTION_ERROR,
+    UNKNOWN_COMMIT_RESULT,
+    run_in_transaction,
+)
+
+
+class FakeSession:
+    """記錄事務操作的會話，commit_errors 依序在每次提交時拋出"""
+
+    def __init__(self, commit_errors=(), abort_error=None):
+        self.in_transaction = False
+        self.commit_errors = list(commit_errors)
+        self.abort_error = abort_error
+        self.started = 0
+        self.commits = 0
+        self.aborts = 0
+        self.ended = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.in_transaction = False
+        self.ended = True
+
+    def start_transaction(self):
+        self.started += 1
+        self.in_transaction = True
+
+    async def commit_transaction(self):
+        self.commits += 1
+        if self.commit_errors:
+            error = self.commit_errors.pop(0)
+            if error is not None:
+                if not error.has_error_label(UNKNOWN_COMMIT_RESULT):
+                    self.in_transaction = False
+                raise error
+        self.in_transaction = False
+
+    async def abort_transaction(self):
+        self.aborts += 1
+        self.in_transaction = False
+        if self.abort_error is not None:
+            raise self.abort_error
+
+
+class FakeClient:
+    """每次 start_session 都返回同一個假會話"""
+
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    def start_session(self):
+        return self.session
+
+
+def labeled_error(label: str, code=None) -> PyMongoError:
+    """帶錯誤標籤的資料庫錯誤"""
+    if code is not None:
+        error = OperationFailure("commit failed", code=code)
+    else:
+        error = PyMongoError("transient failure")
+    error._add_error_label(label)
+    return error
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """關閉退避等待，讓重試立即發生"""
+    monkeypatch.setattr(settings, "TRANSACTION_BACKOFF_BASE_MS", 0)
+    monkeypatch.setattr(settings, "TRANSACTION_MAX_ATTEMPTS", 3)
+
+
+class TestRunInTransaction:
+    """測試事務重試語義"""
+
+    @pytest.mark.asyncio
+    async def test_commit_on_success(self):
+        session = FakeSession()
+
+        result = await run_in_transaction(FakeClient(session), lambda s: asyncio.sleep(0, "ok"))
+
+        assert result == "ok"
+        assert session.started == 1
+        assert session.commits == 1
+        assert session.ended
+
+    @pytest.mark.asyncio
+    async def test_transient_error_retries_whole_transaction(self):
+        session = FakeSession()
+        calls = []
+
+        async def callback(s):
+            calls.append(s)
+            if len(calls) == 1:
+                raise labeled_error(TRANSIENT_TRANSACTION_ERROR)
+            return "ok"
+
+        assert await run_in_transaction(FakeClient(session), callback) == "ok"
+        assert len(calls) == 2
+        assert session.started == 2
+        assert session.aborts == 1
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    async def test_transient_error_gives_up_after_max_attempts(self):
+        session = FakeSession()
+
+        async def callback(s):
+            raise labeled_error(TRANSIENT_TRANSACTION_ERROR)
+
+        with pytest.raises(PyMongoError):
+            await run_in_transaction(FakeClient(session), callback)
+        assert session.started == 3
+
+    @pytest.mark.asyncio
+    async def test_unknown_commit_result_retries_commit_only(self):
+        session = FakeSession(commit_errors=[labeled_error(UNKNOWN_COMMIT_RESULT)])
+        calls = []
+
+        async def callback(s):
+            calls.append(s)
+            return "ok"
+
+        assert await run_in_transaction(FakeClient(session), callback) == "ok"
+        assert len(calls) == 1
+        assert session.commits == 2
+
+    @pytest.mark.asyncio
+    async def test_max_time_expired_commit_not_retried(self):
+        session = FakeSession(commit_errors=[labeled_error(UNKNOWN_COMMIT_RESULT, code=50)])
+
+        with pytest.raises(OperationFailure):
+            await run_in_transaction(FakeClient(session), lambda s: asyncio.sleep(0, "ok"))
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    async def test_transient_commit_error_retries_whole_transaction(self):
+        session = FakeSession(commit_errors=[labeled_error(TRANSIENT_TRANSACTION_ERROR)])
+        calls = []
+
+        async def callback(s):
+            calls.append(s)
+            return "ok"
+
+        assert await run_in_transaction(FakeClient(session), callback) == "ok"
+        assert len(calls) == 2
+        assert session.commits == 2
+
+    @pytest.mark.asyncio
+    async def test_abort_failure_keeps_original_error(self):
+        session = FakeSession(abort_error=PyMongoError("abort failed"))
+
+        async def callback(s):
+            raise ValueError("business rule")
+
+        with pytest.raises(ValueError, match="business rule"):
+            await run_in_transaction(FakeClient(session), callback)
+        assert session.aborts == 1
+
+    @pytest.mark.asyncio
+    async def test_cancellation_not_retried(self):
+        session = FakeSession()
+        calls = []
+
+        async def callback(s):
+            calls.append(s)
+            raise asyncio.CancelledError()
+
+        with pytest.raises(asyncio.CancelledError):
+            await run_in_transaction(FakeClient(session), callback)
+        assert len(calls) == 1
+        assert session.aborts == 0
+        assert session.ended
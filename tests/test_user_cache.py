@@ -0,0 +1,88 @@
+"""
+已認證用戶快取測試
+
+測試命中、依用戶 ID 失效、TTL 過期與副本隔離（不需要資料庫）
+"""
+
+import time
+
+import pytest
+
+from app.models.user import UserInDB, UserRole
+from app.utils.user_cache import UserCache
+
+
+def make_user(user_id: str = "64b7f0c2a1b2c3d4e5f60718", **fields) -> UserInDB:
+    """構造用戶"""
+    return UserInDB(
+        id=user_id,
+        email=fields.pop("email", "cache@example.com"),
+        full_name=fields.pop("full_name", "Cache User"),
+        hashed_password="hashed",
+        **fields
+    )
+
+
+@pytest.fixture
+def cache():
+    """空的用戶快取"""
+    return UserCache(max_entries=10, ttl_seconds=30.0)
+
+
+class TestUserCache:
+    """測試用戶快取"""
+
+    def test_hit_after_set(self, cache):
+        user = make_user()
+        cache.set(user)
+
+        cached = cache.get(user.email)
+        assert cached == user
+        assert cached is not user
+
+    def test_miss(self, cache):
+        assert cache.get("missing@example.com") is None
+
+    def test_invalidate_by_user_id(self, cache):
+        user = make_user()
+        cache.set(user)
+
+        cache.invalidate_user(user.id)
+        assert cache.get(user.email) is None
+
+    def test_role_change_visible_after_invalidation(self, cache):
+        user = make_user()
+        cache.set(user)
+        cache.invalidate_user(user.id)
+
+        cache.set(make_user(role=UserRole.ADMIN))
+        assert cache.get(user.email).role == UserRole.ADMIN
+
+    def test_mutating_result_does_not_change_cache(self, cache):
+        user = make_user()
+        cache.set(user)
+
+        cache.get(user.email).is_active = False
+        assert cache.get(user.email).is_active is True
+
+    def test_expired_entry_is_miss(self):
+        cache = UserCache(max_entries=10, ttl_seconds=0.01)
+        user = make_user()
+        cache.set(user)
+
+        time.sleep(0.02)
+        assert cache.get(user.email) is None
+
+    def test_disabled_cache(self, cache):
+        cache.enabled = False
+        user = make_user()
+        cache.set(user)
+        assert cache.get(user.email) is None
+
+    def test_bounded_entries(self, cache):
+        for i in range(25):
+            cache.set(make_user(user_id=f"{i:024x}", email=f"user{i}@example.com"))
+
+        assert cache.stats()["entries"] == 10
+        assert cache.get("user0@example.com") is None
+        assert cache.get("user24@example.com") is not None
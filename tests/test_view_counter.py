@@ -0,0 +1,118 @@
+"""
+瀏覽計數器測試
+
+測試計數合併、寫入失敗後重新排隊、寫入中的計數、閾值刷新與關閉時刷新
+（以假的集合模擬，不需要資料庫）
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+
+from app.services.view_counter import ViewCounter
+
+PRODUCT_A = str(ObjectId())
+PRODUCT_B = str(ObjectId())
+
+
+class FakeProducts:
+    """記錄 bulk_write 的商品集合，可設定失敗或暫停"""
+
+    def __init__(self):
+        self.calls = []
+        self.error = None
+        self.release = None
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        self.calls.append({str(op._filter["_id"]): op._doc["$inc"]["views"] for op in operations})
+
+
+@pytest_asyncio.fixture
+async def counter_and_products():
+    """已啟動（長間隔，不會自動刷新）的計數器"""
+    products = FakeProducts()
+    flushed = []
+    counter = ViewCounter(flush_interval=3600, flush_threshold=1000, on_flush=lambda ids: flushed.extend(ids))
+    counter.start(products)
+    counter.flushed = flushed
+    yield counter, products
+    products.error = None
+    await counter.stop()
+
+
+class TestViewCounter:
+    """測試寫後合併的瀏覽計數"""
+
+    @pytest.mark.asyncio
+    async def test_flush_merges_increments(self, counter_and_products):
+        counter, products = counter_and_products
+        counter.increment(PRODUCT_A)
+        counter.increment(PRODUCT_A)
+        counter.increment(PRODUCT_B, 3)
+
+        assert await counter.flush() == 2
+        assert products.calls == [{PRODUCT_A: 2, PRODUCT_B: 3}]
+        assert sorted(counter.flushed) == sorted([PRODUCT_A, PRODUCT_B])
+        assert counter.pending(PRODUCT_A) == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_requeues_counts(self, counter_and_products):
+        counter, products = counter_and_products
+        counter.increment(PRODUCT_A, 2)
+        products.error = RuntimeError("write failed")
+
+        assert await counter.flush() == 0
+        assert counter.pending(PRODUCT_A) == 2
+        assert counter.flushed == []
+
+        counter.increment(PRODUCT_A)
+        products.error = None
+        await counter.flush()
+
+        assert products.calls == [{PRODUCT_A: 3}]
+        assert counter.stats()["pending_views"] == 0
+
+    @pytest.mark.asyncio
+    async def test_pending_includes_inflight(self, counter_and_products):
+        counter, products = counter_and_products
+        products.release = asyncio.Event()
+        counter.increment(PRODUCT_A, 2)
+
+        flush = asyncio.create_task(counter.flush())
+        await asyncio.sleep(0)
+        counter.increment(PRODUCT_A)
+
+        assert counter.pending(PRODUCT_A) == 3
+        products.release.set()
+        await flush
+        assert counter.pending(PRODUCT_A) == 1
+
+    @pytest.mark.asyncio
+    async def test_threshold_triggers_flush(self):
+        products = FakeProducts()
+        counter = ViewCounter(flush_interval=3600, flush_threshold=3)
+        counter.start(products)
+
+        counter.increment(PRODUCT_A, 3)
+        await asyncio.sleep(0)
+        await counter.stop()
+
+        assert products.calls == [{PRODUCT_A: 3}]
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_remaining(self):
+        products = FakeProducts()
+        counter = ViewCounter(flush_interval=3600, flush_threshold=1000)
+        counter.start(products)
+        counter.increment(PRODUCT_B)
+
+        await counter.stop()
+
+        assert products.calls == [{PRODUCT_B: 1}]
+        assert not counter.running